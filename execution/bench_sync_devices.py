@@ -0,0 +1,511 @@
+"""Multi-device sync simulator — randomized workloads, then convergence.
+
+Spins up N simulated devices, each its own SQLite database, applies a
+randomized field workload to every device through Repository
+(receiving, truck consumption, labor, job chat) and runs SyncManager
+rounds between them under a chosen transport and topology.  Reports
+bytes written to the shared folder (or server store), export and import
+time, peak memory and how long the devices take to converge once the
+workload stops, then checks every database ends up identical.
+
+    python execution/bench_sync_devices.py                 # 4 devices
+    python execution/bench_sync_devices.py --devices 8 --rounds 20 \\
+        --transport server --topology intermittent --trace-memory
+
+Transports: full (whole-database exports), delta, segments (the
+lock-free per-device logs) and server (an in-process wired-part-syncd).
+Topologies: mesh (every device syncs every round), hub (device 0 is the
+office and syncs after each truck) and intermittent (each device is
+online for a round with probability --online).
+Rows of tables without an updated_at column (job_parts: repeat
+consumption on a job) have no timestamp to order their versions, so two
+transports can end a run diverged there.  The full transport only
+inserts such rows and never carries a later update.  The delta
+transport relays every peer's changes and applies them unconditionally,
+so an older copy relayed through a third device can land after the
+newer one and is not resent until the row changes again (e.g. seed 3
+with the defaults).  Segments and server only carry each device's own
+changes, in order, and converge.
+
+Every device starts from a copy of one seeded database and works its
+own slice of the parts catalog, and each burst of work allocates ids
+from a fresh block above every id handed out so far (AUTOINCREMENT
+never goes below a peer's imported ids, so fixed per-device ranges do
+not survive the first sync).  The simulated edits therefore never
+collide on a primary key or race on a stock counter — a difference at
+the end is a sync bug, not a conflict.
+"""
+
+import argparse
+import hashlib
+import random
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from unittest.mock import patch
+
+try:
+    import resource
+except ImportError:  # Windows: peak RSS is not available
+    resource = None
+
+# Add src to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from wired_part.config import Config
+from wired_part.database.connection import DatabaseConnection
+from wired_part.database.models import (
+    Job,
+    Part,
+    PurchaseOrder,
+    PurchaseOrderItem,
+    Supplier,
+    Truck,
+    User,
+)
+from wired_part.database.repository import Repository
+from wired_part.database.schema import initialize_database
+from wired_part.sync.sync_manager import (
+    SYNC_TABLES,
+    TABLES_WITH_UPDATED_AT,
+    SyncManager,
+)
+
+TRANSPORTS = ("full", "delta", "segments", "server")
+TOPOLOGIES = ("mesh", "hub", "intermittent")
+OPERATIONS = ("receive", "consume", "labor", "chat")
+
+# Ids one burst of work may allocate before running into the next block
+ID_BLOCK = 1_000_000
+
+
+def _seed_template(path: Path, devices: int, parts_per_device: int,
+                   jobs: int):
+    """The database every device starts from."""
+    db = DatabaseConnection(path)
+    initialize_database(db)
+    repo = Repository(db, device_id="template")
+    repo.create_supplier(Supplier(name="Bench Supply"))
+    for n in range(devices):
+        user_id = repo.create_user(User(
+            username=f"tech{n}", display_name=f"Tech {n}", pin_hash="x",
+        ))
+        repo.create_truck(Truck(
+            truck_number=f"T-{n:03d}", name=f"Truck {n}",
+            assigned_user_id=user_id,
+        ))
+        for p in range(parts_per_device):
+            repo.create_part(Part(
+                part_number=f"BENCH-{n:03d}-{p:04d}",
+                name=f"Bench part {n}.{p}", quantity=100, unit_cost=2.5,
+            ))
+    for j in range(jobs):
+        repo.create_job(Job(job_number=f"J-{j:04d}", name=f"Bench job {j}"))
+    # Seed rows predate the run, so edits in its first second win LWW
+    with db.get_connection() as conn:
+        for table in TABLES_WITH_UPDATED_AT:
+            columns = {
+                row[1] for row in conn.execute(f"PRAGMA table_info({table})")
+            }
+            if "updated_at" in columns:
+                conn.execute(
+                    f"UPDATE {table} "
+                    f"SET updated_at = '2026-01-01 00:00:00'"
+                )
+
+
+def _lease_id_block(db: DatabaseConnection, block: int):
+    """Start every AUTOINCREMENT table at id block *block*."""
+    floor = block * ID_BLOCK
+    with db.get_connection() as conn:
+        tables = [
+            row[0] for row in conn.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'table' "
+                "AND sql LIKE '%AUTOINCREMENT%'"
+            ).fetchall()
+        ]
+        for table in tables:
+            updated = conn.execute(
+                "UPDATE sqlite_sequence SET seq = MAX(seq, ?) WHERE name = ?",
+                (floor, table),
+            ).rowcount
+            if not updated:
+                conn.execute(
+                    "INSERT INTO sqlite_sequence (name, seq) VALUES (?, ?)",
+                    (table, floor),
+                )
+
+
+class Device:
+    """One simulated install: a database, a manager and a workload."""
+
+    def __init__(self, index: int, db_path: Path, sync_folder: Path | None,
+                 seed: int):
+        self.index = index
+        self.device_id = f"bench-{index:03d}"
+        self.db = DatabaseConnection(db_path)
+        self.repo = Repository(self.db, device_id=self.device_id)
+        self.rng = random.Random(seed * 1000 + index)
+        with patch.object(Config, "SYNC_ENABLED", sync_folder is not None), \
+             patch.object(Config, "SYNC_FOLDER_PATH", str(sync_folder or "")), \
+             patch.object(Config, "LAST_SYNC_TIMESTAMP", ""), \
+             patch.object(Config, "DEVICE_ID", self.device_id), \
+             patch.object(Config, "get_device_id",
+                          return_value=self.device_id):
+            self.mgr = SyncManager(self.db)
+
+        rows = self.db.execute(
+            "SELECT u.id AS user_id, t.id AS truck_id FROM users u "
+            "JOIN trucks t ON t.assigned_user_id = u.id "
+            "WHERE u.username = ?", (f"tech{index}",),
+        )
+        self.user_id, self.truck_id = rows[0]["user_id"], rows[0]["truck_id"]
+        self.parts = [r["id"] for r in self.db.execute(
+            "SELECT id FROM parts WHERE part_number LIKE ? ORDER BY id",
+            (f"BENCH-{index:03d}-%",),
+        )]
+        self.jobs = [r["id"] for r in self.db.execute(
+            "SELECT id FROM jobs ORDER BY id"
+        )]
+        self.supplier_id = self.db.execute(
+            "SELECT MIN(id) AS id FROM suppliers"
+        )[0]["id"]
+        self.orders = 0
+        self.ops = dict.fromkeys(OPERATIONS, 0)
+
+    # ── Workload ─────────────────────────────────────────────────
+
+    def work(self, count: int, block: int):
+        _lease_id_block(self.db, block)
+        for _ in range(count):
+            op = self.rng.choice(OPERATIONS)
+            getattr(self, f"_{op}")()
+            self.ops[op] += 1
+
+    def _receive(self):
+        """Order a few parts and receive them onto this device's truck."""
+        self.orders += 1
+        order_id = self.repo.create_purchase_order(PurchaseOrder(
+            order_number=f"PO-{self.device_id}-{self.orders:05d}",
+            supplier_id=self.supplier_id, created_by=self.user_id,
+        ))
+        for part_id in self.rng.sample(
+            self.parts, min(len(self.parts), self.rng.randint(1, 3)),
+        ):
+            self.repo.add_order_item(PurchaseOrderItem(
+                order_id=order_id, part_id=part_id,
+                quantity_ordered=self.rng.randint(5, 20), unit_cost=2.5,
+            ))
+        self.repo.submit_purchase_order(order_id)
+        receipts = [
+            {"order_item_id": item.id,
+             "quantity_received": item.quantity_ordered,
+             "allocate_to": "warehouse"}
+            for item in self.repo.get_order_items(order_id)
+        ]
+        self.repo.receive_order_items(order_id, receipts, self.user_id)
+
+    def _consume(self):
+        """Restock the truck if needed and use parts on a job."""
+        part_id = self.rng.choice(self.parts)
+        quantity = self.rng.randint(1, 4)
+        self.repo.add_to_truck_inventory(self.truck_id, part_id, quantity)
+        self.repo.consume_from_truck(
+            self.rng.choice(self.jobs), self.truck_id, part_id, quantity,
+            user_id=self.user_id,
+        )
+
+    def _labor(self):
+        entry_id = self.repo.clock_in(self.user_id, self.rng.choice(self.jobs))
+        self.repo.clock_out(entry_id, description="bench")
+
+    def _chat(self):
+        self.repo.send_chat_message(
+            self.rng.choice(self.jobs), self.user_id,
+            f"{self.device_id} note {self.rng.randrange(1 << 30):08x}",
+        )
+
+    # ── Sync ─────────────────────────────────────────────────────
+
+    def sync(self, transport: str, url: str) -> tuple[float, float]:
+        """One sync, split into (import seconds, export seconds)."""
+        mgr = self.mgr
+        if transport == "server":
+            from wired_part.sync.transport import SyncServerClient
+
+            with SyncServerClient(url) as client:
+                status = client.status()
+                start = time.perf_counter()
+                mgr.import_from_server(client)
+                imported = time.perf_counter()
+                mgr.push_to_server(client, status)
+                client.put_acks(mgr.device_id, mgr.get_peer_watermarks())
+                mgr.collect_tombstones(
+                    status["acks"],
+                    set(status["devices"]) | set(status["acks"]),
+                )
+            return imported - start, time.perf_counter() - imported
+
+        start = time.perf_counter()
+        if transport == "full":
+            mgr.export_to_sync_folder()
+            exported = time.perf_counter()
+            mgr.import_from_sync_folder()
+            return time.perf_counter() - exported, exported - start
+        if transport == "delta":
+            mgr.import_deltas_from_sync_folder()
+            imported = time.perf_counter()
+            mgr.export_deltas_to_sync_folder()
+        else:
+            mgr.import_segments()
+            imported = time.perf_counter()
+            mgr.publish_segment()
+            mgr.collect_tombstones()
+        return imported - start, time.perf_counter() - imported
+
+    def fingerprint(self) -> dict:
+        """{table: (rows, hash)} of every synced table's contents."""
+        result = {}
+        with self.db.get_connection() as conn:
+            for table in SYNC_TABLES:
+                try:
+                    rows = conn.execute(f"SELECT * FROM {table}").fetchall()
+                except Exception:
+                    continue  # Table missing on this schema
+                digest = hashlib.blake2b(digest_size=16)
+                for row in sorted(repr(tuple(r)) for r in rows):
+                    digest.update(row.encode("utf-8"))
+                result[table] = (len(rows), digest.hexdigest())
+        return result
+
+
+class _WriteMeter:
+    """Counts bytes of files created or rewritten under a folder."""
+
+    def __init__(self, root: Path):
+        self.root = root
+        self.total = 0
+        self._seen = self._scan()
+
+    def _scan(self) -> dict:
+        seen = {}
+        for path in self.root.rglob("*"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue  # Pruned meanwhile
+            if path.is_file():
+                seen[path] = (stat.st_size, stat.st_mtime_ns)
+        return seen
+
+    def update(self) -> int:
+        now = self._scan()
+        written = sum(
+            size for path, (size, mtime) in now.items()
+            if self._seen.get(path) != (size, mtime)
+        )
+        self._seen = now
+        self.total += written
+        return written
+
+
+def _schedule(topology: str, devices: list, rng, online: float) -> list:
+    if topology == "hub":
+        office, trucks = devices[0], devices[1:]
+        order = []
+        for truck in trucks:
+            order += [truck, office]
+        return order or [office]
+    if topology == "intermittent":
+        return [d for d in devices if rng.random() < online]
+    return list(devices)
+
+
+def _diverged(devices: list) -> list[str]:
+    """Tables whose contents differ between any two devices."""
+    prints = [d.fingerprint() for d in devices]
+    return sorted(
+        table for table in prints[0]
+        if any(p.get(table) != prints[0][table] for p in prints[1:])
+    )
+
+
+def _peak_rss_mb() -> float | None:
+    """Peak resident memory of this process, or None without ``resource``."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS, kilobytes elsewhere
+    return peak / (1 << 20) if sys.platform == "darwin" else peak / 1024
+
+
+def run_benchmark(devices: int = 4, rounds: int = 10, ops: int = 20,
+                  transport: str = "segments", topology: str = "mesh",
+                  online: float = 0.5, parts_per_device: int = 50,
+                  jobs: int = 10, seed: int = 1,
+                  trace_memory: bool = False, max_settle: int = 10,
+                  workdir: Path | None = None) -> dict:
+    """Run the simulation and return its measurements."""
+    with tempfile.TemporaryDirectory(dir=workdir) as tmp, \
+            patch.object(Config, "update_last_sync"):
+        tmp = Path(tmp)
+        template = tmp / "template.db"
+        _seed_template(template, devices, parts_per_device, jobs)
+
+        shared = tmp / ("syncd" if transport == "server" else "sync")
+        shared.mkdir()
+        server, url = None, ""
+        if transport == "server":
+            from wired_part.sync.syncd import SyncServer
+
+            server = SyncServer(shared, port=0).start()
+            url = server.url
+        try:
+            fleet = []
+            for n in range(devices):
+                path = tmp / f"device-{n:03d}.db"
+                shutil.copyfile(template, path)
+                fleet.append(Device(
+                    n, path, None if server else shared, seed,
+                ))
+
+            meter = _WriteMeter(shared)
+            rng = random.Random(seed)
+            stats = {"import_s": 0.0, "export_s": 0.0, "syncs": 0,
+                     "peak_traced": 0}
+            if trace_memory:
+                tracemalloc.start()
+
+            def sync_round(order):
+                for device in order:
+                    if trace_memory:
+                        tracemalloc.reset_peak()
+                    imp, exp = device.sync(transport, url)
+                    stats["import_s"] += imp
+                    stats["export_s"] += exp
+                    stats["syncs"] += 1
+                    if trace_memory:
+                        stats["peak_traced"] = max(
+                            stats["peak_traced"],
+                            tracemalloc.get_traced_memory()[1],
+                        )
+
+            print(f"{devices} devices, {transport} transport, "
+                  f"{topology} topology, {rounds} rounds x {ops} ops:")
+            work_s = 0.0
+            start = time.perf_counter()
+            block = 0
+            for _ in range(rounds):
+                tick = time.perf_counter()
+                for device in fleet:
+                    block += 1
+                    device.work(ops, block)
+                work_s += time.perf_counter() - tick
+                sync_round(_schedule(topology, fleet, rng, online))
+            meter.update()
+            workload_bytes = meter.total
+
+            # Everyone online until the fleet agrees
+            settle_start = time.perf_counter()
+            settle_rounds, diverged = 0, _diverged(fleet)
+            while diverged and settle_rounds < max_settle:
+                sync_round(_schedule(
+                    "mesh" if topology == "intermittent" else topology,
+                    fleet, rng, online,
+                ))
+                settle_rounds += 1
+                diverged = _diverged(fleet)
+            settle_s = time.perf_counter() - settle_start
+            meter.update()
+            total_s = time.perf_counter() - start
+            if trace_memory:
+                tracemalloc.stop()
+        finally:
+            if server is not None:
+                server.stop()
+
+    totals = dict.fromkeys(OPERATIONS, 0)
+    for device in fleet:
+        for op, count in device.ops.items():
+            totals[op] += count
+    syncs = max(stats["syncs"], 1)
+    results = {
+        "operations": totals,
+        "syncs": stats["syncs"],
+        "workload_s": work_s,
+        "import_s": stats["import_s"],
+        "export_s": stats["export_s"],
+        "bytes_written": meter.total,
+        "bytes_during_workload": workload_bytes,
+        "peak_rss_mb": _peak_rss_mb(),
+        "peak_traced_mb": stats["peak_traced"] / (1 << 20),
+        "settle_rounds": settle_rounds,
+        "settle_s": settle_s,
+        "total_s": total_s,
+        "converged": not diverged,
+        "diverged_tables": diverged,
+    }
+
+    ops_text = ", ".join(f"{op} {n:,}" for op, n in totals.items())
+    print(f"  operations                   {ops_text}")
+    print(f"  local work                   {work_s:8.2f}s")
+    print(f"  syncs                        {stats['syncs']:8,}")
+    print(f"  import                       {stats['import_s']:8.2f}s  "
+          f"({stats['import_s'] / syncs * 1000:.1f} ms/sync)")
+    print(f"  export                       {stats['export_s']:8.2f}s  "
+          f"({stats['export_s'] / syncs * 1000:.1f} ms/sync)")
+    print(f"  bytes written                {meter.total:>12,}  "
+          f"({workload_bytes:,} during the workload)")
+    if results["peak_rss_mb"] is not None:
+        print(f"  peak RSS                     "
+              f"{results['peak_rss_mb']:8.1f} MB")
+    else:
+        print("  peak RSS                          n/a  "
+              "(use --trace-memory on this platform)")
+    if trace_memory:
+        print(f"  peak traced during a sync    "
+              f"{results['peak_traced_mb']:8.1f} MB")
+    print(f"  convergence                  {settle_rounds} round(s), "
+          f"{settle_s:.2f}s after the workload stopped")
+    if diverged:
+        print(f"  DIVERGED after {max_settle} rounds: {', '.join(diverged)}")
+    else:
+        print(f"  all {devices} databases identical")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--devices", type=int, default=4)
+    parser.add_argument("--rounds", type=int, default=10,
+                        help="workload rounds (each followed by syncs)")
+    parser.add_argument("--ops", type=int, default=20,
+                        help="operations per device per round")
+    parser.add_argument("--transport", choices=TRANSPORTS,
+                        default="segments")
+    parser.add_argument("--topology", choices=TOPOLOGIES, default="mesh")
+    parser.add_argument("--online", type=float, default=0.5,
+                        help="intermittent: chance a device syncs a round")
+    parser.add_argument("--parts", type=int, default=50,
+                        help="catalog parts per device")
+    parser.add_argument("--jobs", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--max-settle", type=int, default=10,
+                        help="quiet rounds allowed before giving up")
+    parser.add_argument("--trace-memory", action="store_true",
+                        help="track peak Python allocations per sync "
+                             "(slows every phase down)")
+    args = parser.parse_args()
+    results = run_benchmark(
+        args.devices, args.rounds, args.ops, args.transport,
+        args.topology, args.online, args.parts, args.jobs, args.seed,
+        args.trace_memory, args.max_settle,
+    )
+    sys.exit(0 if results["converged"] else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""Sync merge benchmark — times a bulk import of synthetic parts rows.
+
+Builds a source database with N parts, then merges its export into an
+empty target (all inserts), bumps every row on the source and merges
+again (all last-write-wins updates, after a conflict-detection pass).
+
+    python execution/bench_sync_merge.py              # 200,000 rows
+    python execution/bench_sync_merge.py --rows 20000 --baseline
+
+--baseline also times the old row-at-a-time merge for comparison.
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add src to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from wired_part.config import Config
+from wired_part.database.connection import DatabaseConnection
+from wired_part.database.schema import initialize_database
+from wired_part.sync.sync_manager import SyncManager
+
+
+def _seed_parts(db, rows: int):
+    with db.get_connection() as conn:
+        category = conn.execute("SELECT MIN(id) FROM categories").fetchone()[0]
+        conn.executemany(
+            "INSERT INTO parts (part_number, name, quantity, unit_cost, "
+            "category_id, updated_at) VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                (f"BENCH-{i:07d}", f"Bench part {i}", i % 50, 1.25,
+                 category, "2026-01-01 00:00:00")
+                for i in range(rows)
+            ),
+        )
+
+
+def _export_parts(mgr) -> list[dict]:
+    with mgr.db.get_connection() as conn:
+        return mgr._export_table(conn, "parts")
+
+
+def _per_row_merge(conn, rows: list[dict]) -> int:
+    """The previous merge: one lookup, then one write, per row."""
+    merged = 0
+    for row in rows:
+        local = conn.execute(
+            "SELECT updated_at FROM parts WHERE id = ?", (row["id"],),
+        ).fetchone()
+        if local is None:
+            cols = list(row)
+            conn.execute(
+                f"INSERT OR IGNORE INTO parts ({', '.join(cols)}) "
+                f"VALUES ({', '.join('?' for _ in cols)})",
+                [row[c] for c in cols],
+            )
+            merged += 1
+        elif row["updated_at"] > local[0]:
+            cols = [c for c in row if c != "id"]
+            conn.execute(
+                f"UPDATE parts SET {', '.join(f'{c} = ?' for c in cols)} "
+                f"WHERE id = ?",
+                [row[c] for c in cols] + [row["id"]],
+            )
+            merged += 1
+    return merged
+
+
+def _timed(label: str, fn, results: dict):
+    start = time.perf_counter()
+    value = fn()
+    elapsed = time.perf_counter() - start
+    results[label] = elapsed
+    print(f"  {label:<28} {elapsed:8.2f}s  ({value})")
+    return value
+
+
+def run_benchmark(rows: int = 200_000, baseline: bool = False,
+                  workdir: Path | None = None) -> dict:
+    """Run the benchmark and return {phase: seconds}."""
+    with tempfile.TemporaryDirectory(dir=workdir) as tmp:
+        Config.DEVICE_ID = Config.DEVICE_ID or "bench"
+        source = DatabaseConnection(Path(tmp) / "source.db")
+        initialize_database(source)
+        _seed_parts(source, rows)
+        src_mgr = SyncManager(source)
+        first = _export_parts(src_mgr)
+
+        with source.get_connection() as conn:
+            conn.execute("UPDATE parts SET quantity = quantity + 1, "
+                         "updated_at = '2026-02-01 00:00:00'")
+        second = _export_parts(src_mgr)
+        data = {
+            "schema_version": 0, "tables": {"parts": second},
+        }
+
+        targets = [("set-based", None)]
+        if baseline:
+            targets.append(("per-row", _per_row_merge))
+
+        results = {}
+        for name, merge in targets:
+            target = DatabaseConnection(Path(tmp) / f"target-{name}.db")
+            initialize_database(target)
+            mgr = SyncManager(target)
+            print(f"{name} merge of {rows:,} rows:")
+
+            def apply(batch, merge=merge, mgr=mgr, target=target):
+                with target.get_connection() as conn:
+                    if merge is None:
+                        return mgr._merge_table(conn, "parts", batch)
+                    return merge(conn, batch)
+
+            _timed(f"{name} insert", lambda: apply(first), results)
+            if merge is None:
+                with target.get_connection() as conn:
+                    data["schema_version"] = mgr._get_schema_version(conn)
+                _timed(f"{name} detect_conflicts",
+                       lambda: len(mgr.detect_conflicts(data)), results)
+            _timed(f"{name} update (LWW)", lambda: apply(second), results)
+        return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--baseline", action="store_true",
+                        help="also time the row-at-a-time merge")
+    args = parser.parse_args()
+    run_benchmark(args.rows, args.baseline)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,9 @@
 """Entry point for python -m wired_part."""
 
+import multiprocessing
+
 from wired_part.app import main
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()  # Sync decode workers in frozen builds
     main()
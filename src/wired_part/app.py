@@ -81,11 +81,17 @@ def main():
 
     repo = Repository(db)
 
+    # Batch activity log inserts on a background thread; whatever is
+    # still queued is committed when the event loop exits
+    repo.start_activity_writer()
+    app.aboutToQuit.connect(repo.flush_activity_log)
+
     # Login loop — re-shows the login dialog after logout
     while True:
         current_user = _login(repo)
         if current_user is None:
             # User cancelled the login dialog
+            repo.stop_activity_writer()
             sys.exit(0)
 
         # Apply the user's preferred theme (falls back to Config.APP_THEME)
@@ -109,6 +115,7 @@ def main():
             # User closed the window normally — exit the app
             break
 
+    repo.stop_activity_writer()
     sys.exit(0)
 
 
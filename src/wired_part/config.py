@@ -142,6 +142,11 @@ class Config:
     SYNC_INTERVAL_MINUTES: int = int(_runtime.get(
         "sync_interval_minutes", "60"
     ))
+    # http://host:port of a wired-part-syncd server; used instead of the
+    # sync folder when set
+    SYNC_SERVER_URL: str = _runtime.get("sync_server_url", "")
+    # Shared secret the sync server requires (see wired-part-syncd)
+    SYNC_SERVER_TOKEN: str = _runtime.get("sync_server_token", "")
     DEVICE_ID: str = _runtime.get("device_id", "")
     LAST_SYNC_TIMESTAMP: str = _runtime.get("last_sync_timestamp", "")
 
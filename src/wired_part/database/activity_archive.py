@@ -0,0 +1,54 @@
+"""Compressed, immutable segment files for archived activity log entries.
+
+Each segment holds one month's worth of entries moved out of
+``activity_log`` in a single archival pass, as zlib-compressed JSON
+lines sorted by id.  Segments are written once (to a temp file, then
+renamed into place) and never modified, so decoded segments can be
+cached by path.  The ``activity_archive_segments`` table indexes them.
+"""
+
+import json
+import os
+import zlib
+from functools import lru_cache
+from pathlib import Path
+
+SEGMENT_SUFFIX = ".jsonl.z"
+
+
+def archive_dir(db) -> Path:
+    """Directory holding *db*'s activity segments, beside the database."""
+    return db.db_path.parent / f"{db.db_path.stem}_activity_archive"
+
+
+def segment_name(month: str, first_id: int, last_id: int) -> str:
+    """File name for a segment of *month* (``YYYY-MM``) entries."""
+    return (
+        f"activity-{month.replace('-', '')}-"
+        f"{first_id:010d}-{last_id:010d}{SEGMENT_SUFFIX}"
+    )
+
+
+def write_segment(path: Path, entries: list[dict]):
+    """Atomically write *entries* as a compressed JSON-lines segment."""
+    payload = "\n".join(
+        json.dumps(entry, separators=(",", ":"), default=str)
+        for entry in entries
+    ).encode("utf-8")
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as fh:
+        fh.write(zlib.compress(payload, 9))
+        fh.flush()
+        os.fsync(fh.fileno())
+    os.replace(tmp, path)
+
+
+@lru_cache(maxsize=32)
+def read_segment(path: str) -> tuple[dict, ...]:
+    """Decode a segment; cached because segments never change."""
+    try:
+        raw = zlib.decompress(Path(path).read_bytes()).decode("utf-8")
+    except (OSError, zlib.error):
+        return ()
+    return tuple(json.loads(line) for line in raw.splitlines() if line)
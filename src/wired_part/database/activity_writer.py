@@ -0,0 +1,205 @@
+"""Write-behind writer for the activity log.
+
+``Repository.log_activity`` hands entries to the running writer for its
+database file instead of committing one INSERT per call.  A background
+thread drains the bounded buffer and inserts entries in batches, when a
+batch fills up or ``flush_interval`` seconds after its first entry.
+``flush()`` blocks until everything queued so far is on disk; readers
+of the activity log call it first so they always see their own writes.
+Entries leave the buffer only once their batch has committed: a batch
+that fails because the database is busy (a long sync merge holding the
+write lock) stays at the head of the buffer and is retried with backoff.
+
+One writer runs per database file (see ``start_writer``); it is flushed
+and stopped at interpreter exit.
+"""
+
+import atexit
+import logging
+import sqlite3
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+
+_INSERT_SQL = (
+    "INSERT INTO activity_log "
+    "(user_id, action, entity_type, entity_id, entity_label, details, "
+    "created_at) VALUES (?, ?, ?, ?, ?, ?, ?)"
+)
+
+logger = logging.getLogger(__name__)
+
+_writers: dict[str, "ActivityLogWriter"] = {}
+_writers_lock = threading.Lock()
+
+
+def _key(db) -> str:
+    return str(db.db_path.resolve())
+
+
+def get_writer(db) -> "ActivityLogWriter | None":
+    """The running writer for *db*'s file, if any."""
+    return _writers.get(_key(db))
+
+
+def start_writer(db, **kwargs) -> "ActivityLogWriter":
+    """Start (or return the already running) writer for *db*'s file."""
+    with _writers_lock:
+        writer = _writers.get(_key(db))
+        if writer is None:
+            writer = ActivityLogWriter(db, **kwargs)
+            _writers[_key(db)] = writer
+        return writer
+
+
+def stop_writer(db):
+    """Flush and stop the writer for *db*'s file, if one is running."""
+    with _writers_lock:
+        writer = _writers.pop(_key(db), None)
+    if writer is not None:
+        writer.close()
+
+
+@atexit.register
+def _stop_all():
+    with _writers_lock:
+        writers = list(_writers.values())
+        _writers.clear()
+    for writer in writers:
+        writer.close()
+
+
+class ActivityLogWriter:
+    """Buffers activity log rows and inserts them on a daemon thread."""
+
+    # Waits between attempts of one flush while the database is busy
+    RETRY_DELAYS = (0.05, 0.1, 0.2, 0.5, 1.0)
+    # Background thread's pause after a failed flush, doubling up to max
+    BACKOFF_INITIAL = 1.0
+    BACKOFF_MAX = 30.0
+
+    def __init__(self, db, batch_size: int = None,
+                 flush_interval: float = None, max_queue: int = None):
+        from wired_part.utils.constants import (
+            ACTIVITY_LOG_BATCH_SIZE,
+            ACTIVITY_LOG_FLUSH_INTERVAL,
+            ACTIVITY_LOG_QUEUE_SIZE,
+        )
+        self.db = db
+        self.batch_size = batch_size or ACTIVITY_LOG_BATCH_SIZE
+        self.flush_interval = (
+            ACTIVITY_LOG_FLUSH_INTERVAL if flush_interval is None
+            else flush_interval
+        )
+        self.max_queue = max_queue or ACTIVITY_LOG_QUEUE_SIZE
+        self._buffer: deque = deque()
+        self._cond = threading.Condition()
+        # Held while a batch is taken from the buffer and inserted, so
+        # a flush() returns only after every earlier entry is committed
+        self._write_lock = threading.Lock()
+        self._closed = False
+        self._thread = threading.Thread(
+            target=self._run, name="activity-log-writer", daemon=True,
+        )
+        self._thread.start()
+
+    def submit(self, user_id, action, entity_type, entity_id=None,
+               entity_label="", details=""):
+        """Queue one entry; stamped now so batching keeps its time."""
+        stamp = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+        row = (user_id, action, entity_type, entity_id,
+               entity_label, details, stamp)
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("activity log writer is closed")
+            self._buffer.append(row)
+            size = len(self._buffer)
+            if size >= self.batch_size:
+                self._cond.notify_all()
+        if size > self.max_queue:
+            # Back-pressure: the caller pays for one synchronous batch
+            self.flush()
+
+    def flush(self):
+        """Block until every entry submitted so far is committed.
+
+        Retries while the database is locked; if it stays locked the
+        error is raised and the entries remain queued for the next
+        flush.
+        """
+        with self._write_lock:
+            with self._cond:
+                batch = list(self._buffer)
+            if not batch:
+                return
+            for delay in (*self.RETRY_DELAYS, None):
+                try:
+                    self._insert(batch)
+                    break
+                except sqlite3.OperationalError:
+                    if delay is None:
+                        raise
+                    time.sleep(delay)
+            # Submissions only append, so the batch is still the head
+            with self._cond:
+                for _ in batch:
+                    self._buffer.popleft()
+
+    def _insert(self, batch: list):
+        try:
+            with self.db.get_connection() as conn:
+                conn.executemany(_INSERT_SQL, batch)
+        except sqlite3.IntegrityError:
+            # One bad row (e.g. a user deleted meanwhile) must not
+            # block the rest forever: insert one by one, dropping it
+            with self.db.get_connection() as conn:
+                for row in batch:
+                    try:
+                        conn.execute(_INSERT_SQL, row)
+                    except sqlite3.IntegrityError as e:
+                        logger.warning("Dropped activity entry %r: %s",
+                                       row, e)
+
+    def close(self):
+        """Flush, then stop the background thread."""
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join()
+        self.flush()
+
+    @property
+    def pending(self) -> int:
+        """Entries still waiting in the buffer."""
+        return len(self._buffer)
+
+    def _run(self):
+        backoff = 0.0
+        while True:
+            with self._cond:
+                while not self._buffer and not self._closed:
+                    self._cond.wait()
+                if self._closed:
+                    return  # close() does the final flush
+                # Give the batch a chance to fill before writing
+                deadline = time.monotonic() + self.flush_interval
+                while len(self._buffer) < self.batch_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0 or self._closed:
+                        break
+                    self._cond.wait(remaining)
+            try:
+                self.flush()
+                backoff = 0.0
+            except Exception:
+                # Still queued; try again later instead of spinning
+                backoff = min(backoff * 2 or self.BACKOFF_INITIAL,
+                              self.BACKOFF_MAX)
+                logger.warning("Activity log flush failed; retrying in "
+                               "%.0fs", backoff, exc_info=True)
+                with self._cond:
+                    if not self._closed:
+                        self._cond.wait(backoff)
@@ -0,0 +1,104 @@
+"""Domain events published by the Repository after a write commits.
+
+Events carry only the ids of what changed; subscribers re-read whatever
+rows they display.  The bus is plain Python so the database layer stays
+free of Qt — the UI wraps it in a relay that batches events per
+event-loop tick (see ``wired_part.ui.domain_events``).
+"""
+
+import threading
+from dataclasses import dataclass, field, fields
+from typing import Callable
+
+
+@dataclass(frozen=True)
+class DomainEvent:
+    """Base class for all domain events."""
+
+
+@dataclass(frozen=True)
+class PartsChanged(DomainEvent):
+    """Warehouse part rows were created, updated or deleted."""
+    part_ids: frozenset = field(default_factory=frozenset)
+
+
+@dataclass(frozen=True)
+class TruckInventoryChanged(DomainEvent):
+    """On-hand truck inventory changed for these trucks and parts."""
+    truck_ids: frozenset = field(default_factory=frozenset)
+    part_ids: frozenset = field(default_factory=frozenset)
+
+
+@dataclass(frozen=True)
+class TransfersChanged(DomainEvent):
+    """Truck transfers were created, received or cancelled."""
+    transfer_ids: frozenset = field(default_factory=frozenset)
+    truck_ids: frozenset = field(default_factory=frozenset)
+
+
+@dataclass(frozen=True)
+class OrdersChanged(DomainEvent):
+    """Purchase orders (or their items) changed."""
+    order_ids: frozenset = field(default_factory=frozenset)
+
+
+@dataclass(frozen=True)
+class LaborChanged(DomainEvent):
+    """Labor entries were clocked in or out."""
+    entry_ids: frozenset = field(default_factory=frozenset)
+    user_ids: frozenset = field(default_factory=frozenset)
+    job_ids: frozenset = field(default_factory=frozenset)
+
+
+def coalesce(events: list[DomainEvent]) -> list[DomainEvent]:
+    """Merge events of the same type by unioning their id sets.
+
+    Order follows the first occurrence of each event type.
+    """
+    merged: dict[type, dict[str, frozenset]] = {}
+    for event in events:
+        acc = merged.setdefault(type(event), {})
+        for f in fields(event):
+            acc[f.name] = acc.get(f.name, frozenset()) | getattr(
+                event, f.name
+            )
+    return [cls(**values) for cls, values in merged.items()]
+
+
+class EventBus:
+    """Synchronous publish/subscribe hub for domain events."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers: list[tuple[Callable, tuple]] = []
+
+    def subscribe(self, callback: Callable[[DomainEvent], None],
+                  event_types: tuple = ()) -> Callable[[], None]:
+        """Call *callback* for each published event of *event_types*.
+
+        An empty *event_types* subscribes to everything.  Returns a
+        function that removes the subscription.
+        """
+        entry = (callback, tuple(event_types))
+        with self._lock:
+            self._subscribers.append(entry)
+
+        def unsubscribe():
+            with self._lock:
+                if entry in self._subscribers:
+                    self._subscribers.remove(entry)
+
+        return unsubscribe
+
+    def publish(self, *events: DomainEvent):
+        """Deliver *events* to matching subscribers, in order."""
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for event in events:
+            for callback, types in subscribers:
+                if types and not isinstance(event, types):
+                    continue
+                try:
+                    callback(event)
+                except Exception:
+                    pass  # A failing subscriber must not break writes
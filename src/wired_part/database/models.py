@@ -389,6 +389,8 @@ class JobNotebook:
     updated_at: Optional[datetime] = None
     # Joined fields
     job_number: str = field(default="", repr=False)
+    # Populated by get_notebook_tree()
+    sections: list = field(default_factory=list, repr=False)
 
 
 @dataclass
@@ -398,6 +400,8 @@ class NotebookSection:
     name: str = ""
     sort_order: int = 0
     created_at: Optional[datetime] = None
+    # Populated by get_notebook_tree()
+    pages: list = field(default_factory=list, repr=False)
 
 
 @dataclass
@@ -653,6 +657,7 @@ class ReturnAuthorization:
     order_number: str = field(default="", repr=False)
     created_by_name: str = field(default="", repr=False)
     item_count: int = field(default=0, repr=False)
+    total_value: float = field(default=0.0, repr=False)
 
 
 @dataclass
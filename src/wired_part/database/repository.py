@@ -4,6 +4,15 @@ import hashlib
 from typing import Optional
 
 from .connection import DatabaseConnection
+from .events import (
+    DomainEvent,
+    EventBus,
+    LaborChanged,
+    OrdersChanged,
+    PartsChanged,
+    TransfersChanged,
+    TruckInventoryChanged,
+)
 from .models import (
     Brand,
     Category,
@@ -42,8 +51,23 @@ from .models import (
 class Repository:
     """Provides all database operations for the application."""
 
-    def __init__(self, db: DatabaseConnection):
+    def __init__(self, db: DatabaseConnection, device_id: str = None,
+                 event_bus: EventBus = None):
         self.db = db
+        self._device_id = device_id
+        self.events = event_bus or EventBus()
+
+    @property
+    def device_id(self) -> str:
+        """ID of the device this repository writes on behalf of."""
+        if not self._device_id:
+            from wired_part.config import Config
+            self._device_id = Config.get_device_id()
+        return self._device_id
+
+    def _publish(self, *events: DomainEvent):
+        """Publish domain events; call only after the write committed."""
+        self.events.publish(*events)
 
     @staticmethod
     def _escape_like(value: str) -> str:
@@ -181,7 +205,9 @@ class Repository:
     def get_low_stock_parts(self) -> list[Part]:
         rows = self.db.execute(
             self._PARTS_SELECT + """
-            WHERE p.quantity < p.min_quantity AND p.min_quantity > 0
+            WHERE p.id IN (
+                SELECT part_id FROM low_stock_state WHERE truck_id = 0
+            )
             ORDER BY (p.min_quantity - p.quantity) DESC
         """)
         return [Part(**dict(r)) for r in rows]
@@ -229,24 +255,17 @@ class Repository:
         """)
         return rows[0]["cnt"] if rows else 0
 
-    def generate_local_part_number(self) -> str:
-        """Generate the next local part number (e.g. LP-0001)."""
+    def generate_local_part_number(self, peek: bool = False) -> str:
+        """Allocate the next local part number (e.g. LP-0001).
+
+        With *peek*, return it without reserving it — for display in a
+        dialog that may be cancelled; allocate again when saving.
+        """
         from wired_part.config import Config
-        prefix = Config.LOCAL_PN_PREFIX
-        rows = self.db.execute("""
-            SELECT local_part_number FROM parts
-            WHERE local_part_number LIKE ?
-            ORDER BY local_part_number DESC LIMIT 1
-        """, (f"{prefix}-%",))
-        if rows and rows[0]["local_part_number"]:
-            last = rows[0]["local_part_number"]
-            try:
-                num = int(last.split("-", 1)[1]) + 1
-            except (ValueError, IndexError):
-                num = 1
-        else:
-            num = 1
-        return f"{prefix}-{num:04d}"
+        return self._next_document_number(
+            "parts", "local_part_number", Config.LOCAL_PN_PREFIX, width=4,
+            peek=peek,
+        )
 
     def create_part(self, part: Part) -> int:
         with self.db.get_connection() as conn:
@@ -270,7 +289,9 @@ class Repository:
                 part.color_options, part.type_style, part.has_qr_tag,
                 part.pdfs,
             ))
-            return cursor.lastrowid
+            part_id = cursor.lastrowid
+        self._publish(PartsChanged(frozenset({part_id})))
+        return part_id
 
     def update_part(self, part: Part):
         with self.db.get_connection() as conn:
@@ -298,6 +319,7 @@ class Repository:
                 part.deprecation_started_at, part.id,
             ))
         self._try_advance_if_deprecating(part.id)
+        self._publish(PartsChanged(frozenset({part.id})))
 
     def can_delete_part(self, part_id: int) -> tuple[bool, str]:
         """Check whether a part can be safely deleted.
@@ -370,6 +392,7 @@ class Repository:
                         (part_id,),
                     )
             conn.execute("DELETE FROM parts WHERE id = ?", (part_id,))
+        self._publish(PartsChanged(frozenset({part_id})))
 
     # ── Brands ────────────────────────────────────────────────────
 
@@ -663,16 +686,16 @@ class Repository:
         with self.db.get_connection() as conn:
             conn.execute("DELETE FROM jobs WHERE id = ?", (job_id,))
 
-    def generate_job_number(self) -> str:
-        """Generate next sequential job number like JOB-2026-001."""
+    def generate_job_number(self, peek: bool = False) -> str:
+        """Allocate the next job number like JOB-2026-001.
+
+        With *peek*, return it without reserving it (for display).
+        """
         from datetime import datetime
-        year = datetime.now().year
-        rows = self.db.execute(
-            "SELECT COUNT(*) as cnt FROM jobs WHERE job_number LIKE ?",
-            (f"JOB-{year}-%",),
+        return self._next_document_number(
+            "jobs", "job_number", "JOB", period=str(datetime.now().year),
+            peek=peek,
         )
-        count = rows[0]["cnt"] + 1 if rows else 1
-        return f"JOB-{year}-{count:03d}"
 
     # ── Job Parts ───────────────────────────────────────────────
 
@@ -719,7 +742,8 @@ class Repository:
 
             # Deduct from inventory
             conn.execute(
-                "UPDATE parts SET quantity = quantity - ? WHERE id = ?",
+                "UPDATE parts SET quantity = quantity - ?, "
+                "updated_at = CURRENT_TIMESTAMP WHERE id = ?",
                 (job_part.quantity_used, job_part.part_id),
             )
             return cursor.lastrowid
@@ -733,7 +757,8 @@ class Repository:
             ).fetchone()
             if row:
                 conn.execute(
-                    "UPDATE parts SET quantity = quantity + ? WHERE id = ?",
+                    "UPDATE parts SET quantity = quantity + ?, "
+                    "updated_at = CURRENT_TIMESTAMP WHERE id = ?",
                     (row["quantity_used"], row["part_id"]),
                 )
                 conn.execute(
@@ -741,11 +766,7 @@ class Repository:
                 )
 
     def get_job_total_cost(self, job_id: int) -> float:
-        rows = self.db.execute("""
-            SELECT COALESCE(SUM(quantity_used * unit_cost_at_use), 0) AS total
-            FROM job_parts WHERE job_id = ?
-        """, (job_id,))
-        return rows[0]["total"] if rows else 0.0
+        return self.get_job_cost_totals(job_id)["material_cost"]
 
     # ── Job Assignments ─────────────────────────────────────────
 
@@ -932,6 +953,9 @@ class Repository:
                 quantity = quantity + excluded.quantity,
                 updated_at = CURRENT_TIMESTAMP
         """, (truck_id, part_id, quantity))
+        self._publish(TruckInventoryChanged(
+            frozenset({truck_id}), frozenset({part_id}),
+        ))
 
     def set_truck_inventory_levels(
         self, truck_id: int, part_id: int,
@@ -944,6 +968,9 @@ class Repository:
                 updated_at = CURRENT_TIMESTAMP
             WHERE truck_id = ? AND part_id = ?
         """, (min_quantity, max_quantity, truck_id, part_id))
+        self._publish(TruckInventoryChanged(
+            frozenset({truck_id}), frozenset({part_id}),
+        ))
 
     def set_truck_inventory_quantity(
         self, truck_id: int, part_id: int, quantity: int,
@@ -956,6 +983,9 @@ class Repository:
                 quantity = excluded.quantity,
                 updated_at = CURRENT_TIMESTAMP
         """, (truck_id, part_id, quantity))
+        self._publish(TruckInventoryChanged(
+            frozenset({truck_id}), frozenset({part_id}),
+        ))
 
     def get_truck_inventory_with_levels(
         self, truck_id: int,
@@ -992,7 +1022,8 @@ class Repository:
 
             # Atomic deduct — UPDATE only succeeds if stock sufficient
             cursor = conn.execute(
-                "UPDATE parts SET quantity = quantity - ? "
+                "UPDATE parts SET quantity = quantity - ?, "
+                "updated_at = CURRENT_TIMESTAMP "
                 "WHERE id = ? AND quantity >= ?",
                 (transfer.quantity, transfer.part_id, transfer.quantity),
             )
@@ -1031,7 +1062,14 @@ class Repository:
                 transfer.created_by, transfer.notes,
                 source_order_id, supplier_id,
             ))
-            return cursor.lastrowid
+            transfer_id = cursor.lastrowid
+        self._publish(
+            PartsChanged(frozenset({transfer.part_id})),
+            TransfersChanged(
+                frozenset({transfer_id}), frozenset({transfer.truck_id}),
+            ),
+        )
+        return transfer_id
 
     def receive_transfer(self, transfer_id: int, received_by: int):
         """Receive a pending transfer — adds to truck on-hand inventory."""
@@ -1063,7 +1101,14 @@ class Repository:
                 WHERE id = ?
             """, (received_by, transfer_id))
             _part_id = row["part_id"]
+            _truck_id = row["truck_id"]
         self._try_advance_if_deprecating(_part_id)
+        self._publish(
+            TruckInventoryChanged(
+                frozenset({_truck_id}), frozenset({_part_id}),
+            ),
+            TransfersChanged(frozenset({transfer_id}), frozenset({_truck_id})),
+        )
 
     def cancel_transfer(self, transfer_id: int):
         """Cancel a pending transfer — restores warehouse stock."""
@@ -1080,7 +1125,8 @@ class Repository:
 
             # Restore warehouse stock
             conn.execute(
-                "UPDATE parts SET quantity = quantity + ? WHERE id = ?",
+                "UPDATE parts SET quantity = quantity + ?, "
+                "updated_at = CURRENT_TIMESTAMP WHERE id = ?",
                 (row["quantity"], row["part_id"]),
             )
 
@@ -1089,6 +1135,12 @@ class Repository:
                 "UPDATE truck_transfers SET status = 'cancelled' WHERE id = ?",
                 (transfer_id,),
             )
+        self._publish(
+            PartsChanged(frozenset({row["part_id"]})),
+            TransfersChanged(
+                frozenset({transfer_id}), frozenset({row["truck_id"]}),
+            ),
+        )
 
     def return_to_warehouse(self, truck_id: int, part_id: int,
                             quantity: int, user_id: int = None) -> int:
@@ -1117,7 +1169,8 @@ class Repository:
 
             # Add back to warehouse
             conn.execute(
-                "UPDATE parts SET quantity = quantity + ? WHERE id = ?",
+                "UPDATE parts SET quantity = quantity + ?, "
+                "updated_at = CURRENT_TIMESTAMP WHERE id = ?",
                 (quantity, part_id),
             )
 
@@ -1131,6 +1184,11 @@ class Repository:
             """, (truck_id, part_id, quantity, user_id, user_id))
             transfer_id = cursor.lastrowid
         self._try_advance_if_deprecating(part_id)
+        self._publish(
+            PartsChanged(frozenset({part_id})),
+            TruckInventoryChanged(frozenset({truck_id}), frozenset({part_id})),
+            TransfersChanged(frozenset({transfer_id}), frozenset({truck_id})),
+        )
         return transfer_id
 
     def get_truck_transfers(self, truck_id: int,
@@ -1359,30 +1417,14 @@ class Repository:
                     f'{{"truck_id": {truck_id}}}',
                 ))
 
-            # Check for low warehouse stock and create alert
-            stock_row = conn.execute(
-                "SELECT part_number, quantity, min_quantity "
-                "FROM parts WHERE id = ?",
-                (part_id,),
-            ).fetchone()
-            if stock_row and stock_row["min_quantity"] > 0:
-                if stock_row["quantity"] < stock_row["min_quantity"]:
-                    deficit = stock_row["min_quantity"] - stock_row["quantity"]
-                    conn.execute("""
-                        INSERT INTO notifications
-                            (user_id, title, message, severity, source)
-                        VALUES (NULL, ?, ?, 'warning', 'system')
-                    """, (
-                        f"Low Stock: {stock_row['part_number']}",
-                        f"Warehouse stock for {stock_row['part_number']} "
-                        f"is at {stock_row['quantity']} "
-                        f"(min: {stock_row['min_quantity']}, "
-                        f"need {deficit} more). "
-                        f"Consider reordering.",
-                    ))
+            # Announce warehouse low-stock crossings not yet notified
+            self._notify_low_stock_transitions(conn)
 
             log_id = cursor.lastrowid
         self._try_advance_if_deprecating(part_id)
+        self._publish(TruckInventoryChanged(
+            frozenset({truck_id}), frozenset({part_id}),
+        ))
         return log_id
 
     def get_consumption_log(self, job_id: int = None,
@@ -1431,43 +1473,156 @@ class Repository:
             ))
             return cursor.lastrowid
 
+    # Broadcasts (user_id IS NULL) are shared rows, so read state lives
+    # per user: a read cursor (everything at or below it is read) plus
+    # receipts for broadcasts read individually above the cursor.
+    # Personal rows keep using their own is_read flag.
+    _INBOX_COLUMNS = (
+        "n.id, n.user_id, n.title, n.message, n.severity, n.source, "
+        "{read} AS is_read, n.target_tab, n.target_data, n.created_at"
+    )
+    _PERSONAL_READ = "(n.is_read = 1 OR n.id <= ?)"
+    _BROADCAST_READ = (
+        "(n.id <= ? OR EXISTS (SELECT 1 FROM notification_receipts r "
+        "WHERE r.user_id = ? AND r.notification_id = n.id))"
+    )
+
+    def get_notification_cursor(self, user_id: int) -> int:
+        """Highest notification id *user_id* has marked read in bulk."""
+        rows = self.db.execute(
+            "SELECT read_through_id FROM notification_cursors "
+            "WHERE user_id = ?",
+            (user_id,),
+        )
+        return rows[0]["read_through_id"] if rows else 0
+
+    def _query_inbox(self, user_id: int, *, is_read: int | None = None,
+                     severity: str | None = None,
+                     source: str | None = None,
+                     before_id: int | None = None,
+                     limit: int = 50, offset: int = 0) -> list[Notification]:
+        """Newest-first inbox for *user_id*, one indexed branch per kind.
+
+        Personal and broadcast rows are read separately and merged so
+        neither branch needs an ``OR`` on user_id.
+        """
+        cursor = self.get_notification_cursor(user_id)
+        branch_limit = limit + offset
+
+        def branch(owner_clause, owner_params, read_expr, read_params):
+            clauses = [owner_clause]
+            params = list(owner_params)
+            if before_id is not None:
+                clauses.append("n.id < ?")
+                params.append(before_id)
+            if severity:
+                clauses.append("n.severity = ?")
+                params.append(severity)
+            if source:
+                clauses.append("n.source = ?")
+                params.append(source)
+            if is_read is not None:
+                clauses.append(read_expr if is_read else f"NOT {read_expr}")
+                params.extend(read_params)
+            columns = self._INBOX_COLUMNS.format(
+                read=f"CASE WHEN {read_expr} THEN 1 ELSE 0 END",
+            )
+            sql = (
+                f"SELECT * FROM (SELECT {columns} "  # noqa: S608
+                f"FROM notifications n WHERE {' AND '.join(clauses)} "
+                f"ORDER BY n.id DESC LIMIT ?)"
+            )
+            return sql, list(read_params) + params + [branch_limit]
+
+        personal_sql, personal_params = branch(
+            "n.user_id = ?", [user_id], self._PERSONAL_READ, [cursor],
+        )
+        broadcast_sql, broadcast_params = branch(
+            "n.user_id IS NULL", [], self._BROADCAST_READ,
+            [cursor, user_id],
+        )
+        rows = self.db.execute(
+            f"{personal_sql} UNION ALL {broadcast_sql} "
+            f"ORDER BY id DESC LIMIT ? OFFSET ?",
+            tuple(personal_params + broadcast_params + [limit, offset]),
+        )
+        return [Notification(**dict(r)) for r in rows]
+
     def get_user_notifications(self, user_id: int,
                                unread_only: bool = False,
-                               limit: int = 50) -> list[Notification]:
-        if unread_only:
-            rows = self.db.execute("""
-                SELECT * FROM notifications
-                WHERE (user_id = ? OR user_id IS NULL) AND is_read = 0
-                ORDER BY created_at DESC LIMIT ?
-            """, (user_id, limit))
-        else:
-            rows = self.db.execute("""
-                SELECT * FROM notifications
-                WHERE user_id = ? OR user_id IS NULL
-                ORDER BY created_at DESC LIMIT ?
-            """, (user_id, limit))
-        return [Notification(**dict(r)) for r in rows]
+                               limit: int = 50,
+                               before_id: int | None = None,
+                               ) -> list[Notification]:
+        """Newest-first notifications for *user_id*.
+
+        Pass the id of the last row of a page as *before_id* to fetch
+        the next page.
+        """
+        return self._query_inbox(
+            user_id, is_read=0 if unread_only else None,
+            before_id=before_id, limit=limit,
+        )
+
+    def mark_notification_read(self, notification_id: int,
+                               user_id: int | None = None):
+        """Mark one notification read.
 
-    def mark_notification_read(self, notification_id: int):
+        Broadcasts are marked read for *user_id* only; without a user
+        the shared row flag is set, which no longer affects any inbox.
+        """
         with self.db.get_connection() as conn:
-            conn.execute(
-                "UPDATE notifications SET is_read = 1 WHERE id = ?",
+            row = conn.execute(
+                "SELECT user_id FROM notifications WHERE id = ?",
                 (notification_id,),
-            )
+            ).fetchone()
+            if row is None:
+                return
+            if row["user_id"] is None and user_id is not None:
+                conn.execute(
+                    "INSERT OR IGNORE INTO notification_receipts "
+                    "(user_id, notification_id) VALUES (?, ?)",
+                    (user_id, notification_id),
+                )
+            else:
+                conn.execute(
+                    "UPDATE notifications SET is_read = 1 WHERE id = ?",
+                    (notification_id,),
+                )
 
     def mark_all_notifications_read(self, user_id: int):
+        """Advance *user_id*'s read cursor past every notification."""
         with self.db.get_connection() as conn:
-            conn.execute(
-                "UPDATE notifications SET is_read = 1 "
-                "WHERE (user_id = ? OR user_id IS NULL) AND is_read = 0",
-                (user_id,),
-            )
+            conn.execute("""
+                INSERT INTO notification_cursors
+                    (user_id, read_through_id, updated_at)
+                VALUES (?, (SELECT COALESCE(MAX(id), 0) FROM notifications),
+                        CURRENT_TIMESTAMP)
+                ON CONFLICT(user_id) DO UPDATE SET
+                    read_through_id = MAX(read_through_id,
+                                          excluded.read_through_id),
+                    updated_at = excluded.updated_at
+            """, (user_id,))
+            # Receipts at or below the cursor are now redundant
+            conn.execute("""
+                DELETE FROM notification_receipts
+                WHERE user_id = ? AND notification_id <= (
+                    SELECT read_through_id FROM notification_cursors
+                    WHERE user_id = ?)
+            """, (user_id, user_id))
 
     def get_unread_count(self, user_id: int) -> int:
+        cursor = self.get_notification_cursor(user_id)
         rows = self.db.execute("""
-            SELECT COUNT(*) as cnt FROM notifications
-            WHERE (user_id = ? OR user_id IS NULL) AND is_read = 0
-        """, (user_id,))
+            SELECT
+                (SELECT COUNT(*) FROM notifications
+                 WHERE user_id = ? AND is_read = 0 AND id > ?)
+              + (SELECT COUNT(*) FROM notifications n
+                 WHERE n.user_id IS NULL AND n.id > ?
+                   AND NOT EXISTS (
+                       SELECT 1 FROM notification_receipts r
+                       WHERE r.user_id = ? AND r.notification_id = n.id))
+                AS cnt
+        """, (user_id, cursor, cursor, user_id))
         return rows[0]["cnt"] if rows else 0
 
     MAX_NOTIFICATIONS = 500
@@ -1484,23 +1639,42 @@ class Repository:
     def enforce_notification_cap(self) -> int:
         """Purge oldest read notifications when total exceeds MAX_NOTIFICATIONS.
 
+        A broadcast counts as read once every active user's cursor is
+        past it, or once it is NOTIFICATION_BROADCAST_CAP_DAYS old, so a
+        user who never opens the inbox cannot pin every broadcast.
         Returns the number of purged rows.
         """
-        total = self.db.execute("SELECT COUNT(*) AS cnt FROM notifications")
-        count = total[0]["cnt"] if total else 0
+        from wired_part.utils.constants import NOTIFICATION_BROADCAST_CAP_DAYS
+
+        count = int(self.get_stats_counters().get("notifications.count", 0))
         if count <= self.MAX_NOTIFICATIONS:
             return 0
         excess = count - self.MAX_NOTIFICATIONS
         with self.db.get_connection() as conn:
-            # Delete oldest *read* notifications first
+            # Delete oldest *read* notifications first: personal rows
+            # their owner has read, broadcasts below every active user's
+            # read cursor or past the broadcast age limit
             cursor = conn.execute("""
                 DELETE FROM notifications WHERE id IN (
-                    SELECT id FROM notifications
-                    WHERE is_read = 1
-                    ORDER BY created_at ASC
+                    SELECT n.id FROM notifications n
+                    LEFT JOIN notification_cursors c
+                        ON c.user_id = n.user_id
+                    WHERE (n.user_id IS NOT NULL
+                           AND (n.is_read = 1
+                                OR n.id <= COALESCE(c.read_through_id, 0)))
+                       OR (n.user_id IS NULL AND n.id <= (
+                           SELECT COALESCE(MIN(
+                               COALESCE(uc.read_through_id, 0)), 0)
+                           FROM users u
+                           LEFT JOIN notification_cursors uc
+                               ON uc.user_id = u.id
+                           WHERE u.is_active = 1))
+                       OR (n.user_id IS NULL AND n.created_at
+                           < datetime('now', ? || ' days'))
+                    ORDER BY n.created_at ASC, n.id ASC
                     LIMIT ?
                 )
-            """, (excess,))
+            """, (f"-{NOTIFICATION_BROADCAST_CAP_DAYS}", excess))
             return cursor.rowcount
 
     def get_user_notifications_filtered(
@@ -1511,41 +1685,267 @@ class Repository:
         is_read: int | None = None,
         limit: int = 50,
         offset: int = 0,
+        before_id: int | None = None,
     ) -> list[Notification]:
-        """Fetch notifications with optional severity/source/read filters."""
-        clauses = ["(user_id = ? OR user_id IS NULL)"]
-        params: list = [user_id]
-        if severity:
-            clauses.append("severity = ?")
-            params.append(severity)
-        if source:
-            clauses.append("source = ?")
-            params.append(source)
-        if is_read is not None:
-            clauses.append("is_read = ?")
-            params.append(is_read)
-        where = " AND ".join(clauses)
-        params.extend([limit, offset])
+        """Fetch notifications with optional severity/source/read filters.
+
+        Prefer *before_id* (keyset) over *offset* for paging.
+        """
+        return self._query_inbox(
+            user_id, is_read=is_read, severity=severity, source=source,
+            before_id=before_id, limit=limit, offset=offset,
+        )
+
+    # ── Notification Retention ──────────────────────────────────
+    #
+    # The live notifications table only holds the last
+    # NOTIFICATION_HOT_DAYS.  Older rows move to archive partitions named
+    # notifications_pYYYYMM after the month they expire in, so expiring
+    # a month of notifications is a DROP TABLE rather than a DELETE.
+
+    _NOTIFICATION_COLUMNS = (
+        "id, user_id, title, message, severity, source, is_read, "
+        "target_tab, target_data, created_at"
+    )
+    _PARTITION_PREFIX = "notifications_p"
+
+    @staticmethod
+    def _notification_retention_sql() -> tuple[str, list]:
+        """CASE expression giving a notification's lifetime in days."""
+        from wired_part.utils.constants import (
+            NOTIFICATION_RETENTION_DAYS,
+            NOTIFICATION_SOURCE_RETENTION_DAYS,
+        )
+        whens, params = [], []
+        for source, days in NOTIFICATION_SOURCE_RETENTION_DAYS.items():
+            whens.append("WHEN source = ? THEN ?")
+            params.extend([source, int(days)])
+        for severity, days in NOTIFICATION_RETENTION_DAYS.items():
+            whens.append("WHEN severity = ? THEN ?")
+            params.extend([severity, int(days)])
+        default = max(NOTIFICATION_RETENTION_DAYS.values(), default=90)
+        params.append(int(default))
+        return f"(CASE {' '.join(whens)} ELSE ? END)", params
+
+    def get_notification_partitions(self) -> list[str]:
+        """Archive partition table names, oldest expiry month first."""
         rows = self.db.execute(
-            f"SELECT * FROM notifications WHERE {where} "
-            f"ORDER BY created_at DESC LIMIT ? OFFSET ?",
-            tuple(params),
+            "SELECT name FROM sqlite_master WHERE type = 'table' "
+            "AND name GLOB ?",
+            (f"{self._PARTITION_PREFIX}[0-9][0-9][0-9][0-9][0-9][0-9]",),
+        )
+        return sorted(r["name"] for r in rows)
+
+    @classmethod
+    def _ensure_notification_partition(cls, conn, month: str) -> str:
+        table = f"{cls._PARTITION_PREFIX}{month}"
+        conn.execute(f"""
+            CREATE TABLE IF NOT EXISTS {table} (
+                id INTEGER PRIMARY KEY,
+                user_id INTEGER,
+                title TEXT NOT NULL,
+                message TEXT NOT NULL,
+                severity TEXT NOT NULL DEFAULT 'info',
+                source TEXT DEFAULT 'system',
+                is_read INTEGER NOT NULL DEFAULT 0,
+                target_tab TEXT DEFAULT '',
+                target_data TEXT DEFAULT '',
+                created_at TIMESTAMP
+            )
+        """)
+        conn.execute(
+            f"CREATE INDEX IF NOT EXISTS idx_{table}_user "
+            f"ON {table}(user_id)"
+        )
+        return table
+
+    @staticmethod
+    def _journal_head(conn) -> int:
+        return conn.execute(
+            "SELECT COALESCE(MAX(seq), 0) FROM change_journal"
+        ).fetchone()[0]
+
+    @staticmethod
+    def _unjournal_deletes(conn, table: str, since_seq: int):
+        """Keep deletes made after *since_seq* on *table* local.
+
+        Retention and archiving are local storage decisions, not
+        changes to replicate: drop their journal entries and tombstones
+        so peers do not delete the rows too.  The ids are recorded in
+        sync_retired_rows so a peer's copy is not merged back in.
+        """
+        conn.execute(
+            "INSERT OR IGNORE INTO sync_retired_rows (table_name, row_id) "
+            "SELECT table_name, row_id FROM change_journal WHERE seq > ? "
+            "AND table_name = ? AND op = 'delete'",
+            (since_seq, table),
+        )
+        conn.execute(
+            "DELETE FROM change_journal WHERE seq > ? "
+            "AND table_name = ? AND op = 'delete'",
+            (since_seq, table),
+        )
+        conn.execute(
+            "DELETE FROM sync_tombstones WHERE seq > ? AND table_name = ?",
+            (since_seq, table),
+        )
+        # The sync digests cannot see unjournaled deletes; rehash
+        conn.execute(
+            "DELETE FROM sync_digest_state WHERE table_name = ?", (table,),
+        )
+
+    def expire_notifications(self, batch_size: int = None) -> int:
+        """Delete up to *batch_size* live notifications past their lifetime.
+
+        Only rules shorter than the hot window ever match here; longer
+        lived rows are archived first and expire with their partition.
+        Each device expires its own copy, so the deletes stay local.
+        """
+        from wired_part.utils.constants import NOTIFICATION_MAINTENANCE_BATCH
+        batch_size = batch_size or NOTIFICATION_MAINTENANCE_BATCH
+        retention, params = self._notification_retention_sql()
+        with self.db.get_connection() as conn:
+            # Hold the write lock so no other write lands between the
+            # journal head and the delete
+            conn.execute("BEGIN IMMEDIATE")
+            seq = self._journal_head(conn)
+            expired = conn.execute(f"""
+                DELETE FROM notifications WHERE id IN (
+                    SELECT id FROM notifications
+                    WHERE created_at < DATETIME('now', '-' || {retention}
+                                                || ' days')
+                    ORDER BY id LIMIT ?
+                )
+            """, (*params, batch_size)).rowcount
+            if expired:
+                self._unjournal_deletes(conn, "notifications", seq)
+            return expired
+
+    def archive_notifications(self, batch_size: int = None,
+                              hot_days: int = None) -> int:
+        """Move up to *batch_size* notifications older than *hot_days*
+        into their expiry-month partitions.  Returns rows moved.
+
+        Every device archives its own copy; the moves are not synced.
+        """
+        from wired_part.utils.constants import (
+            NOTIFICATION_HOT_DAYS,
+            NOTIFICATION_MAINTENANCE_BATCH,
+        )
+        batch_size = batch_size or NOTIFICATION_MAINTENANCE_BATCH
+        if hot_days is None:
+            hot_days = NOTIFICATION_HOT_DAYS
+        retention, params = self._notification_retention_sql()
+        cols = self._NOTIFICATION_COLUMNS
+        with self.db.get_connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            batch = conn.execute(f"""
+                SELECT id, STRFTIME('%Y%m', DATETIME(
+                    created_at, '+' || {retention} || ' days')) AS month
+                FROM notifications
+                WHERE created_at < DATETIME('now', ?)
+                ORDER BY id LIMIT ?
+            """, (*params, f"-{int(hot_days)} days", batch_size)).fetchall()
+            seq = self._journal_head(conn)
+            by_month: dict[str, list[int]] = {}
+            for row in batch:
+                by_month.setdefault(row["month"], []).append(row["id"])
+            for month, ids in by_month.items():
+                table = self._ensure_notification_partition(conn, month)
+                marks = ", ".join("?" for _ in ids)
+                conn.execute(
+                    f"INSERT OR REPLACE INTO {table} ({cols}) "  # noqa: S608
+                    f"SELECT {cols} FROM notifications "
+                    f"WHERE id IN ({marks})",
+                    ids,
+                )
+                conn.execute(
+                    f"DELETE FROM notifications "  # noqa: S608
+                    f"WHERE id IN ({marks})",
+                    ids,
+                )
+            if batch:
+                self._unjournal_deletes(conn, "notifications", seq)
+        return len(batch)
+
+    def drop_expired_notification_partitions(self) -> list[str]:
+        """Drop partitions whose expiry month has fully passed."""
+        from datetime import datetime
+        current = datetime.now().strftime("%Y%m")
+        expired = [
+            t for t in self.get_notification_partitions()
+            if t[len(self._PARTITION_PREFIX):] < current
+        ]
+        if expired:
+            with self.db.get_connection() as conn:
+                for table in expired:
+                    conn.execute(f"DROP TABLE IF EXISTS {table}")
+        return expired
+
+    def run_notification_maintenance(self, batch_size: int = None) -> dict:
+        """One bounded retention pass: expire, archive, drop partitions.
+
+        Returns ``{"expired": n, "archived": n, "dropped": n,
+        "more": bool}``; *more* is true when a batch was full and
+        another pass would find work.
+        """
+        from wired_part.utils.constants import NOTIFICATION_MAINTENANCE_BATCH
+        batch_size = batch_size or NOTIFICATION_MAINTENANCE_BATCH
+        expired = self.expire_notifications(batch_size)
+        archived = self.archive_notifications(batch_size)
+        dropped = self.drop_expired_notification_partitions()
+        return {
+            "expired": expired,
+            "archived": archived,
+            "dropped": len(dropped),
+            "more": expired >= batch_size or archived >= batch_size,
+        }
+
+    def get_archived_notifications(self, user_id: int,
+                                   limit: int = 50,
+                                   before_id: int | None = None,
+                                   ) -> list[Notification]:
+        """Newest-first archived notifications visible to *user_id*.
+
+        Archived rows are out of the inbox and always reported as read.
+        """
+        cols = ", ".join(
+            "1 AS is_read" if c == "is_read" else c
+            for c in self._NOTIFICATION_COLUMNS.split(", ")
+        )
+        branches, params = [], []
+        for table in self.get_notification_partitions():
+            for owner in ("user_id = ?", "user_id IS NULL"):
+                where = [owner]
+                if owner == "user_id = ?":
+                    params.append(user_id)
+                if before_id is not None:
+                    where.append("id < ?")
+                    params.append(before_id)
+                branches.append(
+                    f"SELECT * FROM (SELECT {cols} "  # noqa: S608
+                    f"FROM {table} WHERE {' AND '.join(where)} "
+                    f"ORDER BY id DESC LIMIT ?)"
+                )
+                params.append(limit)
+        if not branches:
+            return []
+        rows = self.db.execute(
+            " UNION ALL ".join(branches) + " ORDER BY id DESC LIMIT ?",
+            tuple(params + [limit]),
         )
         return [Notification(**dict(r)) for r in rows]
 
     # ── Summaries ───────────────────────────────────────────────
 
     def get_inventory_summary(self) -> dict:
-        rows = self.db.execute("""
-            SELECT
-                COUNT(*) AS total_parts,
-                COALESCE(SUM(quantity), 0) AS total_quantity,
-                COALESCE(SUM(quantity * unit_cost), 0) AS total_value,
-                COUNT(CASE WHEN quantity < min_quantity AND min_quantity > 0
-                      THEN 1 END) AS low_stock_count
-            FROM parts
-        """)
-        return dict(rows[0]) if rows else {}
+        counters = self.get_stats_counters()
+        return {
+            "total_parts": int(counters.get("parts.count", 0)),
+            "total_quantity": int(counters.get("parts.total_quantity", 0)),
+            "total_value": round(counters.get("parts.total_value", 0), 2),
+            "low_stock_count": int(counters.get("parts.low_stock", 0)),
+        }
 
     def get_job_summary(self, status: Optional[str] = None) -> dict:
         if status and status != "all":
@@ -2073,34 +2473,10 @@ class Repository:
         if not job:
             return {}
 
-        # Get consumption records for the job
-        conditions = ["cl.job_id = ?"]
-        params: list = [job_id]
-        if date_from:
-            conditions.append("cl.consumed_at >= ?")
-            params.append(date_from)
-        if date_to:
-            conditions.append("cl.consumed_at <= ?")
-            params.append(date_to)
-
-        where = " AND ".join(conditions)
-        rows = self.db.execute(f"""
-            SELECT cl.*,
-                   p.part_number, p.description AS part_description,
-                   t.truck_number, j.job_number,
-                   COALESCE(u.display_name, '') AS consumed_by_name,
-                   COALESCE(c.name, 'Uncategorized') AS category_name
-            FROM consumption_log cl
-            JOIN parts p ON cl.part_id = p.id
-            JOIN trucks t ON cl.truck_id = t.id
-            JOIN jobs j ON cl.job_id = j.id
-            LEFT JOIN users u ON cl.consumed_by = u.id
-            LEFT JOIN categories c ON p.category_id = c.id
-            WHERE {where}
-            ORDER BY c.name, p.part_number
-        """, tuple(params))
+        # Consumption count and period totals come from the ledger
+        totals = self.get_job_cost_totals(job_id, date_from, date_to)
 
-        # Also include directly assigned parts (from warehouse)
+        # Line items: job_parts holds one running row per job/part
         jp_rows = self.db.execute("""
             SELECT jp.*, p.part_number, p.description AS part_description,
                    COALESCE(c.name, 'Uncategorized') AS category_name
@@ -2156,7 +2532,8 @@ class Repository:
                 }
                 for a in assignments
             ],
-            "consumption_count": len(rows),
+            "consumption_count": totals["consumption_count"],
+            "period_totals": totals,
         }
 
     # ── Billing Cycles & Periods ────────────────────────────────
@@ -2256,16 +2633,14 @@ class Repository:
             if k in BillingPeriod.__dataclass_fields__
         })
 
-        # Calculate total parts cost for period
+        # Period totals are an index range sum over the cost ledger
         job_id = rows[0]["job_id"]
         if job_id:
-            billing = self.get_billing_data(
+            totals = self.get_job_cost_totals(
                 job_id, period.period_start, period.period_end
             )
-            total_parts = billing.get("subtotal", 0.0)
-
-            labor_summary = self.get_labor_summary_for_job(job_id)
-            total_hours = labor_summary.get("total_hours", 0.0)
+            total_parts = totals["material_cost"]
+            total_hours = totals["labor_hours"]
         else:
             total_parts = 0.0
             total_hours = 0.0
@@ -2300,6 +2675,75 @@ class Repository:
         """, (job_id, target_date))
         return len(rows) > 0
 
+    # ── Job Cost Ledger (v20) ─────────────────────────────────────
+
+    @staticmethod
+    def _ledger_range(job_id: int, date_from: str = None,
+                      date_to: str = None) -> tuple[str, list]:
+        """WHERE clause and params for a job's ledger date range."""
+        conditions = ["job_id = ?"]
+        params: list = [job_id]
+        if date_from:
+            conditions.append("day >= DATE(?)")
+            params.append(date_from)
+        if date_to:
+            conditions.append("day <= DATE(?)")
+            params.append(date_to)
+        return " AND ".join(conditions), params
+
+    def get_job_cost_totals(self, job_id: int, date_from: str = None,
+                            date_to: str = None) -> dict:
+        """Sum a job's cost ledger, optionally over a date range.
+
+        Returns material cost and quantity, consumption count, labor
+        hours and labor entry count.  Dates are inclusive and compared
+        by day.
+        """
+        where, params = self._ledger_range(job_id, date_from, date_to)
+        rows = self.db.execute(f"""
+            SELECT COALESCE(SUM(material_cost), 0.0) AS material_cost,
+                   COALESCE(SUM(material_quantity), 0) AS material_quantity,
+                   COALESCE(SUM(consumption_count), 0) AS consumption_count,
+                   COALESCE(SUM(labor_hours), 0.0) AS labor_hours,
+                   COALESCE(SUM(labor_entries), 0) AS labor_entries
+            FROM job_cost_ledger WHERE {where}
+        """, tuple(params))
+        return dict(rows[0])
+
+    def get_job_cost_ledger(self, job_id: int, date_from: str = None,
+                            date_to: str = None) -> list[dict]:
+        """Per-day ledger rows for a job, oldest first."""
+        where, params = self._ledger_range(job_id, date_from, date_to)
+        rows = self.db.execute(f"""
+            SELECT day, material_cost, material_quantity,
+                   consumption_count, labor_hours, labor_entries
+            FROM job_cost_ledger WHERE {where}
+            ORDER BY day
+        """, tuple(params))
+        return [dict(r) for r in rows]
+
+    def rebuild_job_cost_ledger(self, job_id: int = None):
+        """Recompute the cost ledger from job parts, consumption and labor.
+
+        Material used from trucks is re-booked on each consumption's
+        date, the rest of a job part on its assignment date.  Pass
+        *job_id* to rebuild a single job.
+        """
+        from .schema import JOB_COST_LEDGER_REBUILD_SQL
+
+        with self.db.get_connection() as conn:
+            if job_id is None:
+                conn.execute("DELETE FROM job_cost_ledger")
+                conn.execute(JOB_COST_LEDGER_REBUILD_SQL.format(where="1 = 1"))
+            else:
+                conn.execute(
+                    "DELETE FROM job_cost_ledger WHERE job_id = ?", (job_id,)
+                )
+                conn.execute(
+                    JOB_COST_LEDGER_REBUILD_SQL.format(where="job_id = ?"),
+                    (job_id,),
+                )
+
     # ── Labor Entries ─────────────────────────────────────────────
 
     def create_labor_entry(self, entry: LaborEntry) -> int:
@@ -2486,6 +2930,9 @@ class Repository:
             severity="info",
             source="labor",
         ))
+        self._publish(LaborChanged(
+            frozenset({entry_id}), frozenset({user_id}), frozenset({job_id}),
+        ))
         return entry_id
 
     def clock_out(self, entry_id: int,
@@ -2528,45 +2975,135 @@ class Repository:
             severity="info",
             source="labor",
         ))
+        self._publish(LaborChanged(
+            frozenset({entry_id}), frozenset({entry.user_id}),
+            frozenset({entry.job_id}),
+        ))
         return refreshed
 
     def get_labor_summary_for_job(self, job_id: int) -> dict:
         """Get labor summary: total hours, breakdown by category/user."""
-        rows = self.db.execute("""
-            SELECT
-                COALESCE(SUM(hours), 0) AS total_hours,
-                COUNT(*) AS entry_count
-            FROM labor_entries WHERE job_id = ?
-        """, (job_id,))
-        summary = dict(rows[0]) if rows else {
-            "total_hours": 0, "entry_count": 0
+        totals = self.get_labor_rollup(job_id=job_id)
+        summary = {
+            "total_hours": totals[0]["hours"],
+            "entry_count": totals[0]["entries"],
         }
+        summary["by_category"] = [
+            {
+                "sub_task_category": r["category"],
+                "hours": r["hours"],
+                "entries": r["entries"],
+            }
+            for r in self.get_labor_rollup(("category",), job_id=job_id)
+        ]
+        summary["by_user"] = [
+            {
+                "user_name": r["user_name"],
+                "hours": r["hours"],
+                "entries": r["entries"],
+            }
+            for r in self.get_labor_rollup(("user_id",), job_id=job_id)
+        ]
+        return summary
 
-        # By category
-        cat_rows = self.db.execute("""
-            SELECT sub_task_category,
-                   COALESCE(SUM(hours), 0) AS hours,
-                   COUNT(*) AS entries
-            FROM labor_entries WHERE job_id = ?
-            GROUP BY sub_task_category
-            ORDER BY hours DESC
-        """, (job_id,))
-        summary["by_category"] = [dict(r) for r in cat_rows]
+    # ── Labor Rollup (v21) ────────────────────────────────────────
 
-        # By user
-        user_rows = self.db.execute("""
-            SELECT u.display_name AS user_name,
-                   COALESCE(SUM(le.hours), 0) AS hours,
-                   COUNT(*) AS entries
-            FROM labor_entries le
-            JOIN users u ON le.user_id = u.id
-            WHERE le.job_id = ?
-            GROUP BY le.user_id
-            ORDER BY hours DESC
-        """, (job_id,))
-        summary["by_user"] = [dict(r) for r in user_rows]
+    # group_by name -> rollup expression
+    LABOR_ROLLUP_DIMENSIONS = {
+        "job_id": "lr.job_id",
+        "user_id": "lr.user_id",
+        "category": "lr.category",
+        "day": "lr.day",
+        "month": "SUBSTR(lr.day, 1, 7)",
+        "year": "SUBSTR(lr.day, 1, 4)",
+    }
 
-        return summary
+    def get_labor_rollup(
+        self, group_by: tuple = (), job_id: int = None,
+        user_id: int = None, category: str = None,
+        date_from: str = None, date_to: str = None,
+        include_open: bool = True,
+    ) -> list[dict]:
+        """Aggregate labor from the rollup table.
+
+        *group_by* is any combination of ``LABOR_ROLLUP_DIMENSIONS``
+        keys; an empty tuple returns a single totals row.  Each row has
+        the group keys plus hours, entries, overtime_hours and
+        overtime_entries, ordered by hours (highest first).  Grouping
+        by user_id or job_id also adds user_name or job_number.
+        Dates filter on the entry's start date and are inclusive.
+        Pass ``include_open=False`` to skip entries still clocked in.
+        """
+        unknown = set(group_by) - set(self.LABOR_ROLLUP_DIMENSIONS)
+        if unknown:
+            raise ValueError(
+                f"Unknown labor rollup dimension(s): {sorted(unknown)}"
+            )
+
+        conditions = []
+        params: list = []
+        for column, value in (("lr.job_id", job_id),
+                              ("lr.user_id", user_id),
+                              ("lr.category", category)):
+            if value is not None:
+                conditions.append(f"{column} = ?")
+                params.append(value)
+        if date_from:
+            conditions.append("lr.day >= ?")
+            params.append(str(date_from)[:10])
+        if date_to:
+            conditions.append("lr.day <= ?")
+            params.append(str(date_to)[:10])
+        if not include_open:
+            conditions.append("lr.is_open = 0")
+        where = " AND ".join(conditions) or "1 = 1"
+
+        select = [
+            f"{self.LABOR_ROLLUP_DIMENSIONS[d]} AS {d}" for d in group_by
+        ]
+        joins = ""
+        if "user_id" in group_by:
+            select.append("COALESCE(u.display_name, '') AS user_name")
+            joins += " LEFT JOIN users u ON u.id = lr.user_id"
+        if "job_id" in group_by:
+            select.append("COALESCE(j.job_number, '') AS job_number")
+            joins += " LEFT JOIN jobs j ON j.id = lr.job_id"
+        select += [
+            "COALESCE(SUM(lr.hours), 0) AS hours",
+            "COALESCE(SUM(lr.entries), 0) AS entries",
+            "COALESCE(SUM(lr.overtime_hours), 0) AS overtime_hours",
+            "COALESCE(SUM(lr.overtime_entries), 0) AS overtime_entries",
+        ]
+        sql = (
+            f"SELECT {', '.join(select)} "  # noqa: S608
+            f"FROM labor_rollup lr{joins} WHERE {where}"
+        )
+        if group_by:
+            keys = ", ".join(str(i + 1) for i in range(len(group_by)))
+            sql += f" GROUP BY {keys} HAVING SUM(lr.entries) > 0"
+            sql += f" ORDER BY hours DESC, {keys}"
+        rows = self.db.execute(sql, tuple(params))
+        return [dict(r) for r in rows]
+
+    def rebuild_labor_rollup(self, job_id: int = None):
+        """Recompute the labor rollup from labor_entries.
+
+        Pass *job_id* to rebuild a single job.
+        """
+        from .schema import LABOR_ROLLUP_REBUILD_SQL
+
+        with self.db.get_connection() as conn:
+            if job_id is None:
+                conn.execute("DELETE FROM labor_rollup")
+                conn.execute(LABOR_ROLLUP_REBUILD_SQL.format(where="1 = 1"))
+            else:
+                conn.execute(
+                    "DELETE FROM labor_rollup WHERE job_id = ?", (job_id,)
+                )
+                conn.execute(
+                    LABOR_ROLLUP_REBUILD_SQL.format(where="job_id = ?"),
+                    (job_id,),
+                )
 
     # ── Job Locations ─────────────────────────────────────────────
 
@@ -2763,6 +3300,78 @@ class Repository:
         """, (page_id,))
         return NotebookPage(**dict(rows[0])) if rows else None
 
+    def get_notebook_tree(
+        self, job_id: int, include_content: bool = False,
+    ) -> Optional[JobNotebook]:
+        """Load a job's notebook with all sections and pages in one query.
+
+        Sections are attached to ``notebook.sections`` and pages to each
+        ``section.pages``, in the same order as get_sections()/get_pages().
+        When include_content is False the page bodies are left empty;
+        fetch them on demand with get_page_by_id().
+        """
+        content_col = "np.content" if include_content else "''"
+        rows = self.db.execute(f"""
+            SELECT nb.id AS nb_id, nb.job_id AS nb_job_id,
+                   nb.title AS nb_title, nb.created_at AS nb_created_at,
+                   nb.updated_at AS nb_updated_at,
+                   COALESCE(j.job_number, '') AS nb_job_number,
+                   ns.id AS ns_id, ns.name AS ns_name,
+                   ns.sort_order AS ns_sort_order,
+                   ns.created_at AS ns_created_at,
+                   np.id AS np_id, np.title AS np_title,
+                   {content_col} AS np_content,
+                   np.photos AS np_photos,
+                   np.part_references AS np_part_references,
+                   np.created_by AS np_created_by,
+                   np.created_at AS np_created_at,
+                   np.updated_at AS np_updated_at,
+                   COALESCE(u.display_name, '') AS np_created_by_name
+            FROM job_notebooks nb
+            LEFT JOIN jobs j ON nb.job_id = j.id
+            LEFT JOIN notebook_sections ns ON ns.notebook_id = nb.id
+            LEFT JOIN notebook_pages np ON np.section_id = ns.id
+            LEFT JOIN users u ON np.created_by = u.id
+            WHERE nb.job_id = ?
+            ORDER BY ns.sort_order, ns.name, ns.id,
+                     np.created_at DESC, np.id
+        """, (job_id,))
+        if not rows:
+            return None
+
+        first = rows[0]
+        notebook = JobNotebook(
+            id=first["nb_id"], job_id=first["nb_job_id"],
+            title=first["nb_title"], created_at=first["nb_created_at"],
+            updated_at=first["nb_updated_at"],
+            job_number=first["nb_job_number"],
+        )
+        section = None
+        for r in rows:
+            if r["ns_id"] is None:
+                continue
+            if section is None or section.id != r["ns_id"]:
+                section = NotebookSection(
+                    id=r["ns_id"], notebook_id=notebook.id,
+                    name=r["ns_name"], sort_order=r["ns_sort_order"],
+                    created_at=r["ns_created_at"],
+                )
+                notebook.sections.append(section)
+            if r["np_id"] is None:
+                continue
+            section.pages.append(NotebookPage(
+                id=r["np_id"], section_id=section.id,
+                title=r["np_title"], content=r["np_content"],
+                photos=r["np_photos"],
+                part_references=r["np_part_references"],
+                created_by=r["np_created_by"],
+                created_at=r["np_created_at"],
+                updated_at=r["np_updated_at"],
+                section_name=section.name,
+                created_by_name=r["np_created_by_name"],
+            ))
+        return notebook
+
     def search_notebook_pages(
         self, query: str, job_id: int = None,
         section_id: int = None,
@@ -2901,14 +3510,12 @@ class Repository:
         # Parts / billing data
         billing = self.get_billing_data(job_id, date_from, date_to)
 
-        # Notes (all pages from this job's notebook)
-        notebook = self.get_notebook_for_job(job_id)
+        # Notes (all pages from this job's notebook, single query)
+        notebook = self.get_notebook_tree(job_id, include_content=True)
         notes_pages = []
         if notebook:
-            sections = self.get_sections(notebook.id)
-            for section in sections:
-                pages = self.get_pages(section.id)
-                for page in pages:
+            for section in notebook.sections:
+                for page in section.pages:
                     notes_pages.append({
                         "section": section.name,
                         "title": page.title,
@@ -2923,9 +3530,6 @@ class Repository:
         for le in labor:
             labor_photos.extend(le.photo_list)
 
-        # Assigned users
-        assignments = self.get_job_assignments(job_id)
-
         result = {
             "job": {
                 "job_number": job.job_number,
@@ -2958,10 +3562,8 @@ class Repository:
             "materials_subtotal": billing.get("subtotal", 0.0),
             "notes": notes_pages,
             "photos": labor_photos,
-            "assigned_users": [
-                {"name": a.user_name, "role": a.role}
-                for a in assignments
-            ],
+            # get_billing_data already loaded the assignments
+            "assigned_users": billing.get("assigned_users", []),
         }
 
         # For client reports, strip internal details
@@ -3146,19 +3748,17 @@ class Repository:
 
     # ── Purchase Orders ─────────────────────────────────────────────
 
-    def generate_order_number(self) -> str:
-        """Generate next sequential PO number like PO-2026-001."""
-        from datetime import datetime
+    def generate_order_number(self, peek: bool = False) -> str:
+        """Allocate the next PO number like PO-2026-001.
+
+        With *peek*, return it without reserving it (for display).
+        """
+        from datetime import datetime
         from wired_part.config import Config
-        prefix = Config.ORDER_NUMBER_PREFIX
-        year = datetime.now().year
-        rows = self.db.execute(
-            "SELECT COUNT(*) as cnt FROM purchase_orders "
-            "WHERE order_number LIKE ?",
-            (f"{prefix}-{year}-%",),
+        return self._next_document_number(
+            "purchase_orders", "order_number", Config.ORDER_NUMBER_PREFIX,
+            period=str(datetime.now().year), peek=peek,
         )
-        count = rows[0]["cnt"] + 1 if rows else 1
-        return f"{prefix}-{year}-{count:03d}"
 
     def create_purchase_order(self, order: PurchaseOrder) -> int:
         """Create a new purchase order (draft status)."""
@@ -3178,7 +3778,9 @@ class Repository:
                     order.expected_delivery,
                 ),
             )
-            return cursor.lastrowid
+            order_id = cursor.lastrowid
+        self._publish(OrdersChanged(frozenset({order_id})))
+        return order_id
 
     def get_purchase_order_by_id(self, order_id: int) -> Optional[PurchaseOrder]:
         """Get a single order with joined info and aggregates."""
@@ -3291,6 +3893,7 @@ class Repository:
                 order.id,
             ),
         )
+        self._publish(OrdersChanged(frozenset({order.id})))
 
     def submit_purchase_order(self, order_id: int):
         """Transition order from draft to submitted.
@@ -3308,6 +3911,7 @@ class Repository:
             "submitted_at = ? WHERE id = ? AND status = 'draft'",
             (datetime.now().isoformat(), order_id),
         )
+        self._publish(OrdersChanged(frozenset({order_id})))
 
     def cancel_purchase_order(self, order_id: int):
         """Cancel an order (only draft or submitted with no receipts)."""
@@ -3316,6 +3920,7 @@ class Repository:
             "WHERE id = ? AND status IN ('draft', 'submitted')",
             (order_id,),
         )
+        self._publish(OrdersChanged(frozenset({order_id})))
 
     def close_purchase_order(self, order_id: int, *, force: bool = False):
         """Manually close an order.
@@ -3343,6 +3948,7 @@ class Repository:
             "closed_at = ? WHERE id = ?",
             (datetime.now().isoformat(), order_id),
         )
+        self._publish(OrdersChanged(frozenset({order_id})))
 
     def delete_purchase_order(self, order_id: int):
         """Delete a draft order. Raises ValueError if not draft."""
@@ -3354,6 +3960,7 @@ class Repository:
         self.db.execute(
             "DELETE FROM purchase_orders WHERE id = ?", (order_id,)
         )
+        self._publish(OrdersChanged(frozenset({order_id})))
 
     # ── Purchase Order Items ────────────────────────────────────────
 
@@ -3463,6 +4070,8 @@ class Repository:
         Returns the number of items processed.
         """
         count = 0
+        part_ids: set[int] = set()
+        truck_ids: set[int] = set()
         with self.db.get_connection() as conn:
             # Verify order is in a receivable state
             po_row = conn.execute(
@@ -3533,15 +4142,18 @@ class Repository:
                 ).fetchone()
                 part_id = oi_row["part_id"]
                 unit_cost = oi_row["unit_cost"]
+                part_ids.add(part_id)
 
                 # Allocate to the target
                 if allocate_to == "warehouse":
                     conn.execute(
-                        "UPDATE parts SET quantity = quantity + ? "
+                        "UPDATE parts SET quantity = quantity + ?, "
+                        "updated_at = CURRENT_TIMESTAMP "
                         "WHERE id = ?",
                         (qty, part_id),
                     )
                 elif allocate_to == "truck" and truck_id:
+                    truck_ids.add(truck_id)
                     # Create pending truck transfer (v12: with supplier tracking)
                     conn.execute(
                         "INSERT INTO truck_transfers "
@@ -3553,14 +4165,16 @@ class Repository:
                     )
                     # Also add to warehouse first (transfer will deduct)
                     conn.execute(
-                        "UPDATE parts SET quantity = quantity + ? "
+                        "UPDATE parts SET quantity = quantity + ?, "
+                        "updated_at = CURRENT_TIMESTAMP "
                         "WHERE id = ?",
                         (qty, part_id),
                     )
                 elif allocate_to == "job" and job_id:
                     # Add to warehouse then consume for job
                     conn.execute(
-                        "UPDATE parts SET quantity = quantity + ? "
+                        "UPDATE parts SET quantity = quantity + ?, "
+                        "updated_at = CURRENT_TIMESTAMP "
                         "WHERE id = ?",
                         (qty, part_id),
                     )
@@ -3642,6 +4256,13 @@ class Repository:
                     (order_id,),
                 )
 
+        events = [
+            OrdersChanged(frozenset({order_id})),
+            PartsChanged(frozenset(part_ids)),
+        ]
+        if truck_ids:
+            events.append(TransfersChanged(truck_ids=frozenset(truck_ids)))
+        self._publish(*events)
         return count
 
     def get_receive_log(
@@ -3774,19 +4395,17 @@ class Repository:
 
     # ── Return Authorizations ──────────────────────────────────────
 
-    def generate_ra_number(self) -> str:
-        """Generate next sequential RA number like RA-2026-001."""
+    def generate_ra_number(self, peek: bool = False) -> str:
+        """Allocate the next RA number like RA-2026-001.
+
+        With *peek*, return it without reserving it (for display).
+        """
         from datetime import datetime
         from wired_part.config import Config
-        prefix = Config.RA_NUMBER_PREFIX
-        year = datetime.now().year
-        rows = self.db.execute(
-            "SELECT COUNT(*) as cnt FROM return_authorizations "
-            "WHERE ra_number LIKE ?",
-            (f"{prefix}-{year}-%",),
+        return self._next_document_number(
+            "return_authorizations", "ra_number", Config.RA_NUMBER_PREFIX,
+            period=str(datetime.now().year), peek=peek,
         )
-        count = rows[0]["cnt"] + 1 if rows else 1
-        return f"{prefix}-{year}-{count:03d}"
 
     def create_return_authorization(
         self, ra: ReturnAuthorization, items: list[ReturnAuthorizationItem]
@@ -3844,7 +4463,8 @@ class Repository:
                 )
                 # Deduct from warehouse
                 conn.execute(
-                    "UPDATE parts SET quantity = quantity - ? "
+                    "UPDATE parts SET quantity = quantity - ?, "
+                    "updated_at = CURRENT_TIMESTAMP "
                     "WHERE id = ?",
                     (item.quantity, item.part_id),
                 )
@@ -3860,16 +4480,13 @@ class Repository:
                 s.name AS supplier_name,
                 COALESCE(po.order_number, '') AS order_number,
                 COALESCE(u.display_name, '') AS created_by_name,
-                COALESCE(agg.item_count, 0) AS item_count
+                COALESCE(rs.item_count, 0) AS item_count,
+                COALESCE(rs.total_value, 0.0) AS total_value
             FROM return_authorizations ra
             JOIN suppliers s ON ra.supplier_id = s.id
             LEFT JOIN purchase_orders po ON ra.order_id = po.id
             LEFT JOIN users u ON ra.created_by = u.id
-            LEFT JOIN (
-                SELECT ra_id, COUNT(*) AS item_count
-                FROM return_authorization_items
-                GROUP BY ra_id
-            ) agg ON agg.ra_id = ra.id
+            LEFT JOIN return_stats rs ON rs.ra_id = ra.id
             WHERE ra.id = ?""",
             (ra_id,),
         )
@@ -3888,16 +4505,13 @@ class Repository:
                 s.name AS supplier_name,
                 COALESCE(po.order_number, '') AS order_number,
                 COALESCE(u.display_name, '') AS created_by_name,
-                COALESCE(agg.item_count, 0) AS item_count
+                COALESCE(rs.item_count, 0) AS item_count,
+                COALESCE(rs.total_value, 0.0) AS total_value
             FROM return_authorizations ra
             JOIN suppliers s ON ra.supplier_id = s.id
             LEFT JOIN purchase_orders po ON ra.order_id = po.id
             LEFT JOIN users u ON ra.created_by = u.id
-            LEFT JOIN (
-                SELECT ra_id, COUNT(*) AS item_count
-                FROM return_authorization_items
-                GROUP BY ra_id
-            ) agg ON agg.ra_id = ra.id"""
+            LEFT JOIN return_stats rs ON rs.ra_id = ra.id"""
         params = []
         if status:
             query += " WHERE ra.status = ?"
@@ -3981,7 +4595,8 @@ class Repository:
             ).fetchall()
             for item in items:
                 conn.execute(
-                    "UPDATE parts SET quantity = quantity + ? "
+                    "UPDATE parts SET quantity = quantity + ?, "
+                    "updated_at = CURRENT_TIMESTAMP "
                     "WHERE id = ?",
                     (item["quantity"], item["part_id"]),
                 )
@@ -3998,70 +4613,66 @@ class Repository:
         date_to: Optional[str] = None,
     ) -> dict:
         """Get order analytics: total spent, avg order size, etc."""
-        conditions = []
-        params = []
-        if date_from:
-            conditions.append("po.created_at >= ?")
-            params.append(date_from)
-        if date_to:
-            conditions.append("po.created_at <= ?")
-            params.append(date_to)
-
-        where = " WHERE " + " AND ".join(conditions) if conditions else ""
+        where, params = self._rollup_range(date_from, date_to)
 
         # Total orders and spending
-        rows = self.db.execute(
-            f"""SELECT COUNT(*) as total_orders,
-                COALESCE(SUM(agg.total_cost), 0) AS total_spent,
-                COALESCE(AVG(agg.total_cost), 0) AS avg_order_size
-            FROM purchase_orders po
-            LEFT JOIN (
-                SELECT order_id,
-                       SUM(quantity_ordered * unit_cost) AS total_cost
-                FROM purchase_order_items
-                GROUP BY order_id
-            ) agg ON agg.order_id = po.id
-            {where}""",
-            tuple(params),
-        )
+        rows = self.db.execute(f"""
+            SELECT COALESCE(SUM(order_count), 0) AS total_orders,
+                   COALESCE(SUM(ordered_value), 0) AS total_spent,
+                   COALESCE(SUM(item_orders), 0) AS item_orders
+            FROM order_rollup WHERE {where}
+        """, params)
+        row = rows[0]
         result = {
-            "total_orders": rows[0]["total_orders"] if rows else 0,
-            "total_spent": rows[0]["total_spent"] if rows else 0.0,
-            "avg_order_size": rows[0]["avg_order_size"] if rows else 0.0,
+            "total_orders": row["total_orders"],
+            "total_spent": row["total_spent"],
+            # Orders without items have no size, as with AVG() before
+            "avg_order_size": (
+                row["total_spent"] / row["item_orders"]
+                if row["item_orders"] else 0.0
+            ),
         }
 
         # Orders by status
-        status_rows = self.db.execute(
-            f"SELECT status, COUNT(*) as cnt "
-            f"FROM purchase_orders po {where} GROUP BY status",
-            tuple(params),
-        )
+        status_rows = self.db.execute(f"""
+            SELECT status, SUM(order_count) AS cnt
+            FROM order_rollup WHERE {where}
+            GROUP BY status HAVING cnt > 0
+        """, params)
         result["by_status"] = {
             r["status"]: r["cnt"] for r in status_rows
         }
 
-        # Top supplier
-        supplier_rows = self.db.execute(
-            f"""SELECT s.name, COUNT(*) as order_count
-            FROM purchase_orders po
-            JOIN suppliers s ON po.supplier_id = s.id
-            {where}
-            GROUP BY po.supplier_id
+        # Top supplier by order count
+        supplier_rows = self.db.execute(f"""
+            SELECT s.name, SUM(r.order_count) AS order_count
+            FROM order_rollup r
+            JOIN suppliers s ON r.supplier_id = s.id
+            WHERE {where}
+            GROUP BY r.supplier_id
+            HAVING order_count > 0
             ORDER BY order_count DESC
-            LIMIT 1""",
-            tuple(params),
-        )
+            LIMIT 1
+        """, params)
         result["top_supplier"] = (
             supplier_rows[0]["name"] if supplier_rows else "N/A"
         )
 
-        # Return rate
-        total_returns = self.db.execute(
-            "SELECT COUNT(*) as cnt FROM return_authorizations"
-        )
-        result["total_returns"] = (
-            total_returns[0]["cnt"] if total_returns else 0
-        )
+        # Returns raised in the same range
+        if date_from or date_to:
+            ra_where, ra_params = self._rollup_range(
+                date_from, date_to, column="DATE(created_at)",
+            )
+            total_returns = self.db.execute(
+                f"SELECT COUNT(*) AS cnt FROM return_authorizations "
+                f"WHERE {ra_where}",
+                ra_params,
+            )[0]["cnt"]
+        else:
+            total_returns = int(
+                self.get_stats_counters().get("returns.count", 0)
+            )
+        result["total_returns"] = total_returns
 
         return result
 
@@ -4267,9 +4878,15 @@ class Repository:
         self, user_id: int | None, action: str, entity_type: str,
         entity_id: int | None = None, entity_label: str = "",
         details: str = "",
-    ) -> int:
+        sync: bool = False,
+    ) -> int | None:
         """Record an activity log entry.
 
+        While a write-behind writer runs for this database (see
+        ``start_activity_writer``) the entry is queued and None is
+        returned; pass ``sync=True`` for entries that must be committed
+        before the call returns.
+
         Args:
             user_id: User who performed the action (None for system actions).
             action: Verb — 'created', 'updated', 'deleted', 'received',
@@ -4279,10 +4896,21 @@ class Repository:
             entity_id: Primary key of the affected entity.
             entity_label: Human-readable label, e.g. "Job #4521 - Main St".
             details: Optional JSON or text with extra context.
+            sync: Insert immediately even if a writer is running.
 
         Returns:
-            The id of the created log entry.
+            The id of the created log entry, or None when queued.
         """
+        from wired_part.database.activity_writer import get_writer
+
+        writer = get_writer(self.db)
+        if writer is not None and not sync:
+            try:
+                writer.submit(user_id, action, entity_type, entity_id,
+                              entity_label, details)
+                return None
+            except RuntimeError:
+                pass  # Writer closed during shutdown; write directly
         with self.db.get_connection() as conn:
             cursor = conn.execute(
                 "INSERT INTO activity_log "
@@ -4294,6 +4922,23 @@ class Repository:
             )
             return cursor.lastrowid
 
+    def start_activity_writer(self, **kwargs):
+        """Start batching activity log writes for this database file."""
+        from wired_part.database.activity_writer import start_writer
+        return start_writer(self.db, **kwargs)
+
+    def stop_activity_writer(self):
+        """Flush queued activity entries and return to direct inserts."""
+        from wired_part.database.activity_writer import stop_writer
+        stop_writer(self.db)
+
+    def flush_activity_log(self):
+        """Commit any activity entries still queued by the writer."""
+        from wired_part.database.activity_writer import get_writer
+        writer = get_writer(self.db)
+        if writer is not None:
+            writer.flush()
+
     def get_activity_log(
         self, entity_type: str | None = None,
         entity_id: int | None = None,
@@ -4304,10 +4949,13 @@ class Repository:
     ) -> list:
         """Retrieve activity log entries with optional filters.
 
-        Returns list of ActivityLogEntry objects.
+        Newest first, across the live table and archived segments;
+        segments are only opened when the live rows cannot fill *limit*
+        on their own.  Returns list of ActivityLogEntry objects.
         """
         from wired_part.database.models import ActivityLogEntry
 
+        self.flush_activity_log()
         clauses = []
         params: list = []
         if entity_type:
@@ -4320,10 +4968,10 @@ class Repository:
             clauses.append("al.user_id = ?")
             params.append(user_id)
         if date_from:
-            clauses.append("DATE(al.created_at) >= DATE(?)")
+            clauses.append("al.created_at >= DATE(?)")
             params.append(date_from)
         if date_to:
-            clauses.append("DATE(al.created_at) <= DATE(?)")
+            clauses.append("al.created_at < DATE(?, '+1 day')")
             params.append(date_to)
 
         where = " AND ".join(clauses) if clauses else "1=1"
@@ -4335,15 +4983,20 @@ class Repository:
             FROM activity_log al
             LEFT JOIN users u ON al.user_id = u.id
             WHERE {where}
-            ORDER BY al.created_at DESC
+            ORDER BY al.created_at DESC, al.id DESC
             LIMIT ?
         """, tuple(params))
+        entries = [dict(r) for r in rows]
+        entries = self._merge_archived_activity(
+            entries, limit, entity_type=entity_type, entity_id=entity_id,
+            user_id=user_id, date_from=date_from, date_to=date_to,
+        )
         return [
             ActivityLogEntry(**{
-                k: r[k] for k in r.keys()
+                k: v for k, v in entry.items()
                 if k in ActivityLogEntry.__dataclass_fields__
             })
-            for r in rows
+            for entry in entries
         ]
 
     def get_recent_activity(self, limit: int = 20) -> list:
@@ -4358,6 +5011,171 @@ class Repository:
             entity_type=entity_type, entity_id=entity_id, limit=limit
         )
 
+    # ── Activity Archive (v27) ────────────────────────────────────
+    #
+    # Entries older than ACTIVITY_ARCHIVE_DAYS move out of activity_log
+    # into immutable zlib JSON-lines segments (one per month per pass),
+    # indexed by activity_archive_segments.  get_activity_log() reads
+    # them transparently.
+
+    @staticmethod
+    def _activity_sort_key(entry: dict):
+        return (str(entry.get("created_at") or ""), entry.get("id") or 0)
+
+    def get_activity_archive_segments(self) -> list[dict]:
+        """Segment index rows, newest entries first."""
+        rows = self.db.execute(
+            "SELECT * FROM activity_archive_segments "
+            "ORDER BY last_created_at DESC, last_id DESC"
+        )
+        return [dict(r) for r in rows]
+
+    def _merge_archived_activity(self, entries: list[dict], limit: int,
+                                 **filters) -> list[dict]:
+        """Merge archived entries matching *filters* into *entries*."""
+        import json
+
+        from wired_part.database.activity_archive import (
+            archive_dir,
+            read_segment,
+        )
+
+        segments = self.get_activity_archive_segments()
+        if not segments:
+            return entries
+        date_from, date_to = filters["date_from"], filters["date_to"]
+        seen = {e["id"] for e in entries}
+        merged = list(entries)
+        folder = archive_dir(self.db)
+        for seg in segments:
+            if len(merged) >= limit:
+                merged.sort(key=self._activity_sort_key, reverse=True)
+                oldest_kept = str(merged[limit - 1].get("created_at") or "")
+                if str(seg["last_created_at"] or "") < oldest_kept:
+                    break
+            # Skip segments the filters rule out without decoding them
+            if date_from and str(seg["last_created_at"])[:10] < date_from:
+                continue
+            if date_to and str(seg["first_created_at"])[:10] > date_to:
+                continue
+            if (filters["entity_type"]
+                    and filters["entity_type"]
+                    not in json.loads(seg["entity_types"] or "[]")):
+                continue
+            if (filters["user_id"] is not None
+                    and filters["user_id"]
+                    not in json.loads(seg["user_ids"] or "[]")):
+                continue
+            for entry in read_segment(str(folder / seg["file_name"])):
+                if entry["id"] in seen:
+                    continue
+                if not self._activity_matches(entry, **filters):
+                    continue
+                seen.add(entry["id"])
+                merged.append(dict(entry))
+        merged.sort(key=self._activity_sort_key, reverse=True)
+        return merged[:limit]
+
+    @staticmethod
+    def _activity_matches(entry: dict, entity_type=None, entity_id=None,
+                          user_id=None, date_from=None,
+                          date_to=None) -> bool:
+        day = str(entry.get("created_at") or "")[:10]
+        return not (
+            (entity_type and entry["entity_type"] != entity_type)
+            or (entity_id is not None and entry["entity_id"] != entity_id)
+            or (user_id is not None and entry["user_id"] != user_id)
+            or (date_from and day < date_from)
+            or (date_to and day > date_to)
+        )
+
+    def archive_activity_log(self, older_than_days: int = None,
+                             batch_size: int = None) -> dict:
+        """Move up to *batch_size* entries older than *older_than_days*
+        into compressed monthly segments.
+
+        Segment files are written and renamed into place before the
+        entries are deleted, in one transaction with the index rows.
+        The deletes are kept out of the change journal: archiving is a
+        local storage decision, not a change to replicate.  The ids are
+        retired, so a peer's copy of an entry is not merged back in.
+
+        Returns ``{"archived": n, "segments": [file names]}``.
+        """
+        import json
+
+        from wired_part.database.activity_archive import (
+            archive_dir,
+            segment_name,
+            write_segment,
+        )
+        from wired_part.utils.constants import (
+            ACTIVITY_ARCHIVE_BATCH,
+            ACTIVITY_ARCHIVE_DAYS,
+        )
+        if older_than_days is None:
+            older_than_days = ACTIVITY_ARCHIVE_DAYS
+        batch_size = batch_size or ACTIVITY_ARCHIVE_BATCH
+
+        self.flush_activity_log()
+        rows = self.db.execute("""
+            SELECT al.*, COALESCE(u.display_name, '') AS user_name
+            FROM activity_log al
+            LEFT JOIN users u ON al.user_id = u.id
+            WHERE al.created_at < DATETIME('now', ?)
+            ORDER BY al.id
+            LIMIT ?
+        """, (f"-{int(older_than_days)} days", batch_size))
+        if not rows:
+            return {"archived": 0, "segments": []}
+
+        by_month: dict[str, list[dict]] = {}
+        for row in rows:
+            entry = dict(row)
+            by_month.setdefault(str(entry["created_at"])[:7], []).append(
+                entry
+            )
+
+        folder = archive_dir(self.db)
+        index_rows = []
+        for month, entries in sorted(by_month.items()):
+            name = segment_name(month, entries[0]["id"], entries[-1]["id"])
+            write_segment(folder / name, entries)
+            stamps = sorted(str(e["created_at"]) for e in entries)
+            index_rows.append((
+                month, name, entries[0]["id"], entries[-1]["id"],
+                stamps[0], stamps[-1], len(entries),
+                json.dumps(sorted({e["entity_type"] for e in entries})),
+                json.dumps(sorted(
+                    {e["user_id"] for e in entries
+                     if e["user_id"] is not None}
+                )),
+            ))
+
+        ids = [row["id"] for row in rows]
+        with self.db.get_connection() as conn:
+            conn.executemany("""
+                INSERT OR REPLACE INTO activity_archive_segments
+                    (month, file_name, first_id, last_id,
+                     first_created_at, last_created_at, entry_count,
+                     entity_types, user_ids)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, index_rows)
+            seq = self._journal_head(conn)
+            for start in range(0, len(ids), 500):
+                chunk = ids[start:start + 500]
+                marks = ", ".join("?" for _ in chunk)
+                conn.execute(
+                    f"DELETE FROM activity_log "  # noqa: S608
+                    f"WHERE id IN ({marks})",
+                    chunk,
+                )
+            self._unjournal_deletes(conn, "activity_log", seq)
+        return {
+            "archived": len(ids),
+            "segments": [r[1] for r in index_rows],
+        }
+
     # ── v12: Global Search ─────────────────────────────────────────
 
     def search_all(self, query: str) -> dict:
@@ -4735,6 +5553,7 @@ class Repository:
         Returns list of dicts with editor, old_message, new_message, timestamp.
         """
         import json
+        self.flush_activity_log()
         rows = self.db.execute("""
             SELECT al.*, COALESCE(u.display_name, '') AS user_name
             FROM activity_log al
@@ -5080,26 +5899,16 @@ class Repository:
     def get_dashboard_summary(self) -> dict:
         """Aggregate dashboard data: active jobs, clocked-in users,
         pending orders, unread notifications, and low-stock count."""
-        active_jobs = self.db.execute(
-            "SELECT COUNT(*) AS cnt FROM jobs WHERE status = 'active'"
-        )
+        counters = self.get_stats_counters()
         clocked_in = self.db.execute(
             "SELECT COUNT(DISTINCT user_id) AS cnt "
             "FROM labor_entries WHERE end_time IS NULL"
         )
-        pending_orders = self.db.execute(
-            "SELECT COUNT(*) AS cnt FROM purchase_orders "
-            "WHERE status IN ('draft', 'submitted', 'partial')"
-        )
-        low_stock = self.db.execute(
-            "SELECT COUNT(*) AS cnt FROM parts "
-            "WHERE quantity < min_quantity AND min_quantity > 0"
-        )
         return {
-            "active_jobs": active_jobs[0]["cnt"] if active_jobs else 0,
+            "active_jobs": int(counters.get("jobs.active", 0)),
             "clocked_in_users": clocked_in[0]["cnt"] if clocked_in else 0,
-            "pending_orders": pending_orders[0]["cnt"] if pending_orders else 0,
-            "low_stock_parts": low_stock[0]["cnt"] if low_stock else 0,
+            "pending_orders": int(counters.get("orders.pending", 0)),
+            "low_stock_parts": int(counters.get("parts.low_stock", 0)),
         }
 
     def get_low_stock_alerts(self) -> list[dict]:
@@ -5107,32 +5916,19 @@ class Repository:
 
         Returns combined list sorted by urgency (how far below min).
         """
-        # Warehouse low stock
-        warehouse = self.db.execute("""
-            SELECT p.id, p.part_number, p.name, p.quantity, p.min_quantity,
-                   'warehouse' AS location,
-                   '' AS location_name,
-                   (p.min_quantity - p.quantity) AS deficit
-            FROM parts p
-            WHERE p.quantity < p.min_quantity AND p.min_quantity > 0
-            ORDER BY deficit DESC
-        """)
-        # Truck low stock
-        truck = self.db.execute("""
-            SELECT p.id AS id, p.part_number, p.name,
-                   ti.quantity, ti.min_quantity,
-                   'truck' AS location,
-                   t.truck_number AS location_name,
-                   (ti.min_quantity - ti.quantity) AS deficit
-            FROM truck_inventory ti
-            JOIN parts p ON ti.part_id = p.id
-            JOIN trucks t ON ti.truck_id = t.id
-            WHERE ti.quantity < ti.min_quantity AND ti.min_quantity > 0
-            ORDER BY deficit DESC
+        rows = self.db.execute("""
+            SELECT p.id, p.part_number, p.name,
+                   ls.quantity, ls.min_quantity,
+                   CASE WHEN ls.truck_id = 0 THEN 'warehouse'
+                        ELSE 'truck' END AS location,
+                   COALESCE(t.truck_number, '') AS location_name,
+                   (ls.min_quantity - ls.quantity) AS deficit
+            FROM low_stock_state ls
+            JOIN parts p ON ls.part_id = p.id
+            LEFT JOIN trucks t ON ls.truck_id = t.id
+            ORDER BY deficit DESC, ls.truck_id
         """)
-        alerts = [dict(r) for r in warehouse] + [dict(r) for r in truck]
-        alerts.sort(key=lambda x: x["deficit"], reverse=True)
-        return alerts
+        return [dict(r) for r in rows]
 
     def get_spending_by_supplier(
         self, date_from: str = None, date_to: str = None,
@@ -5141,87 +5937,155 @@ class Repository:
 
         Returns [{supplier_name, supplier_id, total_spent, item_count}].
         """
-        conditions = ["rl.quantity_received > 0"]
-        params: list = []
-        if date_from:
-            conditions.append("DATE(rl.received_at) >= ?")
-            params.append(date_from[:10])
-        if date_to:
-            conditions.append("DATE(rl.received_at) <= ?")
-            params.append(date_to[:10])
-        where = " AND ".join(conditions)
-
+        where, params = self._rollup_range(date_from, date_to, "r.day")
         rows = self.db.execute(f"""
             SELECT s.id AS supplier_id,
                    s.name AS supplier_name,
-                   COALESCE(SUM(rl.quantity_received * oi.unit_cost), 0) AS total_spent,
-                   COUNT(DISTINCT rl.id) AS item_count
-            FROM receive_log rl
-            JOIN purchase_order_items oi ON rl.order_item_id = oi.id
-            JOIN purchase_orders po ON oi.order_id = po.id
-            JOIN suppliers s ON po.supplier_id = s.id
+                   COALESCE(SUM(r.received_value), 0) AS total_spent,
+                   COALESCE(SUM(r.receipt_count), 0) AS item_count
+            FROM spend_rollup r
+            JOIN suppliers s ON r.supplier_id = s.id
             WHERE {where}
             GROUP BY s.id
+            HAVING item_count > 0
             ORDER BY total_spent DESC
-        """, tuple(params))
+        """, params)
         return [dict(r) for r in rows]
 
-    def get_labor_analytics(
-        self, job_id: int = None, date_from: str = None, date_to: str = None,
-    ) -> dict:
-        """Labor analytics: hours by user, by category, and totals.
+    # ── Spend Analytics (v22) ───────────────────────────────────
 
-        Returns {total_hours, total_entries, by_user: [...], by_category: [...]}.
-        """
-        conditions = ["le.end_time IS NOT NULL"]
+    # Time-series bucket -> expression over a YYYY-MM-DD day column
+    SPEND_BUCKETS = {
+        "day": "{day}",
+        "week": "DATE({day}, 'weekday 0', '-6 days')",
+        "month": "SUBSTR({day}, 1, 7)",
+        "year": "SUBSTR({day}, 1, 4)",
+    }
+
+    @staticmethod
+    def _rollup_range(date_from: str = None, date_to: str = None,
+                      column: str = "day") -> tuple[str, tuple]:
+        """Inclusive day-range WHERE clause for the rollup tables."""
+        conditions = []
         params: list = []
-        if job_id is not None:
-            conditions.append("le.job_id = ?")
-            params.append(job_id)
         if date_from:
-            conditions.append("DATE(le.start_time) >= ?")
-            params.append(date_from[:10])
+            conditions.append(f"{column} >= ?")
+            params.append(str(date_from)[:10])
         if date_to:
-            conditions.append("DATE(le.start_time) <= ?")
-            params.append(date_to[:10])
-        where = " AND ".join(conditions)
+            conditions.append(f"{column} <= ?")
+            params.append(str(date_to)[:10])
+        return " AND ".join(conditions) or "1 = 1", tuple(params)
 
-        # Totals
-        totals_rows = self.db.execute(f"""
-            SELECT COALESCE(SUM(le.hours), 0) AS total_hours,
-                   COUNT(*) AS total_entries
-            FROM labor_entries le
+    def get_spend_analytics(
+        self, date_from: str = None, date_to: str = None,
+        bucket: str = "month", top_n: int = 5,
+    ) -> dict:
+        """Received-spend totals, a time series and top-N lists.
+
+        Reads only the daily spend rollup, so cost is bounded by the
+        number of (day, supplier, part) cells in the range rather than
+        by order history.  *bucket* is one of ``SPEND_BUCKETS`` (weeks
+        start on Monday).
+
+        Returns {total_spent, total_quantity, receipt_count,
+        series: [{period, total_spent, quantity}],
+        top_suppliers: [{supplier_id, supplier_name, total_spent}],
+        top_parts: [{part_id, part_number, name, total_spent,
+        quantity}]}.
+        """
+        if bucket not in self.SPEND_BUCKETS:
+            raise ValueError(f"Unknown spend bucket: {bucket!r}")
+        where, params = self._rollup_range(date_from, date_to, "r.day")
+
+        totals = self.db.execute(f"""
+            SELECT COALESCE(SUM(received_value), 0) AS total_spent,
+                   COALESCE(SUM(received_quantity), 0) AS total_quantity,
+                   COALESCE(SUM(receipt_count), 0) AS receipt_count
+            FROM spend_rollup r WHERE {where}
+        """, params)
+        result = dict(totals[0])
+
+        period = self.SPEND_BUCKETS[bucket].format(day="r.day")
+        series = self.db.execute(f"""
+            SELECT {period} AS period,
+                   SUM(r.received_value) AS total_spent,
+                   SUM(r.received_quantity) AS quantity
+            FROM spend_rollup r WHERE {where}
+            GROUP BY 1 HAVING SUM(r.receipt_count) > 0
+            ORDER BY 1
+        """, params)
+        result["series"] = [dict(r) for r in series]
+
+        suppliers = self.db.execute(f"""
+            SELECT r.supplier_id, COALESCE(s.name, '') AS supplier_name,
+                   SUM(r.received_value) AS total_spent
+            FROM spend_rollup r
+            LEFT JOIN suppliers s ON s.id = r.supplier_id
             WHERE {where}
-        """, tuple(params))
-        totals = dict(totals_rows[0]) if totals_rows else {
-            "total_hours": 0, "total_entries": 0
-        }
-
-        # By user
-        by_user_rows = self.db.execute(f"""
-            SELECT u.display_name, le.user_id,
-                   COALESCE(SUM(le.hours), 0) AS hours,
-                   COUNT(*) AS entries
-            FROM labor_entries le
-            JOIN users u ON le.user_id = u.id
+            GROUP BY r.supplier_id HAVING SUM(r.receipt_count) > 0
+            ORDER BY total_spent DESC, r.supplier_id
+            LIMIT ?
+        """, params + (top_n,))
+        result["top_suppliers"] = [dict(r) for r in suppliers]
+
+        parts = self.db.execute(f"""
+            SELECT r.part_id, COALESCE(p.part_number, '') AS part_number,
+                   COALESCE(p.name, '') AS name,
+                   SUM(r.received_value) AS total_spent,
+                   SUM(r.received_quantity) AS quantity
+            FROM spend_rollup r
+            LEFT JOIN parts p ON p.id = r.part_id
             WHERE {where}
-            GROUP BY le.user_id
-            ORDER BY hours DESC
-        """, tuple(params))
+            GROUP BY r.part_id HAVING SUM(r.receipt_count) > 0
+            ORDER BY total_spent DESC, r.part_id
+            LIMIT ?
+        """, params + (top_n,))
+        result["top_parts"] = [dict(r) for r in parts]
+        return result
 
-        # By category
-        by_cat_rows = self.db.execute(f"""
-            SELECT le.sub_task_category AS category,
-                   COALESCE(SUM(le.hours), 0) AS hours,
-                   COUNT(*) AS entries
-            FROM labor_entries le
-            WHERE {where}
-            GROUP BY le.sub_task_category
-            ORDER BY hours DESC
-        """, tuple(params))
+    def rebuild_spend_rollups(self):
+        """Recompute spend_rollup and order_rollup from source rows."""
+        from .schema import ORDER_ROLLUP_REBUILD_SQL, SPEND_ROLLUP_REBUILD_SQL
+
+        with self.db.get_connection() as conn:
+            conn.execute("DELETE FROM spend_rollup")
+            conn.execute(SPEND_ROLLUP_REBUILD_SQL)
+            conn.execute("DELETE FROM order_rollup")
+            conn.execute(ORDER_ROLLUP_REBUILD_SQL)
 
-        totals["by_user"] = [dict(r) for r in by_user_rows]
-        totals["by_category"] = [dict(r) for r in by_cat_rows]
+    def get_labor_analytics(
+        self, job_id: int = None, date_from: str = None, date_to: str = None,
+    ) -> dict:
+        """Labor analytics: hours by user, by category, and totals.
+
+        Returns {total_hours, total_entries, by_user: [...], by_category: [...]}.
+        """
+        scope = {
+            "job_id": job_id, "date_from": date_from, "date_to": date_to,
+            "include_open": False,
+        }
+        totals_row = self.get_labor_rollup(**scope)[0]
+        totals = {
+            "total_hours": totals_row["hours"],
+            "total_entries": totals_row["entries"],
+        }
+        totals["by_user"] = [
+            {
+                "display_name": r["user_name"],
+                "user_id": r["user_id"],
+                "hours": r["hours"],
+                "entries": r["entries"],
+            }
+            for r in self.get_labor_rollup(("user_id",), **scope)
+        ]
+        totals["by_category"] = [
+            {
+                "category": r["category"],
+                "hours": r["hours"],
+                "entries": r["entries"],
+            }
+            for r in self.get_labor_rollup(("category",), **scope)
+        ]
         return totals
 
     def get_truck_utilization(self) -> list[dict]:
@@ -5231,25 +6095,257 @@ class Repository:
         pending transfers count.
         """
         rows = self.db.execute("""
-            SELECT t.id, t.truck_number, t.name,
+            SELECT t.id, t.truck_number, t.name, t.is_active,
                    COALESCE(u.display_name, '') AS assigned_to,
-                   (SELECT COUNT(*) FROM truck_inventory ti
-                    WHERE ti.truck_id = t.id AND ti.quantity > 0) AS unique_parts,
-                   (SELECT COALESCE(SUM(ti.quantity), 0)
-                    FROM truck_inventory ti
-                    WHERE ti.truck_id = t.id) AS total_quantity,
-                   (SELECT COALESCE(SUM(ti.quantity * p.unit_cost), 0)
-                    FROM truck_inventory ti
-                    JOIN parts p ON ti.part_id = p.id
-                    WHERE ti.truck_id = t.id) AS inventory_value,
-                   (SELECT COUNT(*) FROM truck_transfers tt
-                    WHERE tt.truck_id = t.id AND tt.status = 'pending') AS pending_transfers
+                   COALESCE(ts.unique_parts, 0) AS unique_parts,
+                   COALESCE(ts.total_quantity, 0) AS total_quantity,
+                   COALESCE(ts.inventory_value, 0) AS inventory_value,
+                   COALESCE(ts.pending_transfers, 0) AS pending_transfers
             FROM trucks t
+            LEFT JOIN truck_stats ts ON ts.truck_id = t.id
             LEFT JOIN users u ON t.assigned_user_id = u.id
             ORDER BY inventory_value DESC
         """)
         return [dict(r) for r in rows]
 
+    def rebuild_truck_and_return_stats(self):
+        """Recompute truck_stats and return_stats from source rows."""
+        from .schema import RETURN_STATS_REBUILD_SQL, TRUCK_STATS_REBUILD_SQL
+
+        with self.db.get_connection() as conn:
+            conn.execute("DELETE FROM truck_stats")
+            conn.execute(TRUCK_STATS_REBUILD_SQL)
+            conn.execute("DELETE FROM return_stats")
+            conn.execute(RETURN_STATS_REBUILD_SQL)
+
+    # ── Low Stock State (v24) ───────────────────────────────────
+
+    def get_low_stock_events(self, after_id: int = 0,
+                             limit: int = 100) -> list[dict]:
+        """Low-stock enter/exit transitions with an id above *after_id*.
+
+        Callers keep the last id they saw and poll for newer events,
+        oldest first.  ``location`` is 'warehouse' or 'truck'.
+        """
+        rows = self.db.execute("""
+            SELECT e.id, e.part_id, e.truck_id, e.transition,
+                   e.quantity, e.min_quantity, e.created_at,
+                   p.part_number, p.name,
+                   CASE WHEN e.truck_id = 0 THEN 'warehouse'
+                        ELSE 'truck' END AS location,
+                   COALESCE(t.truck_number, '') AS location_name
+            FROM low_stock_events e
+            JOIN parts p ON e.part_id = p.id
+            LEFT JOIN trucks t ON e.truck_id = t.id
+            WHERE e.id > ?
+            ORDER BY e.id
+            LIMIT ?
+        """, (after_id, limit))
+        return [dict(r) for r in rows]
+
+    def get_last_low_stock_event_id(self) -> int:
+        """Highest transition id so far (0 when there are none)."""
+        rows = self.db.execute(
+            "SELECT COALESCE(MAX(id), 0) AS last_id FROM low_stock_events"
+        )
+        return rows[0]["last_id"] if rows else 0
+
+    def notify_low_stock_transitions(self) -> int:
+        """Broadcast one notification per new warehouse low-stock crossing.
+
+        Returns the number of notifications created.
+        """
+        with self.db.get_connection() as conn:
+            return self._notify_low_stock_transitions(conn)
+
+    @staticmethod
+    def _notify_low_stock_transitions(conn) -> int:
+        last_id = conn.execute(
+            "SELECT MAX(id) FROM low_stock_events WHERE notified = 0"
+        ).fetchone()[0]
+        if last_id is None:
+            return 0
+        pending = conn.execute("""
+            SELECT e.part_id, p.part_number,
+                   ls.quantity, ls.min_quantity
+            FROM low_stock_events e
+            JOIN parts p ON e.part_id = p.id
+            LEFT JOIN low_stock_state ls
+                ON ls.part_id = e.part_id AND ls.truck_id = 0
+            WHERE e.notified = 0 AND e.id <= ?
+              AND e.transition = 'enter' AND e.truck_id = 0
+            ORDER BY e.id
+        """, (last_id,)).fetchall()
+        created = 0
+        announced = set()
+        for row in pending:
+            # Only crossings still below minimum are worth announcing
+            if row["quantity"] is None or row["part_id"] in announced:
+                continue
+            announced.add(row["part_id"])
+            deficit = row["min_quantity"] - row["quantity"]
+            conn.execute("""
+                INSERT INTO notifications
+                    (user_id, title, message, severity, source)
+                VALUES (NULL, ?, ?, 'warning', 'system')
+            """, (
+                f"Low Stock: {row['part_number']}",
+                f"Warehouse stock for {row['part_number']} "
+                f"is at {row['quantity']} "
+                f"(min: {row['min_quantity']}, "
+                f"need {deficit} more). "
+                f"Consider reordering.",
+            ))
+            created += 1
+        conn.execute(
+            "UPDATE low_stock_events SET notified = 1 "
+            "WHERE notified = 0 AND id <= ?",
+            (last_id,),
+        )
+        return created
+
+    def prune_low_stock_events(
+        self, retention_days: int = None, max_entries: int = None,
+    ) -> int:
+        """Drop old low-stock transitions.  Returns the number deleted.
+
+        Events older than *retention_days*, or beyond the newest
+        *max_entries*, are deleted once they have been announced; events
+        still waiting for notify_low_stock_transitions() are kept.
+        """
+        from wired_part.utils.constants import (
+            LOW_STOCK_EVENT_MAX_ENTRIES,
+            LOW_STOCK_EVENT_RETENTION_DAYS,
+        )
+        if retention_days is None:
+            retention_days = LOW_STOCK_EVENT_RETENTION_DAYS
+        if max_entries is None:
+            max_entries = LOW_STOCK_EVENT_MAX_ENTRIES
+
+        with self.db.get_connection() as conn:
+            cutoff = conn.execute("""
+                SELECT MAX(
+                    COALESCE((SELECT MAX(id) FROM low_stock_events
+                              WHERE created_at < DATETIME('now', ?)), 0),
+                    COALESCE((SELECT id FROM low_stock_events
+                              ORDER BY id DESC LIMIT 1 OFFSET ?), 0)
+                )
+            """, (f"-{int(retention_days)} days", max_entries)).fetchone()[0]
+            if not cutoff:
+                return 0
+            return conn.execute(
+                "DELETE FROM low_stock_events "
+                "WHERE id <= ? AND notified = 1",
+                (cutoff,),
+            ).rowcount
+
+    def rebuild_low_stock_state(self):
+        """Recompute low_stock_state from parts and truck inventory."""
+        from .schema import LOW_STOCK_STATE_REBUILD_SQL
+
+        with self.db.get_connection() as conn:
+            conn.execute("DELETE FROM low_stock_state")
+            conn.execute(LOW_STOCK_STATE_REBUILD_SQL)
+
+    # ── Change Journal (v25) ────────────────────────────────────
+
+    def get_change_journal_seq(self) -> int:
+        """Sequence number of the newest journal entry (0 if none)."""
+        rows = self.db.execute("""
+            SELECT MAX(
+                COALESCE((SELECT MAX(seq) FROM change_journal), 0),
+                (SELECT floor_seq FROM change_journal_state WHERE id = 1)
+            ) AS seq
+        """)
+        return (rows[0]["seq"] or 0) if rows else 0
+
+    def changes_since(self, seq: int = 0, tables: list[str] = None,
+                      limit: int = None) -> list[dict]:
+        """Journal entries with a sequence number above *seq*, oldest first.
+
+        Each entry is ``{seq, table_name, row_id, op, device_id,
+        created_at}``; ``device_id`` is the device the write originated
+        on.  Raises ValueError when entries after *seq* have already been
+        expired by compaction, in which case the caller must fall back
+        to a full refresh.
+        """
+        floor = self.db.execute(
+            "SELECT floor_seq FROM change_journal_state WHERE id = 1"
+        )
+        if floor and seq < floor[0]["floor_seq"]:
+            raise ValueError(
+                f"Change journal has been compacted past seq {seq} "
+                f"(oldest available: {floor[0]['floor_seq']}); "
+                f"a full refresh is required."
+            )
+        sql = (
+            "SELECT seq, table_name, row_id, op, "
+            "COALESCE(device_id, ?) AS device_id, created_at "
+            "FROM change_journal WHERE seq > ?"
+        )
+        params: list = [self.device_id, seq]
+        if tables:
+            sql += f" AND table_name IN ({', '.join('?' for _ in tables)})"
+            params.extend(tables)
+        sql += " ORDER BY seq"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        return [dict(r) for r in self.db.execute(sql, tuple(params))]
+
+    def compact_change_journal(
+        self, retention_days: int = None, max_entries: int = None,
+    ) -> dict:
+        """Drop superseded and expired journal entries.
+
+        An entry is superseded when a newer entry exists for the same
+        row; consumers only need the latest one, so removing it never
+        hides a change.  Entries older than *retention_days*, or beyond
+        the newest *max_entries*, are expired and raise the floor that
+        changes_since() checks against.
+
+        Returns ``{"superseded": n, "expired": n}``.
+        """
+        from wired_part.utils.constants import (
+            CHANGE_JOURNAL_MAX_ENTRIES,
+            CHANGE_JOURNAL_RETENTION_DAYS,
+        )
+        if retention_days is None:
+            retention_days = CHANGE_JOURNAL_RETENTION_DAYS
+        if max_entries is None:
+            max_entries = CHANGE_JOURNAL_MAX_ENTRIES
+
+        with self.db.get_connection() as conn:
+            superseded = conn.execute("""
+                DELETE FROM change_journal
+                WHERE EXISTS (
+                    SELECT 1 FROM change_journal newer
+                    WHERE newer.table_name = change_journal.table_name
+                      AND newer.row_id = change_journal.row_id
+                      AND newer.seq > change_journal.seq
+                )
+            """).rowcount
+
+            cutoff = conn.execute("""
+                SELECT MAX(
+                    COALESCE((SELECT MAX(seq) FROM change_journal
+                              WHERE created_at < DATETIME('now', ?)), 0),
+                    COALESCE((SELECT seq FROM change_journal
+                              ORDER BY seq DESC LIMIT 1 OFFSET ?), 0)
+                )
+            """, (f"-{int(retention_days)} days", max_entries)).fetchone()[0]
+            expired = 0
+            if cutoff:
+                expired = conn.execute(
+                    "DELETE FROM change_journal WHERE seq <= ?", (cutoff,)
+                ).rowcount
+                conn.execute(
+                    "UPDATE change_journal_state "
+                    "SET floor_seq = MAX(floor_seq, ?) WHERE id = 1",
+                    (cutoff,),
+                )
+        return {"superseded": superseded, "expired": expired}
+
     # ── Loop 26: Paginated parts listing ──────────────────────────────
 
     _PARTS_SORT_COLUMNS = {
@@ -5475,12 +6571,9 @@ class Repository:
         rows = self.db.execute("""
             SELECT ra.status,
                    COUNT(*) AS cnt,
-                   COALESCE(SUM(
-                       (SELECT COALESCE(SUM(rai.quantity * rai.unit_cost), 0)
-                        FROM return_authorization_items rai
-                        WHERE rai.ra_id = ra.id)
-                   ), 0) AS total_value
+                   COALESCE(SUM(rs.total_value), 0) AS total_value
             FROM return_authorizations ra
+            LEFT JOIN return_stats rs ON rs.ra_id = ra.id
             GROUP BY ra.status
         """)
 
@@ -5495,7 +6588,8 @@ class Repository:
             total_returns += r["cnt"]
             total_value += r["total_value"]
 
-        # Aging: open RAs older than 30 days
+        # Aging: open RAs older than 30 days.  The cutoff is a plain
+        # range on (status, created_at) so only aged rows are visited.
         aging_rows = self.db.execute("""
             SELECT ra.id, ra.ra_number, ra.status, ra.created_at,
                    s.name AS supplier_name,
@@ -5503,7 +6597,7 @@ class Repository:
             FROM return_authorizations ra
             JOIN suppliers s ON ra.supplier_id = s.id
             WHERE ra.status IN ('initiated', 'picked_up')
-              AND julianday('now') - julianday(ra.created_at) > 30
+              AND ra.created_at < DATETIME('now', '-30 days')
             ORDER BY age_days DESC
         """)
         aging = [dict(r) for r in aging_rows]
@@ -5517,123 +6611,315 @@ class Repository:
 
     # ── Loop 30: App-wide statistics ──────────────────────────────────
 
-    def get_app_statistics(self) -> dict:
+    def get_app_statistics(self, user_id: int | None = None) -> dict:
         """Return comprehensive application-wide statistics.
 
-        Useful for settings/about page, system health checks.
+        Useful for settings/about page, system health checks.  Read
+        state is per user, so notifications include an ``unread`` count
+        only when *user_id* is given.
         """
-        stats = {}
+        c = self.get_stats_counters()
 
-        def _row(result):
-            """Convert first row to dict, or empty dict if no results."""
-            return dict(result[0]) if result else {}
+        def _count(name):
+            return int(c.get(name, 0))
 
-        # Parts
-        row = _row(self.db.execute(
-            "SELECT COUNT(*) AS cnt, "
-            "COALESCE(SUM(quantity), 0) AS total_qty, "
-            "COALESCE(SUM(quantity * unit_cost), 0) AS total_value "
-            "FROM parts"
-        ))
-        stats["parts"] = {
-            "count": row.get("cnt", 0),
-            "total_quantity": row.get("total_qty", 0),
-            "total_value": round(row.get("total_value", 0), 2),
-        }
+        notifications = {"count": _count("notifications.count")}
+        if user_id is not None:
+            notifications["unread"] = self.get_unread_count(user_id)
 
-        # Jobs
-        row = _row(self.db.execute(
-            "SELECT COUNT(*) AS cnt, "
-            "SUM(CASE WHEN status = 'active' THEN 1 ELSE 0 END) AS active, "
-            "SUM(CASE WHEN status = 'completed' THEN 1 ELSE 0 END) AS completed "
-            "FROM jobs"
-        ))
-        stats["jobs"] = {
-            "count": row.get("cnt", 0),
-            "active": row.get("active", 0) or 0,
-            "completed": row.get("completed", 0) or 0,
+        return {
+            "parts": {
+                "count": _count("parts.count"),
+                "total_quantity": _count("parts.total_quantity"),
+                "total_value": round(c.get("parts.total_value", 0), 2),
+            },
+            "jobs": {
+                "count": _count("jobs.count"),
+                "active": _count("jobs.active"),
+                "completed": _count("jobs.completed"),
+            },
+            "users": {"count": _count("users.count")},
+            "trucks": {"count": _count("trucks.count")},
+            "suppliers": {"count": _count("suppliers.count")},
+            "orders": {
+                "count": _count("orders.count"),
+                "open": _count("orders.open"),
+            },
+            "labor": {
+                "entries": _count("labor.entries"),
+                "total_hours": round(c.get("labor.total_hours", 0), 1),
+            },
+            "transfers": {
+                "count": _count("transfers.count"),
+                "pending": _count("transfers.pending"),
+            },
+            "returns": {
+                "count": _count("returns.count"),
+                "open": _count("returns.open"),
+            },
+            "notebooks": {"pages": _count("notebooks.pages")},
+            "activity_log": {"entries": _count("activity_log.entries")},
+            "notifications": notifications,
         }
 
-        # Users
-        row = _row(self.db.execute("SELECT COUNT(*) AS cnt FROM users"))
-        stats["users"] = {"count": row.get("cnt", 0)}
-
-        # Trucks
-        row = _row(self.db.execute("SELECT COUNT(*) AS cnt FROM trucks"))
-        stats["trucks"] = {"count": row.get("cnt", 0)}
-
-        # Suppliers
-        row = _row(self.db.execute("SELECT COUNT(*) AS cnt FROM suppliers"))
-        stats["suppliers"] = {"count": row.get("cnt", 0)}
-
-        # Purchase orders
-        row = _row(self.db.execute(
-            "SELECT COUNT(*) AS cnt, "
-            "SUM(CASE WHEN status IN ('draft', 'submitted') THEN 1 ELSE 0 END) AS open_orders "
-            "FROM purchase_orders"
-        ))
-        stats["orders"] = {
-            "count": row.get("cnt", 0),
-            "open": row.get("open_orders", 0) or 0,
-        }
+    # ── Stats counters (v19) ────────────────────────────────────
 
-        # Labor entries
-        row = _row(self.db.execute(
-            "SELECT COUNT(*) AS cnt, "
-            "COALESCE(SUM(hours), 0) AS total_hours "
-            "FROM labor_entries"
-        ))
-        stats["labor"] = {
-            "entries": row.get("cnt", 0),
-            "total_hours": round(row.get("total_hours", 0), 1),
-        }
+    def get_stats_counters(self) -> dict[str, float]:
+        """Return every trigger-maintained summary counter by name."""
+        rows = self.db.execute("SELECT name, value FROM stats_counters")
+        return {row["name"]: row["value"] for row in rows}
 
-        # Transfers
-        row = _row(self.db.execute(
-            "SELECT COUNT(*) AS cnt, "
-            "SUM(CASE WHEN status = 'pending' THEN 1 ELSE 0 END) AS pending "
-            "FROM truck_transfers"
-        ))
-        stats["transfers"] = {
-            "count": row.get("cnt", 0),
-            "pending": row.get("pending", 0) or 0,
-        }
+    def verify_stats_counters(self, repair: bool = True) -> dict:
+        """Recompute every counter from its source table and compare.
 
-        # Return authorizations
-        row = _row(self.db.execute(
-            "SELECT COUNT(*) AS cnt, "
-            "SUM(CASE WHEN status IN ('initiated', 'picked_up') THEN 1 ELSE 0 END) AS open_returns "
-            "FROM return_authorizations"
-        ))
-        stats["returns"] = {
-            "count": row.get("cnt", 0),
-            "open": row.get("open_returns", 0) or 0,
-        }
+        Returns ``{name: (stored, actual)}`` for each counter that has
+        drifted (e.g. rows written while triggers were missing, or
+        floating-point error in running totals).  When *repair* is true
+        the stored values are overwritten with the recomputed ones.
 
-        # Notebook pages
-        row = _row(self.db.execute(
-            "SELECT COUNT(*) AS cnt FROM notebook_pages"
-        ))
-        stats["notebooks"] = {"pages": row.get("cnt", 0)}
+        Stored values are read, compared and repaired in one transaction
+        (``BEGIN IMMEDIATE`` when repairing), so a write committed midway
+        can neither show up as drift nor be overwritten with a stale
+        total.
+        """
+        from .schema import STATS_COUNTERS, stats_counter_scan_sql
 
-        # Activity log
-        row = _row(self.db.execute(
-            "SELECT COUNT(*) AS cnt FROM activity_log"
-        ))
-        stats["activity_log"] = {"entries": row.get("cnt", 0)}
+        drift = {}
+        with self.db.get_connection() as conn:
+            conn.execute("BEGIN IMMEDIATE" if repair else "BEGIN")
+            stored = {
+                row["name"]: row["value"] for row in conn.execute(
+                    "SELECT name, value FROM stats_counters"
+                )
+            }
+            for name in STATS_COUNTERS:
+                actual = conn.execute(
+                    stats_counter_scan_sql(name)
+                ).fetchone()["value"] or 0
+                current = stored.get(name)
+                if current is None or abs(current - actual) > 1e-6 * max(
+                    1.0, abs(actual)
+                ):
+                    drift[name] = (current, actual)
+            if repair:
+                for name, (_, actual) in drift.items():
+                    conn.execute(
+                        "INSERT INTO stats_counters (name, value) "
+                        "VALUES (?, ?) ON CONFLICT(name) "
+                        "DO UPDATE SET value = excluded.value",
+                        (name, actual),
+                    )
+        return drift
+
+    # ── Sequences (v18) ─────────────────────────────────────────
+
+    # Values reserved per device at a time while sync is enabled, so
+    # devices that create records between syncs never hand out the
+    # same number.
+    SEQUENCE_BLOCK_SIZE = 100
+    # Blocks are striped across this many slots; each device claims
+    # only blocks in the slot derived from its device id, so devices
+    # that have never synced still draw from different ranges.
+    SEQUENCE_DEVICE_SLOTS = 64
+
+    def next_sequence_value(
+        self, name: str, period: str = "", count: int = 1,
+        seed=0,
+    ) -> int:
+        """Atomically reserve *count* consecutive values of a sequence.
 
-        # Notifications
-        row = _row(self.db.execute(
-            "SELECT COUNT(*) AS cnt, "
-            "SUM(CASE WHEN is_read = 0 THEN 1 ELSE 0 END) AS unread "
-            "FROM notifications"
-        ))
-        stats["notifications"] = {
-            "count": row.get("cnt", 0),
-            "unread": row.get("unread", 0) or 0,
-        }
+        Returns the first reserved value.  Counters are kept per
+        (name, period, device) in the ``sequences`` table and updated
+        under ``BEGIN IMMEDIATE``, so concurrent windows or processes
+        never receive the same value.
+
+        *seed* is the highest value already in use; it is only consulted
+        when the counter row is first created and may be a callable
+        taking the open connection (for a one-time scan of legacy data).
+
+        While sync is enabled, values are handed out from blocks of
+        SEQUENCE_BLOCK_SIZE reserved for this device (see
+        ``_sequence_block``), so devices do not collide between syncs;
+        *count* may then not exceed one block.
+        """
+        if count < 1:
+            raise ValueError("count must be at least 1")
+        device_id = self.device_id
+        seq_id = f"{name}:{period}:{device_id}"
+
+        with self.db.get_connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            row, start, block_start, block_end = self._sequence_next(
+                conn, seq_id, name, period, count, seed,
+            )
+
+            if row is None:
+                conn.execute("""
+                    INSERT INTO sequences
+                        (id, name, period, device_id, next_value,
+                         block_start, block_end)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                """, (
+                    seq_id, name, period, device_id, start + count,
+                    block_start or start, block_end,
+                ))
+            elif block_start is not None:
+                conn.execute("""
+                    UPDATE sequences
+                    SET next_value = ?, block_start = ?, block_end = ?,
+                        updated_at = CURRENT_TIMESTAMP
+                    WHERE id = ?
+                """, (start + count, block_start, block_end, seq_id))
+            else:
+                conn.execute("""
+                    UPDATE sequences
+                    SET next_value = ?, block_end = ?,
+                        updated_at = CURRENT_TIMESTAMP
+                    WHERE id = ?
+                """, (start + count, block_end, seq_id))
+            return start
+
+    def peek_sequence_value(
+        self, name: str, period: str = "", seed=0,
+    ) -> int:
+        """The value ``next_sequence_value`` would return, unreserved.
+
+        For display only (e.g. a new-record dialog): another window or
+        device may take the value first, so allocate at insert time.
+        """
+        seq_id = f"{name}:{period}:{self.device_id}"
+        with self.db.get_connection() as conn:
+            return self._sequence_next(conn, seq_id, name, period, 1, seed)[1]
 
-        return stats
+    def _sequence_next(
+        self, conn, seq_id: str, name: str, period: str, count: int, seed,
+    ):
+        """``(row, start, block_start, block_end)`` for the next values.
+
+        *row* is the counter's current row (None if it does not exist
+        yet) and *block_start* is set when a new block must be claimed.
+        Reads only; the caller writes the counter back.
+        """
+        from wired_part.config import Config
+        use_blocks = bool(Config.SYNC_ENABLED)
+        row = conn.execute(
+            "SELECT next_value, block_end FROM sequences WHERE id = ?",
+            (seq_id,),
+        ).fetchone()
+
+        if row is None:
+            floor = seed(conn) if callable(seed) else int(seed or 0)
+            if not use_blocks:
+                floor = max(floor, self._sequence_high_water(
+                    conn, name, period))
+            start = floor + 1
+        else:
+            start = row["next_value"]
+
+        block_start = None
+        block_end = row["block_end"] if row else None
+        if use_blocks and (
+            block_end is None or start + count - 1 > block_end
+        ):
+            if count > self.SEQUENCE_BLOCK_SIZE:
+                raise ValueError(
+                    "count may not exceed SEQUENCE_BLOCK_SIZE "
+                    "while sync is enabled"
+                )
+            block_start = self._sequence_block(
+                conn, seq_id, name, period, start - 1,
+            )
+            block_end = block_start + self.SEQUENCE_BLOCK_SIZE - 1
+            start = block_start
+        elif not use_blocks:
+            block_end = None
+        return row, start, block_start, block_end
+
+    def _sequence_block(
+        self, conn, seq_id: str, name: str, period: str, floor: int,
+    ) -> int:
+        """First value of the next block this device may claim above *floor*.
+
+        Block *k* holds values ``k * SEQUENCE_BLOCK_SIZE + 1`` onwards and
+        belongs to slot ``k % SEQUENCE_DEVICE_SLOTS``; a device only claims
+        blocks in the slot hashed from its id, so unsynced devices draw
+        from disjoint ranges unless their ids share a slot.  Blocks that
+        overlap any range another known device has used or reserved are
+        skipped, which also separates synced devices sharing a slot.
+        """
+        size = self.SEQUENCE_BLOCK_SIZE
+        slots = self.SEQUENCE_DEVICE_SLOTS
+        slot = int(hashlib.sha256(
+            self.device_id.encode("utf-8")
+        ).hexdigest(), 16) % slots
+        taken = [
+            (r["lo"], r["hi"]) for r in conn.execute("""
+                SELECT COALESCE(block_start, 1) AS lo,
+                       MAX(next_value - 1, COALESCE(block_end, 0)) AS hi
+                FROM sequences
+                WHERE name = ? AND period = ? AND id != ?
+            """, (name, period, seq_id))
+        ]
+        block = -(-floor // size)
+        block += (slot - block) % slots
+        while any(
+            lo <= (block + 1) * size and hi > block * size
+            for lo, hi in taken
+        ):
+            block += slots
+        return block * size + 1
+
+    @staticmethod
+    def _sequence_high_water(conn, name: str, period: str) -> int:
+        """Highest value used or reserved by any device for a sequence."""
+        row = conn.execute("""
+            SELECT MAX(MAX(next_value - 1, COALESCE(block_end, 0))) AS hw
+            FROM sequences WHERE name = ? AND period = ?
+        """, (name, period)).fetchone()
+        return (row["hw"] or 0) if row else 0
+
+    def _next_document_number(
+        self, table: str, column: str, prefix: str,
+        period: str = "", width: int = 3, peek: bool = False,
+    ) -> str:
+        """Allocate the next unused number like PREFIX-PERIOD-001.
+
+        The first allocation for a prefix/period seeds the counter from
+        the highest existing number in *table*; afterwards each call is
+        an O(1) counter bump plus an indexed existence check that skips
+        numbers entered by hand.  With *peek*, the number is only
+        predicted and nothing is reserved.
+        """
+        stem = f"{prefix}-{period}-" if period else f"{prefix}-"
+
+        def _seed(conn) -> int:
+            highest = 0
+            for r in conn.execute(
+                f"SELECT {column} AS num FROM {table} "  # noqa: S608
+                f"WHERE {column} LIKE ? ESCAPE '\\'",
+                (self._escape_like(stem) + "%",),
+            ):
+                try:
+                    highest = max(highest, int(r["num"][len(stem):]))
+                except (TypeError, ValueError):
+                    continue
+            return highest
+
+        value = None
+        while True:
+            if not peek:
+                value = self.next_sequence_value(prefix, period, seed=_seed)
+            elif value is None:
+                value = self.peek_sequence_value(prefix, period, seed=_seed)
+            else:
+                value += 1
+            number = f"{stem}{value:0{width}d}"
+            taken = self.db.execute(
+                f"SELECT 1 FROM {table} WHERE {column} = ? LIMIT 1",  # noqa: S608
+                (number,),
+            )
+            if not taken:
+                return number
 
     # ── User Settings (v16) ─────────────────────────────────────
 
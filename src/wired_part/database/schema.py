@@ -1,6 +1,769 @@
 """Database schema definition, initialization, and migrations."""
 
-SCHEMA_VERSION = 17
+SCHEMA_VERSION = 35
+
+# Summary counters kept in ``stats_counters`` (v19).
+# name -> (table, per-row expression).  Each counter equals
+# SUM(expression) over its table; triggers apply the per-row delta on
+# every insert, update and delete.  ``{r}`` is replaced with NEW/OLD.
+STATS_COUNTERS = {
+    "parts.count": ("parts", "1"),
+    "parts.total_quantity": ("parts", "COALESCE({r}.quantity, 0)"),
+    "parts.total_value": (
+        "parts", "COALESCE({r}.quantity * {r}.unit_cost, 0)",
+    ),
+    "parts.low_stock": (
+        "parts",
+        "CASE WHEN {r}.quantity < {r}.min_quantity "
+        "AND {r}.min_quantity > 0 THEN 1 ELSE 0 END",
+    ),
+    "jobs.count": ("jobs", "1"),
+    "jobs.active": ("jobs", "CASE WHEN {r}.status = 'active' THEN 1 ELSE 0 END"),
+    "jobs.completed": (
+        "jobs", "CASE WHEN {r}.status = 'completed' THEN 1 ELSE 0 END",
+    ),
+    "users.count": ("users", "1"),
+    "trucks.count": ("trucks", "1"),
+    "suppliers.count": ("suppliers", "1"),
+    "orders.count": ("purchase_orders", "1"),
+    "orders.open": (
+        "purchase_orders",
+        "CASE WHEN {r}.status IN ('draft', 'submitted') THEN 1 ELSE 0 END",
+    ),
+    "orders.pending": (
+        "purchase_orders",
+        "CASE WHEN {r}.status IN ('draft', 'submitted', 'partial') "
+        "THEN 1 ELSE 0 END",
+    ),
+    "labor.entries": ("labor_entries", "1"),
+    "labor.total_hours": ("labor_entries", "COALESCE({r}.hours, 0)"),
+    "transfers.count": ("truck_transfers", "1"),
+    "transfers.pending": (
+        "truck_transfers",
+        "CASE WHEN {r}.status = 'pending' THEN 1 ELSE 0 END",
+    ),
+    "returns.count": ("return_authorizations", "1"),
+    "returns.open": (
+        "return_authorizations",
+        "CASE WHEN {r}.status IN ('initiated', 'picked_up') "
+        "THEN 1 ELSE 0 END",
+    ),
+    "notebooks.pages": ("notebook_pages", "1"),
+    "activity_log.entries": ("activity_log", "1"),
+    "notifications.count": ("notifications", "1"),
+}
+
+# Tables included in sync and journalled in change_journal (v25).
+# Order matters: parents come before the tables that reference them.
+SYNC_TABLES = [
+    "categories",
+    "suppliers",
+    "users",
+    "hats",
+    "user_hats",
+    "user_settings",
+    "parts",
+    "part_suppliers",
+    "brands",
+    "part_variants",
+    "parts_lists",
+    "parts_list_items",
+    "trucks",
+    "jobs",
+    "job_assignments",
+    "billing_cycles",
+    "purchase_orders",
+    "purchase_order_items",
+    "receive_log",
+    "truck_transfers",
+    "truck_inventory",
+    "labor_entries",
+    "consumption_log",
+    "job_parts",
+    "return_authorizations",
+    "return_authorization_items",
+    "notebook_sections",
+    "notebook_pages",
+    "notebook_attachments",
+    "job_updates",
+    "activity_log",
+    "notifications",
+    "sequences",
+]
+
+
+def stats_counter_scan_sql(name: str) -> str:
+    """Full-scan query that recomputes a single counter from its table."""
+    table, expr = STATS_COUNTERS[name]
+    return (
+        f"SELECT COALESCE(SUM({expr.format(r=table)}), 0) "  # noqa: S608
+        f"AS value FROM {table}"
+    )
+
+
+def _stats_counter_triggers() -> list[str]:
+    """Build the insert/update/delete triggers for ``stats_counters``."""
+    by_table: dict[str, list[tuple[str, str]]] = {}
+    for name, (table, expr) in STATS_COUNTERS.items():
+        by_table.setdefault(table, []).append((name, expr))
+
+    def _update(counters, delta):
+        cases = " ".join(
+            f"WHEN '{name}' THEN {delta(expr)}" for name, expr in counters
+        )
+        names = ", ".join(f"'{name}'" for name, _ in counters)
+        return (
+            f"UPDATE stats_counters SET value = value + "
+            f"CASE name {cases} ELSE 0 END WHERE name IN ({names});"
+        )
+
+    stmts = []
+    for table, counters in by_table.items():
+        stmts.append(
+            f"CREATE TRIGGER IF NOT EXISTS stats_{table}_insert "
+            f"AFTER INSERT ON {table} BEGIN "
+            + _update(counters, lambda e: f"({e.format(r='NEW')})")
+            + " END"
+        )
+        stmts.append(
+            f"CREATE TRIGGER IF NOT EXISTS stats_{table}_delete "
+            f"AFTER DELETE ON {table} BEGIN "
+            + _update(counters, lambda e: f"-({e.format(r='OLD')})")
+            + " END"
+        )
+        stmts.append(
+            f"CREATE TRIGGER IF NOT EXISTS stats_{table}_update "
+            f"AFTER UPDATE ON {table} BEGIN "
+            + _update(
+                counters,
+                lambda e: f"({e.format(r='NEW')}) - ({e.format(r='OLD')})",
+            )
+            + " END"
+        )
+    return stmts
+
+
+def _seed_stats_counters(conn):
+    """Create any missing counter rows, seeded from a full scan."""
+    existing = {
+        row[0] for row in conn.execute("SELECT name FROM stats_counters")
+    }
+    for name in STATS_COUNTERS:
+        if name in existing:
+            continue
+        conn.execute(
+            "INSERT OR IGNORE INTO stats_counters (name, value) "
+            f"SELECT ?, value FROM ({stats_counter_scan_sql(name)})",  # noqa: S608
+            (name,),
+        )
+
+
+def _ledger_upsert(job, day, cost="0", qty="0", consumed="0",
+                   hours="0", entries="0") -> str:
+    """One job_cost_ledger delta, as a trigger body statement."""
+    return (
+        "INSERT INTO job_cost_ledger (job_id, day, material_cost, "
+        "material_quantity, consumption_count, labor_hours, labor_entries) "
+        f"VALUES ({job}, {day}, {cost}, {qty}, {consumed}, {hours}, "
+        f"{entries}) "
+        "ON CONFLICT(job_id, day) DO UPDATE SET "
+        "material_cost = material_cost + excluded.material_cost, "
+        "material_quantity = material_quantity + excluded.material_quantity, "
+        "consumption_count = consumption_count + excluded.consumption_count, "
+        "labor_hours = labor_hours + excluded.labor_hours, "
+        "labor_entries = labor_entries + excluded.labor_entries;"
+    )
+
+
+def _ledger_days(r: str = "") -> dict[str, str]:
+    """Local calendar day each job_cost_ledger source is booked on.
+
+    The triggers (with *r* = ``NEW.``/``OLD.``) and the rebuild share
+    these, so a rebuild never moves a row to another day.  assigned_at
+    and consumed_at are CURRENT_TIMESTAMP values (UTC); labor start_time
+    is written in local time already.  ``change`` is the day a running
+    job_parts row is topped up, corrected or removed.
+    """
+    return {
+        "job_parts": (
+            f"DATE(COALESCE({r}assigned_at, CURRENT_TIMESTAMP), "
+            f"'localtime')"
+        ),
+        "consumption_log": f"DATE({r}consumed_at, 'localtime')",
+        "labor_entries": f"DATE({r}start_time)",
+        "change": "DATE('now', 'localtime')",
+    }
+
+
+def _job_cost_ledger_triggers() -> list[str]:
+    """Triggers that keep job_cost_ledger in step with its sources.
+
+    Each source row is booked on its own day (see _ledger_days):
+    consumption and labor on the day of the event.  job_parts keeps one
+    running row per job and part, so a new row's material is booked on
+    its assigned_at day and every later change to it (another use, a
+    correction, removal) on the day of the change.
+    """
+    def _jp(r, sign, day="job_parts"):
+        return _ledger_upsert(
+            f"{r}.job_id", _ledger_days(f"{r}.")[day],
+            cost=f"{sign}COALESCE({r}.quantity_used * {r}.unit_cost_at_use, 0)",
+            qty=f"{sign}{r}.quantity_used",
+        )
+
+    def _cl(r, sign):
+        return _ledger_upsert(
+            f"{r}.job_id", _ledger_days(f"{r}.")["consumption_log"],
+            consumed=f"{sign}1",
+        )
+
+    def _le(r, sign):
+        return _ledger_upsert(
+            f"{r}.job_id", _ledger_days(f"{r}.")["labor_entries"],
+            hours=f"{sign}COALESCE({r}.hours, 0)", entries=f"{sign}1",
+        )
+
+    stmts = [
+        "CREATE TRIGGER IF NOT EXISTS ledger_job_parts_insert "
+        f"AFTER INSERT ON job_parts BEGIN {_jp('NEW', '')} END",
+        "CREATE TRIGGER IF NOT EXISTS ledger_job_parts_delete "
+        f"AFTER DELETE ON job_parts BEGIN {_jp('OLD', '-', 'change')} END",
+        "CREATE TRIGGER IF NOT EXISTS ledger_job_parts_update "
+        "AFTER UPDATE ON job_parts "
+        "WHEN OLD.quantity_used IS NOT NEW.quantity_used "
+        "OR OLD.unit_cost_at_use IS NOT NEW.unit_cost_at_use "
+        "OR OLD.job_id IS NOT NEW.job_id BEGIN "
+        f"{_jp('OLD', '-', 'change')} {_jp('NEW', '', 'change')} END",
+    ]
+    for table, delta in (("consumption_log", _cl), ("labor_entries", _le)):
+        stmts.append(
+            f"CREATE TRIGGER IF NOT EXISTS ledger_{table}_insert "
+            f"AFTER INSERT ON {table} BEGIN {delta('NEW', '')} END"
+        )
+        stmts.append(
+            f"CREATE TRIGGER IF NOT EXISTS ledger_{table}_delete "
+            f"AFTER DELETE ON {table} BEGIN {delta('OLD', '-')} END"
+        )
+        stmts.append(
+            f"CREATE TRIGGER IF NOT EXISTS ledger_{table}_update "
+            f"AFTER UPDATE ON {table} BEGIN "
+            f"{delta('OLD', '-')} {delta('NEW', '')} END"
+        )
+    stmts.append(
+        "CREATE TRIGGER IF NOT EXISTS ledger_jobs_delete "
+        "AFTER DELETE ON jobs BEGIN "
+        "DELETE FROM job_cost_ledger WHERE job_id = OLD.id; END"
+    )
+    return stmts
+
+
+# Full rebuild of job_cost_ledger from its source tables.  The
+# optional job filter is appended by the caller.  The triggers book a
+# job_parts row's later uses on the day they happen, but the row only
+# keeps its running total: truck uses are re-dated from their
+# consumption_log rows, and the rest of the row (warehouse assignments)
+# goes to its assigned_at day.
+JOB_COST_LEDGER_REBUILD_SQL = """
+    INSERT INTO job_cost_ledger
+        (job_id, day, material_cost, material_quantity,
+         consumption_count, labor_hours, labor_entries)
+    SELECT job_id, day, SUM(cost), SUM(qty), SUM(consumed),
+           SUM(hours), SUM(entries)
+    FROM (
+        SELECT jp.job_id, %(consumption_log)s AS day,
+               COALESCE(cl.quantity * jp.unit_cost_at_use, 0) AS cost,
+               cl.quantity AS qty, 0 AS consumed,
+               0 AS hours, 0 AS entries
+        FROM consumption_log cl
+        JOIN job_parts jp
+            ON jp.job_id = cl.job_id AND jp.part_id = cl.part_id
+        UNION ALL
+        SELECT jp.job_id, %(job_parts)s,
+               COALESCE((jp.quantity_used - COALESCE(used.qty, 0))
+                        * jp.unit_cost_at_use, 0),
+               jp.quantity_used - COALESCE(used.qty, 0), 0, 0, 0
+        FROM job_parts jp
+        LEFT JOIN (
+            SELECT job_id, part_id, SUM(quantity) AS qty
+            FROM consumption_log GROUP BY job_id, part_id
+        ) used ON used.job_id = jp.job_id AND used.part_id = jp.part_id
+        WHERE jp.quantity_used IS NOT COALESCE(used.qty, 0)
+        UNION ALL
+        SELECT job_id, %(consumption_log)s, 0, 0, 1, 0, 0
+        FROM consumption_log
+        UNION ALL
+        SELECT job_id, %(labor_entries)s, 0, 0, 0,
+               COALESCE(hours, 0), 1
+        FROM labor_entries
+    )
+    WHERE {where}
+    GROUP BY job_id, day
+""" % _ledger_days()
+
+
+def _labor_rollup_delta(r: str, sign: str) -> str:
+    """Apply one labor entry (NEW/OLD) to labor_rollup with *sign*."""
+    key = (
+        f"{r}.job_id, {r}.user_id, COALESCE({r}.sub_task_category, ''), "
+        f"DATE({r}.start_time), ({r}.end_time IS NULL)"
+    )
+    hours = f"COALESCE({r}.hours, 0)"
+    overtime = f"(COALESCE({r}.is_overtime, 0) != 0)"
+    return (
+        "INSERT INTO labor_rollup (job_id, user_id, category, day, "
+        "is_open, hours, entries, overtime_hours, overtime_entries) "
+        f"VALUES ({key}, {sign}{hours}, {sign}1, "
+        f"{sign}({hours} * {overtime}), {sign}{overtime}) "
+        "ON CONFLICT(job_id, user_id, category, day, is_open) DO UPDATE SET "
+        "hours = hours + excluded.hours, "
+        "entries = entries + excluded.entries, "
+        "overtime_hours = overtime_hours + excluded.overtime_hours, "
+        "overtime_entries = overtime_entries + excluded.overtime_entries;"
+    )
+
+
+def _labor_rollup_triggers() -> list[str]:
+    """Triggers that keep labor_rollup in step with labor_entries."""
+    # Drop cells whose last entry was removed or moved elsewhere
+    prune = (
+        "DELETE FROM labor_rollup WHERE entries = 0 "
+        "AND job_id = OLD.job_id AND user_id = OLD.user_id;"
+    )
+    return [
+        "CREATE TRIGGER IF NOT EXISTS labor_rollup_insert "
+        "AFTER INSERT ON labor_entries BEGIN "
+        f"{_labor_rollup_delta('NEW', '')} END",
+        "CREATE TRIGGER IF NOT EXISTS labor_rollup_delete "
+        "AFTER DELETE ON labor_entries BEGIN "
+        f"{_labor_rollup_delta('OLD', '-')} {prune} END",
+        "CREATE TRIGGER IF NOT EXISTS labor_rollup_update "
+        "AFTER UPDATE ON labor_entries BEGIN "
+        f"{_labor_rollup_delta('OLD', '-')} "
+        f"{_labor_rollup_delta('NEW', '')} {prune} END",
+    ]
+
+
+# Full rebuild of labor_rollup from labor_entries.  The optional
+# filter is appended by the caller.
+LABOR_ROLLUP_REBUILD_SQL = """
+    INSERT INTO labor_rollup
+        (job_id, user_id, category, day, is_open,
+         hours, entries, overtime_hours, overtime_entries)
+    SELECT job_id, user_id, COALESCE(sub_task_category, ''),
+           DATE(start_time), (end_time IS NULL),
+           SUM(COALESCE(hours, 0)), COUNT(*),
+           SUM(CASE WHEN COALESCE(is_overtime, 0) != 0
+                    THEN COALESCE(hours, 0) ELSE 0 END),
+           SUM(COALESCE(is_overtime, 0) != 0)
+    FROM labor_entries
+    WHERE {where}
+    GROUP BY 1, 2, 3, 4, 5
+"""
+
+
+def _spend_rollup_delta(r: str, sign: str) -> str:
+    """Apply one receive_log row (NEW/OLD) to spend_rollup."""
+    return (
+        "INSERT INTO spend_rollup (day, supplier_id, part_id, "
+        "received_quantity, received_value, receipt_count) "
+        f"SELECT DATE({r}.received_at), po.supplier_id, oi.part_id, "
+        f"{sign}{r}.quantity_received, "
+        f"{sign}({r}.quantity_received * oi.unit_cost), {sign}1 "
+        "FROM purchase_order_items oi "
+        "JOIN purchase_orders po ON po.id = oi.order_id "
+        f"WHERE oi.id = {r}.order_item_id "
+        "ON CONFLICT(day, supplier_id, part_id) DO UPDATE SET "
+        "received_quantity = received_quantity + excluded.received_quantity, "
+        "received_value = received_value + excluded.received_value, "
+        "receipt_count = receipt_count + excluded.receipt_count;"
+    )
+
+
+def _order_rollup_delta(order: str, day: str, supplier: str, status: str,
+                        sign: str, orders: str, item_orders: str,
+                        items: str, value: str) -> str:
+    """One order_rollup delta for the order identified by *order*."""
+    return (
+        "INSERT INTO order_rollup (day, supplier_id, status, order_count, "
+        "item_orders, item_count, ordered_value) "
+        f"SELECT {day}, {supplier}, {status}, {sign}({orders}), "
+        f"{sign}({item_orders}), {sign}({items}), {sign}({value}) "
+        f"FROM purchase_orders WHERE id = {order} "
+        "ON CONFLICT(day, supplier_id, status) DO UPDATE SET "
+        "order_count = order_count + excluded.order_count, "
+        "item_orders = item_orders + excluded.item_orders, "
+        "item_count = item_count + excluded.item_count, "
+        "ordered_value = ordered_value + excluded.ordered_value;"
+    )
+
+
+def _spend_rollup_triggers() -> list[str]:
+    """Triggers for spend_rollup (receipts) and order_rollup (orders).
+
+    Order cells are keyed on the order's creation day, supplier and
+    status.  Item triggers only touch a cell while the parent order
+    still exists: when an order is deleted, its BEFORE DELETE trigger
+    removes the whole order (items included) before the cascade runs.
+    """
+    items_of = (
+        "(SELECT {agg} FROM purchase_order_items WHERE order_id = {o})"
+    )
+
+    def _order(r, sign):
+        o = f"{r}.id"
+        return _order_rollup_delta(
+            o, f"DATE({r}.created_at)", f"{r}.supplier_id",
+            f"{r}.status", sign, "1",
+            items_of.format(agg="COUNT(*) > 0", o=o),
+            items_of.format(agg="COUNT(*)", o=o),
+            items_of.format(
+                agg="COALESCE(SUM(quantity_ordered * unit_cost), 0)", o=o,
+            ),
+        )
+
+    def _item(r, sign):
+        # item_orders flips when an order gains its first item or
+        # loses its last one
+        o = f"{r}.order_id"
+        count = items_of.format(agg="COUNT(*)", o=o)
+        flip = f"({count} = 1)" if sign == "" else f"({count} = 0)"
+        return _order_rollup_delta(
+            o, "DATE(created_at)", "supplier_id", "status", sign, "0",
+            flip, "1", f"{r}.quantity_ordered * {r}.unit_cost",
+        )
+
+    return [
+        "CREATE TRIGGER IF NOT EXISTS spend_receive_log_insert "
+        "AFTER INSERT ON receive_log BEGIN "
+        f"{_spend_rollup_delta('NEW', '')} END",
+        "CREATE TRIGGER IF NOT EXISTS spend_receive_log_delete "
+        "AFTER DELETE ON receive_log BEGIN "
+        f"{_spend_rollup_delta('OLD', '-')} END",
+        "CREATE TRIGGER IF NOT EXISTS spend_receive_log_update "
+        "AFTER UPDATE ON receive_log BEGIN "
+        f"{_spend_rollup_delta('OLD', '-')} "
+        f"{_spend_rollup_delta('NEW', '')} END",
+        "CREATE TRIGGER IF NOT EXISTS order_rollup_po_insert "
+        "AFTER INSERT ON purchase_orders BEGIN "
+        f"{_order('NEW', '')} END",
+        "CREATE TRIGGER IF NOT EXISTS order_rollup_po_delete "
+        "BEFORE DELETE ON purchase_orders BEGIN "
+        f"{_order('OLD', '-')} END",
+        # Only key changes move an order between cells; totals follow
+        # from the item triggers
+        "CREATE TRIGGER IF NOT EXISTS order_rollup_po_update "
+        "AFTER UPDATE OF status, supplier_id, created_at ON purchase_orders "
+        "WHEN OLD.status IS NOT NEW.status "
+        "OR OLD.supplier_id IS NOT NEW.supplier_id "
+        "OR DATE(OLD.created_at) IS NOT DATE(NEW.created_at) BEGIN "
+        + _order_rollup_delta(
+            "NEW.id", "DATE(OLD.created_at)", "OLD.supplier_id",
+            "OLD.status", "-", "1",
+            items_of.format(agg="COUNT(*) > 0", o="NEW.id"),
+            items_of.format(agg="COUNT(*)", o="NEW.id"),
+            items_of.format(
+                agg="COALESCE(SUM(quantity_ordered * unit_cost), 0)",
+                o="NEW.id",
+            ),
+        )
+        + " " + _order('NEW', '') + " END",
+        "CREATE TRIGGER IF NOT EXISTS order_rollup_item_insert "
+        "AFTER INSERT ON purchase_order_items BEGIN "
+        f"{_item('NEW', '')} END",
+        "CREATE TRIGGER IF NOT EXISTS order_rollup_item_delete "
+        "AFTER DELETE ON purchase_order_items BEGIN "
+        f"{_item('OLD', '-')} END",
+        "CREATE TRIGGER IF NOT EXISTS order_rollup_item_update "
+        "AFTER UPDATE OF quantity_ordered, unit_cost "
+        "ON purchase_order_items WHEN OLD.order_id = NEW.order_id BEGIN "
+        + _order_rollup_delta(
+            "NEW.order_id", "DATE(created_at)", "supplier_id", "status",
+            "", "0", "0", "0",
+            "NEW.quantity_ordered * NEW.unit_cost "
+            "- OLD.quantity_ordered * OLD.unit_cost",
+        )
+        + " END",
+        "CREATE TRIGGER IF NOT EXISTS order_rollup_item_move "
+        "AFTER UPDATE OF order_id ON purchase_order_items "
+        "WHEN OLD.order_id != NEW.order_id BEGIN "
+        f"{_item('OLD', '-')} {_item('NEW', '')} END",
+    ]
+
+
+# Full rebuilds of spend_rollup and order_rollup
+SPEND_ROLLUP_REBUILD_SQL = """
+    INSERT INTO spend_rollup
+        (day, supplier_id, part_id, received_quantity,
+         received_value, receipt_count)
+    SELECT DATE(rl.received_at), po.supplier_id, oi.part_id,
+           SUM(rl.quantity_received),
+           SUM(rl.quantity_received * oi.unit_cost), COUNT(*)
+    FROM receive_log rl
+    JOIN purchase_order_items oi ON oi.id = rl.order_item_id
+    JOIN purchase_orders po ON po.id = oi.order_id
+    GROUP BY 1, 2, 3
+"""
+
+ORDER_ROLLUP_REBUILD_SQL = """
+    INSERT INTO order_rollup
+        (day, supplier_id, status, order_count, item_orders,
+         item_count, ordered_value)
+    SELECT DATE(po.created_at), po.supplier_id, po.status, COUNT(*),
+           SUM(COALESCE(agg.item_count, 0) > 0),
+           COALESCE(SUM(agg.item_count), 0),
+           COALESCE(SUM(agg.total_cost), 0)
+    FROM purchase_orders po
+    LEFT JOIN (
+        SELECT order_id, COUNT(*) AS item_count,
+               SUM(quantity_ordered * unit_cost) AS total_cost
+        FROM purchase_order_items
+        GROUP BY order_id
+    ) agg ON agg.order_id = po.id
+    GROUP BY 1, 2, 3
+"""
+
+
+def _truck_stats_delta(truck: str, parts="0", qty="0", value="0",
+                       pending="0") -> str:
+    """One truck_stats delta, as a trigger body statement."""
+    return (
+        "INSERT INTO truck_stats (truck_id, unique_parts, total_quantity, "
+        "inventory_value, pending_transfers) "
+        f"VALUES ({truck}, {parts}, {qty}, {value}, {pending}) "
+        "ON CONFLICT(truck_id) DO UPDATE SET "
+        "unique_parts = unique_parts + excluded.unique_parts, "
+        "total_quantity = total_quantity + excluded.total_quantity, "
+        "inventory_value = inventory_value + excluded.inventory_value, "
+        "pending_transfers = pending_transfers + excluded.pending_transfers;"
+    )
+
+
+def _return_stats_delta(ra: str, items: str, value: str) -> str:
+    """One return_stats delta, as a trigger body statement."""
+    return (
+        "INSERT INTO return_stats (ra_id, item_count, total_value) "
+        f"VALUES ({ra}, {items}, {value}) "
+        "ON CONFLICT(ra_id) DO UPDATE SET "
+        "item_count = item_count + excluded.item_count, "
+        "total_value = total_value + excluded.total_value;"
+    )
+
+
+def _truck_and_return_stats_triggers() -> list[str]:
+    """Triggers for the per-truck and per-RA aggregate tables."""
+
+    def _inv(r, sign):
+        return _truck_stats_delta(
+            f"{r}.truck_id",
+            parts=f"{sign}({r}.quantity > 0)",
+            qty=f"{sign}{r}.quantity",
+            value=(
+                f"{sign}({r}.quantity * COALESCE((SELECT unit_cost "
+                f"FROM parts WHERE id = {r}.part_id), 0))"
+            ),
+        )
+
+    def _xfer(r, sign):
+        return _truck_stats_delta(
+            f"{r}.truck_id", pending=f"{sign}({r}.status = 'pending')",
+        )
+
+    def _rai(r, sign):
+        return _return_stats_delta(
+            f"{r}.ra_id", f"{sign}1",
+            f"{sign}({r}.quantity * {r}.unit_cost)",
+        )
+
+    stmts = []
+    for name, table, delta in (
+        ("truck_stats_inventory", "truck_inventory", _inv),
+        ("truck_stats_transfer", "truck_transfers", _xfer),
+        ("return_stats_item", "return_authorization_items", _rai),
+    ):
+        stmts += [
+            f"CREATE TRIGGER IF NOT EXISTS {name}_insert "
+            f"AFTER INSERT ON {table} BEGIN {delta('NEW', '')} END",
+            f"CREATE TRIGGER IF NOT EXISTS {name}_delete "
+            f"AFTER DELETE ON {table} BEGIN {delta('OLD', '-')} END",
+            f"CREATE TRIGGER IF NOT EXISTS {name}_update "
+            f"AFTER UPDATE ON {table} BEGIN "
+            f"{delta('OLD', '-')} {delta('NEW', '')} END",
+        ]
+    stmts += [
+        # A unit cost change revalues every truck holding the part
+        "CREATE TRIGGER IF NOT EXISTS truck_stats_part_cost "
+        "AFTER UPDATE OF unit_cost ON parts "
+        "WHEN OLD.unit_cost IS NOT NEW.unit_cost BEGIN "
+        "UPDATE truck_stats SET inventory_value = inventory_value + ("
+        "SELECT ti.quantity * (COALESCE(NEW.unit_cost, 0) "
+        "- COALESCE(OLD.unit_cost, 0)) FROM truck_inventory ti "
+        "WHERE ti.truck_id = truck_stats.truck_id AND ti.part_id = NEW.id) "
+        "WHERE truck_id IN (SELECT truck_id FROM truck_inventory "
+        "WHERE part_id = NEW.id); END",
+        "CREATE TRIGGER IF NOT EXISTS truck_stats_truck_insert "
+        "AFTER INSERT ON trucks BEGIN "
+        "INSERT OR IGNORE INTO truck_stats (truck_id) VALUES (NEW.id); END",
+        "CREATE TRIGGER IF NOT EXISTS truck_stats_truck_delete "
+        "AFTER DELETE ON trucks BEGIN "
+        "DELETE FROM truck_stats WHERE truck_id = OLD.id; END",
+        "CREATE TRIGGER IF NOT EXISTS return_stats_ra_insert "
+        "AFTER INSERT ON return_authorizations BEGIN "
+        "INSERT OR IGNORE INTO return_stats (ra_id) VALUES (NEW.id); END",
+        "CREATE TRIGGER IF NOT EXISTS return_stats_ra_delete "
+        "AFTER DELETE ON return_authorizations BEGIN "
+        "DELETE FROM return_stats WHERE ra_id = OLD.id; END",
+    ]
+    return stmts
+
+
+# Full rebuilds of truck_stats and return_stats
+TRUCK_STATS_REBUILD_SQL = """
+    INSERT INTO truck_stats
+        (truck_id, unique_parts, total_quantity, inventory_value,
+         pending_transfers)
+    SELECT t.id,
+           (SELECT COUNT(*) FROM truck_inventory ti
+            WHERE ti.truck_id = t.id AND ti.quantity > 0),
+           (SELECT COALESCE(SUM(ti.quantity), 0) FROM truck_inventory ti
+            WHERE ti.truck_id = t.id),
+           (SELECT COALESCE(SUM(ti.quantity * COALESCE(p.unit_cost, 0)), 0)
+            FROM truck_inventory ti JOIN parts p ON ti.part_id = p.id
+            WHERE ti.truck_id = t.id),
+           (SELECT COUNT(*) FROM truck_transfers tt
+            WHERE tt.truck_id = t.id AND tt.status = 'pending')
+    FROM trucks t
+"""
+
+RETURN_STATS_REBUILD_SQL = """
+    INSERT INTO return_stats (ra_id, item_count, total_value)
+    SELECT ra.id, COUNT(rai.id),
+           COALESCE(SUM(rai.quantity * rai.unit_cost), 0)
+    FROM return_authorizations ra
+    LEFT JOIN return_authorization_items rai ON rai.ra_id = ra.id
+    GROUP BY ra.id
+"""
+
+
+def _low_stock_triggers() -> list[str]:
+    """Triggers that move rows in and out of low_stock_state.
+
+    The warehouse uses ``truck_id = 0``.  Each threshold crossing is
+    recorded once in low_stock_events; changes while a row stays low
+    only refresh the stored quantities.
+    """
+
+    def _low(r):
+        return f"({r}.min_quantity > 0 AND {r}.quantity < {r}.min_quantity)"
+
+    def _enter(r, part, truck):
+        return (
+            "INSERT OR REPLACE INTO low_stock_state "
+            "(part_id, truck_id, quantity, min_quantity) "
+            f"VALUES ({part}, {truck}, {r}.quantity, {r}.min_quantity); "
+            "INSERT INTO low_stock_events "
+            "(part_id, truck_id, transition, quantity, min_quantity) "
+            f"VALUES ({part}, {truck}, 'enter', {r}.quantity, "
+            f"{r}.min_quantity);"
+        )
+
+    def _exit(r, part, truck):
+        return (
+            "DELETE FROM low_stock_state "
+            f"WHERE part_id = {part} AND truck_id = {truck}; "
+            "INSERT INTO low_stock_events "
+            "(part_id, truck_id, transition, quantity, min_quantity) "
+            f"VALUES ({part}, {truck}, 'exit', {r}.quantity, "
+            f"{r}.min_quantity);"
+        )
+
+    stmts = []
+    for name, table, part, truck in (
+        ("low_stock_parts", "parts", "id", None),
+        ("low_stock_truck", "truck_inventory", "part_id", "truck_id"),
+    ):
+        def _keys(r):
+            return f"{r}.{part}", f"{r}.{truck}" if truck else "0"
+
+        stmts += [
+            f"CREATE TRIGGER IF NOT EXISTS {name}_insert "
+            f"AFTER INSERT ON {table} WHEN {_low('NEW')} BEGIN "
+            f"{_enter('NEW', *_keys('NEW'))} END",
+            f"CREATE TRIGGER IF NOT EXISTS {name}_delete "
+            f"AFTER DELETE ON {table} WHEN {_low('OLD')} BEGIN "
+            f"{_exit('OLD', *_keys('OLD'))} END",
+            f"CREATE TRIGGER IF NOT EXISTS {name}_enter "
+            f"AFTER UPDATE OF quantity, min_quantity ON {table} "
+            f"WHEN NOT {_low('OLD')} AND {_low('NEW')} BEGIN "
+            f"{_enter('NEW', *_keys('NEW'))} END",
+            f"CREATE TRIGGER IF NOT EXISTS {name}_exit "
+            f"AFTER UPDATE OF quantity, min_quantity ON {table} "
+            f"WHEN {_low('OLD')} AND NOT {_low('NEW')} BEGIN "
+            f"{_exit('NEW', *_keys('NEW'))} END",
+            f"CREATE TRIGGER IF NOT EXISTS {name}_change "
+            f"AFTER UPDATE OF quantity, min_quantity ON {table} "
+            f"WHEN {_low('OLD')} AND {_low('NEW')} BEGIN "
+            "UPDATE low_stock_state SET quantity = NEW.quantity, "
+            "min_quantity = NEW.min_quantity "
+            f"WHERE part_id = {_keys('NEW')[0]} "
+            f"AND truck_id = {_keys('NEW')[1]}; END",
+        ]
+    return stmts
+
+
+# Full rebuild of low_stock_state (events are not replayed)
+LOW_STOCK_STATE_REBUILD_SQL = """
+    INSERT INTO low_stock_state (part_id, truck_id, quantity, min_quantity)
+    SELECT id, 0, quantity, min_quantity FROM parts
+    WHERE min_quantity > 0 AND quantity < min_quantity
+    UNION ALL
+    SELECT part_id, truck_id, quantity, min_quantity FROM truck_inventory
+    WHERE min_quantity > 0 AND quantity < min_quantity
+"""
+
+
+def _change_journal_triggers() -> list[str]:
+    """Journal every insert, update and delete on the synced tables.
+
+    ``device_id`` is NULL for local writes; sync merges set
+    change_journal_state.origin_device for the duration of the merge so
+    imported rows are attributed to the peer they came from.
+    """
+    stmts = []
+    for table in SYNC_TABLES:
+        for op, ref in (("insert", "NEW"), ("update", "NEW"),
+                        ("delete", "OLD")):
+            stmts.append(
+                f"CREATE TRIGGER IF NOT EXISTS journal_{table}_{op} "
+                f"AFTER {op.upper()} ON {table} BEGIN "
+                "INSERT INTO change_journal "
+                "(table_name, row_id, op, device_id) "
+                f"VALUES ('{table}', {ref}.id, '{op}', "
+                "(SELECT origin_device FROM change_journal_state "
+                "WHERE id = 1)); END"
+            )
+    return stmts
+
+
+def _tombstone_triggers() -> list[str]:
+    """Keep sync_tombstones in step with the change journal.
+
+    A journaled delete leaves a tombstone under the same sequence number
+    (and origin device); re-inserting the row, e.g. when a peer's copy
+    is merged back in, clears it.  Tombstones therefore cost one row per
+    deleted id and outlive journal compaction.
+    """
+    return [
+        "CREATE TRIGGER IF NOT EXISTS tombstone_capture "
+        "AFTER INSERT ON change_journal WHEN NEW.op = 'delete' BEGIN "
+        "INSERT OR REPLACE INTO sync_tombstones "
+        "(seq, table_name, row_id, device_id) "
+        "VALUES (NEW.seq, NEW.table_name, NEW.row_id, NEW.device_id); END",
+        "CREATE TRIGGER IF NOT EXISTS tombstone_revive "
+        "AFTER INSERT ON change_journal WHEN NEW.op = 'insert' BEGIN "
+        "DELETE FROM sync_tombstones "
+        "WHERE table_name = NEW.table_name AND row_id = NEW.row_id; END",
+    ]
+
 
 # Each statement is a separate string to avoid executescript issues
 _SCHEMA_STATEMENTS = [
@@ -606,6 +1369,221 @@ _SCHEMA_STATEMENTS = [
         FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
     )""",
 
+    # Sequences: per-prefix, per-period, per-device number counters (v18)
+    """CREATE TABLE IF NOT EXISTS sequences (
+        id TEXT PRIMARY KEY,
+        name TEXT NOT NULL,
+        period TEXT NOT NULL DEFAULT '',
+        device_id TEXT NOT NULL DEFAULT '',
+        next_value INTEGER NOT NULL DEFAULT 1,
+        block_start INTEGER NOT NULL DEFAULT 1,
+        block_end INTEGER,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )""",
+
+    # Stats counters: trigger-maintained summary totals (v19)
+    """CREATE TABLE IF NOT EXISTS stats_counters (
+        name TEXT PRIMARY KEY,
+        value REAL NOT NULL DEFAULT 0
+    )""",
+
+    # Job cost ledger: per-job, per-day cost rollup (v20)
+    """CREATE TABLE IF NOT EXISTS job_cost_ledger (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        job_id INTEGER NOT NULL,
+        day TEXT NOT NULL,
+        material_cost REAL NOT NULL DEFAULT 0.0,
+        material_quantity INTEGER NOT NULL DEFAULT 0,
+        consumption_count INTEGER NOT NULL DEFAULT 0,
+        labor_hours REAL NOT NULL DEFAULT 0.0,
+        labor_entries INTEGER NOT NULL DEFAULT 0,
+        UNIQUE(job_id, day)
+    )""",
+
+    # Labor rollup: hours by job, user, category and day (v21)
+    """CREATE TABLE IF NOT EXISTS labor_rollup (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        job_id INTEGER NOT NULL,
+        user_id INTEGER NOT NULL,
+        category TEXT NOT NULL DEFAULT '',
+        day TEXT NOT NULL,
+        is_open INTEGER NOT NULL DEFAULT 0,
+        hours REAL NOT NULL DEFAULT 0.0,
+        entries INTEGER NOT NULL DEFAULT 0,
+        overtime_hours REAL NOT NULL DEFAULT 0.0,
+        overtime_entries INTEGER NOT NULL DEFAULT 0,
+        UNIQUE(job_id, user_id, category, day, is_open)
+    )""",
+
+    # Spend rollup: received value by day, supplier and part (v22)
+    """CREATE TABLE IF NOT EXISTS spend_rollup (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        day TEXT NOT NULL,
+        supplier_id INTEGER NOT NULL,
+        part_id INTEGER NOT NULL,
+        received_quantity INTEGER NOT NULL DEFAULT 0,
+        received_value REAL NOT NULL DEFAULT 0.0,
+        receipt_count INTEGER NOT NULL DEFAULT 0,
+        UNIQUE(day, supplier_id, part_id)
+    )""",
+
+    # Order rollup: orders and ordered value by day, supplier, status (v22)
+    """CREATE TABLE IF NOT EXISTS order_rollup (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        day TEXT NOT NULL,
+        supplier_id INTEGER NOT NULL,
+        status TEXT NOT NULL,
+        order_count INTEGER NOT NULL DEFAULT 0,
+        item_orders INTEGER NOT NULL DEFAULT 0,
+        item_count INTEGER NOT NULL DEFAULT 0,
+        ordered_value REAL NOT NULL DEFAULT 0.0,
+        UNIQUE(day, supplier_id, status)
+    )""",
+
+    # Truck stats: per-truck inventory and transfer aggregates (v23)
+    """CREATE TABLE IF NOT EXISTS truck_stats (
+        truck_id INTEGER PRIMARY KEY,
+        unique_parts INTEGER NOT NULL DEFAULT 0,
+        total_quantity INTEGER NOT NULL DEFAULT 0,
+        inventory_value REAL NOT NULL DEFAULT 0.0,
+        pending_transfers INTEGER NOT NULL DEFAULT 0
+    )""",
+
+    # Return stats: per-RA item count and value (v23)
+    """CREATE TABLE IF NOT EXISTS return_stats (
+        ra_id INTEGER PRIMARY KEY,
+        item_count INTEGER NOT NULL DEFAULT 0,
+        total_value REAL NOT NULL DEFAULT 0.0
+    )""",
+
+    # Low stock state: warehouse (truck_id = 0) and truck rows below
+    # their minimum quantity (v24)
+    """CREATE TABLE IF NOT EXISTS low_stock_state (
+        part_id INTEGER NOT NULL,
+        truck_id INTEGER NOT NULL DEFAULT 0,
+        quantity INTEGER NOT NULL,
+        min_quantity INTEGER NOT NULL,
+        entered_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (part_id, truck_id)
+    )""",
+
+    # Low stock events: enter/exit transitions feed (v24)
+    """CREATE TABLE IF NOT EXISTS low_stock_events (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        part_id INTEGER NOT NULL,
+        truck_id INTEGER NOT NULL DEFAULT 0,
+        transition TEXT NOT NULL CHECK (transition IN ('enter', 'exit')),
+        quantity INTEGER NOT NULL,
+        min_quantity INTEGER NOT NULL,
+        notified INTEGER NOT NULL DEFAULT 0,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )""",
+
+    # Change journal: one entry per write to a synced table (v25)
+    """CREATE TABLE IF NOT EXISTS change_journal (
+        seq INTEGER PRIMARY KEY AUTOINCREMENT,
+        table_name TEXT NOT NULL,
+        row_id INTEGER NOT NULL,
+        op TEXT NOT NULL CHECK (op IN ('insert', 'update', 'delete')),
+        device_id TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )""",
+
+    # Change journal state: merge origin and retention floor (v25)
+    """CREATE TABLE IF NOT EXISTS change_journal_state (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        origin_device TEXT,
+        floor_seq INTEGER NOT NULL DEFAULT 0
+    )""",
+    "INSERT OR IGNORE INTO change_journal_state (id) VALUES (1)",
+
+    # Notification read cursors: everything up to the id is read (v26)
+    """CREATE TABLE IF NOT EXISTS notification_cursors (
+        user_id INTEGER PRIMARY KEY,
+        read_through_id INTEGER NOT NULL DEFAULT 0,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+    )""",
+
+    # Notification receipts: broadcasts read above the cursor (v26)
+    """CREATE TABLE IF NOT EXISTS notification_receipts (
+        user_id INTEGER NOT NULL,
+        notification_id INTEGER NOT NULL,
+        read_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (user_id, notification_id),
+        FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
+        FOREIGN KEY (notification_id) REFERENCES notifications(id)
+            ON DELETE CASCADE
+    ) WITHOUT ROWID""",
+
+    # Activity archive: index of compressed activity_log segments (v27)
+    """CREATE TABLE IF NOT EXISTS activity_archive_segments (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        month TEXT NOT NULL,
+        file_name TEXT NOT NULL UNIQUE,
+        first_id INTEGER NOT NULL,
+        last_id INTEGER NOT NULL,
+        first_created_at TIMESTAMP,
+        last_created_at TIMESTAMP,
+        entry_count INTEGER NOT NULL DEFAULT 0,
+        entity_types TEXT DEFAULT '[]',
+        user_ids TEXT DEFAULT '[]',
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )""",
+
+    # Sync peer watermarks: peer journal position imported so far (v28)
+    """CREATE TABLE IF NOT EXISTS sync_peer_watermarks (
+        peer_device TEXT PRIMARY KEY,
+        imported_seq INTEGER NOT NULL DEFAULT 0,
+        imported_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )""",
+
+    # Sync digests: content hash per table and primary-key range (v29)
+    """CREATE TABLE IF NOT EXISTS sync_digest_ranges (
+        table_name TEXT NOT NULL,
+        bucket INTEGER NOT NULL,
+        row_count INTEGER NOT NULL,
+        digest TEXT NOT NULL,
+        PRIMARY KEY (table_name, bucket)
+    ) WITHOUT ROWID""",
+
+    # Sync digest state: journal position each table's digests reflect (v29)
+    """CREATE TABLE IF NOT EXISTS sync_digest_state (
+        table_name TEXT PRIMARY KEY,
+        journal_seq INTEGER NOT NULL DEFAULT 0
+    )""",
+
+    # Sync import ledger: last export file imported from each peer (v30)
+    """CREATE TABLE IF NOT EXISTS sync_import_ledger (
+        peer_device TEXT PRIMARY KEY,
+        file_name TEXT NOT NULL,
+        file_size INTEGER NOT NULL,
+        file_mtime_ns INTEGER NOT NULL,
+        content_hash TEXT NOT NULL,
+        exported_at TEXT,
+        rows_done INTEGER NOT NULL DEFAULT 0,
+        status TEXT NOT NULL DEFAULT 'partial'
+            CHECK (status IN ('partial', 'complete')),
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )""",
+
+    # Sync tombstones: deleted rows, keyed by journal seq (v31)
+    """CREATE TABLE IF NOT EXISTS sync_tombstones (
+        seq INTEGER PRIMARY KEY,
+        table_name TEXT NOT NULL,
+        row_id INTEGER NOT NULL,
+        device_id TEXT,
+        deleted_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )""",
+
+    # Rows this device archived or expired locally; merges skip them (v34)
+    """CREATE TABLE IF NOT EXISTS sync_retired_rows (
+        table_name TEXT NOT NULL,
+        row_id INTEGER NOT NULL,
+        retired_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (table_name, row_id)
+    )""",
+
     # Schema version tracking
     """CREATE TABLE IF NOT EXISTS schema_version (
         version INTEGER PRIMARY KEY,
@@ -695,6 +1673,43 @@ _SCHEMA_STATEMENTS = [
     # v16 indexes: user settings
     "CREATE INDEX IF NOT EXISTS idx_user_settings_user ON user_settings(user_id)",
 
+    # v18 indexes: sequences
+    "CREATE INDEX IF NOT EXISTS idx_sequences_name ON sequences(name, period)",
+
+    # v19 indexes: open clock-ins for the dashboard
+    "CREATE INDEX IF NOT EXISTS idx_labor_open ON labor_entries(user_id) "
+    "WHERE end_time IS NULL",
+
+    # v20 indexes: job cost ledger
+    "CREATE INDEX IF NOT EXISTS idx_job_cost_ledger_day ON job_cost_ledger(day)",
+
+    # v21 indexes: labor rollup
+    "CREATE INDEX IF NOT EXISTS idx_labor_rollup_day ON labor_rollup(day)",
+    "CREATE INDEX IF NOT EXISTS idx_labor_rollup_user ON labor_rollup(user_id, day)",
+
+    # v22 indexes: spend rollup
+    "CREATE INDEX IF NOT EXISTS idx_spend_rollup_supplier ON spend_rollup(supplier_id, day)",
+    "CREATE INDEX IF NOT EXISTS idx_spend_rollup_part ON spend_rollup(part_id, day)",
+
+    # v23 indexes: open-return aging
+    "CREATE INDEX IF NOT EXISTS idx_ra_status_created ON return_authorizations(status, created_at)",
+
+    # v24 indexes: un-notified low stock transitions
+    "CREATE INDEX IF NOT EXISTS idx_low_stock_events_pending ON low_stock_events(id) WHERE notified = 0",
+
+    # v25 indexes: change journal compaction
+    "CREATE INDEX IF NOT EXISTS idx_change_journal_row ON change_journal(table_name, row_id, seq)",
+
+    # v31 indexes: one live tombstone per row
+    "CREATE INDEX IF NOT EXISTS idx_sync_tombstones_row ON sync_tombstones(table_name, row_id)",
+
+    # v26 indexes: per-user unread notifications
+    "CREATE INDEX IF NOT EXISTS idx_notifications_unread ON notifications(user_id) WHERE is_read = 0",
+    "CREATE INDEX IF NOT EXISTS idx_notification_receipts_id ON notification_receipts(notification_id)",
+
+    # v27 indexes: activity archive segments by month
+    "CREATE INDEX IF NOT EXISTS idx_activity_segments_month ON activity_archive_segments(month)",
+
     # v10 indexes
     "CREATE INDEX IF NOT EXISTS idx_parts_deprecation ON parts(deprecation_status)",
     "CREATE INDEX IF NOT EXISTS idx_billing_cycles_job ON billing_cycles(job_id)",
@@ -751,6 +1766,30 @@ _SCHEMA_STATEMENTS = [
         UPDATE brands SET updated_at = CURRENT_TIMESTAMP WHERE id = NEW.id;
     END""",
 
+    # v19: stats_counters maintenance
+    *_stats_counter_triggers(),
+
+    # v20: job_cost_ledger maintenance
+    *_job_cost_ledger_triggers(),
+
+    # v21: labor_rollup maintenance
+    *_labor_rollup_triggers(),
+
+    # v22: spend_rollup / order_rollup maintenance
+    *_spend_rollup_triggers(),
+
+    # v23: truck_stats / return_stats maintenance
+    *_truck_and_return_stats_triggers(),
+
+    # v24: low_stock_state maintenance
+    *_low_stock_triggers(),
+
+    # v25: change_journal capture
+    *_change_journal_triggers(),
+
+    # v31: sync tombstones from journaled deletes
+    *_tombstone_triggers(),
+
     # Record schema version
     f"INSERT OR IGNORE INTO schema_version (version) VALUES ({SCHEMA_VERSION})",
 ]
@@ -1997,6 +3036,475 @@ def _migrate_v16_to_v17(conn):
             pass
 
 
+def _migrate_v17_to_v18(conn):
+    """v17 → v18: Sequences table for atomic document-number allocation."""
+    stmts = [
+        """CREATE TABLE IF NOT EXISTS sequences (
+            id TEXT PRIMARY KEY,
+            name TEXT NOT NULL,
+            period TEXT NOT NULL DEFAULT '',
+            device_id TEXT NOT NULL DEFAULT '',
+            next_value INTEGER NOT NULL DEFAULT 1,
+            block_start INTEGER NOT NULL DEFAULT 1,
+            block_end INTEGER,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )""",
+        "CREATE INDEX IF NOT EXISTS idx_sequences_name ON sequences(name, period)",
+        "INSERT OR REPLACE INTO schema_version (version) VALUES (18)",
+    ]
+    for stmt in stmts:
+        try:
+            conn.execute(stmt)
+        except Exception:
+            pass
+
+
+def _migrate_v18_to_v19(conn):
+    """v18 → v19: Trigger-maintained stats counters for summaries."""
+    stmts = [
+        """CREATE TABLE IF NOT EXISTS stats_counters (
+            name TEXT PRIMARY KEY,
+            value REAL NOT NULL DEFAULT 0
+        )""",
+        "CREATE INDEX IF NOT EXISTS idx_labor_open ON labor_entries(user_id) "
+        "WHERE end_time IS NULL",
+        *_stats_counter_triggers(),
+        "INSERT OR REPLACE INTO schema_version (version) VALUES (19)",
+    ]
+    for stmt in stmts:
+        try:
+            conn.execute(stmt)
+        except Exception:
+            pass
+
+
+def _migrate_v19_to_v20(conn):
+    """v19 → v20: Per-job, per-day cost ledger for billing totals."""
+    stmts = [
+        """CREATE TABLE IF NOT EXISTS job_cost_ledger (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            job_id INTEGER NOT NULL,
+            day TEXT NOT NULL,
+            material_cost REAL NOT NULL DEFAULT 0.0,
+            material_quantity INTEGER NOT NULL DEFAULT 0,
+            consumption_count INTEGER NOT NULL DEFAULT 0,
+            labor_hours REAL NOT NULL DEFAULT 0.0,
+            labor_entries INTEGER NOT NULL DEFAULT 0,
+            UNIQUE(job_id, day)
+        )""",
+        "CREATE INDEX IF NOT EXISTS idx_job_cost_ledger_day "
+        "ON job_cost_ledger(day)",
+        *_job_cost_ledger_triggers(),
+    ]
+    for stmt in stmts:
+        try:
+            conn.execute(stmt)
+        except Exception:
+            pass
+    # Backfill from existing rows
+    conn.execute("DELETE FROM job_cost_ledger")
+    conn.execute(JOB_COST_LEDGER_REBUILD_SQL.format(where="1 = 1"))
+    conn.execute("INSERT OR REPLACE INTO schema_version (version) VALUES (20)")
+
+
+def _migrate_v20_to_v21(conn):
+    """v20 → v21: Labor rollup by job, user, category and day."""
+    stmts = [
+        """CREATE TABLE IF NOT EXISTS labor_rollup (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            job_id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            category TEXT NOT NULL DEFAULT '',
+            day TEXT NOT NULL,
+            is_open INTEGER NOT NULL DEFAULT 0,
+            hours REAL NOT NULL DEFAULT 0.0,
+            entries INTEGER NOT NULL DEFAULT 0,
+            overtime_hours REAL NOT NULL DEFAULT 0.0,
+            overtime_entries INTEGER NOT NULL DEFAULT 0,
+            UNIQUE(job_id, user_id, category, day, is_open)
+        )""",
+        "CREATE INDEX IF NOT EXISTS idx_labor_rollup_day ON labor_rollup(day)",
+        "CREATE INDEX IF NOT EXISTS idx_labor_rollup_user "
+        "ON labor_rollup(user_id, day)",
+        *_labor_rollup_triggers(),
+    ]
+    for stmt in stmts:
+        try:
+            conn.execute(stmt)
+        except Exception:
+            pass
+    # Backfill from existing entries
+    conn.execute("DELETE FROM labor_rollup")
+    conn.execute(LABOR_ROLLUP_REBUILD_SQL.format(where="1 = 1"))
+    conn.execute("INSERT OR REPLACE INTO schema_version (version) VALUES (21)")
+
+
+def _migrate_v21_to_v22(conn):
+    """v21 → v22: Supplier/part spend and order rollups."""
+    stmts = [
+        """CREATE TABLE IF NOT EXISTS spend_rollup (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            day TEXT NOT NULL,
+            supplier_id INTEGER NOT NULL,
+            part_id INTEGER NOT NULL,
+            received_quantity INTEGER NOT NULL DEFAULT 0,
+            received_value REAL NOT NULL DEFAULT 0.0,
+            receipt_count INTEGER NOT NULL DEFAULT 0,
+            UNIQUE(day, supplier_id, part_id)
+        )""",
+        """CREATE TABLE IF NOT EXISTS order_rollup (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            day TEXT NOT NULL,
+            supplier_id INTEGER NOT NULL,
+            status TEXT NOT NULL,
+            order_count INTEGER NOT NULL DEFAULT 0,
+            item_orders INTEGER NOT NULL DEFAULT 0,
+            item_count INTEGER NOT NULL DEFAULT 0,
+            ordered_value REAL NOT NULL DEFAULT 0.0,
+            UNIQUE(day, supplier_id, status)
+        )""",
+        "CREATE INDEX IF NOT EXISTS idx_spend_rollup_supplier "
+        "ON spend_rollup(supplier_id, day)",
+        "CREATE INDEX IF NOT EXISTS idx_spend_rollup_part "
+        "ON spend_rollup(part_id, day)",
+        *_spend_rollup_triggers(),
+    ]
+    for stmt in stmts:
+        try:
+            conn.execute(stmt)
+        except Exception:
+            pass
+    # Backfill from existing receipts and orders
+    conn.execute("DELETE FROM spend_rollup")
+    conn.execute(SPEND_ROLLUP_REBUILD_SQL)
+    conn.execute("DELETE FROM order_rollup")
+    conn.execute(ORDER_ROLLUP_REBUILD_SQL)
+    conn.execute("INSERT OR REPLACE INTO schema_version (version) VALUES (22)")
+
+
+def _migrate_v22_to_v23(conn):
+    """v22 → v23: Per-truck and per-RA aggregate tables."""
+    stmts = [
+        """CREATE TABLE IF NOT EXISTS truck_stats (
+            truck_id INTEGER PRIMARY KEY,
+            unique_parts INTEGER NOT NULL DEFAULT 0,
+            total_quantity INTEGER NOT NULL DEFAULT 0,
+            inventory_value REAL NOT NULL DEFAULT 0.0,
+            pending_transfers INTEGER NOT NULL DEFAULT 0
+        )""",
+        """CREATE TABLE IF NOT EXISTS return_stats (
+            ra_id INTEGER PRIMARY KEY,
+            item_count INTEGER NOT NULL DEFAULT 0,
+            total_value REAL NOT NULL DEFAULT 0.0
+        )""",
+        "CREATE INDEX IF NOT EXISTS idx_ra_status_created "
+        "ON return_authorizations(status, created_at)",
+        *_truck_and_return_stats_triggers(),
+    ]
+    for stmt in stmts:
+        try:
+            conn.execute(stmt)
+        except Exception:
+            pass
+    # Backfill from existing trucks and returns
+    conn.execute("DELETE FROM truck_stats")
+    conn.execute(TRUCK_STATS_REBUILD_SQL)
+    conn.execute("DELETE FROM return_stats")
+    conn.execute(RETURN_STATS_REBUILD_SQL)
+    conn.execute("INSERT OR REPLACE INTO schema_version (version) VALUES (23)")
+
+
+def _migrate_v23_to_v24(conn):
+    """v23 → v24: Incrementally maintained low-stock alert set."""
+    stmts = [
+        """CREATE TABLE IF NOT EXISTS low_stock_state (
+            part_id INTEGER NOT NULL,
+            truck_id INTEGER NOT NULL DEFAULT 0,
+            quantity INTEGER NOT NULL,
+            min_quantity INTEGER NOT NULL,
+            entered_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (part_id, truck_id)
+        )""",
+        """CREATE TABLE IF NOT EXISTS low_stock_events (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            part_id INTEGER NOT NULL,
+            truck_id INTEGER NOT NULL DEFAULT 0,
+            transition TEXT NOT NULL CHECK (transition IN ('enter', 'exit')),
+            quantity INTEGER NOT NULL,
+            min_quantity INTEGER NOT NULL,
+            notified INTEGER NOT NULL DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )""",
+        "CREATE INDEX IF NOT EXISTS idx_low_stock_events_pending "
+        "ON low_stock_events(id) WHERE notified = 0",
+        *_low_stock_triggers(),
+    ]
+    for stmt in stmts:
+        try:
+            conn.execute(stmt)
+        except Exception:
+            pass
+    # Backfill the current alert set; existing shortfalls are not
+    # re-announced as transitions
+    conn.execute("DELETE FROM low_stock_state")
+    conn.execute(LOW_STOCK_STATE_REBUILD_SQL)
+    conn.execute("INSERT OR REPLACE INTO schema_version (version) VALUES (24)")
+
+
+def _migrate_v24_to_v25(conn):
+    """v24 → v25: Change-data-capture journal for synced tables."""
+    stmts = [
+        """CREATE TABLE IF NOT EXISTS change_journal (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            table_name TEXT NOT NULL,
+            row_id INTEGER NOT NULL,
+            op TEXT NOT NULL CHECK (op IN ('insert', 'update', 'delete')),
+            device_id TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )""",
+        """CREATE TABLE IF NOT EXISTS change_journal_state (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            origin_device TEXT,
+            floor_seq INTEGER NOT NULL DEFAULT 0
+        )""",
+        "INSERT OR IGNORE INTO change_journal_state (id) VALUES (1)",
+        "CREATE INDEX IF NOT EXISTS idx_change_journal_row "
+        "ON change_journal(table_name, row_id, seq)",
+        *_change_journal_triggers(),
+    ]
+    for stmt in stmts:
+        try:
+            conn.execute(stmt)
+        except Exception:
+            pass
+    # The journal starts empty: history before v25 is not reconstructed
+    conn.execute("INSERT OR REPLACE INTO schema_version (version) VALUES (25)")
+
+
+def _migrate_v25_to_v26(conn):
+    """v25 → v26: Per-user read cursors and receipts for notifications."""
+    stmts = [
+        """CREATE TABLE IF NOT EXISTS notification_cursors (
+            user_id INTEGER PRIMARY KEY,
+            read_through_id INTEGER NOT NULL DEFAULT 0,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+        )""",
+        """CREATE TABLE IF NOT EXISTS notification_receipts (
+            user_id INTEGER NOT NULL,
+            notification_id INTEGER NOT NULL,
+            read_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (user_id, notification_id),
+            FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
+            FOREIGN KEY (notification_id) REFERENCES notifications(id)
+                ON DELETE CASCADE
+        ) WITHOUT ROWID""",
+        "CREATE INDEX IF NOT EXISTS idx_notifications_unread "
+        "ON notifications(user_id) WHERE is_read = 0",
+        "CREATE INDEX IF NOT EXISTS idx_notification_receipts_id "
+        "ON notification_receipts(notification_id)",
+    ]
+    for stmt in stmts:
+        try:
+            conn.execute(stmt)
+        except Exception:
+            pass
+    # The shared is_read flag on a broadcast meant "someone read it";
+    # keep it read for every existing user rather than resurrecting it
+    conn.execute("""
+        INSERT OR IGNORE INTO notification_receipts (user_id, notification_id)
+        SELECT u.id, n.id FROM users u
+        JOIN notifications n ON n.user_id IS NULL AND n.is_read = 1
+    """)
+    conn.execute("INSERT OR REPLACE INTO schema_version (version) VALUES (26)")
+
+
+def _migrate_v26_to_v27(conn):
+    """v26 → v27: Index table for archived activity log segments."""
+    stmts = [
+        """CREATE TABLE IF NOT EXISTS activity_archive_segments (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            month TEXT NOT NULL,
+            file_name TEXT NOT NULL UNIQUE,
+            first_id INTEGER NOT NULL,
+            last_id INTEGER NOT NULL,
+            first_created_at TIMESTAMP,
+            last_created_at TIMESTAMP,
+            entry_count INTEGER NOT NULL DEFAULT 0,
+            entity_types TEXT DEFAULT '[]',
+            user_ids TEXT DEFAULT '[]',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )""",
+        "CREATE INDEX IF NOT EXISTS idx_activity_segments_month "
+        "ON activity_archive_segments(month)",
+    ]
+    for stmt in stmts:
+        try:
+            conn.execute(stmt)
+        except Exception:
+            pass
+    conn.execute("INSERT OR REPLACE INTO schema_version (version) VALUES (27)")
+
+
+def _migrate_v27_to_v28(conn):
+    """v27 → v28: Per-peer watermarks for journal-driven delta sync."""
+    try:
+        conn.execute("""CREATE TABLE IF NOT EXISTS sync_peer_watermarks (
+            peer_device TEXT PRIMARY KEY,
+            imported_seq INTEGER NOT NULL DEFAULT 0,
+            imported_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )""")
+    except Exception:
+        pass
+    conn.execute("INSERT OR REPLACE INTO schema_version (version) VALUES (28)")
+
+
+def _migrate_v28_to_v29(conn):
+    """v28 → v29: Per-table / per-range content digests for sync."""
+    stmts = [
+        """CREATE TABLE IF NOT EXISTS sync_digest_ranges (
+            table_name TEXT NOT NULL,
+            bucket INTEGER NOT NULL,
+            row_count INTEGER NOT NULL,
+            digest TEXT NOT NULL,
+            PRIMARY KEY (table_name, bucket)
+        ) WITHOUT ROWID""",
+        """CREATE TABLE IF NOT EXISTS sync_digest_state (
+            table_name TEXT PRIMARY KEY,
+            journal_seq INTEGER NOT NULL DEFAULT 0
+        )""",
+    ]
+    for stmt in stmts:
+        try:
+            conn.execute(stmt)
+        except Exception:
+            pass
+    conn.execute("INSERT OR REPLACE INTO schema_version (version) VALUES (29)")
+
+
+def _migrate_v29_to_v30(conn):
+    """v29 → v30: Per-peer ledger of imported sync files."""
+    try:
+        conn.execute("""CREATE TABLE IF NOT EXISTS sync_import_ledger (
+                peer_device TEXT PRIMARY KEY,
+                file_name TEXT NOT NULL,
+                file_size INTEGER NOT NULL,
+                file_mtime_ns INTEGER NOT NULL,
+                content_hash TEXT NOT NULL,
+                exported_at TEXT,
+                rows_done INTEGER NOT NULL DEFAULT 0,
+                status TEXT NOT NULL DEFAULT 'partial'
+                    CHECK (status IN ('partial', 'complete')),
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )""")
+    except Exception:
+        pass
+    conn.execute("INSERT OR REPLACE INTO schema_version (version) VALUES (30)")
+
+
+def _migrate_v30_to_v31(conn):
+    """v30 → v31: Trigger-captured sync tombstones."""
+    stmts = [
+        """CREATE TABLE IF NOT EXISTS sync_tombstones (
+            seq INTEGER PRIMARY KEY,
+            table_name TEXT NOT NULL,
+            row_id INTEGER NOT NULL,
+            device_id TEXT,
+            deleted_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )""",
+        "CREATE INDEX IF NOT EXISTS idx_sync_tombstones_row "
+        "ON sync_tombstones(table_name, row_id)",
+        *_tombstone_triggers(),
+        # Seed from rows whose newest journal entry is a delete
+        """INSERT OR IGNORE INTO sync_tombstones
+               (seq, table_name, row_id, device_id, deleted_at)
+           SELECT j.seq, j.table_name, j.row_id, j.device_id, j.created_at
+           FROM change_journal j
+           WHERE j.op = 'delete' AND NOT EXISTS (
+               SELECT 1 FROM change_journal newer
+               WHERE newer.table_name = j.table_name
+                 AND newer.row_id = j.row_id AND newer.seq > j.seq
+           )""",
+    ]
+    for stmt in stmts:
+        try:
+            conn.execute(stmt)
+        except Exception:
+            pass
+    conn.execute("INSERT OR REPLACE INTO schema_version (version) VALUES (31)")
+
+
+def _migrate_v31_to_v32(conn):
+    """v31 → v32: Book job_parts material on its assigned_at day."""
+    for event in ("insert", "delete", "update"):
+        conn.execute(f"DROP TRIGGER IF EXISTS ledger_job_parts_{event}")
+    for stmt in _job_cost_ledger_triggers():
+        conn.execute(stmt)
+    conn.execute("DELETE FROM job_cost_ledger")
+    conn.execute(JOB_COST_LEDGER_REBUILD_SQL.format(where="1 = 1"))
+    conn.execute("INSERT OR REPLACE INTO schema_version (version) VALUES (32)")
+
+
+def _migrate_v32_to_v33(conn):
+    """v32 → v33: Book later uses of a job part on the day they happen."""
+    for event in ("insert", "delete", "update"):
+        conn.execute(f"DROP TRIGGER IF EXISTS ledger_job_parts_{event}")
+    for stmt in _job_cost_ledger_triggers():
+        conn.execute(stmt)
+    conn.execute("DELETE FROM job_cost_ledger")
+    conn.execute(JOB_COST_LEDGER_REBUILD_SQL.format(where="1 = 1"))
+    conn.execute("INSERT OR REPLACE INTO schema_version (version) VALUES (33)")
+
+
+def _migrate_v33_to_v34(conn):
+    """v33 → v34: Remember locally retired rows so merges skip them."""
+    conn.execute("""CREATE TABLE IF NOT EXISTS sync_retired_rows (
+        table_name TEXT NOT NULL,
+        row_id INTEGER NOT NULL,
+        retired_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (table_name, row_id)
+    )""")
+    # Notifications already moved into monthly partitions
+    for (table,) in conn.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'table' "
+        "AND name GLOB 'notifications_p[0-9][0-9][0-9][0-9][0-9][0-9]'"
+    ).fetchall():
+        conn.execute(
+            "INSERT OR IGNORE INTO sync_retired_rows (table_name, row_id) "
+            f"SELECT 'notifications', id FROM {table}"  # noqa: S608
+        )
+    # Activity entries already moved into archive segments
+    conn.execute("""
+        WITH RECURSIVE archived(id, last_id) AS (
+            SELECT first_id, last_id FROM activity_archive_segments
+            UNION ALL
+            SELECT id + 1, last_id FROM archived WHERE id < last_id
+        )
+        INSERT OR IGNORE INTO sync_retired_rows (table_name, row_id)
+        SELECT 'activity_log', id FROM archived
+        WHERE NOT EXISTS (
+            SELECT 1 FROM activity_log a WHERE a.id = archived.id
+        )
+    """)
+    conn.execute("INSERT OR REPLACE INTO schema_version (version) VALUES (34)")
+
+
+def _migrate_v34_to_v35(conn):
+    """v34 → v35: Drop the shared notifications.unread counter.
+
+    Read state is per user (cursors and receipts), so one counter over
+    the legacy is_read column was always wrong.
+    """
+    for event in ("insert", "delete", "update"):
+        conn.execute(f"DROP TRIGGER IF EXISTS stats_notifications_{event}")
+    for stmt in _stats_counter_triggers():
+        conn.execute(stmt)
+    conn.execute(
+        "DELETE FROM stats_counters WHERE name = 'notifications.unread'"
+    )
+    conn.execute("INSERT OR REPLACE INTO schema_version (version) VALUES (35)")
+
+
 def _ensure_required_columns(conn):
     """Safety net: ensure all required columns exist on every table.
 
@@ -2136,6 +3644,42 @@ def initialize_database(db_connection):
                 _migrate_v15_to_v16(conn)
             if version < 17:
                 _migrate_v16_to_v17(conn)
+            if version < 18:
+                _migrate_v17_to_v18(conn)
+            if version < 19:
+                _migrate_v18_to_v19(conn)
+            if version < 20:
+                _migrate_v19_to_v20(conn)
+            if version < 21:
+                _migrate_v20_to_v21(conn)
+            if version < 22:
+                _migrate_v21_to_v22(conn)
+            if version < 23:
+                _migrate_v22_to_v23(conn)
+            if version < 24:
+                _migrate_v23_to_v24(conn)
+            if version < 25:
+                _migrate_v24_to_v25(conn)
+            if version < 26:
+                _migrate_v25_to_v26(conn)
+            if version < 27:
+                _migrate_v26_to_v27(conn)
+            if version < 28:
+                _migrate_v27_to_v28(conn)
+            if version < 29:
+                _migrate_v28_to_v29(conn)
+            if version < 30:
+                _migrate_v29_to_v30(conn)
+            if version < 31:
+                _migrate_v30_to_v31(conn)
+            if version < 32:
+                _migrate_v31_to_v32(conn)
+            if version < 33:
+                _migrate_v32_to_v33(conn)
+            if version < 34:
+                _migrate_v33_to_v34(conn)
+            if version < 35:
+                _migrate_v34_to_v35(conn)
 
         # Ensure all required columns exist (safety net for edge-case
         # migrations that may have silently failed on ALTER TABLE)
@@ -2146,3 +3690,6 @@ def initialize_database(db_connection):
 
         # Always refresh system hats to latest permissions
         _refresh_system_hat_permissions(conn)
+
+        # Create and seed any missing stats counters (v19)
+        _seed_stats_counters(conn)
@@ -0,0 +1,186 @@
+"""Merkle-style content digests over the synced tables.
+
+Each table is split into fixed primary-key ranges ("buckets") of
+``RANGE_SIZE`` ids.  A bucket's digest hashes its rows in id order; a
+table's digest hashes its bucket digests in bucket order.  Two devices
+holding the same rows therefore agree on every digest, and comparing
+them tells an importer which tables — and which id ranges inside a
+table — can be skipped.
+
+Bucket digests are cached in ``sync_digest_ranges`` and kept current
+from the change journal: only buckets containing journaled changes are
+rehashed, so refreshing the digests of a quiet database is a handful of
+indexed queries.  Tables whose ids are not integers are a single bucket
+and always rehashed whole.
+"""
+
+import hashlib
+import json
+
+RANGE_SIZE = 512
+_DIGEST_SIZE = 16
+
+
+def bucket_of(pk_value) -> str:
+    """Bucket key (as used in digest dicts) for a primary key value."""
+    if isinstance(pk_value, int):
+        return str(pk_value // RANGE_SIZE)
+    return "0"
+
+
+def _row_bytes(columns: list[str], row) -> bytes:
+    pairs = sorted(zip(columns, row))
+    return json.dumps(pairs, separators=(",", ":"), default=str).encode(
+        "utf-8"
+    )
+
+
+def _hash_rows(conn, table: str, where: str = "", params=()) -> dict:
+    """{bucket: (row_count, digest)} for the rows matching *where*."""
+    cursor = conn.execute(
+        f"SELECT * FROM {table} {where} ORDER BY id",  # noqa: S608
+        params,
+    )
+    columns = [desc[0] for desc in cursor.description]
+    pk_index = columns.index("id")
+    buckets: dict[str, list] = {}
+    while True:
+        rows = cursor.fetchmany(1000)
+        if not rows:
+            break
+        for row in rows:
+            key = bucket_of(row[pk_index])
+            entry = buckets.get(key)
+            if entry is None:
+                entry = buckets[key] = [
+                    0, hashlib.blake2b(digest_size=_DIGEST_SIZE),
+                ]
+            entry[0] += 1
+            entry[1].update(hashlib.blake2b(
+                _row_bytes(columns, row), digest_size=_DIGEST_SIZE,
+            ).digest())
+    return {k: (count, h.hexdigest()) for k, (count, h) in buckets.items()}
+
+
+def _integer_ids(conn, table: str) -> bool:
+    info = conn.execute(f"PRAGMA table_info({table})").fetchall()
+    return any(
+        col[1] == "id" and col[5] and col[2].upper() == "INTEGER"
+        for col in info
+    )
+
+
+def _refresh_table(conn, table: str, head: int, floor: int):
+    state = conn.execute(
+        "SELECT journal_seq FROM sync_digest_state WHERE table_name = ?",
+        (table,),
+    ).fetchone()
+    if state is not None and state[0] >= head:
+        return  # No journal entries since the last refresh
+
+    if state is None or state[0] < floor or not _integer_ids(conn, table):
+        conn.execute(
+            "DELETE FROM sync_digest_ranges WHERE table_name = ?", (table,),
+        )
+        fresh = _hash_rows(conn, table)
+    else:
+        dirty = {
+            bucket_of(r[0]) for r in conn.execute(
+                "SELECT DISTINCT row_id FROM change_journal "
+                "WHERE table_name = ? AND seq > ? AND seq <= ?",
+                (table, state[0], head),
+            ).fetchall()
+        }
+        fresh = {}
+        for key in dirty:
+            lo = int(key) * RANGE_SIZE
+            conn.execute(
+                "DELETE FROM sync_digest_ranges "
+                "WHERE table_name = ? AND bucket = ?", (table, int(key)),
+            )
+            fresh.update(_hash_rows(
+                conn, table, "WHERE id >= ? AND id < ?",
+                (lo, lo + RANGE_SIZE),
+            ))
+
+    conn.executemany(
+        "INSERT OR REPLACE INTO sync_digest_ranges "
+        "(table_name, bucket, row_count, digest) VALUES (?, ?, ?, ?)",
+        [(table, int(k), count, digest)
+         for k, (count, digest) in fresh.items()],
+    )
+    conn.execute(
+        "INSERT OR REPLACE INTO sync_digest_state (table_name, journal_seq) "
+        "VALUES (?, ?)", (table, head),
+    )
+
+
+def refresh_digests(conn, tables: list[str]) -> dict:
+    """Bring the cached digests up to date and return them.
+
+    Returns ``{table: {"rows": n, "digest": hex, "ranges": {bucket:
+    hex}}}``.  Must run inside a write transaction (it updates the
+    cache).
+    """
+    head = conn.execute("""
+        SELECT MAX(
+            COALESCE((SELECT MAX(seq) FROM change_journal), 0),
+            COALESCE((SELECT floor_seq FROM change_journal_state
+                      WHERE id = 1), 0)
+        )
+    """).fetchone()[0] or 0
+    floor_row = conn.execute(
+        "SELECT floor_seq FROM change_journal_state WHERE id = 1"
+    ).fetchone()
+    floor = floor_row[0] if floor_row else 0
+
+    digests = {}
+    for table in tables:
+        try:
+            _refresh_table(conn, table, head, floor)
+        except Exception:
+            continue  # Table missing on this schema — never skipped
+        ranges, rows = {}, 0
+        table_hash = hashlib.blake2b(digest_size=_DIGEST_SIZE)
+        for bucket, count, digest in conn.execute(
+            "SELECT bucket, row_count, digest FROM sync_digest_ranges "
+            "WHERE table_name = ? ORDER BY bucket", (table,),
+        ).fetchall():
+            ranges[str(bucket)] = digest
+            rows += count
+            table_hash.update(f"{bucket}:{digest};".encode("ascii"))
+        digests[table] = {
+            "rows": rows, "digest": table_hash.hexdigest(), "ranges": ranges,
+        }
+    return digests
+
+
+def invalidate_digests(conn, table: str):
+    """Force a full rehash of *table* (after unjournaled changes)."""
+    conn.execute(
+        "DELETE FROM sync_digest_state WHERE table_name = ?", (table,),
+    )
+
+
+def diff_digests(local: dict, remote: dict, tables: list[str]) -> dict:
+    """What to merge from a peer, given both sides' digests.
+
+    Returns ``{table: None}`` for tables to merge whole (no usable
+    remote digest) and ``{table: {bucket, ...}}`` for tables where only
+    some ranges differ.  Tables with identical digests are left out.
+    """
+    plan = {}
+    for table in tables:
+        theirs = remote.get(table)
+        mine = local.get(table)
+        if theirs is None or mine is None:
+            plan[table] = None
+            continue
+        if theirs.get("digest") == mine["digest"]:
+            continue
+        their_ranges = theirs.get("ranges", {})
+        plan[table] = {
+            bucket for bucket in their_ranges
+            if their_ranges[bucket] != mine["ranges"].get(bucket)
+        }
+    return plan
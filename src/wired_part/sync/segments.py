@@ -0,0 +1,103 @@
+"""Per-device segment logs, shared by folder sync and the sync server.
+
+A device's log is one directory of immutable sync files::
+
+    seg_<base>_<through>.jsonl.z   its own journal changes in (base, through]
+    snap_<through>.jsonl.z         its whole database as of *through*
+
+Files are written under a temp name and renamed into place, and their
+names say what they cover, so a reader picks the files past its
+watermark from a directory listing without any lock.
+"""
+
+from pathlib import Path
+
+from wired_part.sync.sync_format import SUFFIX
+
+
+def segment_name(base: int, through: int) -> str:
+    return f"seg_{base:012d}_{through:012d}{SUFFIX}"
+
+
+def snapshot_name(through: int) -> str:
+    return f"snap_{through:012d}{SUFFIX}"
+
+
+def parse_name(name: str) -> tuple[str, int, int] | None:
+    """``("seg", base, through)``, ``("snap", 0, through)`` or None."""
+    if not name.endswith(SUFFIX):
+        return None  # Includes writers' in-progress temp files
+    parts = name[:-len(SUFFIX)].split("_")
+    try:
+        if parts[0] == "seg" and len(parts) == 3:
+            return "seg", int(parts[1]), int(parts[2])
+        if parts[0] == "snap" and len(parts) == 2:
+            return "snap", 0, int(parts[1])
+    except ValueError:
+        pass
+    return None
+
+
+def list_segments(folder: Path) -> tuple[list, list]:
+    """``([(base, through, path)], [(through, path)])``, both sorted."""
+    segments, snapshots = [], []
+    try:
+        entries = list(folder.iterdir())
+    except OSError:
+        return segments, snapshots
+    for path in entries:
+        parsed = parse_name(path.name)
+        if parsed is None:
+            continue
+        kind, base, through = parsed
+        if kind == "seg":
+            segments.append((base, through, path))
+        else:
+            snapshots.append((through, path))
+    return sorted(segments), sorted(snapshots)
+
+
+def log_head(folder: Path) -> int:
+    """Journal position the newest file in *folder* reaches (0 if none)."""
+    segments, snapshots = list_segments(folder)
+    return max(
+        [through for _, through, _ in segments]
+        + [through for through, _ in snapshots] + [0]
+    )
+
+
+def plan_segments(folder: Path, mark: int) -> list[Path]:
+    """Files to apply, in order, to bring a reader past *mark*."""
+    segments, snapshots = list_segments(folder)
+    pending = [s for s in segments if s[1] > mark]
+    plan = []
+    if snapshots and (
+        not pending or pending[0][0] > mark
+    ) and snapshots[-1][0] > mark:
+        # The segments after the watermark are gone: start over from
+        # the newest snapshot
+        mark = snapshots[-1][0]
+        plan.append(snapshots[-1][1])
+        pending = [s for s in segments if s[1] > mark]
+    for base, through, path in pending:
+        if base > mark:
+            break  # Gap (still being written?) — retry next round
+        plan.append(path)
+        mark = through
+    return plan
+
+
+def prune_segments(folder: Path, keep: int):
+    """Remove the files a snapshot at *keep* supersedes.
+
+    A reader holding one of them open at this moment just fails that
+    file and picks up the snapshot next round.
+    """
+    segments, snapshots = list_segments(folder)
+    stale = [path for _, through, path in segments if through <= keep]
+    stale += [path for through, path in snapshots if through < keep]
+    for path in stale:
+        try:
+            path.unlink()
+        except OSError:
+            pass  # Open on another device (Windows); next time
@@ -0,0 +1,449 @@
+"""Streaming, compressed sync file format (format version 2).
+
+A sync file is a short magic prefix followed by one compressed stream
+(zlib or lzma) of JSON lines::
+
+    {"format": 2, "device_id": ..., "schema_version": ..., ...}   header
+    {"table": "parts", "columns": ["id", "name", ...]}             section
+    [1, "Wire nut", ...]                                           row
+    ...
+    {"deletes": "parts", "ids": [4, 9]}                            deletes
+    {"end": {"rows": 1234}}                                        trailer
+
+After the compressed stream comes a fixed-size, uncompressed footer:
+``FOOTER_MAGIC``, a hash of every byte before it and their count.  It
+lets a reader check that a file is complete, and identify its content,
+from the last few bytes alone.
+
+Rows are written as value arrays under their section's column list, so
+column names appear once per table instead of once per row.  Files are
+written through ``SyncFileWriter`` and read through ``SyncFileReader``
+in fixed-size chunks; neither side holds more than one batch of rows,
+however large the database is.  A file without its trailer (e.g. a copy
+cut short on the network share) is rejected.
+
+Version 1 files — a single pretty-printed JSON document — are still
+read, so devices running older builds can sync with newer ones.
+"""
+
+import hashlib
+import json
+import lzma
+import os
+import pickle
+import struct
+import tempfile
+import zlib
+from pathlib import Path
+
+FORMAT_VERSION = 2
+MAGIC = b"WPS2"
+CODECS = {"zlib": b"z", "lzma": b"x"}
+DEFAULT_CODEC = "zlib"
+SUFFIX = ".jsonl.z"
+LEGACY_SUFFIX = ".json"
+
+FOOTER_MAGIC = b"WPSEND"
+_FOOTER = struct.Struct("!6s16sQ")  # magic, blake2b-128, body length
+
+_READ_CHUNK = 256 * 1024
+_WRITE_BUFFER = 256 * 1024
+
+
+class SyncFormatError(ValueError):
+    """A sync file is corrupt, truncated or of an unknown format."""
+
+
+def _dumps(value) -> bytes:
+    return json.dumps(value, separators=(",", ":"), default=str).encode(
+        "utf-8"
+    ) + b"\n"
+
+
+class SyncFileWriter:
+    """Write a sync file incrementally; renamed into place on close.
+
+    Use as a context manager.  If the block raises, the partial temp
+    file is removed and any previous file at *path* is left untouched.
+    """
+
+    def __init__(self, path, codec: str = DEFAULT_CODEC):
+        if codec not in CODECS:
+            raise ValueError(f"Unknown sync codec: {codec!r}")
+        self.path = Path(path)
+        self._tmp = self.path.with_name(self.path.name + ".tmp")
+        self._fh = open(self._tmp, "wb")
+        self._hash = hashlib.blake2b(digest_size=16)
+        self._size = 0
+        self._write(MAGIC + CODECS[codec])
+        self._compressor = (
+            zlib.compressobj(6) if codec == "zlib"
+            else lzma.LZMACompressor(preset=6)
+        )
+        self._pending: list[bytes] = []
+        self._pending_size = 0
+        self._rows = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+        return False
+
+    def _emit(self, line: bytes):
+        self._pending.append(line)
+        self._pending_size += len(line)
+        if self._pending_size >= _WRITE_BUFFER:
+            self._drain()
+
+    def _write(self, data: bytes):
+        self._fh.write(data)
+        self._hash.update(data)
+        self._size += len(data)
+
+    def _drain(self):
+        if self._pending:
+            self._write(self._compressor.compress(b"".join(self._pending)))
+            self._pending.clear()
+            self._pending_size = 0
+
+    def write_header(self, meta: dict):
+        """Write the header record; must come first."""
+        self._emit(_dumps({"format": FORMAT_VERSION, **meta}))
+
+    def write_table(self, table: str, columns: list[str], rows) -> int:
+        """Write one table section from an iterable of value sequences.
+
+        Nothing is written for a table without rows.  Returns the number
+        of rows written.
+        """
+        count = 0
+        for row in rows:
+            if count == 0:
+                self._emit(_dumps({"table": table, "columns": list(columns)}))
+            self._emit(_dumps(list(row)))
+            count += 1
+        self._rows += count
+        return count
+
+    def write_deletes(self, table: str, ids: list):
+        """Record ids deleted from *table*."""
+        if ids:
+            self._emit(_dumps({"deletes": table, "ids": list(ids)}))
+
+    def close(self):
+        """Write the trailer, fsync and atomically replace the target."""
+        if self._fh is None:
+            return
+        self._emit(_dumps({"end": {"rows": self._rows}}))
+        self._drain()
+        self._write(self._compressor.flush())
+        self._fh.write(_FOOTER.pack(
+            FOOTER_MAGIC, self._hash.digest(), self._size,
+        ))
+        self._fh.flush()
+        os.fsync(self._fh.fileno())
+        self._fh.close()
+        self._fh = None
+        os.replace(self._tmp, self.path)
+
+    def abort(self):
+        """Discard the partial file."""
+        if self._fh is None:
+            return
+        self._fh.close()
+        self._fh = None
+        try:
+            self._tmp.unlink()
+        except OSError:
+            pass
+
+
+class SyncFileReader:
+    """Read a sync file (format 1 or 2) without loading it whole.
+
+    ``header`` holds the header fields.  ``batches()`` then yields
+    ``("rows", table, [row_dict, ...])`` in batches of at most
+    *batch_size* rows, and ``("deletes", table, [id, ...])``, in file
+    order; it raises SyncFormatError if the file turns out to be
+    truncated or corrupt.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._fh = open(self.path, "rb")
+        self._legacy = None
+        try:
+            prefix = self._fh.read(len(MAGIC) + 1)
+            if prefix[:len(MAGIC)] == MAGIC:
+                self.footer = read_footer(self.path)
+                self._remaining = (
+                    self.footer[1] - len(prefix) if self.footer else None
+                )
+                self._hash = hashlib.blake2b(prefix, digest_size=16)
+                codec = prefix[len(MAGIC):]
+                if codec == CODECS["zlib"]:
+                    self._decompressor = zlib.decompressobj()
+                elif codec == CODECS["lzma"]:
+                    self._decompressor = lzma.LZMADecompressor()
+                else:
+                    raise SyncFormatError(f"Unknown codec in {self.path.name}")
+                self._lines = self._iter_lines()
+                self.header = self._next_record()
+                if not isinstance(self.header, dict) \
+                        or "format" not in self.header:
+                    raise SyncFormatError(f"No header in {self.path.name}")
+            else:
+                self.footer = None
+                self._fh.seek(0)
+                self._legacy = self._load_legacy()
+                self.header = {
+                    k: v for k, v in self._legacy.items()
+                    if k not in ("tables", "deletes")
+                }
+                self.header.setdefault("format", 1)
+        except BaseException:
+            self.close()
+            raise
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    def close(self):
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
+
+    @property
+    def format_version(self) -> int:
+        return self.header.get("format", 1)
+
+    def _load_legacy(self) -> dict:
+        try:
+            data = json.load(self._fh)
+        except (json.JSONDecodeError, UnicodeDecodeError) as e:
+            raise SyncFormatError(f"Corrupt sync file {self.path.name}") from e
+        if not isinstance(data, dict):
+            raise SyncFormatError(f"Corrupt sync file {self.path.name}")
+        return data
+
+    def _inflate(self, chunk: bytes):
+        """Decompress *chunk* in bounded pieces (guards against bombs)."""
+        dec = self._decompressor
+        if isinstance(dec, lzma.LZMADecompressor):
+            yield dec.decompress(chunk, _READ_CHUNK)
+            while not dec.needs_input and not dec.eof:
+                yield dec.decompress(b"", _READ_CHUNK)
+            return
+        yield dec.decompress(chunk, _READ_CHUNK)
+        while dec.unconsumed_tail:
+            yield dec.decompress(dec.unconsumed_tail, _READ_CHUNK)
+
+    def _iter_lines(self):
+        tail = b""
+        try:
+            while True:
+                size = _READ_CHUNK
+                if self._remaining is not None:
+                    size = min(size, self._remaining)
+                chunk = self._fh.read(size) if size else b""
+                if not chunk or self._decompressor.eof:
+                    if hasattr(self._decompressor, "flush"):  # zlib
+                        tail += self._decompressor.flush()
+                    break
+                self._hash.update(chunk)
+                if self._remaining is not None:
+                    self._remaining -= len(chunk)
+                for piece in self._inflate(chunk):
+                    tail += piece
+                    *lines, tail = tail.split(b"\n")
+                    yield from lines
+        except (zlib.error, lzma.LZMAError, OSError) as e:
+            raise SyncFormatError(f"Corrupt sync file {self.path.name}") from e
+        if self.footer and (
+            self._remaining or self._hash.hexdigest() != self.footer[0]
+        ):
+            raise SyncFormatError(f"Corrupt sync file {self.path.name}")
+        if tail:
+            yield tail
+
+    def _next_record(self):
+        line = next(self._lines, None)
+        if line is None:
+            return None
+        try:
+            return json.loads(line)
+        except (json.JSONDecodeError, UnicodeDecodeError) as e:
+            raise SyncFormatError(f"Corrupt sync file {self.path.name}") from e
+
+    def batches(self, batch_size: int = 1000):
+        """Yield row batches and delete lists in file order."""
+        if self._legacy is not None:
+            yield from self._legacy_batches(batch_size)
+            return
+
+        table, columns, batch = None, None, []
+        while True:
+            record = self._next_record()
+            if record is None:
+                raise SyncFormatError(f"Truncated sync file {self.path.name}")
+            if isinstance(record, list):
+                if columns is None:
+                    raise SyncFormatError(
+                        f"Row outside a table in {self.path.name}"
+                    )
+                batch.append(dict(zip(columns, record)))
+                if len(batch) >= batch_size:
+                    yield "rows", table, batch
+                    batch = []
+                continue
+            if batch:
+                yield "rows", table, batch
+                batch = []
+            if "table" in record:
+                table, columns = record["table"], record["columns"]
+            elif "deletes" in record:
+                yield "deletes", record["deletes"], record["ids"]
+            elif "end" in record:
+                return
+            else:
+                raise SyncFormatError(f"Unknown record in {self.path.name}")
+
+    def _legacy_batches(self, batch_size: int):
+        for table, rows in self._legacy.get("tables", {}).items():
+            for start in range(0, len(rows), batch_size):
+                yield "rows", table, rows[start:start + batch_size]
+        for table, ids in self._legacy.get("deletes", {}).items():
+            yield "deletes", table, ids
+
+
+def read_footer(path) -> tuple[str, int] | None:
+    """``(content_hash, body_length)`` from a complete v2 file's footer.
+
+    Returns None for legacy files and for files without a valid footer
+    (e.g. still being copied, or cut short).
+    """
+    try:
+        with open(path, "rb") as fh:
+            fh.seek(0, os.SEEK_END)
+            size = fh.tell()
+            if size < _FOOTER.size:
+                return None
+            fh.seek(size - _FOOTER.size)
+            magic, digest, body = _FOOTER.unpack(fh.read(_FOOTER.size))
+    except OSError:
+        return None
+    if magic != FOOTER_MAGIC or body != size - _FOOTER.size:
+        return None
+    return digest.hex(), body
+
+
+def content_hash(path) -> str | None:
+    """Identify a sync file's content without decoding it.
+
+    v2 files are identified by their footer hash; legacy JSON files by
+    a hash of the whole file.  Returns None for a v2 file without a
+    valid footer — one that is incomplete and should not be imported
+    yet.
+    """
+    footer = read_footer(path)
+    if footer:
+        return footer[0]
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as fh:
+        if fh.read(len(MAGIC)) == MAGIC:
+            return None
+        fh.seek(0)
+        for chunk in iter(lambda: fh.read(_READ_CHUNK), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def write_sync_file(path, data: dict, codec: str = DEFAULT_CODEC):
+    """Write an in-memory export dict (``tables``/``deletes``) to *path*."""
+    meta = {k: v for k, v in data.items() if k not in ("tables", "deletes")}
+    with SyncFileWriter(path, codec) as out:
+        out.write_header(meta)
+        for table, rows in data.get("tables", {}).items():
+            if not rows:
+                continue
+            columns = list(rows[0].keys())
+            out.write_table(
+                table, columns, ([row.get(c) for c in columns] for row in rows),
+            )
+        for table, ids in data.get("deletes", {}).items():
+            out.write_deletes(table, ids)
+
+
+def read_sync_file(path) -> dict:
+    """Load a whole sync file into the in-memory export dict shape.
+
+    For small files and tools (conflict preview, tests); imports stream
+    through SyncFileReader instead.
+    """
+    with SyncFileReader(path) as reader:
+        data = {k: v for k, v in reader.header.items() if k != "format"}
+        data["tables"] = {}
+        deletes = {}
+        for kind, table, payload in reader.batches():
+            if kind == "rows":
+                data["tables"].setdefault(table, []).extend(payload)
+            else:
+                deletes.setdefault(table, []).extend(payload)
+        if deletes:
+            data["deletes"] = deletes
+        return data
+
+
+def spool_sync_file(
+    path, spool_dir, batch_size: int = 1000,
+    schema_version: int | None = None,
+) -> tuple[dict, str | None]:
+    """Decode and check a sync file into a spool: ``(header, spool)``.
+
+    The ``batches()`` records are pickled one at a time to a temp file
+    in *spool_dir*, so only one batch is in memory here or, later, in
+    ``read_spool``.  The file is read to the end, verifying the trailer
+    and footer hash, before the spool's path is returned; on error the
+    partial spool is removed.  When *schema_version* is given and the
+    file's differs, the body is not decoded and *spool* is None.  A
+    plain module-level function so it can run in a worker process.
+    """
+    with SyncFileReader(path) as reader:
+        header = reader.header
+        if schema_version is not None \
+                and header.get("schema_version", 0) != schema_version:
+            return header, None
+        fd, spool = tempfile.mkstemp(suffix=".spool", dir=spool_dir)
+        try:
+            with os.fdopen(fd, "wb") as out:
+                for record in reader.batches(batch_size):
+                    pickle.dump(record, out, pickle.HIGHEST_PROTOCOL)
+        except BaseException:
+            os.unlink(spool)
+            raise
+    return header, spool
+
+
+def read_spool(spool):
+    """Yield the records ``spool_sync_file`` wrote, then delete *spool*."""
+    try:
+        with open(spool, "rb") as fh:
+            while True:
+                try:
+                    yield pickle.load(fh)
+                except EOFError:
+                    return
+    finally:
+        try:
+            os.unlink(spool)
+        except OSError:
+            pass
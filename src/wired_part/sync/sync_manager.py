@@ -7,60 +7,60 @@ Each device maintains its own local SQLite database. Sync works by:
 
 Sync folder layout:
     <sync_folder>/
-        wiredpart_sync_<device_id>.json   — each device's export
-        wiredpart_lock                     — lock file to prevent races
+        wiredpart_sync_<device_id>.jsonl.z — each device's export
+        wiredpart_delta_<src>_to_<dst>.jsonl.z — journal delta for one peer
+        wiredpart_ack_<device_id>.json    — journal positions a device imported
+        segments/<device_id>/             — a device's immutable delta segments
+        wiredpart_lock                     — lock for full-file and delta sync
+
+A wired-part-syncd server (syncd.py) can hold the segment logs instead,
+on its own disk in the same layout, and serve them over HTTP.
 """
 
 import json
+import multiprocessing
 import os
+import tempfile
 import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
 from datetime import datetime, timezone
+from operator import itemgetter
 from pathlib import Path
+from typing import Callable
 
 from wired_part.config import Config
+from wired_part.database.schema import SYNC_TABLES
+from wired_part.sync.digests import bucket_of, diff_digests, refresh_digests
+from wired_part.sync.segments import (
+    list_segments,
+    log_head,
+    parse_name,
+    plan_segments,
+    prune_segments,
+    segment_name,
+    snapshot_name,
+)
+from wired_part.sync.sync_format import (
+    LEGACY_SUFFIX,
+    SUFFIX,
+    SyncFileReader,
+    SyncFileWriter,
+    SyncFormatError,
+    content_hash,
+    read_spool,
+    spool_sync_file,
+    write_sync_file,
+)
 
 
-# Tables included in sync (order matters for FK constraints)
-SYNC_TABLES = [
-    "categories",
-    "suppliers",
-    "users",
-    "hats",
-    "user_hats",
-    "user_settings",
-    "parts",
-    "part_suppliers",
-    "brands",
-    "part_variants",
-    "parts_lists",
-    "parts_list_items",
-    "trucks",
-    "jobs",
-    "job_assignments",
-    "billing_cycles",
-    "purchase_orders",
-    "purchase_order_items",
-    "receive_log",
-    "truck_transfers",
-    "truck_inventory",
-    "labor_entries",
-    "consumption_log",
-    "job_parts",
-    "return_authorizations",
-    "return_authorization_items",
-    "notebook_sections",
-    "notebook_pages",
-    "notebook_attachments",
-    "job_updates",
-    "activity_log",
-    "notifications",
-]
-
 # Tables that use updated_at for merge resolution
 TABLES_WITH_UPDATED_AT = {
     "parts", "jobs", "users", "trucks", "suppliers", "categories",
     "purchase_orders", "purchase_order_items", "labor_entries",
-    "notebook_pages", "truck_inventory", "user_settings",
+    "notebook_pages", "truck_inventory", "user_settings", "sequences",
 }
 
 
@@ -72,12 +72,35 @@ class SyncLockError(SyncError):
     """Another device is currently syncing."""
 
 
+class SyncCancelled(SyncError):
+    """The sync was cancelled; committed progress is kept."""
+
+
+@dataclass(frozen=True)
+class SyncProgress:
+    """Import progress: *done* of *total* peer files merged so far.
+
+    While a file is merged, events with *table* set report the *rows*
+    merged into that table from it so far.
+    """
+    done: int
+    total: int
+    device_id: str = ""
+    table: str = ""
+    rows: int = 0
+
+
 class SyncManager:
     """Manages file-based database synchronization."""
 
     LOCK_FILE = "wiredpart_lock"
     LOCK_TIMEOUT_SECONDS = 300  # 5 minute stale lock threshold
     EXPORT_PREFIX = "wiredpart_sync_"
+    EXPORT_CODEC = "zlib"  # or "lzma": smaller files, slower export
+    MERGE_BATCH = 1000  # rows held in memory per table while importing
+    IMPORT_CHECKPOINT_ROWS = 20_000  # rows between commits of a v2 import
+    DECODE_WORKERS = None  # processes decoding peer files; None = CPUs
+    PARALLEL_DECODE_MIN_BYTES = 1 << 20  # below this, decode in-process
 
     def __init__(self, db_connection):
         self.db = db_connection
@@ -86,6 +109,11 @@ class SyncManager:
         self._sync_enabled = Config.SYNC_ENABLED
         self._last_sync = Config.LAST_SYNC_TIMESTAMP
         self._interval_minutes = getattr(Config, "SYNC_INTERVAL_MINUTES", 60)
+        # Called with a SyncProgress as each peer file is merged
+        self.progress_callback: Callable[[SyncProgress], None] | None = None
+        # Polled between files and batches; True raises SyncCancelled
+        self.cancel_requested: Callable[[], bool] | None = None
+        self._progress = (0, 0)
 
     @property
     def is_configured(self) -> bool:
@@ -106,13 +134,15 @@ class SyncManager:
 
         self._acquire_lock()
         try:
-            export_data = self._build_export()
-            filename = f"{self.EXPORT_PREFIX}{self.device_id}.json"
-            filepath = self.sync_folder / filename
-            filepath.write_text(
-                json.dumps(export_data, indent=2, default=str),
-                encoding="utf-8",
+            self._check_cancelled()
+            filepath = self._export_path(self.device_id)
+            self._write_export(filepath)
+            # Peers must not fall back to a stale pre-v2 export of ours
+            legacy = filepath.with_name(
+                f"{self.EXPORT_PREFIX}{self.device_id}{LEGACY_SUFFIX}"
             )
+            if legacy.exists():
+                legacy.unlink()
             # Update last sync timestamp
             now = datetime.now(timezone.utc).isoformat()
             self._last_sync = now
@@ -132,19 +162,44 @@ class SyncManager:
         self._acquire_lock()
         try:
             summary = {}
+            ledger = self.get_import_ledger()
             # Find all sync files from OTHER devices
-            for filepath in self.sync_folder.glob(f"{self.EXPORT_PREFIX}*.json"):
-                other_device_id = filepath.stem.replace(self.EXPORT_PREFIX, "")
+            jobs = []
+            for other_device_id, filepath in sorted(
+                self._export_files().items()
+            ):
                 if other_device_id == self.device_id:
                     continue  # Skip our own export
-
                 try:
-                    data = json.loads(filepath.read_text(encoding="utf-8"))
-                    device_summary = self._merge_import(data)
+                    entry = self._ledger_entry(
+                        other_device_id, filepath, ledger.get(other_device_id),
+                    )
+                except OSError:
+                    continue
+                if entry is not None:  # None: unchanged since last import
+                    jobs.append((other_device_id, filepath, entry))
+
+            # Files decode in parallel but merge here, one at a time, in
+            # device-id order
+            self._report_progress(0, len(jobs))
+            for done, (job, decoded) in enumerate(
+                self._decode_peer_files(jobs), 1,
+            ):
+                self._check_cancelled()
+                self._progress = (done - 1, len(jobs))
+                try:
+                    if isinstance(decoded, Exception):
+                        raise decoded
+                    header, records = decoded
+                    device_summary = self._merge_records(
+                        header, records, ledger=job[2],
+                    )
                     for table, count in device_summary.items():
                         summary[table] = summary.get(table, 0) + count
-                except (json.JSONDecodeError, KeyError, OSError):
-                    continue  # Skip corrupt files
+                except (SyncFormatError, KeyError, OSError):
+                    pass  # Skip corrupt or truncated files
+                finally:
+                    self._report_progress(done, len(jobs), job[0])
 
             now = datetime.now(timezone.utc).isoformat()
             self._last_sync = now
@@ -165,8 +220,7 @@ class SyncManager:
         """Get current sync status information."""
         other_files = []
         if self.is_configured:
-            for filepath in self.sync_folder.glob(f"{self.EXPORT_PREFIX}*.json"):
-                device_id = filepath.stem.replace(self.EXPORT_PREFIX, "")
+            for device_id, filepath in self._export_files().items():
                 if device_id != self.device_id:
                     stat = filepath.stat()
                     other_files.append({
@@ -189,13 +243,96 @@ class SyncManager:
 
     # ── Export helpers ──────────────────────────────────────────
 
+    def _flush_pending_writes(self):
+        """Commit write-behind activity entries so exports include them."""
+        from wired_part.database.activity_writer import get_writer
+        writer = get_writer(self.db)
+        if writer is not None:
+            writer.flush()
+
+    def _export_path(self, device_id: str) -> Path:
+        return self.sync_folder / f"{self.EXPORT_PREFIX}{device_id}{SUFFIX}"
+
+    def _export_files(self) -> dict[str, Path]:
+        """Each device's export file, preferring v2 over legacy JSON."""
+        files = {}
+        for suffix in (LEGACY_SUFFIX, SUFFIX):
+            for path in self.sync_folder.glob(
+                f"{self.EXPORT_PREFIX}*{suffix}"
+            ):
+                device_id = path.name[
+                    len(self.EXPORT_PREFIX):-len(suffix)
+                ]
+                if device_id:
+                    files[device_id] = path
+        return files
+
+    def _write_export(self, path: Path) -> bool:
+        """Stream every synced table into a v2 sync file at *path*.
+
+        The header carries per-table and per-range content digests.  If
+        the file at *path* already has the current digests, it is only
+        touched, not rewritten; returns whether it was rewritten.
+        """
+        self._flush_pending_writes()
+        with self.db.get_connection() as conn:
+            meta = {
+                "device_id": self.device_id,
+                "exported_at": datetime.now(timezone.utc).isoformat(),
+                "schema_version": self._get_schema_version(conn),
+                "journal_seq": self._journal_head(conn),
+                "digests": refresh_digests(conn, SYNC_TABLES),
+            }
+            if self._export_is_current(path, meta):
+                os.utime(path)
+                return False
+            with SyncFileWriter(path, self.EXPORT_CODEC) as out:
+                out.write_header(meta)
+                for table in SYNC_TABLES:
+                    try:
+                        cursor = conn.execute(
+                            f"SELECT * FROM {table}"  # noqa: S608
+                        )
+                    except Exception:
+                        continue
+                    columns = [desc[0] for desc in cursor.description]
+                    out.write_table(
+                        table, columns, self._iter_cursor(cursor),
+                    )
+        return True
+
+    @staticmethod
+    def _export_is_current(path: Path, meta: dict) -> bool:
+        """Whether the export at *path* already holds this content."""
+        if not path.exists():
+            return False
+        try:
+            with SyncFileReader(path) as reader:
+                header = reader.header
+        except (SyncFormatError, OSError):
+            return False
+        return (
+            header.get("schema_version") == meta["schema_version"]
+            and header.get("digests") == meta["digests"]
+        )
+
+    def _iter_cursor(self, cursor, size: int = 1000):
+        while True:
+            self._check_cancelled()  # The writer drops its partial file
+            rows = cursor.fetchmany(size)
+            if not rows:
+                return
+            yield from (tuple(r) for r in rows)
+
     def _build_export(self) -> dict:
         """Build the export data structure from the local database."""
+        self._flush_pending_writes()
         with self.db.get_connection() as conn:
             export = {
                 "device_id": self.device_id,
                 "exported_at": datetime.now(timezone.utc).isoformat(),
                 "schema_version": self._get_schema_version(conn),
+                "journal_seq": self._journal_head(conn),
                 "tables": {},
             }
             for table in SYNC_TABLES:
@@ -238,8 +375,33 @@ class SyncManager:
 
         Returns dict of {table_name: rows_merged_count}.
         """
+        tables = data.get("tables", {})
+        return self._merge_records(data, (
+            ("rows", table, tables[table])
+            for table in SYNC_TABLES if tables.get(table)
+        ))
+
+    def _merge_records(
+        self, meta: dict, records, ledger: dict | None = None,
+    ) -> dict:
+        """Merge a stream of ``(kind, table, rows)`` records.
+
+        *meta* carries device_id, schema_version, journal_seq and, for
+        v2 files, the peer's content digests; tables and id ranges whose
+        digests match ours are skipped.  Without a *ledger* entry the
+        merge is one transaction, so a SyncFormatError raised by
+        *records* (a truncated file) rolls all of it back.
+
+        With one (see ``_ledger_entry``), progress is committed every
+        ``IMPORT_CHECKPOINT_ROWS`` file rows along with the ledger, the
+        first ``ledger["rows_done"]`` rows are skipped as already
+        merged, and the ledger is marked complete at the end.
+        """
         summary = {}
-        schema_version = data.get("schema_version", 0)
+        skip = ledger["rows_done"] if ledger else 0
+        seen = 0
+        schema_version = meta.get("schema_version", 0)
+        sync_tables = set(SYNC_TABLES)
 
         with self.db.get_connection() as conn:
             local_version = self._get_schema_version(conn)
@@ -247,77 +409,410 @@ class SyncManager:
                 # Schema mismatch — skip merge to avoid corruption
                 return {"_skipped": 1}
 
-            for table in SYNC_TABLES:
-                rows = data.get("tables", {}).get(table, [])
-                if not rows:
-                    continue
-                count = self._merge_table(conn, table, rows)
-                if count > 0:
-                    summary[table] = count
+            # Only tables / id ranges whose digests differ need merging
+            plan = None
+            if meta.get("digests"):
+                plan = diff_digests(
+                    refresh_digests(conn, SYNC_TABLES), meta["digests"],
+                    SYNC_TABLES,
+                )
+                sync_tables &= set(plan)
+
+            # Attribute journal entries written by the merge to the peer
+            self._set_journal_origin(conn, meta.get("device_id"))
+            try:
+                for kind, table, rows in (records if sync_tables else ()):
+                    self._check_cancelled()
+                    if kind != "rows":
+                        continue
+                    seen += len(rows)
+                    if seen <= skip:
+                        continue  # Merged before an interrupted import
+                    if seen - len(rows) < skip:
+                        rows = rows[skip - (seen - len(rows)):]
+                    if ledger and (
+                        seen // self.IMPORT_CHECKPOINT_ROWS
+                        > (seen - len(rows)) // self.IMPORT_CHECKPOINT_ROWS
+                    ):
+                        self._checkpoint_import(
+                            conn, meta, ledger, seen - len(rows),
+                        )
+                    if table not in sync_tables:
+                        continue
+                    buckets = plan.get(table) if plan is not None else None
+                    if buckets is not None:
+                        rows = [
+                            r for r in rows
+                            if bucket_of(r.get("id")) in buckets
+                        ]
+                    count = self._merge_table(conn, table, rows)
+                    if count > 0:
+                        summary[table] = summary.get(table, 0) + count
+                    self._report_progress(
+                        *self._progress, meta.get("device_id") or "",
+                        table, summary.get(table, 0),
+                    )
+            finally:
+                self._set_journal_origin(conn, None)
+
+            # A full export covers the peer's journal up to journal_seq
+            if meta.get("device_id") and meta.get("journal_seq"):
+                self._record_watermark(
+                    conn, meta["device_id"], meta["journal_seq"],
+                )
+            if ledger:
+                self._write_ledger(conn, meta, ledger, seen, "complete")
 
         return summary
 
-    def _merge_table(self, conn, table: str, rows: list[dict]) -> int:
+    def _report_progress(
+        self, done: int, total: int, device_id: str = "",
+        table: str = "", rows: int = 0,
+    ):
+        if self.progress_callback is not None:
+            try:
+                self.progress_callback(
+                    SyncProgress(done, total, device_id, table, rows)
+                )
+            except Exception:
+                pass  # A failing listener must not break the import
+
+    def _check_cancelled(self):
+        if self.cancel_requested is not None and self.cancel_requested():
+            raise SyncCancelled("Sync cancelled.")
+
+    def _decode_peer_files(self, jobs: list):
+        """Yield ``(job, (header, records))`` for each job, in order.
+
+        With several large files, the files are decompressed, parsed
+        and checked in a process pool, a few ahead of the merge.  Each
+        worker spools its file's batches to a temp file, which *records*
+        then streams back one batch at a time, so memory stays bounded
+        however large the files are.  Otherwise each file streams
+        through a SyncFileReader.  A file that cannot be read yields its
+        exception in place of the pair.
+        """
+        with self.db.get_connection() as conn:
+            schema_version = self._get_schema_version(conn)
+        workers = min(self.DECODE_WORKERS or os.cpu_count() or 1, len(jobs))
+        size = 0
+        for _, path, _entry in jobs:
+            try:
+                size += path.stat().st_size
+            except OSError:
+                pass
+        if workers < 2 or size < self.PARALLEL_DECODE_MIN_BYTES:
+            for job in jobs:
+                yield from self._stream_peer_file(job, schema_version)
+            return
+
+        # spawn: forking a process that runs Qt threads is unsafe
+        spool_dir = tempfile.TemporaryDirectory(
+            prefix="wiredpart_decode_", ignore_cleanup_errors=True,
+        )
+        pool = ProcessPoolExecutor(
+            workers, mp_context=multiprocessing.get_context("spawn"),
+        )
+        try:
+            queue = deque()
+            pending = iter(jobs)
+
+            def submit():
+                for job in pending:
+                    try:
+                        future = pool.submit(
+                            spool_sync_file, str(job[1]), spool_dir.name,
+                            self.MERGE_BATCH, schema_version,
+                        )
+                    except BrokenProcessPool:
+                        future = None
+                    queue.append((job, future))
+                    return
+
+            for _ in range(workers * 2):
+                submit()
+            while queue:
+                job, future = queue.popleft()
+                submit()
+                try:
+                    if future is None:
+                        raise BrokenProcessPool("decode pool unavailable")
+                    header, spool = future.result()
+                    result = (header, read_spool(spool) if spool else [])
+                except BrokenProcessPool:
+                    # Workers could not start (or died): decode here
+                    yield from self._stream_peer_file(job, schema_version)
+                    continue
+                except Exception as e:
+                    result = e
+                yield job, result
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+            spool_dir.cleanup()
+
+    def _stream_peer_file(self, job, schema_version: int):
+        try:
+            with SyncFileReader(job[1]) as reader:
+                header = reader.header
+                if header.get("schema_version", 0) != schema_version:
+                    yield job, (header, [])
+                else:
+                    yield job, (header, reader.batches(self.MERGE_BATCH))
+        except (SyncFormatError, KeyError, OSError) as e:
+            yield job, e
+
+    # ── Import ledger ────────────────────────────────────────────
+
+    def get_import_ledger(self) -> dict[str, dict]:
+        """The last export file imported from each peer, by device id."""
+        try:
+            rows = self.db.execute("SELECT * FROM sync_import_ledger")
+        except Exception:
+            return {}  # Pre-v30 database
+        return {r["peer_device"]: dict(r) for r in rows}
+
+    def _ledger_entry(
+        self, device_id: str, filepath: Path, previous: dict | None,
+    ) -> dict | None:
+        """Ledger entry for importing *filepath*, or None to skip it.
+
+        A file whose name, size and mtime match a completed import is
+        skipped without being read; one that was only touched is
+        recognised by its content hash (and its new size and mtime
+        recorded, so the next check is stat-only again).  An incomplete v2 file (no
+        footer yet) is skipped until the next round.  ``rows_done`` is
+        where an interrupted import of the same content left off.
+        """
+        stat = filepath.stat()
+        entry = {
+            "peer_device": device_id,
+            "file_name": filepath.name,
+            "file_size": stat.st_size,
+            "file_mtime_ns": stat.st_mtime_ns,
+            "rows_done": 0,
+        }
+        if previous and previous["status"] == "complete" and all(
+            previous[k] == entry[k]
+            for k in ("file_name", "file_size", "file_mtime_ns")
+        ):
+            return None
+        entry["content_hash"] = content_hash(filepath)
+        if entry["content_hash"] is None:
+            return None  # Still being written or copied
+        if previous and previous["content_hash"] == entry["content_hash"]:
+            if previous["status"] == "complete":
+                with self.db.get_connection() as conn:
+                    conn.execute(
+                        "UPDATE sync_import_ledger SET file_name = ?, "
+                        "file_size = ?, file_mtime_ns = ? "
+                        "WHERE peer_device = ?",
+                        (entry["file_name"], entry["file_size"],
+                         entry["file_mtime_ns"], device_id),
+                    )
+                return None
+            entry["rows_done"] = previous["rows_done"]
+        return entry
+
+    def _checkpoint_import(self, conn, meta: dict, ledger: dict, rows: int):
+        """Commit an import in progress, recording how far it got."""
+        # Never leave the peer as journal origin in a committed state
+        self._set_journal_origin(conn, None)
+        self._write_ledger(conn, meta, ledger, rows, "partial")
+        conn.commit()
+        self._set_journal_origin(conn, meta.get("device_id"))
+
+    @staticmethod
+    def _write_ledger(conn, meta: dict, ledger: dict, rows: int, status: str):
+        conn.execute(
+            """INSERT OR REPLACE INTO sync_import_ledger
+               (peer_device, file_name, file_size, file_mtime_ns,
+                content_hash, exported_at, rows_done, status, updated_at)
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)""",
+            (
+                ledger["peer_device"], ledger["file_name"], ledger["file_size"],
+                ledger["file_mtime_ns"], ledger["content_hash"],
+                meta.get("exported_at"), rows, status,
+            ),
+        )
+
+    @staticmethod
+    def _set_journal_origin(conn, device_id: str | None):
+        """Set the device recorded in change_journal for subsequent writes."""
+        try:
+            conn.execute(
+                "UPDATE change_journal_state SET origin_device = ? "
+                "WHERE id = 1",
+                (device_id,),
+            )
+        except Exception:
+            pass  # Pre-v25 database
+
+    def _merge_table(self, conn, table: str, rows: list[dict],
+                     ties: bool = False) -> int:
         """Merge rows into a local table.
 
-        For tables with updated_at: use last-write-wins.
+        For tables with updated_at: use last-write-wins.  With *ties*,
+        a remote row stamped in the same second as the local one also
+        wins when it differs (see _tie_where).
         For tables without: insert if not exists (by primary key).
+
+        Rows are staged in a temp table and applied with one INSERT ...
+        SELECT and one UPDATE ... FROM, instead of a lookup per row.
         """
-        if not rows:
+        stage = self._stage_rows(conn, table, rows)
+        if stage is None:
             return 0
+        pk, columns = stage
 
+        merged = 0
+        if (table in TABLES_WITH_UPDATED_AT
+                and "updated_at" in columns):
+            # Row exists — take the remote copy if it is newer
+            newer = "s.updated_at > t.updated_at"
+            if ties:
+                newer = f"({newer} OR {self._tie_where(pk, columns)})"
+            merged = self._update_from_stage(
+                conn, table, pk, columns,
+                "s.updated_at IS NOT NULL AND t.updated_at IS NOT NULL "
+                f"AND {newer}",
+            )
+        # Row doesn't exist locally — insert it
+        return merged + self._insert_missing(conn, table, pk, columns)
+
+    @staticmethod
+    def _tie_where(pk: str, columns: list[str]) -> str:
+        """Staged row stamped in the same second as the local one, and
+        different from it.
+
+        updated_at has whole-second resolution, so a second edit in the
+        same second carries the same stamp and must still apply.  An
+        identical row is left alone: rewriting it would fire its
+        update_*_timestamp trigger and restamp it with this device's
+        clock.
+        """
+        differs = " OR ".join(
+            f"t.{c} IS NOT s.{c}" for c in columns if c != pk
+        )
+        return f"(t.updated_at = s.updated_at AND ({differs}))"
+
+    # ── Set-based merge staging ─────────────────────────────────
+
+    STAGE_TABLE = "temp.sync_stage"
+
+    def _stage_rows(
+        self, conn, table: str, rows: list[dict],
+    ) -> tuple[str, list[str]] | None:
+        """Bulk-load *rows* into a temp table shaped like *table*.
+
+        Only columns the local table has are staged; rows without a
+        primary key value are dropped.  Returns ``(pk, columns)``, or
+        None when there is nothing to merge.
+        """
+        if not rows:
+            return None
         pk = self._get_primary_key(conn, table)
         if not pk:
-            return 0
+            return None
+        local_columns = [
+            col[1] for col in conn.execute(
+                f"PRAGMA table_info({table})"  # noqa: S608
+            ).fetchall()
+        ]
+        incoming = set()
+        for row in rows:
+            incoming.update(row.keys())
+        columns = [c for c in local_columns if c in incoming]
+        if pk not in columns:
+            return None
 
-        merged = 0
-        use_lww = table in TABLES_WITH_UPDATED_AT
+        conn.execute(f"DROP TABLE IF EXISTS {self.STAGE_TABLE}")
+        # Same column affinities as the target, no constraints
+        conn.execute(
+            f"CREATE TABLE {self.STAGE_TABLE} AS "  # noqa: S608
+            f"SELECT {', '.join(columns)} FROM main.{table} WHERE 0"
+        )
+        pick = itemgetter(*columns)
 
-        for row in rows:
-            pk_value = row.get(pk)
-            if pk_value is None:
+        def values(row):
+            try:
+                picked = pick(row)
+            except KeyError:  # Row from an older peer lacks a column
+                picked = tuple(row.get(c) for c in columns)
+            return picked if len(columns) > 1 else (picked,)
+
+        conn.executemany(
+            f"INSERT INTO {self.STAGE_TABLE} "  # noqa: S608
+            f"({', '.join(columns)}) "
+            f"VALUES ({', '.join('?' for _ in columns)})",
+            (values(row) for row in rows if row.get(pk) is not None),
+        )
+        return pk, columns
+
+    def _fk_guard(self, conn, table: str, columns: list[str]) -> str:
+        """SQL condition keeping only staged rows whose foreign keys
+        resolve locally (a single violation would abort the statement).
+        """
+        conds = []
+        for fk in conn.execute(
+            f"PRAGMA foreign_key_list({table})"  # noqa: S608
+        ).fetchall():
+            parent, child, parent_col = fk[2], fk[3], fk[4]
+            if child not in columns:
                 continue
+            parent_col = parent_col or self._get_primary_key(conn, parent)
+            conds.append(
+                f"(s.{child} IS NULL OR EXISTS (SELECT 1 FROM main.{parent} "
+                f"p WHERE p.{parent_col} = s.{child}))"
+            )
+        return " AND ".join(conds) or "1"
 
-            local_row = conn.execute(
-                f"SELECT * FROM {table} WHERE {pk} = ?",  # noqa: S608
-                (pk_value,),
-            ).fetchone()
+    def _insert_missing(
+        self, conn, table: str, pk: str, columns: list[str],
+    ) -> int:
+        """Insert staged rows the local table does not have yet.
 
-            if local_row is None:
-                # Row doesn't exist locally — insert it
-                columns = list(row.keys())
-                placeholders = ", ".join("?" for _ in columns)
-                col_names = ", ".join(columns)
-                try:
-                    conn.execute(
-                        f"INSERT OR IGNORE INTO {table} ({col_names}) "  # noqa: S608
-                        f"VALUES ({placeholders})",
-                        tuple(row[c] for c in columns),
-                    )
-                    merged += 1
-                except Exception:
-                    pass  # FK violation, etc — skip
-            elif use_lww:
-                # Row exists — check if remote is newer
-                local_updated = local_row["updated_at"] if "updated_at" in local_row.keys() else None
-                remote_updated = row.get("updated_at")
-
-                if remote_updated and local_updated and remote_updated > local_updated:
-                    # Remote is newer — update local
-                    columns = [c for c in row.keys() if c != pk]
-                    set_clause = ", ".join(f"{c} = ?" for c in columns)
-                    values = [row[c] for c in columns] + [pk_value]
-                    try:
-                        conn.execute(
-                            f"UPDATE {table} SET {set_clause} "  # noqa: S608
-                            f"WHERE {pk} = ?",
-                            values,
-                        )
-                        merged += 1
-                    except Exception:
-                        pass
-
-        return merged
+        Rows deleted here (with a live tombstone) are not resurrected
+        from a peer's older copy, nor are rows this device archived or
+        expired (listed in sync_retired_rows).
+        """
+        col_names = ", ".join(columns)
+        sql = (
+            f"INSERT OR IGNORE INTO main.{table} ({col_names}) "  # noqa: S608
+            f"SELECT {', '.join(f's.{c}' for c in columns)} "
+            f"FROM {self.STAGE_TABLE} s WHERE NOT EXISTS ("
+            f"SELECT 1 FROM main.{table} t WHERE t.{pk} = s.{pk}) "
+            f"AND NOT EXISTS (SELECT 1 FROM sync_tombstones d "
+            f"WHERE d.table_name = '{table}' AND d.row_id = s.{pk}) "
+            f"AND NOT EXISTS (SELECT 1 FROM sync_retired_rows r "
+            f"WHERE r.table_name = '{table}' AND r.row_id = s.{pk}) "
+            f"AND {self._fk_guard(conn, table, columns)}"
+        )
+        inserted = 0
+        while True:
+            # Repeat for rows whose (self-referencing) parent was only
+            # inserted by the previous pass
+            count = conn.execute(sql).rowcount
+            if count <= 0:
+                return inserted
+            inserted += count
+
+    def _update_from_stage(
+        self, conn, table: str, pk: str, columns: list[str], where: str,
+    ) -> int:
+        """Overwrite local rows from staged rows matching *where*.
+
+        *where* may refer to the local row as ``t`` and the staged row
+        as ``s``.
+        """
+        updates = [c for c in columns if c != pk]
+        if not updates:
+            return 0
+        return conn.execute(
+            f"UPDATE OR IGNORE main.{table} AS t SET "  # noqa: S608
+            f"{', '.join(f'{c} = s.{c}' for c in updates)} "
+            f"FROM {self.STAGE_TABLE} s WHERE t.{pk} = s.{pk} "
+            f"AND ({where}) AND {self._fk_guard(conn, table, columns)}"
+        ).rowcount
 
     def _get_primary_key(self, conn, table: str) -> str | None:
         """Get the primary key column name for a table."""
@@ -425,56 +920,40 @@ class SyncManager:
                 if table not in TABLES_WITH_UPDATED_AT:
                     continue
                 rows = data.get("tables", {}).get(table, [])
-                if not rows:
+                stage = self._stage_rows(conn, table, rows)
+                if stage is None or "updated_at" not in stage[1]:
                     continue
-
-                pk = self._get_primary_key(conn, table)
-                if not pk:
-                    continue
-
-                for row in rows:
-                    pk_value = row.get(pk)
-                    if pk_value is None:
-                        continue
-
-                    local_row = conn.execute(
-                        f"SELECT * FROM {table} WHERE {pk} = ?",  # noqa: S608
-                        (pk_value,),
-                    ).fetchone()
-
-                    if local_row is None:
-                        continue  # New row — no conflict
-
-                    local_updated = (
-                        local_row["updated_at"]
-                        if "updated_at" in local_row.keys()
-                        else None
-                    )
-                    remote_updated = row.get("updated_at")
-
-                    if (local_updated and remote_updated
-                            and local_updated != remote_updated):
-                        # Both have different timestamps — check if data
-                        # actually differs (exclude timestamp columns)
-                        local_dict = {
-                            k: local_row[k] for k in local_row.keys()
-                        }
-                        skip_keys = {"updated_at", "created_at"}
-                        data_differs = any(
-                            str(local_dict.get(k)) != str(row.get(k))
-                            for k in row
-                            if k not in skip_keys and k != pk
-                        )
-                        if data_differs:
-                            conflicts.append({
-                                "table": table,
-                                "pk": pk,
-                                "pk_value": pk_value,
-                                "local_updated": local_updated,
-                                "remote_updated": remote_updated,
-                                "local_data": local_dict,
-                                "remote_data": row,
-                            })
+                pk, columns = stage
+
+                # Both have different timestamps — check if data
+                # actually differs (exclude timestamp columns)
+                skip_keys = {"updated_at", "created_at", pk}
+                differs = " OR ".join(
+                    f"t.{c} IS NOT s.{c}"
+                    for c in columns if c not in skip_keys
+                ) or "0"
+                cursor = conn.execute(
+                    f"SELECT t.* FROM main.{table} t "  # noqa: S608
+                    f"JOIN {self.STAGE_TABLE} s ON t.{pk} = s.{pk} "
+                    f"WHERE t.updated_at IS NOT NULL "
+                    f"AND s.updated_at IS NOT NULL "
+                    f"AND t.updated_at != s.updated_at AND ({differs})"
+                )
+                remote = {row.get(pk): row for row in rows}
+                for local_row in cursor.fetchall():
+                    local_dict = {k: local_row[k] for k in local_row.keys()}
+                    pk_value = local_dict[pk]
+                    remote_row = remote.get(pk_value)
+                    conflicts.append({
+                        "table": table,
+                        "pk": pk,
+                        "pk_value": pk_value,
+                        "local_updated": local_dict["updated_at"],
+                        "remote_updated": remote_row.get("updated_at"),
+                        "local_data": local_dict,
+                        "remote_data": remote_row,
+                    })
+            conn.execute(f"DROP TABLE IF EXISTS {self.STAGE_TABLE}")
 
         return conflicts
 
@@ -483,56 +962,16 @@ class SyncManager:
     def export_with_deletions(self) -> dict:
         """Build export that also tracks deleted rows.
 
-        Compares current table row IDs against the set of IDs that
-        were exported last time (stored in a sidecar file). Any IDs
-        present in the previous export but missing now are marked as
-        tombstones.
+        Deletions are captured by triggers into sync_tombstones as they
+        happen; every tombstone not yet collected (see
+        ``collect_tombstones``) is listed, so the cost follows the
+        number of deletes rather than the size of the tables.
 
         Returns the export dict with an additional 'tombstones' key.
         """
         export = self._build_export()
-
-        # Load previous export IDs
-        prev_path = self._get_previous_export_ids_path()
-        prev_ids = {}
-        if prev_path and prev_path.exists():
-            try:
-                prev_ids = json.loads(
-                    prev_path.read_text(encoding="utf-8")
-                )
-            except (json.JSONDecodeError, OSError):
-                prev_ids = {}
-
-        tombstones = {}
-        current_ids = {}
-
-        for table in SYNC_TABLES:
-            rows = export.get("tables", {}).get(table, [])
-            pk = "id"  # default PK
-            cur_set = set()
-            for row in rows:
-                pk_val = row.get(pk)
-                if pk_val is not None:
-                    cur_set.add(pk_val)
-            current_ids[table] = list(cur_set)
-
-            prev_set = set(prev_ids.get(table, []))
-            deleted = prev_set - cur_set
-            if deleted:
-                tombstones[table] = list(deleted)
-
-        export["tombstones"] = tombstones
-
-        # Save current IDs for next comparison
-        if prev_path:
-            try:
-                prev_path.write_text(
-                    json.dumps(current_ids, default=str),
-                    encoding="utf-8",
-                )
-            except OSError:
-                pass
-
+        with self.db.get_connection() as conn:
+            export["tombstones"] = self._tombstones_since(conn, 0)
         return export
 
     def apply_tombstones(self, tombstones: dict):
@@ -558,79 +997,736 @@ class SyncManager:
                     except Exception:
                         pass  # FK constraint, etc.
 
-    def _get_previous_export_ids_path(self):
-        """Path to the sidecar file storing last export's row IDs."""
-        if not self.sync_folder:
-            return None
-        return self.sync_folder / f"wiredpart_ids_{self.device_id}.json"
+    @staticmethod
+    def _tombstones_since(
+        conn, since_seq: int, through: int | None = None,
+        local_only: bool = False,
+    ) -> dict[str, list[int]]:
+        """Ids deleted after *since_seq* (up to *through*), per table."""
+        sql = "SELECT table_name, row_id FROM sync_tombstones WHERE seq > ?"
+        params = [since_seq]
+        if through is not None:
+            sql += " AND seq <= ?"
+            params.append(through)
+        if local_only:
+            sql += " AND device_id IS NULL"
+        deletes: dict[str, list[int]] = {}
+        for table, row_id in conn.execute(sql + " ORDER BY seq", params):
+            deletes.setdefault(table, []).append(row_id)
+        return {
+            table: sorted(deletes[table])
+            for table in SYNC_TABLES if table in deletes
+        }
+
+    def collect_tombstones(
+        self, acks: dict | None = None, peers=None,
+    ) -> int:
+        """Drop tombstones every known peer has acknowledged.
+
+        A peer's ack file records how far into this device's journal it
+        has imported; tombstones at or below the lowest such position
+        are no longer needed by anyone.  A known peer without an ack
+        holds collection back entirely.  *acks* and *peers* default to
+        what the sync folder shows.  Returns the number dropped.
+        """
+        if acks is None:
+            acks = self._read_acks()
+        if peers is None:
+            peers = self.get_sync_peers()
+        peers = [peer for peer in peers if peer != self.device_id]
+        if not peers:
+            return 0
+        through = min(
+            int(acks.get(peer, {}).get(self.device_id, 0)) for peer in peers
+        )
+        if through <= 0:
+            return 0
+        with self.db.get_connection() as conn:
+            return conn.execute(
+                "DELETE FROM sync_tombstones WHERE seq <= ?", (through,),
+            ).rowcount
 
     # ── Loop 33: Incremental sync ────────────────────────────────
 
     def export_incremental(self) -> dict:
         """Export only rows changed since the last sync timestamp.
 
-        Falls back to full export if no last-sync timestamp exists.
-        Returns the export dict with only changed rows.
+        Changed rows are read from the change journal rather than by
+        scanning updated_at/created_at, so tables without timestamps and
+        deletions are covered too (deleted ids are listed under
+        ``deletes``).  Falls back to full export if no last-sync
+        timestamp exists, and to a full snapshot (``full: True``) when
+        the journal no longer reaches back to it.
         """
         if not self._last_sync:
             return self._build_export()
 
+        self._flush_pending_writes()
         with self.db.get_connection() as conn:
             export = {
                 "device_id": self.device_id,
                 "exported_at": datetime.now(timezone.utc).isoformat(),
                 "schema_version": self._get_schema_version(conn),
                 "tables": {},
+                "deletes": {},
                 "incremental": True,
                 "since": self._last_sync,
             }
-
-            for table in SYNC_TABLES:
-                rows = self._export_table_incremental(
-                    conn, table, self._last_sync
+            since_seq = self._journal_seq_at(conn, self._last_sync)
+            if since_seq is None:
+                export["full"] = True
+                export["journal_seq"] = self._journal_head(conn)
+                for table in SYNC_TABLES:
+                    rows = self._export_table(conn, table)
+                    if rows:
+                        export["tables"][table] = rows
+            else:
+                tables, deletes, through = self._journal_delta(
+                    conn, since_seq,
                 )
-                if rows:
-                    export["tables"][table] = rows
-
+                export["tables"] = tables
+                export["deletes"] = deletes
+                export["journal_seq"] = through
             return export
 
-    def _export_table_incremental(
-        self, conn, table: str, since: str
-    ) -> list[dict]:
-        """Export only rows from a table changed since a timestamp."""
-        try:
-            # Check if table has updated_at or created_at
-            columns_info = conn.execute(
-                f"PRAGMA table_info({table})"  # noqa: S608
-            ).fetchall()
-            col_names = {col[1] for col in columns_info}
+    def _journal_seq_at(self, conn, since: str) -> int | None:
+        """Journal position just before the first change after *since*.
 
-            if "updated_at" in col_names:
+        *since* is an ISO timestamp (naive values are taken as UTC).
+        Returns None when the journal cannot prove it holds every change
+        since then: it starts after *since* or has been compacted past
+        it.
+        """
+        try:
+            stamp = datetime.fromisoformat(since)
+        except (TypeError, ValueError):
+            return None
+        if stamp.tzinfo is not None:
+            stamp = stamp.astimezone(timezone.utc)
+        stamp = stamp.strftime("%Y-%m-%d %H:%M:%S")
+
+        first = conn.execute(
+            # created_at has whole seconds: changes in the same second
+            # as *since* may follow it, and resending a row is harmless
+            "SELECT MIN(seq) FROM change_journal WHERE created_at >= ?",
+            (stamp,),
+        ).fetchone()[0]
+        if first is None:
+            return self._journal_head(conn)  # Nothing changed since
+        seq = first - 1
+        if seq <= 0 or seq < self._journal_floor(conn):
+            return None
+        return seq
+
+    # ── Delta sync (change journal) ──────────────────────────────
+    #
+    # Each device writes one delta file per peer, holding the rows it
+    # changed locally since the journal position that peer last
+    # acknowledged.  Peers record what they imported per source device
+    # in sync_peer_watermarks and publish it in their ack file, so the
+    # next delta starts exactly where the last import stopped.
+
+    DELTA_PREFIX = "wiredpart_delta_"
+    ACK_PREFIX = "wiredpart_ack_"
+    DELTA_CHUNK = 500  # ids per SELECT ... WHERE id IN (...)
+
+    @staticmethod
+    def _journal_head(conn) -> int:
+        """Newest journal position (the floor if everything expired)."""
+        row = conn.execute("""
+            SELECT MAX(
+                COALESCE((SELECT MAX(seq) FROM change_journal), 0),
+                COALESCE((SELECT floor_seq FROM change_journal_state
+                          WHERE id = 1), 0)
+            )
+        """).fetchone()
+        return row[0] or 0
+
+    @staticmethod
+    def _journal_floor(conn) -> int:
+        row = conn.execute(
+            "SELECT floor_seq FROM change_journal_state WHERE id = 1"
+        ).fetchone()
+        return row[0] if row else 0
+
+    def _journal_delta(
+        self, conn, since_seq: int, local_only: bool = False,
+    ) -> tuple[dict, dict, int]:
+        """Rows changed after *since_seq*, from the change journal.
+
+        Only the newest journal entry per row matters: rows whose last
+        entry is an insert/update are exported as they are now; deleted
+        rows are listed by id from their tombstones.  With
+        *local_only*, changes merged in from other devices are left out
+        (each device sends its own changes to every peer directly).
+
+        Returns ``(tables, deletes, through_seq)``.
+        """
+        through = self._journal_head(conn)
+        origin = " AND device_id IS NULL" if local_only else ""
+        latest = conn.execute(
+            f"""SELECT j.table_name, j.row_id, j.op
+                FROM change_journal j
+                JOIN (
+                    SELECT MAX(seq) AS seq FROM change_journal
+                    WHERE seq > ? AND seq <= ?{origin}
+                    GROUP BY table_name, row_id
+                ) last ON last.seq = j.seq""",  # noqa: S608
+            (since_seq, through),
+        ).fetchall()
+
+        upserts: dict[str, list[int]] = {}
+        for table_name, row_id, op in latest:
+            if op != "delete":
+                upserts.setdefault(table_name, []).append(row_id)
+        deletes = self._tombstones_since(conn, since_seq, through, local_only)
+
+        tables = {}
+        for table in SYNC_TABLES:
+            ids = sorted(upserts.get(table, ()))
+            rows = []
+            for start in range(0, len(ids), self.DELTA_CHUNK):
+                chunk = ids[start:start + self.DELTA_CHUNK]
                 cursor = conn.execute(
-                    f"SELECT * FROM {table} "  # noqa: S608
-                    f"WHERE updated_at > ?",
-                    (since,),
+                    f"SELECT * FROM {table} WHERE id IN "  # noqa: S608
+                    f"({', '.join('?' for _ in chunk)}) ORDER BY id",
+                    chunk,
                 )
-            elif "created_at" in col_names:
-                cursor = conn.execute(
-                    f"SELECT * FROM {table} "  # noqa: S608
-                    f"WHERE created_at > ?",
-                    (since,),
+                columns = [desc[0] for desc in cursor.description]
+                rows.extend(dict(zip(columns, r)) for r in cursor.fetchall())
+            if rows:
+                tables[table] = rows
+        return tables, deletes, through
+
+    def get_peer_watermarks(self) -> dict[str, int]:
+        """Journal position imported so far, per source device."""
+        rows = self.db.execute(
+            "SELECT peer_device, imported_seq FROM sync_peer_watermarks"
+        )
+        return {r["peer_device"]: r["imported_seq"] for r in rows}
+
+    @staticmethod
+    def _record_watermark(conn, peer_device: str, seq: int):
+        conn.execute(
+            """INSERT INTO sync_peer_watermarks
+               (peer_device, imported_seq, imported_at)
+               VALUES (?, ?, CURRENT_TIMESTAMP)
+               ON CONFLICT(peer_device) DO UPDATE SET
+                   imported_seq = MAX(imported_seq, excluded.imported_seq),
+                   imported_at = excluded.imported_at""",
+            (peer_device, seq),
+        )
+
+    def _ack_path(self, device_id: str) -> Path:
+        return self.sync_folder / f"{self.ACK_PREFIX}{device_id}.json"
+
+    def _delta_path(self, source: str, target: str) -> Path:
+        return self.sync_folder / (
+            f"{self.DELTA_PREFIX}{source}_to_{target}{SUFFIX}"
+        )
+
+    def _read_acks(self) -> dict[str, dict]:
+        """Every device's published watermarks: {device: {source: seq}}."""
+        acks = {}
+        for path in self.sync_folder.glob(f"{self.ACK_PREFIX}*.json"):
+            try:
+                data = json.loads(path.read_text(encoding="utf-8"))
+                acks[data["device_id"]] = dict(data.get("acks", {}))
+            except (json.JSONDecodeError, KeyError, OSError, TypeError):
+                continue
+        return acks
+
+    def _write_ack_file(self):
+        """Publish this device's watermarks for its peers to read."""
+        self._write_json_atomic(self._ack_path(self.device_id), {
+            "device_id": self.device_id,
+            "acks": self.get_peer_watermarks(),
+            "updated_at": datetime.now(timezone.utc).isoformat(),
+        })
+
+    @staticmethod
+    def _write_json_atomic(path: Path, data: dict):
+        """Write JSON to a temp file and rename it over *path*."""
+        tmp = path.with_name(path.name + ".tmp")
+        tmp.write_text(json.dumps(data, default=str), encoding="utf-8")
+        os.replace(tmp, path)
+
+    def get_sync_peers(self) -> list[str]:
+        """Other devices known from ack files, the registry or exports."""
+        peers = set(self._read_acks()) | set(self._load_device_registry())
+        peers |= set(self._export_files())
+        try:
+            peers |= {
+                p.name for p in (self.sync_folder / self.SEGMENT_DIR).iterdir()
+                if p.is_dir()
+            }
+        except OSError:
+            pass
+        peers.discard(self.device_id)
+        return sorted(peers)
+
+    def export_delta(self, peer_id: str) -> dict:
+        """Build the delta for *peer_id* from its acknowledged watermark.
+
+        A peer that has acknowledged nothing yet, or whose watermark has
+        fallen below the journal floor, gets a full snapshot instead —
+        with the tombstones since its watermark, which outlive journal
+        compaction until every peer has acknowledged them.
+        """
+        acked = int(self._read_acks().get(peer_id, {}).get(self.device_id, 0))
+        self._flush_pending_writes()
+        with self.db.get_connection() as conn:
+            export = {
+                "device_id": self.device_id,
+                "target_device": peer_id,
+                "exported_at": datetime.now(timezone.utc).isoformat(),
+                "schema_version": self._get_schema_version(conn),
+                "delta": True,
+                "full": False,
+                "base_seq": acked,
+            }
+            if acked <= 0 or acked < self._journal_floor(conn):
+                export["full"] = True
+                export["base_seq"] = 0
+                export["journal_seq"] = self._journal_head(conn)
+                export["tables"] = {}
+                export["deletes"] = (
+                    self._tombstones_since(conn, acked, local_only=True)
+                    if acked > 0 else {}
                 )
+                for table in SYNC_TABLES:
+                    rows = self._export_table(conn, table)
+                    if rows:
+                        export["tables"][table] = rows
             else:
-                # No timestamp column — export all rows
-                cursor = conn.execute(
-                    f"SELECT * FROM {table}"  # noqa: S608
+                tables, deletes, through = self._journal_delta(
+                    conn, acked, local_only=True,
                 )
+                export["journal_seq"] = through
+                export["tables"] = tables
+                export["deletes"] = deletes
+            return export
 
-            columns = [desc[0] for desc in cursor.description]
-            rows = []
-            for row in cursor.fetchall():
-                row_dict = {columns[i]: row[i] for i in range(len(columns))}
-                rows.append(row_dict)
-            return rows
-        except Exception:
-            return []
+    def export_deltas_to_sync_folder(self) -> dict[str, str]:
+        """Write a delta file for every known peer.
+
+        Peers that are already up to date get no new file.  Returns
+        {peer_device: path} for the files written.
+        """
+        if not self.is_configured:
+            raise SyncError("Sync is not configured. Set a sync folder in Settings.")
+
+        self._acquire_lock()
+        try:
+            self._write_ack_file()
+            self.collect_tombstones()
+            written = {}
+            for peer in self.get_sync_peers():
+                self._check_cancelled()
+                data = self.export_delta(peer)
+                if (not data["full"]
+                        and data["journal_seq"] <= data["base_seq"]):
+                    continue  # Nothing new since the peer's last import
+                path = self._delta_path(self.device_id, peer)
+                write_sync_file(path, data, self.EXPORT_CODEC)
+                written[peer] = str(path)
+            return written
+        finally:
+            self._release_lock()
+
+    def import_deltas_from_sync_folder(self) -> dict:
+        """Apply delta files addressed to this device, in order.
+
+        Files already imported (journal_seq at or below the stored
+        watermark) are skipped, as are deltas whose base is ahead of the
+        watermark — the gap is filled once the source sees the updated
+        ack and re-exports from it.  Returns {table: rows_merged}.
+        """
+        if not self.is_configured:
+            raise SyncError("Sync is not configured.")
+
+        self._acquire_lock()
+        try:
+            summary = {}
+            pattern = f"{self.DELTA_PREFIX}*_to_{self.device_id}{SUFFIX}"
+            for path in sorted(self.sync_folder.glob(pattern)):
+                self._check_cancelled()
+                try:
+                    with SyncFileReader(path) as reader:
+                        meta = reader.header
+                        source = meta["device_id"]
+                        if (source == self.device_id
+                                or meta.get("target_device")
+                                != self.device_id):
+                            continue
+                        mark = self.get_peer_watermarks().get(source, 0)
+                        if meta["journal_seq"] <= mark:
+                            continue
+                        if not meta.get("full") and meta["base_seq"] > mark:
+                            continue
+                        merged = self._merge_delta(
+                            meta, reader.batches(self.MERGE_BATCH),
+                        )
+                    for table, count in merged.items():
+                        summary[table] = summary.get(table, 0) + count
+                except (SyncFormatError, KeyError, OSError, TypeError):
+                    continue  # Skip corrupt files
+
+            self._write_ack_file()
+            return summary
+        finally:
+            self._release_lock()
+
+    def sync_delta(self) -> dict:
+        """Delta sync: import deltas addressed to us, then export ours."""
+        summary = self.import_deltas_from_sync_folder()
+        self.export_deltas_to_sync_folder()
+        now = datetime.now(timezone.utc).isoformat()
+        self._last_sync = now
+        Config.update_last_sync(now)
+        return summary
+
+    def _merge_delta(self, meta: dict, records) -> dict:
+        """Apply one delta and advance the source's watermark atomically.
+
+        *meta* is the file's header and *records* its ``batches()``
+        stream; the merge is one transaction, so a truncated file rolls
+        back.  Full snapshots merge like a regular import, except that a
+        row stamped in the same second as the local copy still applies
+        when it differs (a same-second edit must not lose to a relayed
+        copy of the previous one).  Incremental deltas
+        only carry rows the source changed, so existing rows are
+        overwritten unless the local copy is strictly newer, and listed
+        deletes are applied children-first.
+        """
+        summary = {}
+        sync_tables = set(SYNC_TABLES)
+        with self.db.get_connection() as conn:
+            if meta.get("schema_version", 0) != self._get_schema_version(conn):
+                return {"_skipped": 1}
+
+            source = meta["device_id"]
+            deletes = {}
+            self._set_journal_origin(conn, source)
+            try:
+                for kind, table, payload in records:
+                    self._check_cancelled()
+                    if table not in sync_tables or not payload:
+                        continue
+                    if kind != "rows":
+                        deletes.setdefault(table, []).extend(payload)
+                        continue
+                    if meta.get("full"):
+                        count = self._merge_table(
+                            conn, table, payload, ties=True,
+                        )
+                    else:
+                        count = self._apply_changed_rows(conn, table, payload)
+                    if count > 0:
+                        summary[table] = summary.get(table, 0) + count
+                    self._report_progress(
+                        *self._progress, source, table, summary.get(table, 0),
+                    )
+
+                for table in reversed(SYNC_TABLES):
+                    ids = deletes.get(table)
+                    if not ids:
+                        continue
+                    removed = 0
+                    for row_id in ids:
+                        try:
+                            removed += conn.execute(
+                                f"DELETE FROM {table} WHERE id = ?",  # noqa: S608
+                                (row_id,),
+                            ).rowcount
+                        except Exception:
+                            pass  # Still referenced locally — keep it
+                    if removed:
+                        summary[table] = summary.get(table, 0) + removed
+            finally:
+                self._set_journal_origin(conn, None)
+
+            self._record_watermark(conn, source, meta["journal_seq"])
+        return summary
+
+    def _apply_changed_rows(self, conn, table: str, rows: list[dict]) -> int:
+        """Insert or overwrite rows a peer changed (local-newer wins)."""
+        stage = self._stage_rows(conn, table, rows)
+        if stage is None:
+            return 0
+        pk, columns = stage
+
+        where = "1"
+        if table in TABLES_WITH_UPDATED_AT and "updated_at" in columns:
+            where = (
+                "s.updated_at IS NULL OR t.updated_at IS NULL "
+                "OR t.updated_at < s.updated_at "
+                f"OR {self._tie_where(pk, columns)}"
+            )
+        # Update before inserting so new rows are not rewritten
+        merged = self._update_from_stage(conn, table, pk, columns, where)
+        return merged + self._insert_missing(conn, table, pk, columns)
+
+    # ── Segment sync (lock-free) ─────────────────────────────────
+    #
+    # Each device owns one subfolder of SEGMENT_DIR and is the only
+    # writer there:
+    #
+    #     segments/<device_id>/seg_<base>_<through>.jsonl.z
+    #     segments/<device_id>/snap_<through>.jsonl.z
+    #
+    # A segment holds the device's own journal changes in (base,
+    # through]; a snapshot its whole database as of *through*.  Files
+    # are written to a temp name and renamed into place, never changed
+    # afterwards, and their names say what they cover, so importers need
+    # no lock: they pick the files past their watermark for each peer
+    # from a directory listing.  Compaction replaces a long run of
+    # segments with a fresh snapshot; a peer that falls behind it
+    # catches up from the snapshot.
+
+    SEGMENT_DIR = "segments"
+    SEGMENT_COMPACT_AFTER = 64  # segments kept before a new snapshot
+
+    def _segment_dir(self, device_id: str) -> Path:
+        return self.sync_folder / self.SEGMENT_DIR / device_id
+
+    def publish_segment(self) -> str | None:
+        """Write this device's changes since its last file as a segment.
+
+        Writes a snapshot instead when there is nothing to build on (no
+        files yet, or the journal was compacted past the last one), and
+        compacts once SEGMENT_COMPACT_AFTER segments have piled up.
+        Returns the path written, or None when nothing changed locally.
+        """
+        if not self.is_configured:
+            raise SyncError("Sync is not configured. Set a sync folder in Settings.")
+        folder = self._segment_dir(self.device_id)
+        folder.mkdir(parents=True, exist_ok=True)
+        segments, _ = list_segments(folder)
+        path = self._write_segment(folder, log_head(folder), len(segments))
+        if path is None:
+            return None
+        kind, _, through = parse_name(path.name)
+        if kind == "snap":
+            prune_segments(folder, through)
+        return str(path)
+
+    def _write_segment(
+        self, folder: Path, last: int, pending: int,
+    ) -> Path | None:
+        """Write the changes after *last* into *folder*; None if none.
+
+        *pending* is how many segments the log already holds since its
+        snapshot; a snapshot is written instead of a segment when it
+        reaches SEGMENT_COMPACT_AFTER or there is nothing to build on.
+        """
+        self._flush_pending_writes()
+        with self.db.get_connection() as conn:
+            if last == 0 or last < self._journal_floor(conn) \
+                    or pending >= self.SEGMENT_COMPACT_AFTER:
+                return self._write_snapshot(conn, folder)
+            tables, deletes, through = self._journal_delta(
+                conn, last, local_only=True,
+            )
+            if through <= last or not (tables or deletes):
+                return None
+            path = folder / segment_name(last, through)
+            write_sync_file(path, {
+                "device_id": self.device_id,
+                "exported_at": datetime.now(timezone.utc).isoformat(),
+                "schema_version": self._get_schema_version(conn),
+                "delta": True,
+                "full": False,
+                "base_seq": last,
+                "journal_seq": through,
+                "tables": tables,
+                "deletes": deletes,
+            }, self.EXPORT_CODEC)
+        return path
+
+    def _write_snapshot(self, conn, folder: Path) -> Path:
+        head = self._journal_head(conn)
+        path = folder / snapshot_name(head)
+        with SyncFileWriter(path, self.EXPORT_CODEC) as out:
+            out.write_header({
+                "device_id": self.device_id,
+                "exported_at": datetime.now(timezone.utc).isoformat(),
+                "schema_version": self._get_schema_version(conn),
+                "delta": True,
+                "full": True,
+                "base_seq": 0,
+                "journal_seq": head,
+            })
+            for table in SYNC_TABLES:
+                try:
+                    cursor = conn.execute(f"SELECT * FROM {table}")  # noqa: S608
+                except Exception:
+                    continue  # Table may not exist yet
+                columns = [desc[0] for desc in cursor.description]
+                out.write_table(table, columns, self._iter_cursor(cursor))
+            for table, ids in self._tombstones_since(
+                conn, 0, head, local_only=True,
+            ).items():
+                out.write_deletes(table, ids)
+        return path
+
+    def import_segments(self) -> dict:
+        """Apply every peer's new segments, without any folder lock.
+
+        Peers are taken in device-id order and their files in journal
+        order; each file commits together with the peer's watermark, so
+        an interrupted import resumes at the next file.  Returns
+        {table: rows_merged}.
+        """
+        if not self.is_configured:
+            raise SyncError("Sync is not configured.")
+        root = self.sync_folder / self.SEGMENT_DIR
+        try:
+            peers = sorted(p.name for p in root.iterdir() if p.is_dir())
+        except OSError:
+            peers = []
+        summary = {}
+        marks = self.get_peer_watermarks()
+        plans = [
+            (peer, plan_segments(
+                self._segment_dir(peer), marks.get(peer, 0),
+            ))
+            for peer in peers if peer != self.device_id
+        ]
+        total = sum(len(plan) for _, plan in plans)
+        done = 0
+        self._report_progress(0, total)
+        for peer, plan in plans:
+            for path in plan:
+                self._check_cancelled()
+                self._progress = (done, total)
+                done += 1
+                try:
+                    merged = self._apply_segment(peer, path)
+                finally:
+                    self._report_progress(done, total, peer)
+                if merged is None:
+                    break
+                for table, count in merged.items():
+                    summary[table] = summary.get(table, 0) + count
+        self._write_ack_file()
+        return summary
+
+    def _apply_segment(self, peer: str, path: Path) -> dict | None:
+        """Merge one file of *peer*'s log; None stops that peer's run.
+
+        A file that is gone, unreadable, not *peer*'s or from another
+        schema version stops the run — nothing after it applies either
+        — and the next round retries from the peer's watermark.
+        """
+        try:
+            with SyncFileReader(path) as reader:
+                if reader.header.get("device_id") != peer:
+                    return None
+                merged = self._merge_delta(
+                    reader.header, reader.batches(self.MERGE_BATCH),
+                )
+        except (SyncFormatError, KeyError, OSError, TypeError):
+            return None  # Pruned or unreadable: retry next round
+        return None if "_skipped" in merged else merged
+
+    def sync_segments(self) -> dict:
+        """Lock-free sync: import peers' segments, then publish ours."""
+        summary = self.import_segments()
+        self.publish_segment()
+        self.collect_tombstones()
+        now = datetime.now(timezone.utc).isoformat()
+        self._last_sync = now
+        Config.update_last_sync(now)
+        return summary
+
+    # ── Server sync (wired-part-syncd) ───────────────────────────
+    #
+    # The same per-device logs, held by a sync server on the LAN
+    # instead of a shared folder (see syncd.py).  A sync is a handful of
+    # requests on one keep-alive connection: the server streams every
+    # file a pull needs back to back, the transport downloads ahead
+    # while earlier files merge, and this device's changes go up as one
+    # segment.
+
+    def sync_server(self, url: str = "") -> dict:
+        """Sync through the wired-part-syncd server at *url*.
+
+        Defaults to Config.SYNC_SERVER_URL.  Merges the peers' new log
+        files, pushes this device's changes, publishes its watermarks
+        and collects tombstones every device has acknowledged.  Returns
+        {table: rows_merged}; raises OSError if the server is
+        unreachable.
+        """
+        from wired_part.sync.transport import SyncServerClient
+
+        url = url or Config.SYNC_SERVER_URL
+        if not url:
+            raise SyncError("No sync server configured.")
+        with SyncServerClient(url, Config.SYNC_SERVER_TOKEN) as client:
+            status = client.status()
+            summary = self.import_from_server(client)
+            self.push_to_server(client, status)
+            client.put_acks(self.device_id, self.get_peer_watermarks())
+        self.collect_tombstones(
+            status["acks"], set(status["devices"]) | set(status["acks"]),
+        )
+        now = datetime.now(timezone.utc).isoformat()
+        self._last_sync = now
+        Config.update_last_sync(now)
+        return summary
+
+    def import_from_server(self, client) -> dict:
+        """Merge the peers' log files past our watermarks from *client*.
+
+        Files apply as they arrive, each committing with its peer's
+        watermark, exactly as import_segments applies them from a
+        folder.  Returns {table: rows_merged}.
+        """
+        summary = {}
+        with tempfile.TemporaryDirectory(prefix="wiredpart_pull_") as spool:
+            while True:
+                stream = client.pull(
+                    self.device_id, self.get_peer_watermarks(), Path(spool),
+                )
+                self._report_progress(0, stream.total)
+                stopped, applied = set(), 0
+                for done, (peer, path) in enumerate(stream, 1):
+                    self._check_cancelled()
+                    self._progress = (done - 1, stream.total)
+                    try:
+                        if peer in stopped:
+                            continue
+                        merged = self._apply_segment(peer, path)
+                    finally:
+                        path.unlink(missing_ok=True)
+                        self._report_progress(done, stream.total, peer)
+                    if merged is None:
+                        stopped.add(peer)
+                        continue
+                    applied += 1
+                    for table, count in merged.items():
+                        summary[table] = summary.get(table, 0) + count
+                if not stream.more or not applied:
+                    return summary
+
+    def push_to_server(self, client, status: dict | None = None) -> str | None:
+        """Send this device's changes since the server's copy of its log.
+
+        Returns the name of the file pushed, or None when nothing
+        changed.  *status* is a recent ``client.status()``.
+        """
+        status = status or client.status()
+        mine = status["devices"].get(self.device_id, {})
+        with tempfile.TemporaryDirectory(prefix="wiredpart_push_") as spool:
+            path = self._write_segment(
+                Path(spool), int(mine.get("head", 0)),
+                int(mine.get("segments", 0)),
+            )
+            if path is None:
+                return None
+            client.push(self.device_id, path)
+            return path.name
 
     # ── Loop 34: Multi-device registry ───────────────────────────
 
@@ -822,13 +1918,12 @@ class SyncManager:
         if not self.is_configured:
             return result
 
-        for filepath in self.sync_folder.glob(f"{self.EXPORT_PREFIX}*.json"):
-            device_id = filepath.stem.replace(self.EXPORT_PREFIX, "")
+        for device_id, filepath in self._export_files().items():
             if device_id == self.device_id:
                 continue
             try:
-                data = json.loads(filepath.read_text(encoding="utf-8"))
-                remote_version = data.get("schema_version", 0)
+                with SyncFileReader(filepath) as reader:
+                    remote_version = reader.header.get("schema_version", 0)
                 if remote_version == result["local_version"]:
                     result["compatible_devices"].append(device_id)
                 else:
@@ -836,7 +1931,7 @@ class SyncManager:
                         "device_id": device_id,
                         "version": remote_version,
                     })
-            except (json.JSONDecodeError, OSError):
+            except (SyncFormatError, OSError):
                 result["incompatible_devices"].append({
                     "device_id": device_id,
                     "version": "unknown",
@@ -0,0 +1,443 @@
+"""wired-part-syncd — optional sync server for shop LANs.
+
+Holds the canonical change log on the server's own disk, laid out
+exactly like a sync folder (``segments/<device_id>/`` logs plus
+``wiredpart_ack_<device_id>.json`` files), and serves it over HTTP with
+the protocol in ``wired_part.sync.transport``.  Devices then sync with
+a few requests on one connection instead of many SMB round trips, and
+since every device only appends to its own log the server needs no
+lock beyond a short in-process one around commits.
+
+    WIRED_PART_SYNC_TOKEN=<secret> \
+        wired-part-syncd --host 0.0.0.0 --port 8765 --data /srv/wired-part
+
+The log holds every device's data (user PIN hashes included) and what
+is pushed is merged by every client, so all requests must carry the
+shared secret; the server refuses to listen beyond loopback without
+one.  Devices send ``sync_server_token`` from settings.json.
+
+Standard library only; it runs entirely on the local machine or LAN.
+"""
+
+import argparse
+import hmac
+import ipaddress
+import json
+import logging
+import os
+import threading
+from datetime import datetime, timezone
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import unquote
+
+from wired_part.config import Config
+from wired_part.sync.segments import (
+    list_segments,
+    log_head,
+    parse_name,
+    plan_segments,
+    prune_segments,
+)
+from wired_part.sync.sync_format import SyncFileReader, SyncFormatError
+from wired_part.sync.sync_manager import SyncManager
+from wired_part.sync.transport import (
+    API,
+    AUTH_HEADER,
+    BATCH_CONTENT_TYPE,
+    DEFAULT_PORT,
+    DEVICE_ID_RE,
+    FRAME,
+    copy_stream,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class PushTooLarge(ValueError):
+    """A pushed file is bigger than the server accepts."""
+
+
+class LogConflict(Exception):
+    """A pushed file does not continue the device's log."""
+
+    def __init__(self, message: str, head: int):
+        super().__init__(message)
+        self.head = head
+
+
+class SegmentStore:
+    """The server's copy of every device's segment log."""
+
+    # A pull sends at least one file, then stops adding files past this
+    # many bytes; the client pulls again for the rest
+    PULL_MAX_BYTES = 64 << 20
+    # Largest single file a device may push (a whole-database snapshot)
+    PUSH_MAX_BYTES = 1 << 30
+
+    def __init__(self, root):
+        self.root = Path(root)
+        self.segments = self.root / SyncManager.SEGMENT_DIR
+        self.segments.mkdir(parents=True, exist_ok=True)
+        # Serialises commits and pull planning against compaction
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _check_device(device_id: str) -> str:
+        if not DEVICE_ID_RE.match(device_id or ""):
+            raise ValueError(f"Invalid device id: {device_id!r}")
+        return device_id
+
+    def _ack_path(self, device_id: str) -> Path:
+        return self.root / f"{SyncManager.ACK_PREFIX}{device_id}.json"
+
+    def status(self) -> dict:
+        """Every device's log head and published watermarks."""
+        devices = {}
+        for folder in sorted(self.segments.iterdir()):
+            if folder.is_dir():
+                segments, _ = list_segments(folder)
+                devices[folder.name] = {
+                    "head": log_head(folder), "segments": len(segments),
+                }
+        acks = {}
+        for path in self.root.glob(f"{SyncManager.ACK_PREFIX}*.json"):
+            try:
+                data = json.loads(path.read_text(encoding="utf-8"))
+                acks[data["device_id"]] = dict(data.get("acks", {}))
+            except (json.JSONDecodeError, KeyError, OSError, TypeError):
+                continue
+        return {"devices": devices, "acks": acks}
+
+    def open_pull(self, device_id: str, marks: dict) -> tuple[list, bool]:
+        """Open the files *device_id* needs past *marks*.
+
+        Returns ``([(name, file, size)], more)``.  The files are opened
+        under the lock, so a compaction that prunes them afterwards does
+        not cut the response short.
+        """
+        self._check_device(device_id)
+        opened, total = [], 0
+        with self._lock:
+            for folder in sorted(self.segments.iterdir()):
+                peer = folder.name
+                if peer == device_id or not folder.is_dir():
+                    continue
+                for path in plan_segments(folder, int(marks.get(peer, 0))):
+                    if opened and total >= self.PULL_MAX_BYTES:
+                        return opened, True
+                    try:
+                        fh = open(path, "rb")
+                    except OSError:
+                        break  # Pruned meanwhile — the rest would gap
+                    size = os.fstat(fh.fileno()).st_size
+                    opened.append((f"{peer}/{path.name}", fh, size))
+                    total += size
+        return opened, False
+
+    def push(self, device_id: str, name: str, body, length: int) -> dict:
+        """Append *name* (read from *body*) to *device_id*'s log.
+
+        The file is received to a temp name and read end to end, so
+        its checksum is verified before it becomes visible.  Pushing a
+        file that is already there succeeds without changing anything,
+        so a client can safely retry.
+        """
+        self._check_device(device_id)
+        if length > self.PUSH_MAX_BYTES:
+            raise PushTooLarge(
+                f"{name} is {length:,} bytes; the limit is "
+                f"{self.PUSH_MAX_BYTES:,}"
+            )
+        parsed = parse_name(name)
+        if parsed is None or "/" in name or "\\" in name:
+            raise ValueError(f"Invalid log file name: {name!r}")
+        kind, base, through = parsed
+        folder = self.segments / device_id
+        # Received beside the logs: a rejected push leaves no device behind
+        tmp = self.segments / (
+            f".{device_id}.{name}.{threading.get_ident()}.tmp"
+        )
+        try:
+            with open(tmp, "wb") as out:
+                copy_stream(body, out, length)
+            with SyncFileReader(tmp) as reader:
+                header = reader.header
+                for _ in reader.batches():
+                    pass
+            if header.get("device_id") != device_id \
+                    or int(header.get("journal_seq", -1)) != through \
+                    or int(header.get("base_seq", 0)) != base:
+                raise ValueError(f"{name} does not match its contents")
+
+            with self._lock:
+                folder.mkdir(exist_ok=True)
+                head = log_head(folder)
+                if not (folder / name).exists():
+                    if kind == "seg" and base != head:
+                        raise LogConflict(
+                            f"{name} does not continue the log at {head}",
+                            head,
+                        )
+                    if kind == "snap" and through < head:
+                        raise LogConflict(
+                            f"{name} is older than the log at {head}", head,
+                        )
+                    os.replace(tmp, folder / name)
+                    if kind == "snap":
+                        prune_segments(folder, through)
+                segments, _ = list_segments(folder)
+                return {"head": log_head(folder), "segments": len(segments)}
+        except SyncFormatError as e:
+            raise ValueError(f"Corrupt log file {name}: {e}") from e
+        finally:
+            try:
+                tmp.unlink()
+            except OSError:
+                pass
+
+    def put_acks(self, device_id: str, acks: dict) -> dict:
+        """Record how far *device_id* has imported each peer's log."""
+        self._check_device(device_id)
+        data = {
+            "device_id": device_id,
+            "acks": {str(k): int(v) for k, v in dict(acks).items()},
+            "updated_at": datetime.now(timezone.utc).isoformat(),
+        }
+        path = self._ack_path(device_id)
+        tmp = path.with_name(f"{path.name}.{threading.get_ident()}.tmp")
+        tmp.write_text(json.dumps(data), encoding="utf-8")
+        os.replace(tmp, path)
+        return data
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Keep-alive: one connection per sync
+    server_version = "wired-part-syncd/1"
+
+    @property
+    def store(self) -> SegmentStore:
+        return self.server.store
+
+    def log_message(self, format, *args):
+        logger.debug("%s %s", self.address_string(), format % args)
+
+    def _send_json(self, status: int, data: dict):
+        body = json.dumps(data).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        if self.close_connection:
+            self.send_header("Connection", "close")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _length(self) -> int:
+        try:
+            return int(self.headers.get("Content-Length", ""))
+        except ValueError:
+            raise ValueError("Content-Length required") from None
+
+    def _read_json(self) -> dict:
+        data = json.loads(self.rfile.read(self._length()) or b"{}")
+        if not isinstance(data, dict):
+            raise ValueError("Expected a JSON object")
+        return data
+
+    def _route(self, method: str):
+        path = self.path.split("?", 1)[0]
+        if not path.startswith(API + "/"):
+            return None
+        parts = [unquote(p) for p in path[len(API) + 1:].split("/")]
+        routes = {
+            ("GET", "status"): (self._status, 1),
+            ("POST", "pull"): (self._pull, 1),
+            ("POST", "push"): (self._push, 3),
+            ("PUT", "acks"): (self._acks, 2),
+        }
+        handler = routes.get((method, parts[0]))
+        if handler is None or len(parts) != handler[1]:
+            return None
+        return lambda: handler[0](*parts[1:])
+
+    def _authorized(self) -> bool:
+        token = self.server.token
+        if not token:
+            return True
+        sent = self.headers.get(AUTH_HEADER, "")
+        return hmac.compare_digest(sent.encode("utf-8"),
+                                   token.encode("utf-8"))
+
+    def _dispatch(self, method: str):
+        if not self._authorized():
+            self.close_connection = True  # Body (if any) left unread
+            self._send_json(HTTPStatus.UNAUTHORIZED,
+                            {"error": "Missing or wrong sync token"})
+            return
+        action = self._route(method)
+        if action is None:
+            self.close_connection = True  # Body (if any) left unread
+            self._send_json(HTTPStatus.NOT_FOUND, {"error": "Not found"})
+            return
+        try:
+            action()
+        except LogConflict as e:
+            self._send_json(HTTPStatus.CONFLICT,
+                            {"error": str(e), "head": e.head})
+        except PushTooLarge as e:
+            self.close_connection = True
+            self._send_json(HTTPStatus.REQUEST_ENTITY_TOO_LARGE,
+                            {"error": str(e)})
+        except (ValueError, json.JSONDecodeError) as e:
+            self.close_connection = True
+            self._send_json(HTTPStatus.BAD_REQUEST, {"error": str(e)})
+        except Exception as e:
+            logger.exception("sync request failed")
+            self.close_connection = True
+            self._send_json(HTTPStatus.INTERNAL_SERVER_ERROR,
+                            {"error": str(e)})
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def do_PUT(self):
+        self._dispatch("PUT")
+
+    def _status(self):
+        self._send_json(HTTPStatus.OK, self.store.status())
+
+    def _acks(self, device_id: str):
+        data = self._read_json()
+        self._send_json(
+            HTTPStatus.OK, self.store.put_acks(device_id, data.get("acks", {})),
+        )
+
+    def _push(self, device_id: str, name: str):
+        result = self.store.push(device_id, name, self.rfile, self._length())
+        self._send_json(HTTPStatus.OK, result)
+
+    def _pull(self):
+        data = self._read_json()
+        marks = data.get("marks") or {}
+        if not isinstance(marks, dict):
+            raise ValueError("marks must be an object")
+        files, more = self.store.open_pull(data.get("device_id", ""), marks)
+        try:
+            length = sum(
+                FRAME.size + len(name.encode("utf-8")) + size
+                for name, _, size in files
+            )
+            self.send_response(HTTPStatus.OK)
+            self.send_header("Content-Type", BATCH_CONTENT_TYPE)
+            self.send_header("Content-Length", str(length))
+            self.send_header("X-Batch-Count", str(len(files)))
+            self.send_header("X-More", "1" if more else "0")
+            self.end_headers()
+            for name, fh, size in files:
+                encoded = name.encode("utf-8")
+                self.wfile.write(FRAME.pack(len(encoded), size) + encoded)
+                copy_stream(fh, self.wfile, size)
+        finally:
+            for _, fh, _ in files:
+                fh.close()
+
+
+class SyncServer(ThreadingHTTPServer):
+    """HTTP server over a SegmentStore; one thread per connection.
+
+    Requests must carry *token* in ``AUTH_HEADER``.  Without a token the
+    server only binds to a loopback address.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, data_dir, host: str = "127.0.0.1",
+                 port: int = DEFAULT_PORT, token: str = ""):
+        if not token and not _is_loopback(host):
+            raise ValueError(
+                f"Refusing to serve on {host} without a sync token"
+            )
+        self.token = token
+        self.store = SegmentStore(data_dir)
+        super().__init__((host, port), _Handler)
+        self._thread: threading.Thread | None = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        """Serve from a background thread (for embedding and tests)."""
+        self._thread = threading.Thread(
+            target=self.serve_forever, name="wired-part-syncd", daemon=True,
+        )
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop serving and release the port."""
+        self.shutdown()
+        self.server_close()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+
+def _is_loopback(host: str) -> bool:
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False  # A host name may resolve to anything
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="wired-part-syncd", description=__doc__.splitlines()[0],
+    )
+    parser.add_argument("--host", default="127.0.0.1",
+                        help="address to listen on (0.0.0.0 for the LAN)")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument(
+        "--data", type=Path,
+        default=Config.DATABASE_PATH.parent / "syncd",
+        help="folder holding the change log",
+    )
+    parser.add_argument(
+        "--token", default=None,
+        help="shared secret devices must send (default: "
+             "$WIRED_PART_SYNC_TOKEN, then sync_server_token)",
+    )
+    parser.add_argument("--max-push-mb", type=int, default=None,
+                        help="largest file a device may push")
+    parser.add_argument("-v", "--verbose", action="store_true")
+    args = parser.parse_args(argv)
+    token = (args.token or os.environ.get("WIRED_PART_SYNC_TOKEN")
+             or Config.SYNC_SERVER_TOKEN)
+    logging.basicConfig(
+        level=logging.DEBUG if args.verbose else logging.INFO,
+        format="%(asctime)s %(levelname)s %(message)s",
+    )
+    try:
+        server = SyncServer(args.data, args.host, args.port, token)
+    except ValueError as e:
+        parser.error(f"{e} (pass --token or set WIRED_PART_SYNC_TOKEN)")
+    if args.max_push_mb:
+        server.store.PUSH_MAX_BYTES = args.max_push_mb << 20
+    logger.info("Serving %s on %s", args.data, server.url)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
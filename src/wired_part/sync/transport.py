@@ -0,0 +1,241 @@
+"""HTTP client for a wired-part-syncd sync server.
+
+Speaks the small protocol served by ``wired_part.sync.syncd`` over one
+keep-alive connection:
+
+    GET  /v1/status                 {"devices": {id: {"head", "segments"}},
+                                     "acks": {id: {source: seq}}}
+    POST /v1/pull                   {"device_id", "marks"} -> batch stream
+    POST /v1/push/<device>/<file>   body: one segment or snapshot file
+    PUT  /v1/acks/<device>          {"acks": {source: seq}}
+
+Every request carries the shared secret in ``AUTH_HEADER`` when the
+server was started with one (``sync_server_token`` in settings.json).
+
+A pull answers with the requested log files back to back, each framed
+as ``FRAME`` (name length, payload length), the name ``<device>/<file>``
+and the file bytes.  The files are sync-format files, so they travel
+compressed exactly as they are stored.
+"""
+
+import http.client
+import json
+import queue
+import re
+import socket
+import struct
+import threading
+from pathlib import Path
+from urllib.parse import quote, urlsplit
+
+from wired_part.sync.segments import parse_name
+from wired_part.sync.sync_manager import SyncError
+
+API = "/v1"
+DEFAULT_PORT = 8765
+FRAME = struct.Struct("!HQ")  # name length, payload length
+BATCH_CONTENT_TYPE = "application/x-wiredpart-batches"
+AUTH_HEADER = "X-Sync-Token"
+# Device ids are uuids; anything else must not become a path
+DEVICE_ID_RE = re.compile(r"^[A-Za-z0-9][A-Za-z0-9._-]{0,127}$")
+
+_COPY_CHUNK = 256 * 1024
+
+
+class SyncServerError(SyncError):
+    """The sync server rejected a request."""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(f"Sync server error {status}: {message}")
+        self.status = status
+
+
+def _read_exact(stream, size: int) -> bytes:
+    data = stream.read(size)
+    if len(data) != size:
+        raise SyncError("Connection closed mid-transfer.")
+    return data
+
+
+def copy_stream(src, dst, length: int):
+    """Copy exactly *length* bytes from *src* to *dst*."""
+    remaining = length
+    while remaining:
+        chunk = src.read(min(remaining, _COPY_CHUNK))
+        if not chunk:
+            raise SyncError("Connection closed mid-transfer.")
+        dst.write(chunk)
+        remaining -= len(chunk)
+
+
+class PullStream:
+    """The files of one pull, downloaded ahead of the caller.
+
+    A reader thread saves each file into *spool* while the caller is
+    still merging the previous ones, keeping at most PREFETCH files
+    waiting.  Iterating yields ``(device_id, path)`` in server order;
+    ``total`` is the number of files and ``more`` says the server held
+    some back (pull again with the new watermarks).
+    """
+
+    PREFETCH = 4
+
+    def __init__(self, response, spool: Path):
+        self.total = int(response.getheader("X-Batch-Count", "0"))
+        self.more = response.getheader("X-More", "0") == "1"
+        self._response = response
+        self._spool = Path(spool)
+        self._queue: queue.Queue = queue.Queue(self.PREFETCH)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(
+            target=self._download, name="sync-pull", daemon=True,
+        )
+        self._thread.start()
+
+    def _put(self, item) -> bool:
+        while not self._stop.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _download(self):
+        try:
+            for index in range(self.total):
+                name_len, size = FRAME.unpack(
+                    _read_exact(self._response, FRAME.size)
+                )
+                name = _read_exact(self._response, name_len).decode("utf-8")
+                device_id, _, file_name = name.partition("/")
+                if not DEVICE_ID_RE.match(device_id) \
+                        or parse_name(file_name) is None:
+                    raise SyncError(f"Bad batch name from server: {name!r}")
+                path = self._spool / f"{index:06d}_{device_id}_{file_name}"
+                with open(path, "wb") as out:
+                    copy_stream(self._response, out, size)
+                if not self._put((device_id, path)):
+                    return
+            self._put(None)
+        except Exception as e:
+            self._put(e)
+
+    def __iter__(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+
+    def close(self, sock=None) -> bool:
+        """Stop downloading; True if the whole response was read.
+
+        A download still waiting on the network is cut off by shutting
+        down *sock*, the connection's socket.
+        """
+        self._stop.set()
+        if self._thread.is_alive() and sock is not None:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        self._thread.join()
+        if self._response.length:
+            return False
+        self._response.read()  # Marks the response done for reuse
+        return True
+
+
+class SyncServerClient:
+    """One keep-alive HTTP connection to a sync server.
+
+    Connection failures surface as OSError, like an unreachable sync
+    folder; requests the server refuses raise SyncServerError.
+    """
+
+    def __init__(self, url: str, token: str = "", timeout: float = 30.0):
+        parts = urlsplit(url if "//" in url else f"http://{url}")
+        if parts.scheme != "http" or not parts.hostname:
+            raise SyncError(f"Unsupported sync server URL: {url}")
+        self.url = url
+        self._token = token
+        self._conn = http.client.HTTPConnection(
+            parts.hostname, parts.port or DEFAULT_PORT, timeout=timeout,
+        )
+        self._stream: PullStream | None = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    def close(self):
+        self._finish_stream()
+        self._conn.close()
+
+    def _finish_stream(self):
+        stream, self._stream = self._stream, None
+        if stream is not None and not stream.close(self._conn.sock):
+            self._conn.close()  # Abandoned part-way: reconnect next time
+
+    def _request(self, method: str, path: str, body=None, headers=None):
+        self._finish_stream()
+        headers = dict(headers or {})
+        if self._token:
+            headers[AUTH_HEADER] = self._token
+        self._conn.request(method, API + path, body, headers)
+        response = self._conn.getresponse()
+        if response.status >= 400:
+            text = response.read().decode("utf-8", "replace")
+            try:
+                text = json.loads(text).get("error", text)
+            except (ValueError, AttributeError):
+                pass
+            raise SyncServerError(response.status, text)
+        return response
+
+    def _json(self, method: str, path: str, data=None) -> dict:
+        body = None if data is None else json.dumps(data).encode("utf-8")
+        headers = {"Content-Type": "application/json"} if body else {}
+        response = self._request(method, path, body, headers)
+        return json.loads(response.read() or b"{}")
+
+    def status(self) -> dict:
+        """Every device's log head and published watermarks."""
+        return self._json("GET", "/status")
+
+    def pull(self, device_id: str, marks: dict, spool: Path) -> PullStream:
+        """Stream the peers' log files past *marks* into *spool*."""
+        response = self._request(
+            "POST", "/pull",
+            json.dumps({"device_id": device_id, "marks": marks}).encode(),
+            {"Content-Type": "application/json"},
+        )
+        self._stream = PullStream(response, spool)
+        return self._stream
+
+    def push(self, device_id: str, path: Path) -> dict:
+        """Append one of this device's log files to the server's copy."""
+        path = Path(path)
+        with open(path, "rb") as fh:
+            response = self._request(
+                "POST",
+                f"/push/{quote(device_id, safe='')}/{quote(path.name)}",
+                fh,
+                {
+                    "Content-Type": "application/octet-stream",
+                    "Content-Length": str(path.stat().st_size),
+                },
+            )
+        return json.loads(response.read() or b"{}")
+
+    def put_acks(self, device_id: str, acks: dict) -> dict:
+        """Publish how far this device has imported each peer's log."""
+        return self._json(
+            "PUT", f"/acks/{quote(device_id, safe='')}", {"acks": acks},
+        )
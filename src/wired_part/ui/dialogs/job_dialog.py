@@ -66,7 +66,10 @@ class JobDialog(QDialog):
         self.job_number_input = QLineEdit()
         self.job_number_input.setMaxLength(20)
         if not self.job:
-            self.job_number_input.setText(self.repo.generate_job_number())
+            # A preview: the number is allocated when the job is saved
+            self.job_number_input.setText(
+                self.repo.generate_job_number(peek=True)
+            )
             self.job_number_input.setReadOnly(True)
         form.addRow("Job Number:", self.job_number_input)
 
@@ -213,9 +216,13 @@ class JobDialog(QDialog):
             QMessageBox.warning(self, "Validation", "Job name is required.")
             return
 
+        if self.job:
+            job_number = self.job_number_input.text().strip()
+        else:
+            job_number = self.repo.generate_job_number()
         data = Job(
             id=self.job.id if self.job else None,
-            job_number=self.job_number_input.text().strip(),
+            job_number=job_number,
             name=name,
             customer=self.customer_input.text().strip(),
             address=self.address_input.text().strip(),
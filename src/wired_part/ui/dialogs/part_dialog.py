@@ -430,8 +430,9 @@ class PartDialog(QDialog):
         """Enable/disable local PN field based on auto-generate checkbox."""
         self.local_pn_input.setEnabled(not checked)
         if checked:
+            # A preview: the number is allocated when the part is saved
             self.local_pn_input.setText(
-                self.repo.generate_local_part_number()
+                self.repo.generate_local_part_number(peek=True)
             )
 
     def _on_browse_image(self):
@@ -766,6 +767,10 @@ class PartDialog(QDialog):
         ]
         supplier_text = checked_names[0] if checked_names else ""
 
+        local_pn = self.local_pn_input.text().strip()
+        if local_pn and self.auto_lpn_check.isChecked():
+            local_pn = self.repo.generate_local_part_number()
+
         # Build part data — color_options and type_style are now "[]"
         # (variant tree replaces the old JSON fields)
         data = Part(
@@ -788,7 +793,7 @@ class PartDialog(QDialog):
             brand_part_number=(
                 self.brand_pn_input.text().strip() if is_specific else ""
             ),
-            local_part_number=self.local_pn_input.text().strip(),
+            local_part_number=local_pn,
             image_path=self.image_path_input.text().strip(),
             subcategory=self.subcategory_input.currentText().strip(),
             color_options="[]",
@@ -0,0 +1,99 @@
+"""Qt glue for repository domain events.
+
+``DomainEventRelay`` moves events from the repository's ``EventBus``
+onto the GUI thread and batches them, so a burst of writes reaches the
+pages as one coalesced list per event-loop tick.
+
+``LiveRefreshMixin`` lets a page skip full reloads on tab switches.  A
+page remembers the change-journal position it last loaded at, plus the
+rows it has since patched in place from events; it is stale only when
+the journal shows a change to one of its tables that it has not seen.
+"""
+
+from PySide6.QtCore import QObject, QTimer, Signal
+
+from wired_part.database.events import EventBus, coalesce
+
+
+class DomainEventRelay(QObject):
+    """Deliver coalesced domain events once per event-loop tick."""
+
+    events_ready = Signal(list)
+    _received = Signal(object)
+
+    def __init__(self, bus: EventBus, parent=None):
+        super().__init__(parent)
+        self._pending: list = []
+        self._scheduled = False
+        # Queued automatically when a write happens off the GUI thread
+        self._received.connect(self._queue)
+        self._unsubscribe = bus.subscribe(self._received.emit)
+
+    def _queue(self, event):
+        self._pending.append(event)
+        if not self._scheduled:
+            self._scheduled = True
+            QTimer.singleShot(0, self._flush)
+
+    def _flush(self):
+        self._scheduled = False
+        events, self._pending = coalesce(self._pending), []
+        if events:
+            self.events_ready.emit(events)
+
+    def close(self):
+        """Stop listening to the bus."""
+        self._unsubscribe()
+
+
+class LiveRefreshMixin:
+    """Journal-based staleness tracking for pages with a ``repo``.
+
+    Subclasses list the synced tables they display in WATCHED_TABLES,
+    call ``_begin_load()`` / ``_mark_loaded(seq)`` around a full reload
+    and ``_mark_patched(table, ids, seq)`` after re-reading rows in
+    place, where *seq* was taken by ``_begin_load()`` before the read.
+    """
+
+    WATCHED_TABLES: tuple[str, ...] = ()
+    # Beyond this many unseen journal entries a full reload is cheaper
+    STALE_SCAN_LIMIT = 500
+
+    _journal_seq: int | None = None
+    _patched: dict | None = None
+
+    def _begin_load(self) -> int:
+        return self.repo.get_change_journal_seq()
+
+    def _mark_loaded(self, seq: int):
+        self._journal_seq = seq
+        self._patched = {}
+
+    def _mark_patched(self, table: str, row_ids, seq: int):
+        if self._patched is None:
+            return
+        for row_id in row_ids:
+            self._patched[(table, row_id)] = seq
+
+    def is_stale(self) -> bool:
+        """True when the page must reload to show current data."""
+        if self._journal_seq is None:
+            return True
+        try:
+            changes = self.repo.changes_since(
+                self._journal_seq, tables=list(self.WATCHED_TABLES),
+                limit=self.STALE_SCAN_LIMIT,
+            )
+        except ValueError:
+            return True  # Journal compacted past our position
+        if len(changes) >= self.STALE_SCAN_LIMIT:
+            return True
+        patched = self._patched or {}
+        for change in changes:
+            key = (change["table_name"], change["row_id"])
+            if change["seq"] > patched.get(key, -1):
+                return True
+        if changes:
+            # Everything since our position was patched in place
+            self._mark_loaded(changes[-1]["seq"])
+        return False
@@ -18,17 +18,23 @@ from PySide6.QtWidgets import (
     QWidget,
 )
 
+from wired_part.config import Config
 from wired_part.database.connection import DatabaseConnection
 from wired_part.database.models import User
 from wired_part.database.repository import Repository
 from wired_part.ui.widgets.search_dialog import SearchDialog
 from wired_part.ui.widgets.toast_widget import ToastManager
 from wired_part.utils.constants import (
+    ACTIVITY_ARCHIVE_BATCH,
+    ACTIVITY_ARCHIVE_INTERVAL,
     APP_NAME,
+    CHANGE_JOURNAL_COMPACT_INTERVAL,
     DEFAULT_WINDOW_HEIGHT,
     DEFAULT_WINDOW_WIDTH,
     MIN_WINDOW_HEIGHT,
     MIN_WINDOW_WIDTH,
+    NOTIFICATION_MAINTENANCE_INTERVAL,
+    STATS_COUNTER_CHECK_INTERVAL,
 )
 
 
@@ -53,8 +59,10 @@ class MainWindow(QMainWindow):
         self.setMinimumSize(MIN_WINDOW_WIDTH, MIN_WINDOW_HEIGHT)
 
         self._setup_ui()
+        self._setup_domain_events()
         self._setup_status_bar()
         self._setup_background_agents()
+        self._setup_sync_service()
         self._setup_global_shortcuts()
         self._update_status_bar()
 
@@ -66,6 +74,34 @@ class MainWindow(QMainWindow):
         self._notif_timer.timeout.connect(self._update_status_bar)
         self._notif_timer.start(60_000)
 
+        # Periodically recompute summary counters and repair any drift
+        self._stats_check_timer = QTimer(self)
+        self._stats_check_timer.timeout.connect(self._check_stats_counters)
+        self._stats_check_timer.start(STATS_COUNTER_CHECK_INTERVAL * 60_000)
+
+        # Periodically compact the change journal and prune old
+        # low-stock transitions
+        self._journal_timer = QTimer(self)
+        self._journal_timer.timeout.connect(self._compact_change_journal)
+        self._journal_timer.start(CHANGE_JOURNAL_COMPACT_INTERVAL * 60_000)
+
+        # Prune and archive notifications in small batches; while a pass
+        # finds more work the timer drops to a short catch-up interval
+        self._notif_maintenance_timer = QTimer(self)
+        self._notif_maintenance_timer.timeout.connect(
+            self._run_notification_maintenance
+        )
+        self._notif_maintenance_timer.start(
+            NOTIFICATION_MAINTENANCE_INTERVAL * 60_000
+        )
+
+        # Move old activity log entries into compressed archive segments
+        self._activity_archive_timer = QTimer(self)
+        self._activity_archive_timer.timeout.connect(
+            self._archive_activity_log
+        )
+        self._activity_archive_timer.start(ACTIVITY_ARCHIVE_INTERVAL * 60_000)
+
     # ── Helpers ──────────────────────────────────────────────────
 
     @staticmethod
@@ -494,6 +530,25 @@ class MainWindow(QMainWindow):
             lambda *_: self._update_status_bar()
         )
 
+    def _setup_sync_service(self):
+        """Schedule background syncs when a sync folder is configured."""
+        from wired_part.ui.sync_service import SyncService
+        self.sync_service = SyncService(self.db.db_path, parent=self)
+        self._close_pending = False
+        self.sync_service.status_changed.connect(
+            self.sync_status_label.setText
+        )
+        self.sync_service.sync_finished.connect(self._on_sync_finished)
+        if Config.SYNC_ENABLED:
+            self.sync_service.start()
+
+    def _on_sync_finished(self, summary: dict):
+        """Show rows merged by a background sync."""
+        if not summary:
+            return
+        self._update_status_bar()
+        self._refresh_page(self.tabs.currentWidget())
+
     def _setup_global_shortcuts(self):
         """Set up application-wide keyboard shortcuts."""
         search_shortcut = QShortcut(QKeySequence("Ctrl+K"), self)
@@ -537,6 +592,8 @@ class MainWindow(QMainWindow):
         self.user_label = QLabel(
             f"User: {self.current_user.display_name}"
         )
+        self.sync_status_label = QLabel("Sync: off")
+        self.sync_status_label.setObjectName("SyncStatusLabel")
 
         self.status_bar.addWidget(self.clock_status_label)
         self.status_bar.addWidget(self.status_label, 1)
@@ -544,10 +601,15 @@ class MainWindow(QMainWindow):
         self.status_bar.addPermanentWidget(self.notification_label)
         self.status_bar.addPermanentWidget(self.parts_count_label)
         self.status_bar.addPermanentWidget(self.low_stock_label)
+        self.status_bar.addPermanentWidget(self.sync_status_label)
         self.status_bar.addPermanentWidget(self.user_label)
 
     def _update_status_bar(self):
         """Refresh status bar counts including clock-in status."""
+        try:
+            self.repo.notify_low_stock_transitions()
+        except Exception:
+            pass
         summary = self.repo.get_inventory_summary()
         total = summary.get("total_parts", 0)
         low = summary.get("low_stock_count", 0)
@@ -600,11 +662,26 @@ class MainWindow(QMainWindow):
         except Exception:
             pass
 
+    @staticmethod
+    def _refresh_page(widget):
+        """Refresh a page unless it reports it is already current."""
+        if not hasattr(widget, "refresh"):
+            return
+        if hasattr(widget, "is_stale") and not widget.is_stale():
+            return
+        widget.refresh()
+
+    def _setup_domain_events(self):
+        """Subscribe pages to coalesced repository domain events."""
+        from wired_part.ui.domain_events import DomainEventRelay
+        self.event_relay = DomainEventRelay(self.repo.events, self)
+        for page in (self.inventory_page, self.trucks_inventory_page):
+            self.event_relay.events_ready.connect(page.on_domain_events)
+
     def _on_tab_changed(self, index: int):
         """Refresh the active tab's data."""
         widget = self.tabs.widget(index)
-        if hasattr(widget, "refresh"):
-            widget.refresh()
+        self._refresh_page(widget)
         # For container tabs with sub-tabs, refresh the active sub-tab
         for sub_tabs in (
             self.parts_catalog_page.sub_tabs,
@@ -613,14 +690,10 @@ class MainWindow(QMainWindow):
             self.agent_tabs,
         ):
             if sub_tabs.parent() == widget:
-                sub_widget = sub_tabs.currentWidget()
-                if hasattr(sub_widget, "refresh"):
-                    sub_widget.refresh()
+                self._refresh_page(sub_tabs.currentWidget())
         # Also refresh supplier orders stacked widget if visible
         if index == 2 and self.warehouse_tabs.currentIndex() == 2:
-            current_order_page = self.supplier_orders_stack.currentWidget()
-            if hasattr(current_order_page, "refresh"):
-                current_order_page.refresh()
+            self._refresh_page(self.supplier_orders_stack.currentWidget())
         self._update_status_bar()
         self._update_tab_badges()
 
@@ -628,16 +701,12 @@ class MainWindow(QMainWindow):
         """Refresh the active sub-tab's data."""
         sender = self.sender()
         if isinstance(sender, QTabWidget):
-            widget = sender.widget(index)
-            if hasattr(widget, "refresh"):
-                widget.refresh()
+            self._refresh_page(sender.widget(index))
 
     def _on_supplier_orders_changed(self, index: int):
         """Switch the supplier orders stacked widget and refresh."""
         self.supplier_orders_stack.setCurrentIndex(index)
-        widget = self.supplier_orders_stack.currentWidget()
-        if hasattr(widget, "refresh"):
-            widget.refresh()
+        self._refresh_page(self.supplier_orders_stack.currentWidget())
 
     def _toggle_notifications(self, checked: bool):
         """Show/hide the notifications panel."""
@@ -671,7 +740,7 @@ class MainWindow(QMainWindow):
         """Navigate to the target tab when a notification is clicked."""
         nid = item.data(Qt.UserRole)
         if nid:
-            self.repo.mark_notification_read(nid)
+            self.repo.mark_notification_read(nid, self.current_user.id)
             self._update_status_bar()
 
         # Find the notification object
@@ -725,6 +794,47 @@ class MainWindow(QMainWindow):
         if self.notif_panel.isVisible():
             self._refresh_notifications()
 
+    def _check_stats_counters(self):
+        """Repair drifted stats counters and refresh the status bar."""
+        try:
+            drift = self.repo.verify_stats_counters(repair=True)
+        except Exception:
+            return
+        if drift:
+            self._update_status_bar()
+
+    def _compact_change_journal(self):
+        """Drop superseded and expired change journal entries."""
+        try:
+            self.repo.compact_change_journal()
+        except Exception:
+            pass
+        try:
+            self.repo.prune_low_stock_events()
+        except Exception:
+            pass
+
+    def _run_notification_maintenance(self):
+        """Run one bounded notification retention pass."""
+        try:
+            more = self.repo.run_notification_maintenance()["more"]
+        except Exception:
+            more = False
+        self._notif_maintenance_timer.setInterval(
+            1000 if more else NOTIFICATION_MAINTENANCE_INTERVAL * 60_000
+        )
+
+    def _archive_activity_log(self):
+        """Archive one batch of old activity entries."""
+        try:
+            archived = self.repo.archive_activity_log()["archived"]
+        except Exception:
+            archived = 0
+        more = archived >= ACTIVITY_ARCHIVE_BATCH
+        self._activity_archive_timer.setInterval(
+            1000 if more else ACTIVITY_ARCHIVE_INTERVAL * 60_000
+        )
+
     def _on_logout(self):
         """Confirm and trigger logout."""
         reply = QMessageBox.question(
@@ -735,5 +845,29 @@ class MainWindow(QMainWindow):
         )
         if reply == QMessageBox.Yes:
             self._notif_timer.stop()
+            self._stats_check_timer.stop()
+            self._journal_timer.stop()
+            self._notif_maintenance_timer.stop()
+            self._activity_archive_timer.stop()
+            self.sync_service.stop()
+            self.event_relay.close()
             self.logout_requested.emit()
             self.close()
+
+    def closeEvent(self, event):
+        """Cancel a running background sync before the window closes.
+
+        A sync that does not stop within a second keeps the window open
+        until it does, so its thread is never destroyed while running
+        and the GUI thread is not blocked waiting for it.
+        """
+        if not self.sync_service.stop():
+            if not self._close_pending:
+                self._close_pending = True
+                self.sync_service.stopped.connect(self._close_after_sync)
+            event.ignore()
+            return
+        super().closeEvent(event)
+
+    def _close_after_sync(self):
+        self.close()
@@ -15,14 +15,18 @@ from PySide6.QtWidgets import (
     QWidget,
 )
 
+from wired_part.database.events import PartsChanged
 from wired_part.database.models import Part, User
 from wired_part.database.repository import Repository
+from wired_part.ui.domain_events import LiveRefreshMixin
 from wired_part.utils.formatters import format_currency
 
 
-class InventoryPage(QWidget):
+class InventoryPage(LiveRefreshMixin, QWidget):
     """Full inventory view with search, filter, and CRUD actions."""
 
+    WATCHED_TABLES = ("parts", "categories", "brands")
+
     COLUMNS = [
         "Part #", "Description", "Qty", "Min", "Location",
         "Category", "Unit Cost", "Supplier",
@@ -120,8 +124,34 @@ class InventoryPage(QWidget):
 
     def refresh(self):
         """Reload all data from the database."""
+        seq = self._begin_load()
         self._load_categories()
         self._load_parts()
+        self._mark_loaded(seq)
+
+    def on_domain_events(self, events: list):
+        """Patch changed part rows in place while the page is shown."""
+        part_ids = set()
+        for event in events:
+            if isinstance(event, PartsChanged):
+                part_ids |= event.part_ids
+        if not part_ids or not self.isVisible():
+            return  # Hidden pages catch up via is_stale() when shown
+        seq = self._begin_load()
+        rows = {p.id: row for row, p in enumerate(self._parts)}
+        category_id = self.category_filter.currentData()
+        for part_id in part_ids:
+            part = self.repo.get_part_by_id(part_id)
+            row = rows.get(part_id)
+            if (part is None or row is None
+                    or (category_id is not None
+                        and part.category_id != category_id)):
+                # Added, deleted or filtered out — rebuild the list
+                self.refresh()
+                return
+            self._parts[row] = part
+            self._set_row(row, part)
+        self._mark_patched("parts", part_ids, seq)
 
     def _load_categories(self):
         """Populate the category filter dropdown."""
@@ -160,26 +190,30 @@ class InventoryPage(QWidget):
         """Fill the table widget with current parts data."""
         self.table.setRowCount(len(self._parts))
         for row, part in enumerate(self._parts):
-            items = [
-                QTableWidgetItem(part.part_number),
-                QTableWidgetItem(part.description),
-                QTableWidgetItem(str(part.quantity)),
-                QTableWidgetItem(str(part.min_quantity)),
-                QTableWidgetItem(part.location),
-                QTableWidgetItem(part.category_name),
-                QTableWidgetItem(
-                    format_currency(part.unit_cost)
-                    if self._can_see_dollars else "—"
-                ),
-                QTableWidgetItem(part.supplier),
-            ]
-            # Highlight low stock in red
-            if part.is_low_stock:
-                for item in items:
-                    item.setForeground(Qt.red)
-
-            for col, item in enumerate(items):
-                self.table.setItem(row, col, item)
+            self._set_row(row, part)
+
+    def _set_row(self, row: int, part: Part):
+        """Render one part into the given table row."""
+        items = [
+            QTableWidgetItem(part.part_number),
+            QTableWidgetItem(part.description),
+            QTableWidgetItem(str(part.quantity)),
+            QTableWidgetItem(str(part.min_quantity)),
+            QTableWidgetItem(part.location),
+            QTableWidgetItem(part.category_name),
+            QTableWidgetItem(
+                format_currency(part.unit_cost)
+                if self._can_see_dollars else "—"
+            ),
+            QTableWidgetItem(part.supplier),
+        ]
+        # Highlight low stock in red
+        if part.is_low_stock:
+            for item in items:
+                item.setForeground(Qt.red)
+
+        for col, item in enumerate(items):
+            self.table.setItem(row, col, item)
 
     def _selected_part(self) -> Part | None:
         """Return the currently selected Part, or None."""
@@ -22,6 +22,8 @@ class NotificationsPage(QWidget):
 
     navigate_requested = Signal(str, int)  # (target_tab, entity_id)
 
+    PAGE_SIZE = 50
+
     def __init__(self, repo: Repository, current_user: User, parent=None):
         super().__init__(parent)
         self.repo = repo
@@ -90,6 +92,11 @@ class NotificationsPage(QWidget):
         bottom_row.addWidget(self.count_label)
         bottom_row.addStretch()
 
+        self.load_more_btn = QPushButton("Load More")
+        self.load_more_btn.clicked.connect(self._load_more)
+        self.load_more_btn.setVisible(False)
+        bottom_row.addWidget(self.load_more_btn)
+
         self.dismiss_btn = QPushButton("Dismiss Selected")
         self.dismiss_btn.clicked.connect(self._dismiss_selected)
         bottom_row.addWidget(self.dismiss_btn)
@@ -102,7 +109,7 @@ class NotificationsPage(QWidget):
         """Reload notifications with current filter settings."""
         self._apply_filters()
 
-    def _apply_filters(self):
+    def _filter_values(self) -> dict:
         severity = self.severity_combo.currentText()
         source = self.source_combo.currentText()
         status = self.status_combo.currentText()
@@ -115,14 +122,30 @@ class NotificationsPage(QWidget):
         elif status == "Read":
             read_val = 1
 
+        return {"severity": sev_val, "source": src_val, "is_read": read_val}
+
+    def _apply_filters(self):
         self._notifications = self.repo.get_user_notifications_filtered(
-            self.current_user.id,
-            severity=sev_val,
-            source=src_val,
-            is_read=read_val,
-            limit=50,
+            self.current_user.id, limit=self.PAGE_SIZE,
+            **self._filter_values(),
+        )
+        self._populate_table()
+        self.load_more_btn.setVisible(
+            len(self._notifications) == self.PAGE_SIZE
+        )
+
+    def _load_more(self):
+        """Append the next page, keyed on the oldest row shown."""
+        if not self._notifications:
+            return
+        page = self.repo.get_user_notifications_filtered(
+            self.current_user.id, limit=self.PAGE_SIZE,
+            before_id=self._notifications[-1].id,
+            **self._filter_values(),
         )
+        self._notifications.extend(page)
         self._populate_table()
+        self.load_more_btn.setVisible(len(page) == self.PAGE_SIZE)
 
     def _populate_table(self):
         self.table.setRowCount(len(self._notifications))
@@ -173,7 +196,7 @@ class NotificationsPage(QWidget):
 
         # Mark read
         if not n.is_read and n.id:
-            self.repo.mark_notification_read(n.id)
+            self.repo.mark_notification_read(n.id, self.current_user.id)
             n.is_read = 1
             status_item = QTableWidgetItem("Read")
             self.table.setItem(row, 5, status_item)
@@ -197,7 +220,9 @@ class NotificationsPage(QWidget):
             if row < len(self._notifications):
                 n = self._notifications[row]
                 if not n.is_read and n.id:
-                    self.repo.mark_notification_read(n.id)
+                    self.repo.mark_notification_read(
+                        n.id, self.current_user.id,
+                    )
         self._apply_filters()
 
     def _mark_all_read(self):
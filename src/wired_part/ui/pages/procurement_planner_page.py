@@ -40,6 +40,7 @@ class ProcurementPlannerPage(QWidget):
         self._parts_data: list = []  # Part objects for the table
         self._supplier_columns: dict[int, QListWidget] = {}  # sid → list
         self._supplier_names: dict[int, str] = {}
+        self._last_low_stock_event: int | None = None  # feed cursor
         self._setup_ui()
 
     # ── UI ──────────────────────────────────────────────────────
@@ -150,10 +151,27 @@ class ProcurementPlannerPage(QWidget):
 
     def refresh(self):
         """Called when tab is selected."""
-        pass  # Don't auto-load — user clicks "Load Low Stock"
+        # Don't auto-load — user clicks "Load Low Stock".  Once loaded,
+        # point out warehouse threshold crossings since then.
+        if self._last_low_stock_event is None:
+            return
+        events = [
+            e for e in self.repo.get_low_stock_events(
+                self._last_low_stock_event
+            )
+            if e["location"] == "warehouse"
+        ]
+        if events:
+            entered = sum(1 for e in events if e["transition"] == "enter")
+            exited = len(events) - entered
+            self.status_label.setText(
+                f"Since loading: {entered} part(s) went low, "
+                f"{exited} recovered. Reload to update."
+            )
 
     def _load_low_stock(self):
         """Populate table with parts below min quantity."""
+        self._last_low_stock_event = self.repo.get_last_low_stock_event_id()
         self._parts_data = self.repo.get_low_stock_parts()
         self._populate_parts_table()
         self._build_supplier_columns()
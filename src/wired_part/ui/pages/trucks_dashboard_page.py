@@ -94,43 +94,35 @@ class TrucksDashboardPage(QWidget):
         pending = self.repo.get_all_pending_transfers()
         self.pending_transfers_card.set_value(str(len(pending)))
 
-        # Total truck inventory value
+        # Per-truck aggregates are precomputed; one query for the fleet
+        stats = {
+            u["id"]: u for u in self.repo.get_truck_utilization()
+        }
         total_value = 0.0
         self.fleet_table.setRowCount(len(active_trucks))
         for row, truck in enumerate(active_trucks):
+            truck_stats = stats.get(truck.id, {})
             self.fleet_table.setItem(
                 row, 0, QTableWidgetItem(
                     f"{truck.truck_number} — {truck.name}"
                 )
             )
-            # Assigned user
-            assigned = ""
-            if truck.assigned_user_id:
-                try:
-                    user = self.repo.get_user_by_id(truck.assigned_user_id)
-                    if user:
-                        assigned = user.display_name
-                except Exception:
-                    pass
             self.fleet_table.setItem(
-                row, 1, QTableWidgetItem(assigned or "Unassigned")
+                row, 1, QTableWidgetItem(
+                    truck.assigned_user_name or "Unassigned"
+                )
             )
-            # Inventory count
-            inv = self.repo.get_truck_inventory(truck.id)
-            item_count = sum(i.quantity for i in inv)
             self.fleet_table.setItem(
-                row, 2, QTableWidgetItem(str(item_count))
-            )
-            # Pending transfers for this truck
-            truck_pending = self.repo.get_truck_transfers(
-                truck.id, status="pending"
+                row, 2, QTableWidgetItem(
+                    str(truck_stats.get("total_quantity", 0))
+                )
             )
             self.fleet_table.setItem(
-                row, 3, QTableWidgetItem(str(len(truck_pending)))
+                row, 3, QTableWidgetItem(
+                    str(truck_stats.get("pending_transfers", 0))
+                )
             )
-            # Accumulate value
-            for ti in inv:
-                total_value += (ti.quantity or 0) * (ti.unit_cost or 0)
+            total_value += truck_stats.get("inventory_value", 0.0)
 
         from wired_part.utils.formatters import format_currency
         self.total_inv_value_card.set_value(format_currency(total_value))
@@ -14,7 +14,13 @@ from PySide6.QtWidgets import (
     QWidget,
 )
 
+from wired_part.database.events import (
+    PartsChanged,
+    TransfersChanged,
+    TruckInventoryChanged,
+)
 from wired_part.database.repository import Repository
+from wired_part.ui.domain_events import LiveRefreshMixin
 from wired_part.utils.formatters import format_currency
 
 
@@ -156,9 +162,11 @@ class _TruckInventoryTab(QWidget):
         return item
 
 
-class TrucksInventoryPage(QWidget):
+class TrucksInventoryPage(LiveRefreshMixin, QWidget):
     """Container page with dynamic sub-tabs for each truck's inventory."""
 
+    WATCHED_TABLES = ("trucks", "truck_inventory", "parts")
+
     def __init__(self, repo: Repository, current_user=None):
         super().__init__()
         self.repo = repo
@@ -207,6 +215,7 @@ class TrucksInventoryPage(QWidget):
 
     def refresh(self):
         """Rebuild truck tabs from database."""
+        seq = self._begin_load()
         trucks = self.repo.get_all_trucks(active_only=True)
 
         # Track which trucks still exist
@@ -245,6 +254,37 @@ class TrucksInventoryPage(QWidget):
         self.truck_count_label.setText(
             f"{len(trucks)} active truck{'s' if len(trucks) != 1 else ''}"
         )
+        self._mark_loaded(seq)
+
+    def on_domain_events(self, events: list):
+        """Reload only the truck tabs touched by *events*."""
+        truck_ids, part_ids = set(), set()
+        for event in events:
+            if isinstance(event, (TruckInventoryChanged, TransfersChanged)):
+                truck_ids |= event.truck_ids
+            if isinstance(event, PartsChanged):
+                part_ids |= event.part_ids
+        if not (truck_ids or part_ids):
+            return
+        seq = self._begin_load()
+        # Parts not stocked on any truck are not shown here at all
+        shown = {
+            i.part_id for tab in self._truck_tabs.values() for i in tab._items
+        }
+        self._mark_patched("parts", part_ids - shown, seq)
+        if not self.isVisible():
+            return  # Hidden pages catch up via is_stale() when shown
+        for truck_id, tab in self._truck_tabs.items():
+            if truck_id in truck_ids or any(
+                i.part_id in part_ids for i in tab._items
+            ):
+                tab.refresh()
+                self._mark_patched(
+                    "truck_inventory", [i.id for i in tab._items], seq,
+                )
+                self._mark_patched(
+                    "parts", [i.part_id for i in tab._items], seq,
+                )
 
     def _on_truck_tab_changed(self, index: int):
         """Refresh the selected truck tab."""
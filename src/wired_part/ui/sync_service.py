@@ -0,0 +1,298 @@
+"""Background sync service — runs SyncManager off the GUI thread.
+
+``SyncWorker`` performs one sync on its own thread with its own
+``DatabaseConnection``, forwarding the manager's progress callbacks as
+Qt signals and honouring cancellation between files and batches.
+
+``SyncService`` schedules workers: every ``SYNC_INTERVAL_MINUTES``, after
+the user has been idle for a while, or on demand.  When the sync folder
+is unreachable (a network share that is offline, another device holding
+the lock) retries back off exponentially instead of waiting for the
+next interval.  Syncs go through the wired-part-syncd server when
+``Config.SYNC_SERVER_URL`` is set, else through the sync folder.
+"""
+
+import time
+from datetime import datetime
+
+from PySide6.QtCore import (
+    QCoreApplication, QEvent, QObject, QThread, QTimer, Signal,
+)
+
+from wired_part.config import Config
+from wired_part.database.connection import DatabaseConnection
+from wired_part.sync.sync_manager import (
+    SyncCancelled,
+    SyncLockError,
+    SyncManager,
+    SyncProgress,
+)
+from wired_part.sync.transport import SyncServerError
+from wired_part.utils.constants import (
+    SYNC_IDLE_MIN_GAP,
+    SYNC_IDLE_SECONDS,
+    SYNC_RETRY_INITIAL,
+    SYNC_RETRY_MAX,
+)
+
+# SyncManager entry point for each worker mode
+_MODES = {
+    "full": "sync",
+    "delta": "sync_delta",
+    "segments": "sync_segments",
+    "server": "sync_server",
+}
+
+# Events that count as user activity for idle detection
+_INPUT_EVENTS = frozenset({
+    QEvent.Type.KeyPress,
+    QEvent.Type.MouseButtonPress,
+    QEvent.Type.MouseMove,
+    QEvent.Type.Wheel,
+})
+
+
+class SyncWorker(QThread):
+    """Runs a single sync in a thread."""
+
+    progress = Signal(int, int, str)  # files done, files total, device_id
+    table_progress = Signal(str, str, int)  # device_id, table, rows merged
+    completed = Signal(dict)  # merge summary
+    failed = Signal(str)  # error_text
+    unavailable = Signal(str)  # error_text; folder or lock unavailable
+    cancelled = Signal()
+
+    # Minimum seconds between table_progress signals; a merge reports
+    # every batch of every table, far more often than a label repaints
+    TABLE_PROGRESS_INTERVAL = 0.1
+
+    def __init__(self, db_path, mode: str = "full"):
+        super().__init__()
+        if mode not in _MODES:
+            raise ValueError(f"Unknown sync mode: {mode}")
+        self.db_path = db_path
+        self.mode = mode
+        self._last_table_emit = 0.0
+
+    def _on_progress(self, event: SyncProgress):
+        if event.table:
+            now = time.monotonic()
+            if now - self._last_table_emit >= self.TABLE_PROGRESS_INTERVAL:
+                self._last_table_emit = now
+                self.table_progress.emit(
+                    event.device_id, event.table, event.rows,
+                )
+        else:
+            self.progress.emit(event.done, event.total, event.device_id)
+
+    def run(self):
+        try:
+            mgr = SyncManager(DatabaseConnection(self.db_path))
+            if self.mode != "server" and not mgr.is_configured:
+                self.unavailable.emit("Sync folder is not available.")
+                return
+            mgr.progress_callback = self._on_progress
+            mgr.cancel_requested = self.isInterruptionRequested
+            summary = getattr(mgr, _MODES[self.mode])()
+            self.completed.emit(summary)
+        except SyncCancelled:
+            self.cancelled.emit()
+        except (SyncLockError, OSError) as e:
+            self.unavailable.emit(str(e))
+        except SyncServerError as e:
+            # A conflicting push or a server that is down clears up on
+            # its own; anything else (e.g. a bad token) needs the user
+            if e.status == 409 or e.status >= 500:
+                self.unavailable.emit(str(e))
+            else:
+                self.failed.emit(str(e))
+        except Exception as e:
+            self.failed.emit(str(e))
+
+
+class SyncService(QObject):
+    """Schedules background syncs and reports their status."""
+
+    status_changed = Signal(str)  # status bar text
+    progress = Signal(int, int, str)  # files done, files total, device_id
+    table_progress = Signal(str, str, int)  # device_id, table, rows merged
+    sync_finished = Signal(dict)  # merge summary
+    sync_failed = Signal(str)  # error_text
+    stopped = Signal()  # a sync cancelled by stop() has finished
+
+    IDLE_CHECK_MS = 30_000
+
+    def __init__(self, db_path, parent=None, mode: str | None = None):
+        super().__init__(parent)
+        self.db_path = db_path
+        self.mode = mode
+        self._worker: SyncWorker | None = None
+        self._enabled = False
+        self._last_input = time.monotonic()
+        self._last_run = 0.0
+        self._retry_secs = 0
+        self._status = "Sync: off"
+
+        self._interval_timer = QTimer(self)
+        self._interval_timer.timeout.connect(self._on_interval)
+        self._idle_timer = QTimer(self)
+        self._idle_timer.timeout.connect(self._check_idle)
+        self._retry_timer = QTimer(self)
+        self._retry_timer.setSingleShot(True)
+        self._retry_timer.timeout.connect(self.sync_now)
+
+    @staticmethod
+    def _interval_ms() -> int:
+        """Sync interval in milliseconds from Config (minutes -> ms)."""
+        return max(Config.SYNC_INTERVAL_MINUTES, 1) * 60 * 1000
+
+    def start(self):
+        """Start the interval and idle schedules."""
+        self._enabled = True
+        self._interval_timer.start(self._interval_ms())
+        self._idle_timer.start(self.IDLE_CHECK_MS)
+        app = QCoreApplication.instance()
+        if app is not None:
+            app.installEventFilter(self)
+        self._set_status("Sync: waiting")
+
+    def stop(self, timeout_ms: int = 1_000) -> bool:
+        """Stop scheduling and cancel any running sync.
+
+        Waits up to *timeout_ms* for the sync to reach a checkpoint.
+        Returns False if it is still running; ``stopped`` is emitted once
+        it finishes, and until then the service (and its parent) must
+        stay alive, or the thread would be destroyed while running.
+        """
+        self._enabled = False
+        self._interval_timer.stop()
+        self._idle_timer.stop()
+        self._retry_timer.stop()
+        app = QCoreApplication.instance()
+        if app is not None:
+            app.removeEventFilter(self)
+        worker = self._worker
+        if worker is None:
+            return True
+        worker.requestInterruption()
+        self._set_status("Sync: cancelling…")
+        return worker.wait(timeout_ms)
+
+    def sync_now(self) -> bool:
+        """Start a sync unless one is running.  Returns True if started."""
+        if self._worker is not None:
+            return False
+        if not Config.SYNC_ENABLED:
+            self._set_status("Sync: off")
+            return False
+        self._retry_timer.stop()
+        self._last_run = time.monotonic()
+        mode = self.mode or ("server" if Config.SYNC_SERVER_URL else "full")
+        worker = SyncWorker(self.db_path, mode)
+        worker.progress.connect(self.progress)
+        worker.progress.connect(self._on_progress)
+        worker.table_progress.connect(self.table_progress)
+        worker.table_progress.connect(self._on_table_progress)
+        worker.completed.connect(self._on_completed)
+        worker.failed.connect(self._on_failed)
+        worker.unavailable.connect(self._on_unavailable)
+        worker.cancelled.connect(self._on_cancelled)
+        worker.finished.connect(self._on_worker_done)
+        self._worker = worker
+        self._set_status("Sync: starting…")
+        worker.start()
+        return True
+
+    def cancel(self):
+        """Ask the running sync to stop at its next checkpoint."""
+        if self._worker is not None:
+            self._worker.requestInterruption()
+            self._set_status("Sync: cancelling…")
+
+    @property
+    def is_running(self) -> bool:
+        return self._worker is not None
+
+    @property
+    def enabled(self) -> bool:
+        return self._enabled
+
+    @property
+    def status(self) -> str:
+        return self._status
+
+    @property
+    def retry_seconds(self) -> int:
+        """Delay before the pending retry, or 0 when none is pending."""
+        return self._retry_secs if self._retry_timer.isActive() else 0
+
+    def eventFilter(self, obj, event):
+        if event.type() in _INPUT_EVENTS:
+            self._last_input = time.monotonic()
+        return False
+
+    def _set_status(self, text: str):
+        if text != self._status:
+            self._status = text
+            self.status_changed.emit(text)
+
+    def _on_interval(self):
+        # Pick up interval changes made in Settings
+        self._interval_timer.setInterval(self._interval_ms())
+        if not self._retry_timer.isActive():
+            self.sync_now()
+
+    def _check_idle(self):
+        """Sync once the user has been idle, at most every few minutes."""
+        if self._worker is not None or self._retry_timer.isActive():
+            return
+        now = time.monotonic()
+        if (now - self._last_input >= SYNC_IDLE_SECONDS
+                and now - self._last_run >= SYNC_IDLE_MIN_GAP * 60):
+            self.sync_now()
+
+    def _on_progress(self, done: int, total: int, device_id: str):
+        if total:
+            self._set_status(f"Sync: {done}/{total} files")
+
+    def _on_table_progress(self, device_id: str, table: str, rows: int):
+        self._set_status(f"Sync: merging {table} ({rows:,} rows)")
+
+    def _on_completed(self, summary: dict):
+        self._retry_secs = 0
+        merged = sum(v for v in summary.values() if isinstance(v, int))
+        stamp = datetime.now().strftime("%H:%M")
+        if merged:
+            self._set_status(f"Sync: merged {merged:,} rows at {stamp}")
+        else:
+            self._set_status(f"Sync: up to date ({stamp})")
+        self.sync_finished.emit(summary)
+
+    def _on_failed(self, error: str):
+        self._set_status(f"Sync failed: {error}")
+        self.sync_failed.emit(error)
+
+    def _on_unavailable(self, error: str):
+        """Retry with exponential backoff while the folder is unreachable."""
+        if not self._enabled:
+            self._on_failed(error)
+            return
+        self._retry_secs = (
+            min(self._retry_secs * 2, SYNC_RETRY_MAX)
+            if self._retry_secs else SYNC_RETRY_INITIAL
+        )
+        self._retry_timer.start(self._retry_secs * 1000)
+        self._set_status(
+            f"Sync: folder unavailable — retrying in {self._retry_secs}s"
+        )
+        self.sync_failed.emit(error)
+
+    def _on_cancelled(self):
+        self._set_status("Sync: cancelled")
+
+    def _on_worker_done(self):
+        worker, self._worker = self._worker, None
+        if worker is not None:
+            worker.deleteLater()
+        if not self._enabled:
+            self.stopped.emit()
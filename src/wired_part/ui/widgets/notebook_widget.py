@@ -40,6 +40,7 @@ class NotebookWidget(QWidget):
         self.user_id = user_id
         self._current_section_id = None
         self._current_page_id = None
+        self._pages_by_section: dict[int, list[NotebookPage]] = {}
         self._setup_ui()
         self._load_notebook()
 
@@ -191,9 +192,20 @@ class NotebookWidget(QWidget):
 
     def _load_notebook(self):
         """Load or create the notebook for this job."""
-        self.notebook = self.repo.get_or_create_notebook(self.job_id)
+        self.repo.get_or_create_notebook(self.job_id)
         self._load_sections()
 
+    def _load_tree(self):
+        """Fetch the section/page hierarchy (without page bodies).
+
+        Page content is loaded on demand when a page is selected.
+        """
+        self.notebook = self.repo.get_notebook_tree(self.job_id)
+        self._sections = self.notebook.sections
+        self._pages_by_section = {
+            section.id: section.pages for section in self._sections
+        }
+
     def switch_job(self, job_id: int):
         """Switch to a different job's notebook.
 
@@ -220,7 +232,7 @@ class NotebookWidget(QWidget):
         """Load sections into the sections list."""
         self.sections_list.blockSignals(True)
         self.sections_list.clear()
-        self._sections = self.repo.get_sections(self.notebook.id)
+        self._load_tree()
         for section in self._sections:
             label = section.name
             if self._is_locked_section(section.name):
@@ -246,14 +258,22 @@ class NotebookWidget(QWidget):
         self._current_section_id = current.data(Qt.UserRole)
         self._load_pages()
 
-    def _load_pages(self):
-        """Load pages for the current section."""
+    def _load_pages(self, reload: bool = False):
+        """Load pages for the current section.
+
+        Uses the cached notebook tree unless *reload* is set, in which
+        case the tree is re-fetched first (after adding/deleting pages).
+        """
         if not self._current_section_id:
             return
 
+        if reload:
+            self._load_tree()
         self.pages_list.blockSignals(True)
         self.pages_list.clear()
-        self._pages = self.repo.get_pages(self._current_section_id)
+        self._pages = self._pages_by_section.get(
+            self._current_section_id, []
+        )
         for page in self._pages:
             item = QListWidgetItem(page.title or "Untitled")
             item.setData(Qt.UserRole, page.id)
@@ -339,10 +359,13 @@ class NotebookWidget(QWidget):
 
         QTimer.singleShot(3000, _reset_status)
 
-        # Update the page title in the list
+        # Update the page title in the list and the cached tree
         current_item = self.pages_list.currentItem()
         if current_item:
             current_item.setText(page.title)
+        for cached in self._pages_by_section.get(page.section_id, []):
+            if cached.id == page.id:
+                cached.title = page.title
 
     # ── Attachment helpers ──────────────────────────────────────
 
@@ -526,7 +549,7 @@ class NotebookWidget(QWidget):
                 created_by=self.user_id,
             )
             pid = self.repo.create_page(page)
-            self._load_pages()
+            self._load_pages(reload=True)
             # Select the new page (last one)
             self.pages_list.setCurrentRow(self.pages_list.count() - 1)
 
@@ -546,4 +569,4 @@ class NotebookWidget(QWidget):
         if reply == QMessageBox.Yes:
             self._current_page_id = None
             self.repo.delete_page(page_id)
-            self._load_pages()
+            self._load_pages(reload=True)
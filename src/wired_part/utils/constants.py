@@ -352,6 +352,57 @@ AUDIT_AGENT_INTERVAL_DEFAULT = 30
 ADMIN_AGENT_INTERVAL_DEFAULT = 60
 REMINDER_AGENT_INTERVAL_DEFAULT = 15
 
+# How often the main window re-verifies stats_counters (minutes)
+STATS_COUNTER_CHECK_INTERVAL = 60
+
+# Change journal retention: entries older than this many days, or beyond
+# the newest CHANGE_JOURNAL_MAX_ENTRIES, are dropped by compaction
+CHANGE_JOURNAL_RETENTION_DAYS = 30
+CHANGE_JOURNAL_MAX_ENTRIES = 200_000
+CHANGE_JOURNAL_COMPACT_INTERVAL = 60  # minutes
+
+# Low-stock transition feed retention: notified events older than this
+# many days, or beyond the newest LOW_STOCK_EVENT_MAX_ENTRIES, are pruned
+# on the change journal compaction schedule
+LOW_STOCK_EVENT_RETENTION_DAYS = 90
+LOW_STOCK_EVENT_MAX_ENTRIES = 50_000
+
+# Notification retention.  Notifications older than NOTIFICATION_HOT_DAYS
+# leave the live table for monthly archive partitions, keyed by the month
+# they expire in, so expiry drops a whole partition at once.  Lifetime in
+# days comes from the source rule when one exists, else the severity rule.
+NOTIFICATION_HOT_DAYS = 30
+NOTIFICATION_RETENTION_DAYS = {"info": 90, "warning": 180, "critical": 365}
+NOTIFICATION_SOURCE_RETENTION_DAYS = {"reminder_agent": 30}
+NOTIFICATION_MAINTENANCE_BATCH = 500
+NOTIFICATION_MAINTENANCE_INTERVAL = 15  # minutes
+# Past this age the notification cap may purge a broadcast even if an
+# active user never read it (e.g. never opened their inbox)
+NOTIFICATION_BROADCAST_CAP_DAYS = 7
+
+# Write-behind activity log: entries are inserted in batches of up to
+# ACTIVITY_LOG_BATCH_SIZE, at most ACTIVITY_LOG_FLUSH_INTERVAL seconds
+# after being logged; past ACTIVITY_LOG_QUEUE_SIZE buffered entries the
+# logging caller flushes synchronously
+ACTIVITY_LOG_BATCH_SIZE = 200
+ACTIVITY_LOG_FLUSH_INTERVAL = 2.0  # seconds
+ACTIVITY_LOG_QUEUE_SIZE = 10_000
+
+# Activity log archival: entries older than ACTIVITY_ARCHIVE_DAYS move to
+# compressed monthly segment files, ACTIVITY_ARCHIVE_BATCH rows per pass
+ACTIVITY_ARCHIVE_DAYS = 90
+ACTIVITY_ARCHIVE_BATCH = 5000
+ACTIVITY_ARCHIVE_INTERVAL = 60  # minutes
+
+# Background sync: besides every SYNC_INTERVAL_MINUTES, a sync runs after
+# SYNC_IDLE_SECONDS without user input (at most every SYNC_IDLE_MIN_GAP
+# minutes).  While the sync folder is unavailable, retries back off from
+# SYNC_RETRY_INITIAL up to SYNC_RETRY_MAX seconds.
+SYNC_IDLE_SECONDS = 120
+SYNC_IDLE_MIN_GAP = 10  # minutes
+SYNC_RETRY_INITIAL = 30  # seconds
+SYNC_RETRY_MAX = 900  # seconds
+
 # ── Parts Catalog types ──────────────────────────────────────────
 PART_TYPES = ["general", "specific"]
 
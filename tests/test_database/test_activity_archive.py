@@ -0,0 +1,142 @@
+"""Tests for activity log archival into compressed segments (v27)."""
+
+import zlib
+from datetime import datetime, timedelta
+
+from wired_part.database.activity_archive import archive_dir
+from wired_part.database.models import User
+from wired_part.database.schema import initialize_database
+
+
+def _log(repo, db, days_ago, entity_type="job", entity_id=1, user_id=None,
+         label=""):
+    entry_id = repo.log_activity(
+        user_id, "updated", entity_type, entity_id, label, sync=True,
+    )
+    stamp = datetime.now() - timedelta(days=days_ago)
+    with db.get_connection() as conn:
+        conn.execute(
+            "UPDATE activity_log SET created_at = ? WHERE id = ?",
+            (stamp.strftime("%Y-%m-%d %H:%M:%S"), entry_id),
+        )
+    return entry_id
+
+
+def _live_count(db):
+    return db.execute("SELECT COUNT(*) AS c FROM activity_log")[0]["c"]
+
+
+class TestArchival:
+    """Old entries move into compressed, indexed segment files."""
+
+    def test_moves_old_entries(self, repo, db):
+        old = [_log(repo, db, 200 + i) for i in range(3)]
+        recent = _log(repo, db, 1)
+        result = repo.archive_activity_log(older_than_days=90)
+        assert result["archived"] == 3
+        assert _live_count(db) == 1
+        segments = repo.get_activity_archive_segments()
+        assert sum(s["entry_count"] for s in segments) == 3
+        for seg in segments:
+            raw = (archive_dir(db) / seg["file_name"]).read_bytes()
+            assert zlib.decompress(raw).startswith(b"{")
+        ids = {e.id for e in repo.get_activity_log(limit=10)}
+        assert ids == set(old) | {recent}
+
+    def test_one_segment_per_month(self, repo, db):
+        _log(repo, db, 200)
+        _log(repo, db, 260)
+        result = repo.archive_activity_log(older_than_days=90)
+        months = {s["month"] for s in repo.get_activity_archive_segments()}
+        assert len(result["segments"]) == len(months) == 2
+
+    def test_batches_are_bounded(self, repo, db):
+        for _ in range(5):
+            _log(repo, db, 200)
+        assert repo.archive_activity_log(90, batch_size=2)["archived"] == 2
+        assert _live_count(db) == 3
+
+    def test_deletes_are_not_journaled(self, repo, db):
+        _log(repo, db, 200)
+        seq = repo.get_change_journal_seq()
+        repo.archive_activity_log(older_than_days=90)
+        assert repo.changes_since(seq, tables=["activity_log"]) == []
+
+    def test_nothing_to_archive(self, repo, db):
+        _log(repo, db, 1)
+        assert repo.archive_activity_log(90) == {
+            "archived": 0, "segments": [],
+        }
+
+
+class TestUnifiedQuery:
+    """get_activity_log reads live rows and segments together."""
+
+    def test_entity_activity_spans_archive(self, repo, db):
+        archived = _log(repo, db, 300, entity_id=7, label="Old")
+        _log(repo, db, 300, entity_id=8)
+        live = _log(repo, db, 2, entity_id=7, label="New")
+        repo.archive_activity_log(older_than_days=90)
+        entries = repo.get_entity_activity("job", 7)
+        assert [e.id for e in entries] == [live, archived]
+        assert entries[1].entity_label == "Old"
+
+    def test_live_rows_alone_satisfy_limit(self, repo, db):
+        _log(repo, db, 300)
+        repo.archive_activity_log(older_than_days=90)
+        live = [_log(repo, db, 1) for _ in range(3)]
+        entries = repo.get_activity_log(limit=3)
+        assert {e.id for e in entries} == set(live)
+
+    def test_filters_apply_to_archive(self, repo, db):
+        uid = repo.create_user(User(
+            username="arch", display_name="Archivist", pin_hash="x",
+        ))
+        mine = _log(repo, db, 300, entity_type="part", user_id=uid)
+        _log(repo, db, 300, entity_type="part")
+        _log(repo, db, 300, entity_type="job", user_id=uid)
+        repo.archive_activity_log(older_than_days=90)
+        entries = repo.get_activity_log(entity_type="part", user_id=uid)
+        assert [e.id for e in entries] == [mine]
+        assert entries[0].user_name == "Archivist"
+        day = (datetime.now() - timedelta(days=300)).strftime("%Y-%m-%d")
+        assert len(repo.get_activity_log(date_from=day, date_to=day)) == 3
+        assert repo.get_activity_log(date_to="2000-01-01") == []
+
+
+class TestActivityArchiveMigration:
+    """Upgrading a v26 database creates the segment index."""
+
+    def test_migrates_from_v26(self, db):
+        with db.get_connection() as conn:
+            conn.execute("DROP TABLE activity_archive_segments")
+            conn.execute("DELETE FROM schema_version WHERE version > 26")
+            conn.execute(
+                "INSERT OR IGNORE INTO schema_version (version) VALUES (26)"
+            )
+        initialize_database(db)
+        rows = db.execute(
+            "SELECT name FROM sqlite_master "
+            "WHERE type='table' AND name='activity_archive_segments'"
+        )
+        assert len(rows) == 1
+
+    def test_v34_retires_archived_ids(self, repo, db):
+        archived = _log(repo, db, 200)
+        live = _log(repo, db, 1)
+        repo.archive_activity_log(older_than_days=90)
+        with db.get_connection() as conn:
+            conn.execute("DELETE FROM sync_retired_rows")
+            conn.execute("DELETE FROM schema_version WHERE version > 33")
+            conn.execute(
+                "INSERT OR IGNORE INTO schema_version (version) VALUES (33)"
+            )
+        initialize_database(db)
+        retired = {
+            r["row_id"] for r in db.execute(
+                "SELECT row_id FROM sync_retired_rows "
+                "WHERE table_name = 'activity_log'"
+            )
+        }
+        assert archived in retired
+        assert live not in retired
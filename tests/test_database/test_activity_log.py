@@ -138,3 +138,106 @@ class TestEntityActivity:
         entries = repo.get_entity_activity("job", 42)
         assert len(entries) == 2
         assert all(e.entity_id == 42 for e in entries)
+
+
+class TestWriteBehind:
+    """Batched activity logging on a background writer."""
+
+    @pytest.fixture
+    def writer(self, repo):
+        # A long interval keeps entries queued until something flushes
+        writer = repo.start_activity_writer(flush_interval=60)
+        yield writer
+        repo.stop_activity_writer()
+
+    def _stored(self, repo):
+        rows = repo.db.execute("SELECT COUNT(*) AS c FROM activity_log")
+        return rows[0]["c"]
+
+    def test_queued_entries_return_none(self, repo, user, writer):
+        assert repo.log_activity(user.id, "created", "job", 1) is None
+        assert writer.pending == 1
+        assert self._stored(repo) == 0
+
+    def test_reads_flush_first(self, repo, user, writer):
+        repo.log_activity(user.id, "created", "job", 1, "Queued")
+        entries = repo.get_activity_log()
+        assert [e.entity_label for e in entries] == ["Queued"]
+        assert writer.pending == 0
+
+    def test_sync_option_commits_immediately(self, repo, user, writer):
+        entry_id = repo.log_activity(user.id, "deleted", "job", 1, sync=True)
+        assert entry_id > 0
+        assert self._stored(repo) == 1
+
+    def test_full_batch_is_written_in_background(self, repo, user):
+        import time
+        writer = repo.start_activity_writer(batch_size=5, flush_interval=60)
+        try:
+            for i in range(5):
+                repo.log_activity(user.id, "created", "job", i)
+            deadline = time.monotonic() + 5
+            while self._stored(repo) < 5 and time.monotonic() < deadline:
+                time.sleep(0.01)
+            assert self._stored(repo) == 5
+            assert writer.pending == 0
+        finally:
+            repo.stop_activity_writer()
+
+    def test_stop_flushes_and_restores_direct_writes(self, repo, user,
+                                                     writer):
+        repo.log_activity(user.id, "created", "job", 1)
+        repo.stop_activity_writer()
+        assert self._stored(repo) == 1
+        assert repo.log_activity(user.id, "created", "job", 2) > 0
+
+    def test_overflow_flushes_in_caller(self, repo, user):
+        repo.start_activity_writer(flush_interval=60, max_queue=3)
+        try:
+            for i in range(4):
+                repo.log_activity(user.id, "created", "job", i)
+            assert self._stored(repo) == 4
+        finally:
+            repo.stop_activity_writer()
+
+    def test_writer_is_shared_per_database(self, repo, user, writer):
+        other = Repository(repo.db)
+        other.log_activity(user.id, "created", "job", 1)
+        assert writer.pending == 1
+        assert len(repo.get_activity_log()) == 1
+
+    def test_busy_database_keeps_batch_queued(self, repo, user, writer):
+        import sqlite3
+        from unittest.mock import patch
+
+        repo.log_activity(user.id, "created", "job", 1)
+        busy = sqlite3.OperationalError("database is locked")
+        with patch.object(writer, "RETRY_DELAYS", ()), \
+             patch.object(writer, "_insert", side_effect=busy):
+            with pytest.raises(sqlite3.OperationalError):
+                writer.flush()
+        assert writer.pending == 1
+        repo.log_activity(user.id, "created", "job", 2)
+        writer.flush()
+        assert self._stored(repo) == 2
+        assert writer.pending == 0
+
+    def test_flush_retries_while_busy(self, repo, user, writer):
+        import sqlite3
+        from unittest.mock import patch
+
+        repo.log_activity(user.id, "created", "job", 1)
+        real = writer._insert
+        attempts = []
+
+        def flaky(batch):
+            attempts.append(1)
+            if len(attempts) < 3:
+                raise sqlite3.OperationalError("database is locked")
+            real(batch)
+
+        with patch.object(writer, "RETRY_DELAYS", (0, 0, 0)), \
+             patch.object(writer, "_insert", side_effect=flaky):
+            writer.flush()
+        assert len(attempts) == 3
+        assert self._stored(repo) == 1
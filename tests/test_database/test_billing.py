@@ -2,10 +2,16 @@
 
 import pytest
 
+from datetime import date
+
 from wired_part.database.models import (
     BillingCycle,
     BillingPeriod,
     Job,
+    JobPart,
+    LaborEntry,
+    Part,
+    Truck,
     User,
 )
 from wired_part.database.repository import Repository
@@ -150,3 +156,157 @@ class TestBillingPeriods:
         assert "job" in data
         assert "categories" in data
         assert "subtotal" in data
+
+
+class TestJobCostLedger:
+    """Per-job, per-day cost rollup maintained by triggers."""
+
+    def _labor(self, repo, billing_data, day, hours):
+        return repo.create_labor_entry(LaborEntry(
+            user_id=billing_data["user_id"], job_id=billing_data["job_id"],
+            start_time=f"{day}T08:00:00", end_time=f"{day}T16:00:00",
+            hours=hours,
+        ))
+
+    def test_material_changes_update_ledger(self, repo, billing_data):
+        jid = billing_data["job_id"]
+        pid = repo.create_part(Part(
+            part_number="LEDGER-1", quantity=50, unit_cost=4.0,
+        ))
+        repo.assign_part_to_job(JobPart(job_id=jid, part_id=pid,
+                                        quantity_used=3))
+        repo.assign_part_to_job(JobPart(job_id=jid, part_id=pid,
+                                        quantity_used=2))
+        assert repo.get_job_total_cost(jid) == 20.0
+        totals = repo.get_job_cost_totals(jid)
+        assert totals["material_quantity"] == 5
+
+        jp = repo.get_job_parts(jid)[0]
+        repo.remove_part_from_job(jp.id)
+        assert repo.get_job_total_cost(jid) == 0.0
+
+    def test_labor_booked_by_day(self, repo, billing_data):
+        jid = billing_data["job_id"]
+        self._labor(repo, billing_data, "2025-01-10", 8.0)
+        self._labor(repo, billing_data, "2025-02-03", 2.5)
+
+        january = repo.get_job_cost_totals(jid, "2025-01-01", "2025-01-31")
+        assert january["labor_hours"] == 8.0
+        assert january["labor_entries"] == 1
+        assert repo.get_job_cost_totals(jid)["labor_hours"] == 10.5
+        days = [r["day"] for r in repo.get_job_cost_ledger(jid)]
+        assert days == ["2025-01-10", "2025-02-03"]
+
+    def test_labor_edit_moves_hours(self, repo, billing_data):
+        jid = billing_data["job_id"]
+        eid = self._labor(repo, billing_data, "2025-01-10", 8.0)
+        entry = repo.get_labor_entry_by_id(eid)
+        entry.start_time = "2025-02-10T08:00:00"
+        entry.hours = 6.0
+        repo.update_labor_entry(entry)
+
+        assert repo.get_job_cost_totals(
+            jid, "2025-01-01", "2025-01-31"
+        )["labor_hours"] == 0.0
+        assert repo.get_job_cost_totals(
+            jid, "2025-02-01", "2025-02-28"
+        )["labor_hours"] == 6.0
+
+    def test_close_period_uses_period_totals(self, repo, billing_data):
+        jid = billing_data["job_id"]
+        self._labor(repo, billing_data, "2025-01-10", 8.0)
+        self._labor(repo, billing_data, "2025-02-03", 2.5)
+        cycle = repo.get_or_create_billing_cycle(job_id=jid)
+        period_id = repo.create_billing_period(
+            cycle.id, "2025-01-01", "2025-01-31"
+        )
+        repo.close_billing_period(period_id)
+        period = repo.get_billing_periods(cycle.id)[0]
+        assert period.total_hours == 8.0
+
+    def test_rebuild_matches_triggers(self, repo, billing_data):
+        jid = billing_data["job_id"]
+        self._labor(repo, billing_data, "2025-01-10", 8.0)
+        pid = repo.create_part(Part(
+            part_number="LEDGER-2", quantity=10, unit_cost=1.5,
+        ))
+        repo.assign_part_to_job(JobPart(job_id=jid, part_id=pid,
+                                        quantity_used=4))
+        before = repo.get_job_cost_totals(jid)
+        repo.rebuild_job_cost_ledger(jid)
+        assert repo.get_job_cost_totals(jid) == before
+        today = date.today().isoformat()
+        assert repo.get_job_cost_totals(jid, today, today)[
+            "material_cost"
+        ] == 6.0
+
+    def test_material_booked_on_assigned_day(self, repo, billing_data):
+        jid = billing_data["job_id"]
+        pid = repo.create_part(Part(
+            part_number="LEDGER-3", quantity=10, unit_cost=2.0,
+        ))
+        # As a job_parts row arriving by sync, assigned long ago
+        repo.db.execute(
+            "INSERT INTO job_parts (job_id, part_id, quantity_used, "
+            "unit_cost_at_use, assigned_at) "
+            "VALUES (?, ?, 3, 2.0, '2025-01-05 12:00:00')",
+            (jid, pid),
+        )
+        ledger = [(r["day"], r["material_cost"])
+                  for r in repo.get_job_cost_ledger(jid)]
+        assert ledger == [("2025-01-05", 6.0)]
+        repo.rebuild_job_cost_ledger(jid)
+        assert [(r["day"], r["material_cost"])
+                for r in repo.get_job_cost_ledger(jid)] == ledger
+
+    def test_same_part_used_in_two_periods(self, repo, billing_data):
+        jid = billing_data["job_id"]
+        pid = repo.create_part(Part(
+            part_number="LEDGER-4", quantity=10, unit_cost=2.0,
+        ))
+        tid = repo.create_truck(Truck(truck_number="T-LEDGER"))
+        # First use in January 2025, as a synced truck consumption
+        repo.db.execute(
+            "INSERT INTO job_parts (job_id, part_id, quantity_used, "
+            "unit_cost_at_use, assigned_at) "
+            "VALUES (?, ?, 3, 2.0, '2025-01-05 12:00:00')",
+            (jid, pid),
+        )
+        repo.db.execute(
+            "INSERT INTO consumption_log (job_id, truck_id, part_id, "
+            "quantity, unit_cost_at_use, consumed_at) "
+            "VALUES (?, ?, ?, 3, 2.0, '2025-01-05 12:00:00')",
+            (jid, tid, pid),
+        )
+        # Second use today adds to the same running job_parts row
+        repo.db.execute(
+            "UPDATE job_parts SET quantity_used = quantity_used + 2 "
+            "WHERE job_id = ? AND part_id = ?", (jid, pid),
+        )
+        repo.db.execute(
+            "INSERT INTO consumption_log (job_id, truck_id, part_id, "
+            "quantity, unit_cost_at_use) VALUES (?, ?, ?, 2, 2.0)",
+            (jid, tid, pid),
+        )
+
+        today = date.today()
+        cycle = repo.get_or_create_billing_cycle(job_id=jid)
+        january = repo.create_billing_period(
+            cycle.id, "2025-01-01", "2025-01-31"
+        )
+        current = repo.create_billing_period(
+            cycle.id, today.replace(day=1).isoformat(), today.isoformat(),
+        )
+        repo.close_billing_period(january)
+        repo.close_billing_period(current)
+        totals = {
+            p.id: p.total_parts_cost
+            for p in repo.get_billing_periods(cycle.id)
+        }
+        assert totals == {january: 6.0, current: 4.0}
+
+        ledger = [(r["day"], r["material_cost"], r["material_quantity"])
+                  for r in repo.get_job_cost_ledger(jid)]
+        repo.rebuild_job_cost_ledger(jid)
+        assert [(r["day"], r["material_cost"], r["material_quantity"])
+                for r in repo.get_job_cost_ledger(jid)] == ledger
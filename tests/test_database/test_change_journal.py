@@ -0,0 +1,134 @@
+"""Tests for the trigger-fed change_journal (v25)."""
+
+from unittest.mock import patch
+
+import pytest
+
+from wired_part.config import Config
+from wired_part.database.connection import DatabaseConnection
+from wired_part.database.models import Category, Part
+from wired_part.database.repository import Repository
+from wired_part.database.schema import initialize_database
+from wired_part.sync.sync_manager import SYNC_TABLES, SyncManager
+
+
+@pytest.fixture
+def journal_repo(db):
+    return Repository(db, device_id="device-a")
+
+
+def _ops(changes):
+    return [(c["table_name"], c["row_id"], c["op"]) for c in changes]
+
+
+class TestJournalCapture:
+    """Writes to synced tables are journaled in order."""
+
+    def test_every_synced_table_has_triggers(self, db):
+        names = {
+            r["name"] for r in db.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'trigger' "
+                "AND name LIKE 'journal_%'"
+            )
+        }
+        for table in SYNC_TABLES:
+            for op in ("insert", "update", "delete"):
+                assert f"journal_{table}_{op}" in names
+
+    def test_insert_update_delete(self, journal_repo):
+        start = journal_repo.get_change_journal_seq()
+        pid = journal_repo.create_part(Part(part_number="CJ-1", quantity=1))
+        part = journal_repo.get_part_by_id(pid)
+        part.quantity = 2
+        journal_repo.update_part(part)
+        journal_repo.delete_part(pid)
+
+        changes = journal_repo.changes_since(start, tables=["parts"])
+        ops = [op for _, row_id, op in _ops(changes) if row_id == pid]
+        assert ops[0] == "insert"
+        assert "update" in ops
+        assert ops[-1] == "delete"
+        assert [c["seq"] for c in changes] == sorted(
+            c["seq"] for c in changes
+        )
+        assert {c["device_id"] for c in changes} == {"device-a"}
+
+    def test_filters_and_limit(self, journal_repo):
+        start = journal_repo.get_change_journal_seq()
+        journal_repo.create_part(Part(part_number="CJ-1"))
+        journal_repo.create_category(Category(name="CJ Cat"))
+        cats = journal_repo.changes_since(start, tables=["categories"])
+        assert {c["table_name"] for c in cats} == {"categories"}
+        assert len(journal_repo.changes_since(start, limit=1)) == 1
+
+    def test_local_tables_are_not_journaled(self, journal_repo):
+        start = journal_repo.get_change_journal_seq()
+        journal_repo.rebuild_low_stock_state()
+        assert journal_repo.changes_since(start) == []
+
+
+class TestJournalCompaction:
+    """Compaction keeps the newest entry per row and enforces retention."""
+
+    def test_superseded_entries_removed(self, journal_repo):
+        start = journal_repo.get_change_journal_seq()
+        pid = journal_repo.create_part(Part(part_number="CJ-1"))
+        part = journal_repo.get_part_by_id(pid)
+        for qty in (1, 2, 3):
+            part.quantity = qty
+            journal_repo.update_part(part)
+        result = journal_repo.compact_change_journal()
+        assert result["superseded"] > 0
+        assert result["expired"] == 0
+        changes = journal_repo.changes_since(start, tables=["parts"])
+        assert _ops(changes) == [("parts", pid, "update")]
+
+    def test_expiry_raises_floor(self, journal_repo):
+        journal_repo.create_part(Part(part_number="CJ-1"))
+        journal_repo.create_part(Part(part_number="CJ-2"))
+        last = journal_repo.get_change_journal_seq()
+        result = journal_repo.compact_change_journal(max_entries=1)
+        assert result["expired"] >= 1
+        assert journal_repo.get_change_journal_seq() == last
+        assert len(journal_repo.changes_since(last - 1)) == 1
+        with pytest.raises(ValueError):
+            journal_repo.changes_since(0)
+
+    def test_age_based_expiry(self, journal_repo, db):
+        journal_repo.create_part(Part(part_number="CJ-1"))
+        with db.get_connection() as conn:
+            conn.execute(
+                "UPDATE change_journal "
+                "SET created_at = DATETIME('now', '-90 days')"
+            )
+        result = journal_repo.compact_change_journal(retention_days=30)
+        assert result["expired"] > 0
+        assert journal_repo.changes_since(
+            journal_repo.get_change_journal_seq()
+        ) == []
+
+
+class TestJournalOrigin:
+    """Rows merged from a peer are attributed to that peer."""
+
+    def test_merge_records_remote_device(self, db, tmp_path):
+        db_b = DatabaseConnection(str(tmp_path / "b.db"))
+        initialize_database(db_b)
+        Repository(db_b).create_part(Part(part_number="CJ-REMOTE"))
+
+        with patch.object(Config, "get_device_id", return_value="device-b"):
+            export = SyncManager(db_b)._build_export()
+        with patch.object(Config, "get_device_id", return_value="device-a"):
+            mgr = SyncManager(db)
+        repo = Repository(db, device_id="device-a")
+        start = repo.get_change_journal_seq()
+        mgr._merge_import(export)
+
+        merged = repo.changes_since(start, tables=["parts"])
+        assert merged
+        assert {c["device_id"] for c in merged} == {"device-b"}
+
+        # Local writes after the merge are attributed locally again
+        repo.create_part(Part(part_number="CJ-LOCAL"))
+        latest = repo.changes_since(merged[-1]["seq"], tables=["parts"])
+        assert {c["device_id"] for c in latest} == {"device-a"}
@@ -0,0 +1,141 @@
+"""Tests for the domain event bus and repository publishing."""
+
+from wired_part.database.events import (
+    EventBus,
+    LaborChanged,
+    OrdersChanged,
+    PartsChanged,
+    TransfersChanged,
+    TruckInventoryChanged,
+    coalesce,
+)
+from wired_part.database.models import (
+    Job,
+    Part,
+    PurchaseOrder,
+    Supplier,
+    Truck,
+    TruckTransfer,
+    User,
+)
+
+
+def _record(repo):
+    seen = []
+    repo.events.subscribe(seen.append)
+    return seen
+
+
+class TestEventBus:
+    """Subscription, filtering and coalescing."""
+
+    def test_filtered_subscription(self):
+        bus = EventBus()
+        parts, everything = [], []
+        bus.subscribe(parts.append, (PartsChanged,))
+        unsubscribe = bus.subscribe(everything.append)
+        bus.publish(PartsChanged(frozenset({1})), OrdersChanged())
+        assert parts == [PartsChanged(frozenset({1}))]
+        assert len(everything) == 2
+
+        unsubscribe()
+        bus.publish(OrdersChanged())
+        assert len(everything) == 2
+
+    def test_failing_subscriber_is_isolated(self):
+        bus = EventBus()
+        seen = []
+        bus.subscribe(lambda e: 1 / 0)
+        bus.subscribe(seen.append)
+        bus.publish(PartsChanged())
+        assert seen == [PartsChanged()]
+
+    def test_coalesce_unions_ids_per_type(self):
+        merged = coalesce([
+            PartsChanged(frozenset({1})),
+            TruckInventoryChanged(frozenset({7}), frozenset({1})),
+            PartsChanged(frozenset({2})),
+        ])
+        assert merged == [
+            PartsChanged(frozenset({1, 2})),
+            TruckInventoryChanged(frozenset({7}), frozenset({1})),
+        ]
+
+
+class TestRepositoryPublishing:
+    """Write methods publish after their transaction commits."""
+
+    def test_part_events(self, repo):
+        seen = _record(repo)
+        pid = repo.create_part(Part(part_number="EV-1", quantity=3))
+        part = repo.get_part_by_id(pid)
+        part.quantity = 4
+        repo.update_part(part)
+        repo.delete_part(pid)
+        assert seen == [PartsChanged(frozenset({pid}))] * 3
+
+    def test_published_after_commit(self, repo):
+        observed = []
+        repo.events.subscribe(
+            lambda e: observed.append(
+                repo.get_part_by_id(next(iter(e.part_ids))).quantity
+            ),
+            (PartsChanged,),
+        )
+        repo.create_part(Part(part_number="EV-1", quantity=9))
+        assert observed == [9]
+
+    def test_transfer_lifecycle(self, repo):
+        uid = repo.create_user(User(
+            username="ev", display_name="EV", pin_hash="x",
+        ))
+        tid = repo.create_truck(Truck(truck_number="T-EV", name="EV"))
+        pid = repo.create_part(Part(part_number="EV-1", quantity=10))
+        seen = _record(repo)
+
+        xfer = repo.create_transfer(TruckTransfer(
+            truck_id=tid, part_id=pid, quantity=2, created_by=uid,
+        ))
+        repo.receive_transfer(xfer, uid)
+        assert seen == [
+            PartsChanged(frozenset({pid})),
+            TransfersChanged(frozenset({xfer}), frozenset({tid})),
+            TruckInventoryChanged(frozenset({tid}), frozenset({pid})),
+            TransfersChanged(frozenset({xfer}), frozenset({tid})),
+        ]
+
+        jid = repo.create_job(Job(job_number="JOB-EV", name="EV"))
+        seen.clear()
+        repo.consume_from_truck(jid, tid, pid, 1, user_id=uid)
+        assert TruckInventoryChanged(
+            frozenset({tid}), frozenset({pid}),
+        ) in seen
+
+    def test_order_and_labor_events(self, repo):
+        uid = repo.create_user(User(
+            username="ev", display_name="EV", pin_hash="x",
+        ))
+        sid = repo.create_supplier(Supplier(name="EV Supply"))
+        jid = repo.create_job(Job(job_number="JOB-EV", name="EV"))
+        seen = _record(repo)
+
+        oid = repo.create_purchase_order(PurchaseOrder(
+            order_number="PO-EV", supplier_id=sid, created_by=uid,
+        ))
+        entry_id = repo.clock_in(uid, jid)
+        assert seen[0] == OrdersChanged(frozenset({oid}))
+        assert seen[-1] == LaborChanged(
+            frozenset({entry_id}), frozenset({uid}), frozenset({jid}),
+        )
+
+    def test_failed_write_publishes_nothing(self, repo):
+        pid = repo.create_part(Part(part_number="EV-1", quantity=0))
+        tid = repo.create_truck(Truck(truck_number="T-EV", name="EV"))
+        seen = _record(repo)
+        try:
+            repo.create_transfer(TruckTransfer(
+                truck_id=tid, part_id=pid, quantity=5,
+            ))
+        except ValueError:
+            pass
+        assert seen == []
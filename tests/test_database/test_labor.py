@@ -205,3 +205,69 @@ class TestLaborSummary:
         summary = repo.get_labor_summary_for_job(labor_data["job_id"])
         assert summary["total_hours"] == 0
         assert summary["entry_count"] == 0
+
+
+class TestLaborRollup:
+    """Rollup of hours by job, user, category and day."""
+
+    def _entry(self, repo, labor_data, day, hours, category="General",
+               overtime=0):
+        return repo.create_labor_entry(LaborEntry(
+            user_id=labor_data["user_id"], job_id=labor_data["job_id"],
+            start_time=f"{day}T08:00:00", end_time=f"{day}T17:00:00",
+            hours=hours, sub_task_category=category, is_overtime=overtime,
+        ))
+
+    def test_group_by_combinations(self, repo, labor_data):
+        self._entry(repo, labor_data, "2024-03-01", 4.0, "Rough-in")
+        self._entry(repo, labor_data, "2024-03-02", 2.0, "Trim")
+        self._entry(repo, labor_data, "2025-01-05", 3.0, "Rough-in", 1)
+
+        by_cat = repo.get_labor_rollup(("category",))
+        assert [(r["category"], r["hours"]) for r in by_cat] == [
+            ("Rough-in", 7.0), ("Trim", 2.0),
+        ]
+        by_year = repo.get_labor_rollup(("year", "category"))
+        assert len(by_year) == 3
+        totals = repo.get_labor_rollup(date_from="2025-01-01")[0]
+        assert totals["hours"] == 3.0
+        assert totals["overtime_hours"] == 3.0
+        assert totals["overtime_entries"] == 1
+
+    def test_user_group_includes_name(self, repo, labor_data):
+        self._entry(repo, labor_data, "2024-03-01", 4.0)
+        row = repo.get_labor_rollup(("user_id", "job_id"))[0]
+        assert row["user_name"] == "Laborer One"
+        assert row["job_number"] == "JOB-LABOR-001"
+
+    def test_unknown_dimension_raises(self, repo):
+        with pytest.raises(ValueError, match="dimension"):
+            repo.get_labor_rollup(("weekday",))
+
+    def test_clock_out_moves_entry_out_of_open(self, repo, labor_data):
+        eid = repo.clock_in(labor_data["user_id"], labor_data["job_id"])
+        assert repo.get_labor_rollup(include_open=False)[0]["entries"] == 0
+        assert repo.get_labor_rollup()[0]["entries"] == 1
+        repo.clock_out(eid)
+        assert repo.get_labor_rollup(include_open=False)[0]["entries"] == 1
+
+    def test_update_and_delete(self, repo, labor_data):
+        eid = self._entry(repo, labor_data, "2024-03-01", 4.0, "Rough-in")
+        entry = repo.get_labor_entry_by_id(eid)
+        entry.sub_task_category = "Trim"
+        entry.hours = 5.0
+        repo.update_labor_entry(entry)
+        assert [r["category"] for r in repo.get_labor_rollup(
+            ("category",)
+        )] == ["Trim"]
+
+        repo.delete_labor_entry(eid)
+        assert repo.get_labor_rollup(("category",)) == []
+        assert repo.db.execute("SELECT COUNT(*) FROM labor_rollup")[0][0] == 0
+
+    def test_rebuild_matches_triggers(self, repo, labor_data):
+        self._entry(repo, labor_data, "2024-03-01", 4.0, "Rough-in", 1)
+        self._entry(repo, labor_data, "2024-03-01", 1.5, "Rough-in")
+        before = repo.get_labor_rollup(("day", "category"))
+        repo.rebuild_labor_rollup()
+        assert repo.get_labor_rollup(("day", "category")) == before
@@ -0,0 +1,163 @@
+"""Tests for the trigger-maintained low_stock_state table (v24)."""
+
+from wired_part.database.models import Part, Truck
+from wired_part.database.schema import initialize_database
+
+
+def _state(repo):
+    return {
+        (r["part_id"], r["truck_id"]): r["quantity"]
+        for r in repo.db.execute("SELECT * FROM low_stock_state")
+    }
+
+
+def _transitions(repo):
+    return [
+        (e["part_id"], e["truck_id"], e["transition"])
+        for e in repo.get_low_stock_events()
+    ]
+
+
+class TestWarehouseTransitions:
+    """Parts enter and leave the alert set on threshold crossings."""
+
+    def test_enter_change_exit(self, repo):
+        pid = repo.create_part(Part(
+            part_number="LS-1", quantity=5, min_quantity=10,
+        ))
+        assert _state(repo) == {(pid, 0): 5}
+
+        part = repo.get_part_by_id(pid)
+        part.quantity = 3
+        repo.update_part(part)
+        assert _state(repo) == {(pid, 0): 3}
+        assert _transitions(repo) == [(pid, 0, "enter")]
+
+        part.quantity = 12
+        repo.update_part(part)
+        assert _state(repo) == {}
+        assert _transitions(repo) == [(pid, 0, "enter"), (pid, 0, "exit")]
+
+    def test_min_quantity_change_enters(self, repo):
+        pid = repo.create_part(Part(part_number="LS-1", quantity=5))
+        assert _state(repo) == {}
+        part = repo.get_part_by_id(pid)
+        part.min_quantity = 8
+        repo.update_part(part)
+        assert [p.id for p in repo.get_low_stock_parts()] == [pid]
+
+    def test_events_are_paged_by_id(self, repo):
+        for i in range(3):
+            repo.create_part(Part(
+                part_number=f"LS-{i}", quantity=0, min_quantity=1,
+            ))
+        first = repo.get_low_stock_events(limit=2)
+        rest = repo.get_low_stock_events(after_id=first[-1]["id"])
+        assert len(first) == 2 and len(rest) == 1
+        assert repo.get_last_low_stock_event_id() == rest[0]["id"]
+
+
+class TestTruckTransitions:
+    """Truck inventory rows are tracked alongside the warehouse."""
+
+    def test_truck_alerts(self, repo):
+        pid = repo.create_part(Part(part_number="LS-1", quantity=50))
+        tid = repo.create_truck(Truck(truck_number="T-LS", name="LS"))
+        repo.add_to_truck_inventory(tid, pid, 1)
+        repo.set_truck_inventory_levels(tid, pid, min_quantity=4)
+        alerts = repo.get_low_stock_alerts()
+        assert [(a["location"], a["location_name"], a["deficit"])
+                for a in alerts] == [("truck", "T-LS", 3)]
+
+        repo.add_to_truck_inventory(tid, pid, 5)
+        assert repo.get_low_stock_alerts() == []
+
+
+class TestLowStockNotifications:
+    """One broadcast notification per crossing, not per consumption."""
+
+    def _titles(self, repo):
+        return [
+            r["title"] for r in repo.db.execute(
+                "SELECT title FROM notifications WHERE title LIKE 'Low%'"
+            )
+        ]
+
+    def test_single_notification_per_crossing(self, repo):
+        pid = repo.create_part(Part(
+            part_number="LS-1", quantity=2, min_quantity=10,
+        ))
+        assert repo.notify_low_stock_transitions() == 1
+        assert repo.notify_low_stock_transitions() == 0
+        assert self._titles(repo) == ["Low Stock: LS-1"]
+
+        # Leave and re-enter: a second crossing, a second notification
+        part = repo.get_part_by_id(pid)
+        part.quantity = 20
+        repo.update_part(part)
+        part.quantity = 1
+        repo.update_part(part)
+        assert repo.notify_low_stock_transitions() == 1
+
+    def test_recovered_parts_are_not_announced(self, repo):
+        pid = repo.create_part(Part(
+            part_number="LS-1", quantity=2, min_quantity=10,
+        ))
+        part = repo.get_part_by_id(pid)
+        part.quantity = 20
+        repo.update_part(part)
+        assert repo.notify_low_stock_transitions() == 0
+
+
+class TestLowStockEventRetention:
+    """Announced transitions are pruned by age or count."""
+
+    def _churn(self, repo, times):
+        pid = repo.create_part(Part(
+            part_number="LS-1", quantity=20, min_quantity=10,
+        ))
+        for _ in range(times):
+            part = repo.get_part_by_id(pid)
+            part.quantity = 2 if part.quantity >= 10 else 20
+            repo.update_part(part)
+
+    def test_keeps_newest_entries(self, repo):
+        self._churn(repo, 6)
+        repo.notify_low_stock_transitions()
+        assert repo.prune_low_stock_events(max_entries=2) == 4
+        assert len(_transitions(repo)) == 2
+
+    def test_expires_by_age(self, repo, db):
+        self._churn(repo, 2)
+        repo.notify_low_stock_transitions()
+        with db.get_connection() as conn:
+            conn.execute(
+                "UPDATE low_stock_events "
+                "SET created_at = DATETIME('now', '-100 days')"
+            )
+        assert repo.prune_low_stock_events(retention_days=90) == 2
+        assert repo.prune_low_stock_events(retention_days=90) == 0
+
+    def test_keeps_unannounced_events(self, repo):
+        self._churn(repo, 3)
+        assert repo.prune_low_stock_events(max_entries=0) == 0
+        assert repo.notify_low_stock_transitions() == 1
+
+
+class TestLowStockMigration:
+    """Upgrading a v23 database backfills the alert set."""
+
+    def test_migrates_from_v23(self, repo, db):
+        pid = repo.create_part(Part(
+            part_number="LS-1", quantity=1, min_quantity=5,
+        ))
+        with db.get_connection() as conn:
+            conn.execute("DROP TABLE low_stock_state")
+            conn.execute("DROP TABLE low_stock_events")
+            conn.execute("DELETE FROM schema_version WHERE version > 23")
+            conn.execute(
+                "INSERT OR IGNORE INTO schema_version (version) VALUES (23)"
+            )
+        initialize_database(db)
+        assert _state(repo) == {(pid, 0): 1}
+        assert repo.get_low_stock_events() == []
@@ -282,3 +282,62 @@ class TestNotebookSearch:
 
         repo.delete_job(notebook_data["job_id"])
         assert repo.get_notebook_for_job(notebook_data["job_id"]) is None
+
+
+class TestNotebookTree:
+    """Test single-query notebook tree loading."""
+
+    def test_tree_none_without_notebook(self, repo, notebook_data):
+        assert repo.get_notebook_tree(notebook_data["job_id"]) is None
+
+    def test_tree_matches_sections_and_pages(self, repo, notebook_data):
+        nb = repo.get_or_create_notebook(notebook_data["job_id"])
+        sections = repo.get_sections(nb.id)
+        repo.create_page(NotebookPage(
+            section_id=sections[0].id, title="First",
+            content="<p>Body</p>", created_by=notebook_data["user_id"],
+        ))
+        repo.create_page(NotebookPage(
+            section_id=sections[2].id, title="Other",
+        ))
+
+        tree = repo.get_notebook_tree(notebook_data["job_id"])
+        assert tree.id == nb.id
+        assert tree.job_number == "JOB-NOTE-001"
+        assert [s.id for s in tree.sections] == [s.id for s in sections]
+        for section in tree.sections:
+            assert (
+                [p.id for p in section.pages]
+                == [p.id for p in repo.get_pages(section.id)]
+            )
+        page = tree.sections[0].pages[0]
+        assert page.title == "First"
+        assert page.section_name == sections[0].name
+        assert page.created_by_name == "Note User"
+
+    def test_tree_content_is_lazy_by_default(self, repo, notebook_data):
+        nb = repo.get_or_create_notebook(notebook_data["job_id"])
+        sid = repo.get_sections(nb.id)[0].id
+        pid = repo.create_page(NotebookPage(
+            section_id=sid, title="Lazy", content="<p>Heavy body</p>",
+        ))
+
+        lazy = repo.get_notebook_tree(notebook_data["job_id"])
+        assert lazy.sections[0].pages[0].content == ""
+        assert repo.get_page_by_id(pid).content == "<p>Heavy body</p>"
+
+        full = repo.get_notebook_tree(
+            notebook_data["job_id"], include_content=True,
+        )
+        assert full.sections[0].pages[0].content == "<p>Heavy body</p>"
+
+    def test_work_report_notes_from_tree(self, repo, notebook_data):
+        nb = repo.get_or_create_notebook(notebook_data["job_id"])
+        sid = repo.get_sections(nb.id)[0].id
+        repo.create_page(NotebookPage(
+            section_id=sid, title="Report Note", content="Pulled wire",
+        ))
+        report = repo.get_work_report_data(notebook_data["job_id"])
+        assert len(report["notes"]) == 1
+        assert report["notes"][0]["title"] == "Report Note"
+        assert report["notes"][0]["content"] == "Pulled wire"
@@ -0,0 +1,167 @@
+"""Tests for per-user notification read cursors and receipts (v26)."""
+
+from wired_part.database.models import Notification, User
+from wired_part.database.schema import initialize_database
+
+
+def _user(repo, name):
+    return repo.create_user(User(
+        username=name, display_name=name.title(), pin_hash="x",
+    ))
+
+
+def _broadcast(repo, title="Broadcast"):
+    return repo.create_notification(Notification(
+        user_id=None, title=title, message="all", severity="info",
+    ))
+
+
+def _personal(repo, uid, title="Personal"):
+    return repo.create_notification(Notification(
+        user_id=uid, title=title, message="one", severity="info",
+    ))
+
+
+class TestBroadcastReadState:
+    """Reading a broadcast only affects the reader."""
+
+    def test_receipt_is_per_user(self, repo):
+        alice, bob = _user(repo, "alice"), _user(repo, "bob")
+        nid = _broadcast(repo)
+        repo.mark_notification_read(nid, alice)
+        assert repo.get_unread_count(alice) == 0
+        assert repo.get_unread_count(bob) == 1
+        [seen] = repo.get_user_notifications(alice)
+        assert seen.is_read == 1
+        [unseen] = repo.get_user_notifications(bob, unread_only=True)
+        assert unseen.id == nid
+
+    def test_mark_all_read_is_per_user(self, repo):
+        alice, bob = _user(repo, "alice"), _user(repo, "bob")
+        for i in range(3):
+            _broadcast(repo, f"B{i}")
+        _personal(repo, alice)
+        repo.mark_all_notifications_read(alice)
+        assert repo.get_unread_count(alice) == 0
+        assert repo.get_unread_count(bob) == 3
+        # Newer notifications are unread again
+        _broadcast(repo, "Later")
+        assert repo.get_unread_count(alice) == 1
+
+    def test_mark_all_read_only_moves_cursor(self, repo, db):
+        alice = _user(repo, "alice")
+        nids = [_broadcast(repo, f"B{i}") for i in range(3)]
+        personal = _personal(repo, alice)
+        repo.mark_notification_read(nids[0], alice)
+        repo.mark_all_notifications_read(alice)
+        assert repo.get_notification_cursor(alice) == personal
+        # Personal flags untouched, redundant receipts pruned
+        row = db.execute(
+            "SELECT is_read FROM notifications WHERE id = ?", (personal,),
+        )[0]
+        assert row["is_read"] == 0
+        assert db.execute("SELECT * FROM notification_receipts") == []
+
+
+class TestInboxQueries:
+    """Inbox listing merges personal rows and broadcasts."""
+
+    def test_excludes_other_users(self, repo):
+        alice, bob = _user(repo, "alice"), _user(repo, "bob")
+        _personal(repo, bob, "For Bob")
+        mine = _personal(repo, alice, "For Alice")
+        shared = _broadcast(repo)
+        ids = [n.id for n in repo.get_user_notifications(alice)]
+        assert ids == [shared, mine]
+
+    def test_keyset_pagination(self, repo):
+        alice = _user(repo, "alice")
+        created = []
+        for i in range(7):
+            created.append(_broadcast(repo, f"B{i}"))
+            created.append(_personal(repo, alice, f"P{i}"))
+        pages, before = [], None
+        while True:
+            page = repo.get_user_notifications(
+                alice, limit=4, before_id=before,
+            )
+            if not page:
+                break
+            pages.extend(n.id for n in page)
+            before = page[-1].id
+        assert pages == sorted(created, reverse=True)
+
+    def test_filtered_read_status(self, repo):
+        alice = _user(repo, "alice")
+        read_b = _broadcast(repo, "Read B")
+        _broadcast(repo, "Unread B")
+        read_p = _personal(repo, alice, "Read P")
+        repo.mark_notification_read(read_b, alice)
+        repo.mark_notification_read(read_p, alice)
+        read = repo.get_user_notifications_filtered(alice, is_read=1)
+        unread = repo.get_user_notifications_filtered(alice, is_read=0)
+        assert {n.title for n in read} == {"Read B", "Read P"}
+        assert {n.title for n in unread} == {"Unread B"}
+
+    def test_unread_count_uses_index(self, repo, db):
+        plan = db.execute(
+            "EXPLAIN QUERY PLAN SELECT COUNT(*) FROM notifications "
+            "WHERE user_id = ? AND is_read = 0 AND id > ?", (1, 0),
+        )
+        assert any("idx_notifications_unread" in r["detail"] for r in plan)
+
+
+class TestNotificationCap:
+    """Broadcasts are only purged once every active user read them."""
+
+    def test_unread_broadcasts_survive(self, repo, monkeypatch):
+        alice = _user(repo, "alice")
+        _user(repo, "bob")
+        for i in range(4):
+            _broadcast(repo, f"B{i}")
+        monkeypatch.setattr(type(repo), "MAX_NOTIFICATIONS", 2)
+        repo.mark_all_notifications_read(alice)
+        assert repo.enforce_notification_cap() == 0
+        active = repo.db.execute("SELECT id FROM users WHERE is_active = 1")
+        for row in active:
+            repo.mark_all_notifications_read(row["id"])
+        assert repo.enforce_notification_cap() == 2
+
+    def test_old_broadcasts_purge_without_every_reader(
+        self, repo, monkeypatch,
+    ):
+        _user(repo, "alice")  # Never opens the inbox
+        ids = [_broadcast(repo, f"B{i}") for i in range(4)]
+        with repo.db.get_connection() as conn:
+            conn.execute(
+                "UPDATE notifications SET created_at = "
+                "datetime('now', '-8 days') WHERE id IN (?, ?)",
+                (ids[0], ids[1]),
+            )
+        monkeypatch.setattr(type(repo), "MAX_NOTIFICATIONS", 1)
+        assert repo.enforce_notification_cap() == 2
+        left = {r["id"] for r in repo.db.execute("SELECT id FROM notifications")}
+        assert left == set(ids[2:])
+
+
+class TestNotificationReceiptsMigration:
+    """Upgrading a v25 database keeps read broadcasts read."""
+
+    def test_migrates_from_v25(self, repo, db):
+        alice = _user(repo, "alice")
+        read = _broadcast(repo, "Read")
+        _broadcast(repo, "Unread")
+        with db.get_connection() as conn:
+            conn.execute(
+                "UPDATE notifications SET is_read = 1 WHERE id = ?", (read,),
+            )
+            conn.execute("DROP TABLE notification_receipts")
+            conn.execute("DROP TABLE notification_cursors")
+            conn.execute("DELETE FROM schema_version WHERE version > 25")
+            conn.execute(
+                "INSERT OR IGNORE INTO schema_version (version) VALUES (25)"
+            )
+        initialize_database(db)
+        assert repo.get_unread_count(alice) == 1
+        [unread] = repo.get_user_notifications(alice, unread_only=True)
+        assert unread.title == "Unread"
@@ -0,0 +1,158 @@
+"""Tests for batched notification retention and monthly partitions."""
+
+from datetime import datetime, timedelta
+
+from wired_part.database.models import Notification, User
+
+
+def _notify(repo, db, days_ago, severity="info", source="system",
+            user_id=None, title="N"):
+    nid = repo.create_notification(Notification(
+        user_id=user_id, title=title, message="m",
+        severity=severity, source=source,
+    ))
+    stamp = datetime.now() - timedelta(days=days_ago)
+    with db.get_connection() as conn:
+        conn.execute(
+            "UPDATE notifications SET created_at = ? WHERE id = ?",
+            (stamp.strftime("%Y-%m-%d %H:%M:%S"), nid),
+        )
+    return nid
+
+
+def _live_ids(db):
+    return {r["id"] for r in db.execute("SELECT id FROM notifications")}
+
+
+class TestExpiry:
+    """Rules shorter than the hot window delete from the live table."""
+
+    def test_source_rule_overrides_severity(self, repo, db):
+        reminder = _notify(repo, db, 31, severity="critical",
+                           source="reminder_agent")
+        fresh = _notify(repo, db, 5, source="reminder_agent")
+        assert repo.expire_notifications() == 1
+        assert _live_ids(db) == {fresh}
+        assert reminder not in _live_ids(db)
+
+    def test_batches_are_bounded(self, repo, db):
+        for _ in range(5):
+            _notify(repo, db, 40, source="reminder_agent")
+        assert repo.expire_notifications(batch_size=2) == 2
+        assert repo.expire_notifications(batch_size=2) == 2
+        assert repo.expire_notifications(batch_size=2) == 1
+        assert repo.expire_notifications(batch_size=2) == 0
+
+
+class TestArchive:
+    """Old notifications move to expiry-month partitions."""
+
+    def test_moves_by_expiry_month(self, repo, db):
+        old_info = _notify(repo, db, 45, severity="info")
+        old_crit = _notify(repo, db, 45, severity="critical")
+        recent = _notify(repo, db, 2)
+        assert repo.archive_notifications() == 2
+        assert _live_ids(db) == {recent}
+
+        def month(days):
+            created = datetime.now() - timedelta(days=45)
+            return (created + timedelta(days=days)).strftime("%Y%m")
+
+        info_table = f"notifications_p{month(90)}"
+        crit_table = f"notifications_p{month(365)}"
+        assert set(repo.get_notification_partitions()) == {
+            info_table, crit_table,
+        }
+        assert db.execute(f"SELECT id FROM {info_table}")[0]["id"] == old_info
+        assert db.execute(f"SELECT id FROM {crit_table}")[0]["id"] == old_crit
+
+    def test_archived_notifications_are_readable(self, repo, db):
+        uid = repo.create_user(User(
+            username="arch", display_name="Arch", pin_hash="x",
+        ))
+        other = repo.create_user(User(
+            username="other", display_name="Other", pin_hash="x",
+        ))
+        mine = _notify(repo, db, 60, user_id=uid, title="Mine")
+        shared = _notify(repo, db, 50, title="Shared")
+        _notify(repo, db, 55, user_id=other, title="Theirs")
+        repo.archive_notifications()
+        archived = repo.get_archived_notifications(uid)
+        assert [n.id for n in archived] == [shared, mine]
+        assert all(n.is_read == 1 for n in archived)
+        assert repo.get_user_notifications(uid) == []
+        page = repo.get_archived_notifications(uid, before_id=shared)
+        assert [n.id for n in page] == [mine]
+
+
+class TestPartitionDrop:
+    """Partitions are dropped whole once their month has passed."""
+
+    def test_drops_past_months_only(self, repo, db):
+        _notify(repo, db, 400, severity="warning")  # expired months ago
+        _notify(repo, db, 40, severity="critical")
+        repo.archive_notifications()
+        assert len(repo.get_notification_partitions()) == 2
+        dropped = repo.drop_expired_notification_partitions()
+        assert len(dropped) == 1
+        assert len(repo.get_notification_partitions()) == 1
+
+    def test_maintenance_pass(self, repo, db):
+        _notify(repo, db, 40, source="reminder_agent")
+        _notify(repo, db, 40)
+        _notify(repo, db, 400)
+        result = repo.run_notification_maintenance(batch_size=10)
+        assert result == {
+            "expired": 2, "archived": 1, "dropped": 0, "more": False,
+        }
+        assert _live_ids(db) == set()
+
+    def test_counters_follow_moves(self, repo, db):
+        _notify(repo, db, 40)
+        _notify(repo, db, 1)
+        repo.run_notification_maintenance()
+        assert repo.get_stats_counters()["notifications.count"] == 1
+        assert repo.verify_stats_counters(repair=False) == {}
+
+
+class TestStaysLocal:
+    """Retention moves are not replicated to other devices."""
+
+    def test_no_journal_entries_or_tombstones(self, repo, db):
+        _notify(repo, db, 40, source="reminder_agent")
+        _notify(repo, db, 45)
+        seq = repo.get_change_journal_seq()
+        assert repo.expire_notifications() == 1
+        assert repo.archive_notifications(hot_days=30) == 1
+        assert repo.changes_since(seq, tables=["notifications"]) == []
+        assert db.execute(
+            "SELECT COUNT(*) AS n FROM sync_tombstones "
+            "WHERE table_name = 'notifications'"
+        )[0]["n"] == 0
+
+    def test_moved_ids_are_retired(self, repo, db):
+        expired = _notify(repo, db, 40, source="reminder_agent")
+        archived = _notify(repo, db, 45)
+        repo.expire_notifications()
+        repo.archive_notifications(hot_days=30)
+        assert {
+            r["row_id"] for r in db.execute(
+                "SELECT row_id FROM sync_retired_rows "
+                "WHERE table_name = 'notifications'"
+            )
+        } == {expired, archived}
+
+    def test_migration_retires_partitioned_ids(self, repo, db):
+        from wired_part.database.schema import initialize_database
+        archived = _notify(repo, db, 45)
+        repo.archive_notifications(hot_days=30)
+        with db.get_connection() as conn:
+            conn.execute("DROP TABLE sync_retired_rows")
+            conn.execute("DELETE FROM schema_version WHERE version > 33")
+            conn.execute(
+                "INSERT OR IGNORE INTO schema_version (version) VALUES (33)"
+            )
+        initialize_database(db)
+        assert db.execute(
+            "SELECT table_name, row_id FROM sync_retired_rows"
+        )[0]["row_id"] == archived
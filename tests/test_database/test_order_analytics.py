@@ -107,3 +107,78 @@ class TestOrderAnalytics:
         assert summary["draft_orders"] == 1
         assert summary["items_awaiting"] > 0
         assert summary["open_returns"] == 0
+
+
+class TestSpendRollups:
+    """Order and spend rollups behind the analytics queries."""
+
+    def _receive(self, repo, order, user, qty):
+        item = repo.get_order_items(order.id)[0]
+        repo.receive_order_items(order.id, [{
+            "order_item_id": item.id,
+            "quantity_received": qty,
+            "allocate_to": "warehouse",
+        }], user.id)
+
+    def test_order_totals_follow_items(self, repo, sample_orders):
+        analytics = repo.get_order_analytics()
+        # 10 + 20 + 30 units at $0.50
+        assert analytics["total_spent"] == pytest.approx(30.0)
+        assert analytics["avg_order_size"] == pytest.approx(10.0)
+
+        item = repo.get_order_items(sample_orders[2].id)[0]
+        item.quantity_ordered = 40
+        repo.update_order_item(item)
+        assert repo.get_order_analytics()["total_spent"] == pytest.approx(35.0)
+
+        repo.delete_purchase_order(sample_orders[2].id)
+        analytics = repo.get_order_analytics()
+        assert analytics["total_orders"] == 2
+        assert analytics["total_spent"] == pytest.approx(15.0)
+        assert analytics["by_status"] == {"submitted": 2}
+
+    def test_order_without_items_not_in_average(
+        self, repo, sample_orders, supplier, test_user,
+    ):
+        repo.create_purchase_order(PurchaseOrder(
+            order_number="PO-EMPTY", supplier_id=supplier.id,
+            created_by=test_user.id,
+        ))
+        analytics = repo.get_order_analytics()
+        assert analytics["total_orders"] == 4
+        assert analytics["avg_order_size"] == pytest.approx(10.0)
+
+    def test_receipts_feed_spend(self, repo, sample_orders, test_user):
+        self._receive(repo, sample_orders[0], test_user, 10)
+        self._receive(repo, sample_orders[1], test_user, 5)
+
+        spending = repo.get_spending_by_supplier()
+        assert spending[0]["supplier_name"] == "Acme Electric"
+        assert spending[0]["total_spent"] == pytest.approx(7.5)
+        assert spending[0]["item_count"] == 2
+
+        spend = repo.get_spend_analytics(bucket="day", top_n=1)
+        assert spend["total_spent"] == pytest.approx(7.5)
+        assert spend["total_quantity"] == 15
+        assert len(spend["series"]) == 1
+        assert spend["top_parts"][0]["part_number"] == "WIRE-001"
+        assert spend["top_suppliers"][0]["supplier_name"] == "Acme Electric"
+
+    def test_spend_date_range_and_buckets(self, repo, sample_orders,
+                                          test_user):
+        self._receive(repo, sample_orders[0], test_user, 10)
+        assert repo.get_spend_analytics(date_from="2099-01-01")[
+            "series"
+        ] == []
+        for bucket in Repository.SPEND_BUCKETS:
+            assert len(repo.get_spend_analytics(bucket=bucket)["series"]) == 1
+        with pytest.raises(ValueError):
+            repo.get_spend_analytics(bucket="fortnight")
+
+    def test_rebuild_matches_triggers(self, repo, sample_orders, test_user):
+        self._receive(repo, sample_orders[0], test_user, 4)
+        orders = repo.get_order_analytics()
+        spend = repo.get_spend_analytics()
+        repo.rebuild_spend_rollups()
+        assert repo.get_order_analytics() == orders
+        assert repo.get_spend_analytics() == spend
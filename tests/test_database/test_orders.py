@@ -321,6 +321,25 @@ class TestOrderReceiving:
         updated_part = repo.get_part_by_id(target_part_id)
         assert updated_part.quantity == initial_qty + 5
 
+    def test_receive_stamps_part_for_sync(
+        self, repo, draft_order, parts, test_user,
+    ):
+        repo.submit_purchase_order(draft_order.id)
+        item = repo.get_order_items(draft_order.id)[0]
+        repo.db.execute(
+            "UPDATE parts SET updated_at = '2020-01-01 00:00:00' "
+            "WHERE id = ?", (item.part_id,),
+        )
+        repo.receive_order_items(draft_order.id, [{
+            "order_item_id": item.id,
+            "quantity_received": 1,
+            "allocate_to": "warehouse",
+        }], test_user.id)
+        rows = repo.db.execute(
+            "SELECT updated_at FROM parts WHERE id = ?", (item.part_id,),
+        )
+        assert rows[0]["updated_at"] > "2020-01-01 00:00:00"
+
     def test_receive_to_truck(self, repo, draft_order, parts, test_user):
         from wired_part.database.models import Truck
         truck = Truck(truck_number="T-001", name="Test Truck")
@@ -258,3 +258,47 @@ class TestReturnStatusWorkflow:
         repo.update_return_status(initiated_ra.id, "cancelled")
         ra = repo.get_return_authorization_by_id(initiated_ra.id)
         assert ra.status == "cancelled"
+
+
+class TestReturnStats:
+    """return_stats tracks item counts and values per RA (v23)."""
+
+    def test_values_follow_items(self, repo, initiated_ra, parts):
+        ra = repo.get_return_authorization_by_id(initiated_ra.id)
+        assert ra.item_count == 1
+        assert ra.total_value == 2.5
+
+        with repo.db.get_connection() as conn:
+            conn.execute(
+                "INSERT INTO return_authorization_items "
+                "(ra_id, part_id, quantity, unit_cost) VALUES (?, ?, 2, ?)",
+                (initiated_ra.id, parts[1].id, parts[1].unit_cost),
+            )
+        ra = repo.get_return_authorization_by_id(initiated_ra.id)
+        assert ra.item_count == 2
+        assert ra.total_value == 8.0
+
+    def test_pipeline_summary(self, repo, initiated_ra):
+        summary = repo.get_return_pipeline_summary()
+        assert summary["by_status"]["initiated"] == {
+            "count": 1, "total_value": 2.5,
+        }
+        assert summary["total_value"] == 2.5
+        assert summary["aging"] == []
+
+    def test_aging_uses_created_at(self, repo, initiated_ra):
+        with repo.db.get_connection() as conn:
+            conn.execute(
+                "UPDATE return_authorizations "
+                "SET created_at = DATETIME('now', '-45 days') WHERE id = ?",
+                (initiated_ra.id,),
+            )
+        aging = repo.get_return_pipeline_summary()["aging"]
+        assert [a["id"] for a in aging] == [initiated_ra.id]
+
+    def test_delete_removes_stats(self, repo, initiated_ra):
+        repo.delete_return_authorization(initiated_ra.id)
+        rows = repo.db.execute(
+            "SELECT * FROM return_stats WHERE ra_id = ?", (initiated_ra.id,)
+        )
+        assert rows == []
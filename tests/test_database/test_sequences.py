@@ -0,0 +1,243 @@
+"""Tests for the sequences table and document-number allocation (v18)."""
+
+import threading
+from unittest.mock import patch
+
+import pytest
+
+from wired_part.config import Config
+from wired_part.database.connection import DatabaseConnection
+from wired_part.database.models import Job, Part
+from wired_part.database.repository import Repository
+from wired_part.database.schema import initialize_database
+
+
+@pytest.fixture
+def seq_repo(db):
+    """Repository with a fixed device id and sync disabled."""
+    with patch.object(Config, "SYNC_ENABLED", False):
+        yield Repository(db, device_id="device-a")
+
+
+class TestNextSequenceValue:
+    """Test the raw counter API."""
+
+    def test_starts_at_one(self, seq_repo):
+        assert seq_repo.next_sequence_value("X", "2026") == 1
+        assert seq_repo.next_sequence_value("X", "2026") == 2
+
+    def test_counters_are_per_name_and_period(self, seq_repo):
+        assert seq_repo.next_sequence_value("X", "2026") == 1
+        assert seq_repo.next_sequence_value("X", "2027") == 1
+        assert seq_repo.next_sequence_value("Y", "2026") == 1
+        assert seq_repo.next_sequence_value("X", "2026") == 2
+
+    def test_block_reservation(self, seq_repo):
+        assert seq_repo.next_sequence_value("X", count=10) == 1
+        assert seq_repo.next_sequence_value("X") == 11
+
+    def test_seed_only_used_on_creation(self, seq_repo):
+        assert seq_repo.next_sequence_value("X", seed=41) == 42
+        assert seq_repo.next_sequence_value("X", seed=500) == 43
+
+    def test_rejects_non_positive_count(self, seq_repo):
+        with pytest.raises(ValueError):
+            seq_repo.next_sequence_value("X", count=0)
+
+    def test_concurrent_allocations_are_unique(self, db):
+        values = []
+        lock = threading.Lock()
+
+        def worker():
+            repo = Repository(db, device_id="device-a")
+            for _ in range(20):
+                v = repo.next_sequence_value("PO", "2026")
+                with lock:
+                    values.append(v)
+
+        with patch.object(Config, "SYNC_ENABLED", False):
+            threads = [threading.Thread(target=worker) for _ in range(4)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+        assert sorted(values) == list(range(1, 81))
+
+
+def _copy_sequences(src, dst):
+    """Simulate a sync of the sequences table from *src* into *dst*."""
+    with dst.get_connection() as conn:
+        for row in src.execute("SELECT * FROM sequences"):
+            row = dict(row)
+            cols = ", ".join(row)
+            marks = ", ".join("?" for _ in row)
+            conn.execute(
+                f"INSERT OR REPLACE INTO sequences ({cols}) "
+                f"VALUES ({marks})",
+                tuple(row.values()),
+            )
+
+
+@pytest.fixture
+def db_b(tmp_path):
+    """A second device's database."""
+    conn = DatabaseConnection(tmp_path / "b.db")
+    initialize_database(conn)
+    return conn
+
+
+class TestDeviceBlocks:
+    """Per-device reserved ranges while sync is enabled."""
+
+    def test_device_gets_a_block(self, db):
+        repo = Repository(db, device_id="device-a")
+        size = Repository.SEQUENCE_BLOCK_SIZE
+        with patch.object(Config, "SYNC_ENABLED", True):
+            first = repo.next_sequence_value("PO", "2026")
+            assert repo.next_sequence_value("PO", "2026") == first + 1
+        row = db.execute(
+            "SELECT * FROM sequences WHERE device_id = 'device-a'"
+        )[0]
+        assert (first - 1) % size == 0
+        assert row["block_start"] == first
+        assert row["block_end"] == first + size - 1
+
+    def test_devices_get_disjoint_blocks(self, db, db_b):
+        repo_a = Repository(db, device_id="device-a")
+        repo_b = Repository(db_b, device_id="device-b")
+
+        with patch.object(Config, "SYNC_ENABLED", True):
+            a_first = repo_a.next_sequence_value("PO", "2026")
+            _copy_sequences(db, db_b)
+            b_first = repo_b.next_sequence_value("PO", "2026")
+
+        size = Repository.SEQUENCE_BLOCK_SIZE
+        assert abs(a_first - b_first) >= size
+
+    def test_unsynced_devices_get_different_numbers(self, db, db_b):
+        repo_a = Repository(db, device_id="device-a")
+        repo_b = Repository(db_b, device_id="device-b")
+        with patch.object(Config, "SYNC_ENABLED", True):
+            a_numbers = {repo_a.generate_job_number() for _ in range(3)}
+            b_numbers = {repo_b.generate_job_number() for _ in range(3)}
+        assert len(a_numbers) == len(b_numbers) == 3
+        assert not a_numbers & b_numbers
+
+    def test_synced_devices_claim_disjoint_next_blocks(self, db, db_b):
+        repo_a = Repository(db, device_id="device-a")
+        repo_b = Repository(db_b, device_id="device-b")
+        a_values, b_values = [], []
+        with patch.object(Config, "SYNC_ENABLED", True), \
+                patch.object(Repository, "SEQUENCE_BLOCK_SIZE", 2):
+            for _ in range(3):
+                # Each device exhausts its block, then both sync
+                a_values += [repo_a.next_sequence_value("X")
+                             for _ in range(2)]
+                b_values += [repo_b.next_sequence_value("X")
+                             for _ in range(2)]
+                _copy_sequences(db, db_b)
+                _copy_sequences(db_b, db)
+            a_values.append(repo_a.next_sequence_value("X"))
+            b_values.append(repo_b.next_sequence_value("X"))
+        assert len(set(a_values)) == len(a_values)
+        assert not set(a_values) & set(b_values)
+
+    def test_known_devices_sharing_a_slot_skip_each_other(self, db, db_b):
+        repo_a = Repository(db, device_id="device-a")
+        repo_b = Repository(db_b, device_id="device-b")
+        with patch.object(Config, "SYNC_ENABLED", True), \
+                patch.object(Repository, "SEQUENCE_DEVICE_SLOTS", 1), \
+                patch.object(Repository, "SEQUENCE_BLOCK_SIZE", 2):
+            assert repo_a.next_sequence_value("X") == 1
+            _copy_sequences(db, db_b)
+            assert repo_b.next_sequence_value("X") == 3
+            _copy_sequences(db_b, db)
+            assert repo_a.next_sequence_value("X") == 2
+            assert repo_a.next_sequence_value("X") == 5
+
+    def test_count_limited_to_one_block(self, db):
+        repo = Repository(db, device_id="device-a")
+        with patch.object(Config, "SYNC_ENABLED", True), \
+                patch.object(Repository, "SEQUENCE_BLOCK_SIZE", 2):
+            with pytest.raises(ValueError):
+                repo.next_sequence_value("X", count=3)
+
+    def test_exhausted_block_claims_next(self, db):
+        repo = Repository(db, device_id="device-a")
+        with patch.object(Config, "SYNC_ENABLED", True), \
+                patch.object(Repository, "SEQUENCE_DEVICE_SLOTS", 1), \
+                patch.object(Repository, "SEQUENCE_BLOCK_SIZE", 2):
+            assert [repo.next_sequence_value("X") for _ in range(5)] == [
+                1, 2, 3, 4, 5,
+            ]
+            row = db.execute("SELECT * FROM sequences")[0]
+            assert row["block_start"] == 5
+            assert row["block_end"] == 6
+
+
+class TestDocumentNumbers:
+    """Generators built on the sequence allocator."""
+
+    def test_each_allocation_gets_a_new_number(self, seq_repo):
+        first = seq_repo.generate_job_number()
+        second = seq_repo.generate_job_number()
+        assert first.endswith("-001")
+        assert second.endswith("-002")
+
+    def test_peek_does_not_consume(self, seq_repo):
+        assert seq_repo.generate_job_number(peek=True).endswith("-001")
+        assert seq_repo.generate_job_number(peek=True).endswith("-001")
+        assert seq_repo.generate_job_number().endswith("-001")
+        assert seq_repo.generate_job_number(peek=True).endswith("-002")
+
+    def test_peek_skips_numbers_entered_by_hand(self, seq_repo):
+        seq_repo.create_part(Part(
+            part_number="P1", local_part_number="LP-0001",
+        ))
+        assert seq_repo.generate_local_part_number(peek=True) == "LP-0002"
+        assert seq_repo.generate_local_part_number() == "LP-0002"
+
+    def test_peek_matches_allocation_in_blocks(self, seq_repo):
+        with patch.object(Config, "SYNC_ENABLED", True), \
+                patch.object(Repository, "SEQUENCE_BLOCK_SIZE", 2):
+            for _ in range(4):
+                peeked = seq_repo.generate_order_number(peek=True)
+                assert seq_repo.generate_order_number() == peeked
+
+    def test_seeds_from_existing_rows(self, seq_repo):
+        from datetime import datetime
+        year = datetime.now().year
+        seq_repo.create_job(Job(
+            job_number=f"JOB-{year}-017", name="Legacy", status="active",
+        ))
+        assert seq_repo.generate_job_number() == f"JOB-{year}-018"
+
+    def test_skips_numbers_entered_by_hand(self, seq_repo):
+        assert seq_repo.generate_local_part_number() == "LP-0001"
+        seq_repo.create_part(Part(
+            part_number="P2", local_part_number="LP-0002",
+        ))
+        assert seq_repo.generate_local_part_number() == "LP-0003"
+
+    def test_order_and_ra_numbers(self, seq_repo):
+        assert seq_repo.generate_order_number().endswith("-001")
+        assert seq_repo.generate_order_number().endswith("-002")
+        assert seq_repo.generate_ra_number().endswith("-001")
+
+
+class TestSequencesMigration:
+    """Upgrading a v17 database creates the sequences table."""
+
+    def test_migrates_from_v17(self, db):
+        with db.get_connection() as conn:
+            conn.execute("DROP TABLE sequences")
+            conn.execute("DELETE FROM schema_version WHERE version > 17")
+            conn.execute(
+                "INSERT OR IGNORE INTO schema_version (version) VALUES (17)"
+            )
+        initialize_database(db)
+        rows = db.execute(
+            "SELECT name FROM sqlite_master "
+            "WHERE type='table' AND name='sequences'"
+        )
+        assert len(rows) == 1
@@ -0,0 +1,218 @@
+"""Tests for the trigger-maintained stats_counters table (v19)."""
+
+from wired_part.database.models import (
+    Job,
+    LaborEntry,
+    Notification,
+    Part,
+    PurchaseOrder,
+    Supplier,
+    User,
+)
+from wired_part.database.schema import STATS_COUNTERS, initialize_database
+
+
+def _counters(repo):
+    return repo.get_stats_counters()
+
+
+class TestCounterSeeding:
+    """Every counter row exists on a fresh database."""
+
+    def test_all_counters_present(self, repo):
+        counters = _counters(repo)
+        assert set(STATS_COUNTERS) <= set(counters)
+
+    def test_fresh_database_has_no_drift(self, repo):
+        assert repo.verify_stats_counters(repair=False) == {}
+
+
+class TestPartCounters:
+    """Part inserts, updates and deletes keep totals in step."""
+
+    def test_insert_update_delete(self, repo):
+        pid = repo.create_part(Part(
+            part_number="SC-1", quantity=10, unit_cost=2.5, min_quantity=20,
+        ))
+        c = _counters(repo)
+        assert c["parts.count"] == 1
+        assert c["parts.total_quantity"] == 10
+        assert c["parts.total_value"] == 25.0
+        assert c["parts.low_stock"] == 1
+
+        part = repo.get_part_by_id(pid)
+        part.quantity = 30
+        repo.update_part(part)
+        c = _counters(repo)
+        assert c["parts.total_quantity"] == 30
+        assert c["parts.total_value"] == 75.0
+        assert c["parts.low_stock"] == 0
+
+        repo.delete_part(pid)
+        c = _counters(repo)
+        assert c["parts.count"] == 0
+        assert c["parts.total_quantity"] == 0
+        assert c["parts.total_value"] == 0
+
+    def test_inventory_summary_reads_counters(self, repo):
+        repo.create_part(Part(part_number="SC-1", quantity=4, unit_cost=1.25))
+        summary = repo.get_inventory_summary()
+        assert summary == {
+            "total_parts": 1,
+            "total_quantity": 4,
+            "total_value": 5.0,
+            "low_stock_count": 0,
+        }
+        assert isinstance(summary["total_parts"], int)
+
+
+class TestStatusCounters:
+    """Status-filtered counters follow status changes."""
+
+    def test_job_status_transitions(self, repo):
+        jid = repo.create_job(Job(
+            job_number="JOB-SC-1", name="Stats", status="active",
+        ))
+        assert repo.get_dashboard_summary()["active_jobs"] == 1
+        job = repo.get_job_by_id(jid)
+        job.status = "completed"
+        repo.update_job(job)
+        stats = repo.get_app_statistics()
+        assert stats["jobs"]["active"] == 0
+        assert stats["jobs"]["completed"] == 1
+
+    def test_order_open_and_pending(self, repo):
+        sid = repo.create_supplier(Supplier(name="Stats Supply"))
+        uid = repo.create_user(User(
+            username="sc", display_name="SC", pin_hash="x",
+        ))
+        oid = repo.create_purchase_order(PurchaseOrder(
+            order_number="PO-SC-1", supplier_id=sid, status="draft",
+            created_by=uid,
+        ))
+        assert repo.get_app_statistics()["orders"]["open"] == 1
+        assert repo.get_dashboard_summary()["pending_orders"] == 1
+        repo.close_purchase_order(oid, force=True)
+        stats = repo.get_app_statistics()["orders"]
+        assert stats == {"count": 1, "open": 0}
+        assert repo.get_dashboard_summary()["pending_orders"] == 0
+
+    def test_labor_hours(self, repo):
+        uid = repo.create_user(User(
+            username="sc", display_name="SC", pin_hash="x",
+        ))
+        jid = repo.create_job(Job(job_number="JOB-SC-2", name="Labor"))
+        repo.create_labor_entry(LaborEntry(
+            user_id=uid, job_id=jid, start_time="2026-01-01T08:00:00",
+            end_time="2026-01-01T10:30:00", hours=2.5,
+        ))
+        labor = repo.get_app_statistics()["labor"]
+        assert labor == {"entries": 1, "total_hours": 2.5}
+
+    def test_unread_notifications_are_per_user(self, repo):
+        first = repo.create_user(User(
+            username="sc1", display_name="SC1", pin_hash="x",
+        ))
+        second = repo.create_user(User(
+            username="sc2", display_name="SC2", pin_hash="x",
+        ))
+        nid = repo.create_notification(Notification(
+            title="Everyone", message="m",
+        ))
+        repo.mark_notification_read(nid, first)
+        assert repo.get_app_statistics()["notifications"] == {"count": 1}
+        stats = repo.get_app_statistics(user_id=first)["notifications"]
+        assert stats == {"count": 1, "unread": 0}
+        stats = repo.get_app_statistics(user_id=second)["notifications"]
+        assert stats == {"count": 1, "unread": 1}
+
+
+class TestDriftRepair:
+    """verify_stats_counters finds and fixes drift."""
+
+    def test_detects_and_repairs(self, repo, db):
+        repo.create_part(Part(part_number="SC-1", quantity=5))
+        with db.get_connection() as conn:
+            conn.execute(
+                "UPDATE stats_counters SET value = 99 "
+                "WHERE name = 'parts.count'"
+            )
+        drift = repo.verify_stats_counters(repair=False)
+        assert drift == {"parts.count": (99, 1)}
+        assert _counters(repo)["parts.count"] == 99
+
+        assert repo.verify_stats_counters() == drift
+        assert _counters(repo)["parts.count"] == 1
+        assert repo.verify_stats_counters() == {}
+
+    def test_repair_blocks_writers_until_done(self, repo, db, monkeypatch):
+        import sqlite3
+
+        from wired_part.database import schema
+
+        blocked = []
+        real_scan = schema.stats_counter_scan_sql
+
+        def scan_with_writer(name):
+            if not blocked:
+                other = sqlite3.connect(db.db_path, timeout=0)
+                try:
+                    other.execute(
+                        "INSERT INTO parts (part_number) VALUES ('SC-W')"
+                    )
+                    other.commit()
+                    blocked.append(False)
+                except sqlite3.OperationalError:
+                    blocked.append(True)
+                finally:
+                    other.close()
+            return real_scan(name)
+
+        monkeypatch.setattr(schema, "stats_counter_scan_sql", scan_with_writer)
+        assert repo.verify_stats_counters() == {}
+        assert blocked == [True]
+
+    def test_recreates_missing_rows(self, repo, db):
+        with db.get_connection() as conn:
+            conn.execute("DELETE FROM stats_counters")
+        drift = repo.verify_stats_counters()
+        assert set(drift) == set(STATS_COUNTERS)
+        assert repo.verify_stats_counters() == {}
+
+
+class TestStatsCountersMigration:
+    """Upgrading a v18 database seeds counters from existing rows."""
+
+    def test_migrates_from_v18(self, repo, db):
+        repo.create_part(Part(part_number="SC-1", quantity=7, unit_cost=2))
+        with db.get_connection() as conn:
+            conn.execute("DROP TABLE stats_counters")
+            for table in {t for t, _ in STATS_COUNTERS.values()}:
+                for op in ("insert", "update", "delete"):
+                    conn.execute(f"DROP TRIGGER stats_{table}_{op}")
+            conn.execute("DELETE FROM schema_version WHERE version > 18")
+            conn.execute(
+                "INSERT OR IGNORE INTO schema_version (version) VALUES (18)"
+            )
+        initialize_database(db)
+        summary = repo.get_inventory_summary()
+        assert summary["total_parts"] == 1
+        assert summary["total_value"] == 14.0
+        repo.create_part(Part(part_number="SC-2", quantity=1))
+        assert repo.get_inventory_summary()["total_parts"] == 2
+
+    def test_v35_drops_shared_unread_counter(self, repo, db):
+        with db.get_connection() as conn:
+            conn.execute(
+                "INSERT INTO stats_counters (name, value) "
+                "VALUES ('notifications.unread', 3)"
+            )
+            conn.execute("DELETE FROM schema_version WHERE version > 34")
+            conn.execute(
+                "INSERT OR IGNORE INTO schema_version (version) VALUES (34)"
+            )
+        initialize_database(db)
+        assert "notifications.unread" not in _counters(repo)
+        repo.create_notification(Notification(title="N", message="m"))
+        assert _counters(repo)["notifications.count"] == 1
+        assert repo.verify_stats_counters() == {}
@@ -156,3 +156,47 @@ class TestTransferWorkflow:
 
         inv = repo.get_truck_inventory(setup_data["truck_id"])
         assert inv[0].quantity == 5
+
+
+class TestTruckStats:
+    """truck_stats is kept in step with inventory and transfers (v23)."""
+
+    def _stats(self, repo, truck_id):
+        return next(
+            u for u in repo.get_truck_utilization() if u["id"] == truck_id
+        )
+
+    def test_transfer_lifecycle(self, repo, setup_data):
+        tid = setup_data["truck_id"]
+        xfer = repo.create_transfer(TruckTransfer(
+            truck_id=tid, part_id=setup_data["part_id"], quantity=4,
+            created_by=setup_data["user_id"],
+        ))
+        stats = self._stats(repo, tid)
+        assert stats["pending_transfers"] == 1
+        assert stats["total_quantity"] == 0
+
+        repo.receive_transfer(xfer, setup_data["user_id"])
+        stats = self._stats(repo, tid)
+        assert stats["pending_transfers"] == 0
+        assert stats["unique_parts"] == 1
+        assert stats["total_quantity"] == 4
+        assert stats["inventory_value"] == 100.0
+        assert stats["assigned_to"] == "Driver One"
+
+    def test_part_cost_revalues_inventory(self, repo, setup_data):
+        tid, pid = setup_data["truck_id"], setup_data["part_id"]
+        repo.add_to_truck_inventory(tid, pid, 2)
+        part = repo.get_part_by_id(pid)
+        part.unit_cost = 30.0
+        repo.update_part(part)
+        assert self._stats(repo, tid)["inventory_value"] == 60.0
+
+    def test_rebuild_matches_triggers(self, repo, db, setup_data):
+        tid = setup_data["truck_id"]
+        repo.add_to_truck_inventory(tid, setup_data["part_id"], 3)
+        before = self._stats(repo, tid)
+        with db.get_connection() as conn:
+            conn.execute("DELETE FROM truck_stats")
+        repo.rebuild_truck_and_return_stats()
+        assert self._stats(repo, tid) == before
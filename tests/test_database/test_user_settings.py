@@ -23,10 +23,10 @@ def user(repo):
 
 
 class TestSchemaVersion:
-    """Ensure schema was bumped to v17."""
+    """Ensure schema was bumped to v32."""
 
-    def test_schema_version_is_17(self):
-        assert SCHEMA_VERSION == 17
+    def test_schema_version_is_35(self):
+        assert SCHEMA_VERSION == 35
 
     def test_user_settings_table_exists(self, repo):
         rows = repo.db.execute(
@@ -40,8 +40,8 @@ def labor_job(repo):
 class TestSchemaV17:
     """Verify schema version and new columns."""
 
-    def test_schema_version_is_17(self):
-        assert SCHEMA_VERSION == 17
+    def test_schema_version_is_35(self):
+        assert SCHEMA_VERSION == 35
 
     def test_labor_entries_has_drive_time_column(self, repo):
         """drive_time_minutes column exists in labor_entries table."""
@@ -0,0 +1,140 @@
+"""Tests for the set-based (temp-table staged) sync merge."""
+
+from unittest.mock import patch
+
+import pytest
+
+from wired_part.config import Config
+from wired_part.database.connection import DatabaseConnection
+from wired_part.database.models import Part
+from wired_part.database.repository import Repository
+from wired_part.database.schema import initialize_database
+from wired_part.sync.sync_manager import SyncManager
+
+
+@pytest.fixture
+def mgr(tmp_path):
+    db = DatabaseConnection(str(tmp_path / "bulk.db"))
+    initialize_database(db)
+    with patch.object(Config, "DEVICE_ID", "device-a"), \
+         patch.object(Config, "get_device_id", return_value="device-a"):
+        return SyncManager(db)
+
+
+def _part_row(mgr, part_id, **overrides):
+    category = mgr.db.execute("SELECT MIN(id) AS id FROM categories")[0]["id"]
+    row = {
+        "id": part_id, "part_number": f"BULK-{part_id}",
+        "name": f"Part {part_id}", "quantity": 1, "unit_cost": 1.0,
+        "category_id": category, "updated_at": "2026-01-01 00:00:00",
+    }
+    row.update(overrides)
+    return row
+
+
+def _merge(mgr, rows, table="parts"):
+    with mgr.db.get_connection() as conn:
+        return mgr._merge_table(conn, table, rows)
+
+
+def _quantity(mgr, part_id):
+    rows = mgr.db.execute(
+        "SELECT quantity FROM parts WHERE id = ?", (part_id,),
+    )
+    return rows[0]["quantity"] if rows else None
+
+
+class TestSetBasedMerge:
+    """Inserts and last-write-wins updates applied per table."""
+
+    def test_inserts_missing_rows(self, mgr):
+        rows = [_part_row(mgr, i) for i in range(1, 51)]
+        assert _merge(mgr, rows) == 50
+        assert _merge(mgr, rows) == 0  # Already present, not newer
+
+    def test_newer_remote_row_wins(self, mgr):
+        _merge(mgr, [_part_row(mgr, 1), _part_row(mgr, 2)])
+        assert _merge(mgr, [
+            _part_row(mgr, 1, quantity=9, updated_at="2026-02-01 00:00:00"),
+            _part_row(mgr, 2, quantity=9, updated_at="2025-12-01 00:00:00"),
+        ]) == 1
+        assert _quantity(mgr, 1) == 9
+        assert _quantity(mgr, 2) == 1
+
+    def test_bad_foreign_key_skips_only_that_row(self, mgr):
+        assert _merge(mgr, [
+            _part_row(mgr, 1),
+            _part_row(mgr, 2, category_id=99999),
+        ]) == 1
+        assert _quantity(mgr, 2) is None
+
+    def test_constraint_violation_skips_only_that_row(self, mgr):
+        assert _merge(mgr, [
+            _part_row(mgr, 1), _part_row(mgr, 2, quantity=-5),
+        ]) == 1
+
+    def test_unknown_columns_are_ignored(self, mgr):
+        assert _merge(mgr, [_part_row(mgr, 1, added_later="x")]) == 1
+
+    def test_delta_update_keeps_newer_local_row(self, mgr):
+        _merge(mgr, [_part_row(mgr, 1, updated_at="2026-03-01 00:00:00")])
+        _merge(mgr, [_part_row(mgr, 2)])
+        with mgr.db.get_connection() as conn:
+            count = mgr._apply_changed_rows(conn, "parts", [
+                _part_row(mgr, 1, quantity=7),
+                _part_row(mgr, 2, quantity=7),
+                _part_row(mgr, 3, quantity=7),
+            ])
+        assert count == 2
+        assert [_quantity(mgr, i) for i in (1, 2, 3)] == [1, 7, 7]
+
+    def test_full_delta_applies_same_second_edit(self, mgr):
+        _merge(mgr, [_part_row(mgr, 1, quantity=5)])
+        second_edit = [_part_row(mgr, 1, quantity=9)]  # Same updated_at
+        assert _merge(mgr, second_edit) == 0
+        with mgr.db.get_connection() as conn:
+            assert mgr._merge_table(conn, "parts", second_edit,
+                                    ties=True) == 1
+            assert mgr._merge_table(conn, "parts", second_edit,
+                                    ties=True) == 0
+        assert _quantity(mgr, 1) == 9
+
+    def test_delta_tie_does_not_restamp_identical_row(self, mgr):
+        job = {"id": 1, "job_number": "J-1", "name": "Tie",
+               "updated_at": "2026-01-01 00:00:00"}
+        _merge(mgr, [job], table="jobs")
+        with mgr.db.get_connection() as conn:
+            assert mgr._apply_changed_rows(conn, "jobs", [dict(job)]) == 0
+            assert mgr._apply_changed_rows(
+                conn, "jobs", [dict(job, name="Renamed")],
+            ) == 1
+        rows = mgr.db.execute("SELECT name, updated_at FROM jobs WHERE id = 1")
+        assert rows[0]["name"] == "Renamed"
+
+
+class TestSetBasedConflicts:
+    """Conflicts come from one join against the staged rows."""
+
+    def test_detects_only_rows_that_differ(self, mgr):
+        repo = Repository(mgr.db)
+        cat = repo.get_all_categories()[0]
+        ids = [
+            repo.create_part(Part(part_number=f"C-{i}", name=f"C{i}",
+                                  quantity=1, category_id=cat.id))
+            for i in range(3)
+        ]
+        local = {
+            r["id"]: dict(r) for r in mgr.db.execute("SELECT * FROM parts")
+        }
+        changed = dict(local[ids[0]], quantity=5,
+                       updated_at="2099-01-01 00:00:00")
+        touched = dict(local[ids[1]], updated_at="2099-01-01 00:00:00")
+        with mgr.db.get_connection() as conn:
+            version = mgr._get_schema_version(conn)
+        conflicts = mgr.detect_conflicts({
+            "schema_version": version,
+            "tables": {"parts": [changed, touched, local[ids[2]]]},
+        })
+        assert [c["pk_value"] for c in conflicts] == [ids[0]]
+        assert conflicts[0]["remote_data"]["quantity"] == 5
+        assert conflicts[0]["local_data"]["quantity"] == 1
@@ -0,0 +1,244 @@
+"""Tests for change-journal delta sync with per-peer watermarks (v28)."""
+
+import json
+from unittest.mock import patch
+
+import pytest
+
+from wired_part.config import Config
+from wired_part.database.connection import DatabaseConnection
+from wired_part.database.models import Part
+from wired_part.database.repository import Repository
+from wired_part.database.schema import initialize_database
+from wired_part.sync.sync_format import read_sync_file, write_sync_file
+from wired_part.sync.sync_manager import SyncManager
+
+
+@pytest.fixture
+def db_a(tmp_path):
+    db = DatabaseConnection(str(tmp_path / "device_a.db"))
+    initialize_database(db)
+    return db
+
+
+@pytest.fixture
+def db_b(tmp_path):
+    db = DatabaseConnection(str(tmp_path / "device_b.db"))
+    initialize_database(db)
+    return db
+
+
+@pytest.fixture
+def sync_folder(tmp_path):
+    folder = tmp_path / "sync"
+    folder.mkdir()
+    return folder
+
+
+def _make_mgr(db, sync_folder, device_id, last_sync=""):
+    with patch.object(Config, "SYNC_ENABLED", True), \
+         patch.object(Config, "SYNC_FOLDER_PATH", str(sync_folder)), \
+         patch.object(Config, "LAST_SYNC_TIMESTAMP", last_sync), \
+         patch.object(Config, "DEVICE_ID", device_id), \
+         patch.object(Config, "get_device_id", return_value=device_id):
+        mgr = SyncManager(db)
+    return mgr
+
+
+def _add_part(repo, number, qty=5):
+    cat = repo.get_all_categories()[0]
+    return repo.create_part(Part(
+        part_number=number, name=number, quantity=qty,
+        unit_cost=1.0, category_id=cat.id,
+    ))
+
+
+@pytest.fixture
+def pair(db_a, db_b, sync_folder):
+    """Two devices that have completed an initial (full) delta sync."""
+    mgr_a = _make_mgr(db_a, sync_folder, "device-a")
+    mgr_b = _make_mgr(db_b, sync_folder, "device-b")
+    with patch.object(Config, "update_last_sync"):
+        mgr_b.export_deltas_to_sync_folder()  # Announces device-b
+        mgr_a.export_deltas_to_sync_folder()
+        mgr_b.import_deltas_from_sync_folder()
+    return mgr_a, mgr_b
+
+
+def _read_delta(sync_folder, source, target):
+    return read_sync_file(
+        sync_folder / f"wiredpart_delta_{source}_to_{target}.jsonl.z"
+    )
+
+
+class TestDeltaExport:
+    """Each peer's delta starts at the position it acknowledged."""
+
+    def test_first_delta_is_full_snapshot(self, pair, sync_folder):
+        data = _read_delta(sync_folder, "device-a", "device-b")
+        assert data["full"] is True
+        assert "categories" in data["tables"]
+
+    def test_import_records_watermark_and_ack(self, pair, sync_folder):
+        mgr_a, mgr_b = pair
+        head = Repository(mgr_a.db).get_change_journal_seq()
+        assert mgr_b.get_peer_watermarks() == {"device-a": head}
+        ack = json.loads(
+            (sync_folder / "wiredpart_ack_device-b.json").read_text()
+        )
+        assert ack["acks"] == {"device-a": head}
+
+    def test_delta_holds_only_changed_rows(self, pair, sync_folder):
+        mgr_a, mgr_b = pair
+        repo_a = Repository(mgr_a.db)
+        _add_part(repo_a, "DELTA-1")
+        base = mgr_b.get_peer_watermarks()["device-a"]
+        data = mgr_a.export_delta("device-b")
+        assert data["full"] is False
+        assert data["base_seq"] == base
+        assert list(data["tables"]) == ["parts"]
+        assert data["tables"]["parts"][0]["part_number"] == "DELTA-1"
+
+    def test_up_to_date_peer_gets_no_file(self, pair, sync_folder):
+        mgr_a, _ = pair
+        assert mgr_a.export_deltas_to_sync_folder() == {}
+
+    def test_merged_rows_are_not_echoed(self, pair):
+        mgr_a, mgr_b = pair
+        b_head = Repository(mgr_b.db).get_change_journal_seq()
+        _add_part(Repository(mgr_a.db), "ECHO")
+        with patch.object(Config, "update_last_sync"):
+            mgr_a.export_deltas_to_sync_folder()
+            mgr_b.import_deltas_from_sync_folder()
+        with patch.object(
+            SyncManager, "_read_acks",
+            return_value={"device-a": {"device-b": b_head}},
+        ):
+            data = mgr_b.export_delta("device-a")
+        assert data["full"] is False
+        assert data["tables"] == {} and data["deletes"] == {}
+
+    def test_compacted_journal_falls_back_to_snapshot(self, pair):
+        mgr_a, _ = pair
+        with mgr_a.db.get_connection() as conn:
+            conn.execute(
+                "UPDATE change_journal_state SET floor_seq = "
+                "(SELECT MAX(seq) FROM change_journal) + 1"
+            )
+        assert mgr_a.export_delta("device-b")["full"] is True
+
+
+class TestDeltaImport:
+    """Deltas apply updates and deletes exactly once."""
+
+    def _round(self, mgr_a, mgr_b):
+        with patch.object(Config, "update_last_sync"):
+            mgr_a.export_deltas_to_sync_folder()
+            return mgr_b.import_deltas_from_sync_folder()
+
+    def test_updates_and_deletes_propagate(self, pair):
+        mgr_a, mgr_b = pair
+        repo_a, repo_b = Repository(mgr_a.db), Repository(mgr_b.db)
+        keep = _add_part(repo_a, "KEEP")
+        gone = _add_part(repo_a, "GONE")
+        self._round(mgr_a, mgr_b)
+        assert repo_b.get_part_by_id(gone) is not None
+
+        part = repo_a.get_part_by_id(keep)
+        part.quantity = 42
+        repo_a.update_part(part)
+        repo_a.delete_part(gone, force=True)
+        summary = self._round(mgr_a, mgr_b)
+        assert summary["parts"] == 2
+        assert repo_b.get_part_by_id(keep).quantity == 42
+        assert repo_b.get_part_by_id(gone) is None
+
+    def test_reimport_is_skipped(self, pair):
+        mgr_a, mgr_b = pair
+        _add_part(Repository(mgr_a.db), "ONCE")
+        assert self._round(mgr_a, mgr_b)["parts"] == 1
+        assert mgr_b.import_deltas_from_sync_folder() == {}
+
+    def test_delta_with_gap_is_skipped(self, pair, sync_folder):
+        mgr_a, mgr_b = pair
+        _add_part(Repository(mgr_a.db), "GAP")
+        data = mgr_a.export_delta("device-b")
+        data["base_seq"] += 1000
+        data["journal_seq"] += 1000
+        write_sync_file(
+            sync_folder / "wiredpart_delta_device-a_to_device-b.jsonl.z", data,
+        )
+        assert mgr_b.import_deltas_from_sync_folder() == {}
+
+    def test_merged_changes_are_attributed_to_source(self, pair):
+        mgr_a, mgr_b = pair
+        _add_part(Repository(mgr_a.db), "ORIGIN")
+        self._round(mgr_a, mgr_b)
+        rows = mgr_b.db.execute(
+            "SELECT device_id FROM change_journal WHERE table_name = 'parts' "
+            "ORDER BY seq DESC LIMIT 1"
+        )
+        assert rows[0]["device_id"] == "device-a"
+
+
+class TestJournalIncrementalExport:
+    """export_incremental reads the journal instead of timestamps."""
+
+    def test_includes_deletes(self, db_a, sync_folder):
+        repo = Repository(db_a)
+        pid = _add_part(repo, "DEL")
+        with db_a.get_connection() as conn:
+            conn.execute(
+                "UPDATE change_journal SET created_at = '2000-01-01 00:00:00'"
+            )
+        repo.delete_part(pid, force=True)
+        mgr = _make_mgr(db_a, sync_folder, "device-a",
+                        last_sync="2020-01-01T00:00:00+00:00")
+        export = mgr.export_incremental()
+        assert export["deletes"]["parts"] == [pid]
+        assert "parts" not in export["tables"]
+
+    def test_includes_changes_in_the_last_sync_second(
+        self, db_a, sync_folder,
+    ):
+        repo = Repository(db_a)
+        pid = _add_part(repo, "SAME-SECOND")
+        with db_a.get_connection() as conn:
+            conn.execute(
+                "UPDATE change_journal SET created_at = '2000-01-01 00:00:00'"
+            )
+            conn.execute(
+                "UPDATE change_journal SET created_at = '2020-01-01 00:00:00' "
+                "WHERE table_name = 'parts' AND row_id = ?", (pid,),
+            )
+        mgr = _make_mgr(db_a, sync_folder, "device-a",
+                        last_sync="2020-01-01T00:00:00.400000+00:00")
+        export = mgr.export_incremental()
+        assert [r["id"] for r in export["tables"]["parts"]] == [pid]
+
+    def test_full_export_records_watermark(self, db_a, db_b, sync_folder):
+        mgr_a = _make_mgr(db_a, sync_folder, "device-a")
+        mgr_b = _make_mgr(db_b, sync_folder, "device-b")
+        with patch.object(Config, "update_last_sync"):
+            mgr_a.export_to_sync_folder()
+            mgr_b.import_from_sync_folder()
+        seq = Repository(db_a).get_change_journal_seq()
+        assert mgr_b.get_peer_watermarks() == {"device-a": seq}
+
+
+class TestPeerWatermarkMigration:
+    """Upgrading a v27 database creates the watermark table."""
+
+    def test_migrates_from_v27(self, db_a):
+        with db_a.get_connection() as conn:
+            conn.execute("DROP TABLE sync_peer_watermarks")
+            conn.execute("DELETE FROM schema_version WHERE version > 27")
+            conn.execute(
+                "INSERT OR IGNORE INTO schema_version (version) VALUES (27)"
+            )
+        initialize_database(db_a)
+        rows = db_a.execute(
+            "SELECT name FROM sqlite_master "
+            "WHERE type='table' AND name='sync_peer_watermarks'"
+        )
+        assert len(rows) == 1
@@ -0,0 +1,176 @@
+"""Tests for the per-peer import ledger (v30)."""
+
+import os
+from unittest.mock import patch
+
+import pytest
+
+from wired_part.config import Config
+from wired_part.database.connection import DatabaseConnection
+from wired_part.database.models import Supplier
+from wired_part.database.repository import Repository
+from wired_part.database.schema import initialize_database
+from wired_part.sync import sync_manager
+from wired_part.sync.sync_format import SyncFormatError
+from wired_part.sync.sync_manager import SyncManager
+
+
+def _make_mgr(tmp_path, device_id):
+    db = DatabaseConnection(str(tmp_path / f"{device_id}.db"))
+    initialize_database(db)
+    folder = tmp_path / "sync"
+    folder.mkdir(exist_ok=True)
+    with patch.object(Config, "SYNC_ENABLED", True), \
+         patch.object(Config, "SYNC_FOLDER_PATH", str(folder)), \
+         patch.object(Config, "LAST_SYNC_TIMESTAMP", ""), \
+         patch.object(Config, "DEVICE_ID", device_id), \
+         patch.object(Config, "get_device_id", return_value=device_id):
+        mgr = SyncManager(db)
+    return mgr
+
+
+def _supplier_names(mgr):
+    return {s.name for s in Repository(mgr.db).get_all_suppliers()}
+
+
+@pytest.fixture(autouse=True)
+def _no_config_writes():
+    with patch.object(Config, "update_last_sync"):
+        yield
+
+
+@pytest.fixture
+def peer(tmp_path):
+    mgr_b = _make_mgr(tmp_path, "device-b")
+    Repository(mgr_b.db).create_supplier(Supplier(name="From B"))
+    mgr_b.export_to_sync_folder()
+    return mgr_b
+
+
+class TestUnchangedFiles:
+    """Files already imported are skipped before they are decoded."""
+
+    def test_ledger_records_import(self, tmp_path, peer):
+        mgr_a = _make_mgr(tmp_path, "device-a")
+        assert mgr_a.import_from_sync_folder()["suppliers"] == 1
+        entry = mgr_a.get_import_ledger()["device-b"]
+        assert entry["status"] == "complete"
+        assert entry["file_name"] == "wiredpart_sync_device-b.jsonl.z"
+        assert entry["exported_at"]
+
+    def test_unchanged_file_is_not_opened(self, tmp_path, peer):
+        mgr_a = _make_mgr(tmp_path, "device-a")
+        mgr_a.import_from_sync_folder()
+        with patch.object(sync_manager, "SyncFileReader") as reader, \
+             patch.object(sync_manager, "content_hash") as hashed:
+            assert mgr_a.import_from_sync_folder() == {}
+        reader.assert_not_called()
+        hashed.assert_not_called()
+
+    def test_touched_file_is_recognised_by_hash(self, tmp_path, peer):
+        mgr_a = _make_mgr(tmp_path, "device-a")
+        mgr_a.import_from_sync_folder()
+        path = peer._export_path("device-b")
+        os.utime(path, ns=(0, 0))
+        with patch.object(sync_manager, "SyncFileReader") as reader:
+            assert mgr_a.import_from_sync_folder() == {}
+        reader.assert_not_called()
+        assert mgr_a.get_import_ledger()["device-b"]["file_mtime_ns"] == 0
+
+    def test_changed_file_is_imported(self, tmp_path, peer):
+        mgr_a = _make_mgr(tmp_path, "device-a")
+        mgr_a.import_from_sync_folder()
+        Repository(peer.db).create_supplier(Supplier(name="Later B"))
+        peer.export_to_sync_folder()
+        assert mgr_a.import_from_sync_folder() == {"suppliers": 1}
+        assert "Later B" in _supplier_names(mgr_a)
+
+    def test_incomplete_file_waits(self, tmp_path, peer):
+        path = peer._export_path("device-b")
+        path.write_bytes(path.read_bytes()[:-10])
+        mgr_a = _make_mgr(tmp_path, "device-a")
+        with patch.object(sync_manager, "SyncFileReader") as reader:
+            assert mgr_a.import_from_sync_folder() == {}
+        reader.assert_not_called()
+        assert mgr_a.get_import_ledger() == {}
+
+
+class TestResume:
+    """An interrupted import picks up at its last checkpoint."""
+
+    def test_resumes_after_failure(self, tmp_path):
+        mgr_b = _make_mgr(tmp_path, "device-b")
+        repo_b = Repository(mgr_b.db)
+        for i in range(300):
+            repo_b.create_supplier(Supplier(name=f"Supplier {i}"))
+        mgr_b.export_to_sync_folder()
+
+        mgr_a = _make_mgr(tmp_path, "device-a")
+        mgr_a.MERGE_BATCH = 50
+        mgr_a.IMPORT_CHECKPOINT_ROWS = 100
+        real = SyncManager._merge_table
+        merged = []
+
+        def failing(self, conn, table, rows):
+            if table == "suppliers" and len(merged) >= 150:
+                raise SyncFormatError("connection to share lost")
+            if table == "suppliers":
+                merged.extend(rows)
+            return real(self, conn, table, rows)
+
+        with patch.object(SyncManager, "_merge_table", failing):
+            mgr_a.import_from_sync_folder()
+        entry = mgr_a.get_import_ledger()["device-b"]
+        assert entry["status"] == "partial"
+        assert entry["rows_done"] > 0
+        kept = len([n for n in _supplier_names(mgr_a)
+                    if n.startswith("Supplier")])
+        assert 100 <= kept <= 150  # Up to the last checkpoint
+
+        merged.clear()
+
+        def spy(self, conn, table, rows):
+            if table == "suppliers":
+                merged.extend(rows)
+            return real(self, conn, table, rows)
+
+        with patch.object(SyncManager, "_merge_table", spy):
+            mgr_a.import_from_sync_folder()
+        assert len(merged) == 300 - kept  # Checkpointed rows are not re-read
+        assert {f"Supplier {i}" for i in range(300)} <= _supplier_names(mgr_a)
+        assert mgr_a.get_import_ledger()["device-b"]["status"] == "complete"
+
+    def test_checkpoint_does_not_leak_journal_origin(self, tmp_path):
+        mgr_b = _make_mgr(tmp_path, "device-b")
+        repo_b = Repository(mgr_b.db)
+        for i in range(120):
+            repo_b.create_supplier(Supplier(name=f"Supplier {i}"))
+        mgr_b.export_to_sync_folder()
+
+        mgr_a = _make_mgr(tmp_path, "device-a")
+        mgr_a.MERGE_BATCH = 50
+        mgr_a.IMPORT_CHECKPOINT_ROWS = 50
+        with patch.object(SyncManager, "_write_ledger",
+                          side_effect=[None, OSError("disk full")]):
+            mgr_a.import_from_sync_folder()
+        origin = mgr_a.db.execute(
+            "SELECT origin_device FROM change_journal_state WHERE id = 1"
+        )[0]["origin_device"]
+        assert origin is None
+
+
+class TestLedgerMigration:
+    """Upgrading a v29 database creates the ledger."""
+
+    def test_migrates_from_v29(self, tmp_path):
+        db = DatabaseConnection(str(tmp_path / "old.db"))
+        initialize_database(db)
+        with db.get_connection() as conn:
+            conn.execute("DROP TABLE sync_import_ledger")
+            conn.execute("DELETE FROM schema_version WHERE version > 29")
+            conn.execute(
+                "INSERT OR IGNORE INTO schema_version (version) VALUES (29)"
+            )
+        initialize_database(db)
+        assert db.execute("SELECT COUNT(*) AS n FROM sync_import_ledger")[
+            0]["n"] == 0
@@ -0,0 +1,183 @@
+"""Tests for decoding peer sync files in parallel."""
+
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from unittest.mock import patch
+
+import pytest
+
+from wired_part.config import Config
+from wired_part.database.connection import DatabaseConnection
+from wired_part.database.repository import Repository
+from wired_part.database.schema import initialize_database
+from wired_part.sync.sync_format import (
+    SyncFormatError,
+    read_spool,
+    spool_sync_file,
+    write_sync_file,
+)
+from wired_part.sync.sync_manager import (
+    SyncCancelled,
+    SyncManager,
+    SyncProgress,
+)
+
+
+def _make_mgr(tmp_path, device_id):
+    db = DatabaseConnection(str(tmp_path / f"{device_id}.db"))
+    initialize_database(db)
+    folder = tmp_path / "sync"
+    folder.mkdir(exist_ok=True)
+    with patch.object(Config, "SYNC_ENABLED", True), \
+         patch.object(Config, "SYNC_FOLDER_PATH", str(folder)), \
+         patch.object(Config, "LAST_SYNC_TIMESTAMP", ""), \
+         patch.object(Config, "DEVICE_ID", device_id), \
+         patch.object(Config, "get_device_id", return_value=device_id):
+        mgr = SyncManager(db)
+    return mgr
+
+
+@pytest.fixture(autouse=True)
+def _no_config_writes():
+    with patch.object(Config, "update_last_sync"):
+        yield
+
+
+@pytest.fixture
+def trucks(tmp_path):
+    """Three peers, each exporting a supplier named after it."""
+    for truck in ("truck-3", "truck-1", "truck-2"):
+        mgr = _make_mgr(tmp_path, truck)
+        with mgr.db.get_connection() as conn:
+            conn.execute(
+                "INSERT INTO suppliers (id, name) VALUES (?, ?)",
+                (1000 * int(truck[-1]), f"From {truck}"),
+            )
+        mgr.export_to_sync_folder()
+
+
+@pytest.fixture
+def office(tmp_path, trucks):
+    mgr = _make_mgr(tmp_path, "office")
+    mgr.DECODE_WORKERS = 2
+    mgr.PARALLEL_DECODE_MIN_BYTES = 0
+    return mgr
+
+
+def _merge_order(mgr):
+    order = []
+    real = SyncManager._merge_records
+
+    def spy(self, meta, records, ledger=None):
+        order.append(meta["device_id"])
+        return real(self, meta, records, ledger=ledger)
+
+    with patch.object(SyncManager, "_merge_records", spy):
+        summary = mgr.import_from_sync_folder()
+    return order, summary
+
+
+class TestParallelImport:
+    """Files decode in worker processes and merge in device order."""
+
+    def test_merges_all_peers_in_device_order(self, office):
+        with patch("wired_part.sync.sync_manager.SyncFileReader") as reader:
+            order, summary = _merge_order(office)
+        reader.assert_not_called()  # Decoded by the pool, not in-process
+        assert order == ["truck-1", "truck-2", "truck-3"]
+        assert summary == {"suppliers": 3}
+        names = {s.name for s in Repository(office.db).get_all_suppliers()}
+        assert {"From truck-1", "From truck-2", "From truck-3"} <= names
+
+    def test_same_result_as_serial_import(self, tmp_path, trucks, office):
+        serial = _make_mgr(tmp_path, "office-serial")
+        serial.DECODE_WORKERS = 1
+        assert _merge_order(serial) == _merge_order(office)
+
+    def test_corrupt_file_is_skipped(self, office):
+        path = office._export_path("truck-2")
+        path.write_bytes(path.read_bytes()[:40] + b"\0" * 40
+                         + path.read_bytes()[80:])
+        order, summary = _merge_order(office)
+        assert order == ["truck-1", "truck-3"]
+        assert summary == {"suppliers": 2}
+
+    def test_reports_progress(self, office):
+        events = []
+        office.progress_callback = events.append
+        office.import_from_sync_folder()
+        assert [e for e in events if not e.table] == [
+            SyncProgress(0, 3),
+            SyncProgress(1, 3, "truck-1"),
+            SyncProgress(2, 3, "truck-2"),
+            SyncProgress(3, 3, "truck-3"),
+        ]
+
+    def test_reports_table_progress(self, office):
+        events = []
+        office.progress_callback = events.append
+        office.import_from_sync_folder()
+        assert SyncProgress(0, 3, "truck-1", "suppliers", 1) in events
+
+    def test_cancel_keeps_completed_files(self, office):
+        events = []
+        office.progress_callback = events.append
+        office.cancel_requested = lambda: any(
+            e.device_id == "truck-1" and not e.table for e in events
+        )
+        with pytest.raises(SyncCancelled):
+            office.import_from_sync_folder()
+        assert set(office.get_import_ledger()) == {"truck-1"}
+
+    def test_broken_pool_falls_back_to_streaming(self, office):
+        def broken(*args, **kwargs):
+            future = Future()
+            future.set_exception(BrokenProcessPool("no processes"))
+            return future
+
+        with patch.object(ProcessPoolExecutor, "submit", broken):
+            order, summary = _merge_order(office)
+        assert order == ["truck-1", "truck-2", "truck-3"]
+        assert summary == {"suppliers": 3}
+
+
+class TestSpoolSyncFile:
+    """The worker function validates a file end to end."""
+
+    def test_skips_body_on_schema_mismatch(self, tmp_path):
+        path = tmp_path / "x.jsonl.z"
+        write_sync_file(path, {
+            "device_id": "d", "schema_version": 3,
+            "tables": {"parts": [{"id": 1}]},
+        })
+        header, spool = spool_sync_file(path, tmp_path, schema_version=4)
+        assert header["device_id"] == "d" and spool is None
+
+    def test_spool_streams_back_and_is_removed(self, tmp_path):
+        path = tmp_path / "x.jsonl.z"
+        write_sync_file(path, {
+            "device_id": "d", "schema_version": 3,
+            "tables": {"parts": [{"id": i} for i in range(5)]},
+        })
+        spool_dir = tmp_path / "spool"
+        spool_dir.mkdir()
+        _, spool = spool_sync_file(path, spool_dir, 2, schema_version=3)
+        assert list(read_spool(spool)) == [
+            ("rows", "parts", [{"id": 0}, {"id": 1}]),
+            ("rows", "parts", [{"id": 2}, {"id": 3}]),
+            ("rows", "parts", [{"id": 4}]),
+        ]
+        assert list(spool_dir.iterdir()) == []
+
+    def test_truncated_file_leaves_no_spool(self, tmp_path):
+        path = tmp_path / "x.jsonl.z"
+        write_sync_file(path, {
+            "device_id": "d", "schema_version": 3,
+            "tables": {"parts": [{"id": i} for i in range(500)]},
+        })
+        path.write_bytes(path.read_bytes()[:-40])
+        spool_dir = tmp_path / "spool"
+        spool_dir.mkdir()
+        with pytest.raises(SyncFormatError):
+            spool_sync_file(path, spool_dir, schema_version=3)
+        assert list(spool_dir.iterdir()) == []
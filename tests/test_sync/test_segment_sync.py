@@ -0,0 +1,157 @@
+"""Tests for lock-free, append-only segment sync."""
+
+import json
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+import pytest
+
+from wired_part.config import Config
+from wired_part.database.connection import DatabaseConnection
+from wired_part.database.repository import Repository
+from wired_part.database.schema import initialize_database
+from wired_part.sync.sync_manager import SyncManager
+
+
+@pytest.fixture
+def sync_folder(tmp_path):
+    folder = tmp_path / "sync"
+    folder.mkdir()
+    return folder
+
+
+def _make_mgr(tmp_path, sync_folder, device_id):
+    db = DatabaseConnection(str(tmp_path / f"{device_id}.db"))
+    initialize_database(db)
+    with patch.object(Config, "SYNC_ENABLED", True), \
+         patch.object(Config, "SYNC_FOLDER_PATH", str(sync_folder)), \
+         patch.object(Config, "LAST_SYNC_TIMESTAMP", ""), \
+         patch.object(Config, "DEVICE_ID", device_id), \
+         patch.object(Config, "get_device_id", return_value=device_id):
+        mgr = SyncManager(db)
+    return mgr
+
+
+def _add_supplier(mgr, supplier_id, name):
+    with mgr.db.get_connection() as conn:
+        conn.execute(
+            "INSERT INTO suppliers (id, name) VALUES (?, ?)",
+            (supplier_id, name),
+        )
+
+
+def _names(mgr):
+    return {s.name for s in Repository(mgr.db).get_all_suppliers()}
+
+
+def _files(mgr, device_id):
+    return sorted(p.name for p in mgr._segment_dir(device_id).iterdir())
+
+
+@pytest.fixture(autouse=True)
+def _no_config_writes():
+    with patch.object(Config, "update_last_sync"):
+        yield
+
+
+@pytest.fixture
+def pair(tmp_path, sync_folder):
+    return (_make_mgr(tmp_path, sync_folder, "device-a"),
+            _make_mgr(tmp_path, sync_folder, "device-b"))
+
+
+class TestPublish:
+    """Each device appends immutable files to its own folder."""
+
+    def test_first_publish_is_snapshot_then_segments(self, pair):
+        mgr_a, _ = pair
+        first = mgr_a.publish_segment()
+        assert "snap_" in first
+        assert mgr_a.publish_segment() is None  # Nothing changed
+
+        _add_supplier(mgr_a, 100, "A1")
+        second = mgr_a.publish_segment()
+        files = _files(mgr_a, "device-a")
+        assert len(files) == 2 and second.endswith(files[0])
+        assert files[0].startswith("seg_")
+        assert not any(f.endswith(".tmp") for f in files)
+
+    def test_compaction_replaces_segments_with_snapshot(self, pair):
+        mgr_a, _ = pair
+        mgr_a.SEGMENT_COMPACT_AFTER = 2
+        mgr_a.publish_segment()
+        for i in range(2):
+            _add_supplier(mgr_a, 100 + i, f"A{i}")
+            mgr_a.publish_segment()
+        _add_supplier(mgr_a, 200, "A-last")
+        assert "snap_" in mgr_a.publish_segment()
+        files = _files(mgr_a, "device-a")
+        assert len(files) == 1 and files[0].startswith("snap_")
+
+
+class TestImport:
+    """Peers apply each other's files in order, past their watermark."""
+
+    def test_changes_and_deletes_propagate(self, pair):
+        mgr_a, mgr_b = pair
+        _add_supplier(mgr_a, 100, "Keep")
+        _add_supplier(mgr_a, 101, "Drop")
+        mgr_a.sync_segments()
+        mgr_b.sync_segments()
+        assert {"Keep", "Drop"} <= _names(mgr_b)
+
+        Repository(mgr_a.db).delete_supplier(101)
+        mgr_a.sync_segments()
+        assert mgr_b.import_segments() == {"suppliers": 1}
+        assert "Drop" not in _names(mgr_b)
+        assert mgr_b.import_segments() == {}  # Already applied
+
+    def test_ignores_the_folder_lock(self, pair, sync_folder):
+        mgr_a, mgr_b = pair
+        (sync_folder / SyncManager.LOCK_FILE).write_text(
+            json.dumps({"device_id": "crashed-device"}), encoding="utf-8",
+        )
+        _add_supplier(mgr_a, 100, "Unblocked")
+        mgr_a.sync_segments()
+        mgr_b.sync_segments()
+        assert "Unblocked" in _names(mgr_b)
+
+    def test_stops_at_gap(self, pair):
+        mgr_a, mgr_b = pair
+        mgr_a.publish_segment()
+        for i in range(3):
+            _add_supplier(mgr_a, 100 + i, f"A{i}")
+            mgr_a.publish_segment()
+        middle = [f for f in _files(mgr_a, "device-a")
+                  if f.startswith("seg_")][1]
+        (mgr_a._segment_dir("device-a") / middle).unlink()
+        mgr_b.import_segments()
+        names = _names(mgr_b)
+        assert "A0" in names and "A2" not in names
+
+    def test_lagging_peer_catches_up_from_snapshot(self, pair):
+        mgr_a, mgr_b = pair
+        mgr_a.SEGMENT_COMPACT_AFTER = 2
+        mgr_a.publish_segment()
+        mgr_b.import_segments()
+        for i in range(4):
+            _add_supplier(mgr_a, 100 + i, f"A{i}")
+            mgr_a.publish_segment()
+        assert not any(
+            f.startswith("seg_000000000000") for f in _files(mgr_a, "device-a")
+        )
+        mgr_b.import_segments()
+        assert {f"A{i}" for i in range(4)} <= _names(mgr_b)
+
+    def test_many_devices_sync_concurrently(self, tmp_path, sync_folder):
+        mgrs = [
+            _make_mgr(tmp_path, sync_folder, f"truck-{i}") for i in range(4)
+        ]
+        for i, mgr in enumerate(mgrs):
+            _add_supplier(mgr, 1000 * (i + 1), f"From truck-{i}")
+        for _ in range(2):
+            with ThreadPoolExecutor(len(mgrs)) as pool:
+                list(pool.map(lambda m: m.sync_segments(), mgrs))
+        expected = {f"From truck-{i}" for i in range(4)}
+        for mgr in mgrs:
+            assert expected <= _names(mgr)
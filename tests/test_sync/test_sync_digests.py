@@ -0,0 +1,173 @@
+"""Tests for per-table / per-range sync digests (v29)."""
+
+import shutil
+from unittest.mock import patch
+
+import pytest
+
+from wired_part.config import Config
+from wired_part.database.connection import DatabaseConnection
+from wired_part.database.models import Supplier
+from wired_part.database.repository import Repository
+from wired_part.database.schema import initialize_database
+from wired_part.sync.digests import (
+    RANGE_SIZE,
+    bucket_of,
+    diff_digests,
+    refresh_digests,
+)
+from wired_part.sync.sync_manager import SYNC_TABLES, SyncManager
+
+
+@pytest.fixture
+def sync_folder(tmp_path):
+    folder = tmp_path / "sync"
+    folder.mkdir()
+    return folder
+
+
+@pytest.fixture
+def db_a(tmp_path):
+    db = DatabaseConnection(str(tmp_path / "device_a.db"))
+    initialize_database(db)
+    return db
+
+
+@pytest.fixture
+def db_b(tmp_path, db_a):
+    """A converged peer: a byte-for-byte copy of device A."""
+    shutil.copy(db_a.db_path, tmp_path / "device_b.db")
+    return DatabaseConnection(str(tmp_path / "device_b.db"))
+
+
+def _make_mgr(db, sync_folder, device_id):
+    with patch.object(Config, "SYNC_ENABLED", True), \
+         patch.object(Config, "SYNC_FOLDER_PATH", str(sync_folder)), \
+         patch.object(Config, "LAST_SYNC_TIMESTAMP", ""), \
+         patch.object(Config, "DEVICE_ID", device_id), \
+         patch.object(Config, "get_device_id", return_value=device_id):
+        mgr = SyncManager(db)
+    return mgr
+
+
+def _digests(db, tables=SYNC_TABLES):
+    with db.get_connection() as conn:
+        return refresh_digests(conn, tables)
+
+
+def _add_supplier(db, supplier_id, name):
+    with db.get_connection() as conn:
+        conn.execute(
+            "INSERT INTO suppliers (id, name, created_at, updated_at) "
+            "VALUES (?, ?, '2026-01-01 00:00:00', '2026-01-01 00:00:00')",
+            (supplier_id, name),
+        )
+
+
+class TestDigests:
+    """Digests match for equal content and localise differences."""
+
+    def test_copies_have_equal_digests(self, db_a, db_b):
+        assert _digests(db_a) == _digests(db_b)
+
+    def test_change_only_affects_its_range(self, db_a, db_b):
+        _add_supplier(db_a, 1, "Low")
+        _add_supplier(db_a, RANGE_SIZE * 3, "High")
+        _add_supplier(db_b, 1, "Low")
+        _add_supplier(db_b, RANGE_SIZE * 3, "High (edited)")
+        mine, theirs = _digests(db_a), _digests(db_b)
+        plan = diff_digests(mine, theirs, SYNC_TABLES)
+        assert plan == {"suppliers": {"3"}}
+
+    def test_refresh_is_incremental(self, db_a):
+        _digests(db_a)
+        with patch(
+            "wired_part.sync.digests._hash_rows", return_value={},
+        ) as hashed:
+            _digests(db_a)
+        hashed.assert_not_called()  # Nothing journaled since
+
+    def test_delete_empties_bucket(self, db_a):
+        before = _digests(db_a, ["suppliers"])
+        _add_supplier(db_a, RANGE_SIZE * 2, "Gone soon")
+        assert _digests(db_a, ["suppliers"]) != before
+        with db_a.get_connection() as conn:
+            conn.execute("DELETE FROM suppliers WHERE id = ?",
+                         (RANGE_SIZE * 2,))
+        assert _digests(db_a, ["suppliers"]) == before
+
+    def test_compacted_journal_forces_full_rehash(self, db_a):
+        expected = _digests(db_a, ["suppliers"])
+        with db_a.get_connection() as conn:
+            conn.execute("UPDATE sync_digest_ranges SET digest = 'stale'")
+            conn.execute(
+                "UPDATE change_journal_state SET floor_seq = "
+                "(SELECT COALESCE(MAX(seq), 0) FROM change_journal) + 1"
+            )
+        assert _digests(db_a, ["suppliers"]) == expected
+
+    def test_bucket_keys(self):
+        assert bucket_of(0) == "0"
+        assert bucket_of(RANGE_SIZE + 1) == "1"
+        assert bucket_of("next_job") == "0"
+
+
+class TestDigestSkipping:
+    """Imports and exports skip content that already matches."""
+
+    @pytest.fixture(autouse=True)
+    def _no_config_writes(self):
+        with patch.object(Config, "update_last_sync"):
+            yield
+
+    def test_identical_peer_merges_nothing(self, db_a, db_b, sync_folder):
+        _make_mgr(db_b, sync_folder, "device-b").export_to_sync_folder()
+        mgr_a = _make_mgr(db_a, sync_folder, "device-a")
+        with patch.object(SyncManager, "_merge_table") as merge:
+            assert mgr_a.import_from_sync_folder() == {}
+        merge.assert_not_called()
+
+    def test_only_differing_ranges_are_merged(
+        self, db_a, db_b, sync_folder,
+    ):
+        for db in (db_a, db_b):
+            _add_supplier(db, 5, "Shared")
+        _add_supplier(db_b, RANGE_SIZE * 4, "New on B")
+        _make_mgr(db_b, sync_folder, "device-b").export_to_sync_folder()
+
+        mgr_a = _make_mgr(db_a, sync_folder, "device-a")
+        merged = []
+        real = SyncManager._merge_table
+
+        def spy(self, conn, table, rows):
+            merged.append((table, [r["id"] for r in rows]))
+            return real(self, conn, table, rows)
+
+        with patch.object(SyncManager, "_merge_table", spy):
+            assert mgr_a.import_from_sync_folder() == {"suppliers": 1}
+        assert merged == [("suppliers", [RANGE_SIZE * 4])]
+        names = {s.name for s in Repository(db_a).get_all_suppliers()}
+        assert "New on B" in names
+
+    def test_unchanged_export_is_not_rewritten(self, db_a, sync_folder):
+        mgr = _make_mgr(db_a, sync_folder, "device-a")
+        path = mgr._export_path("device-a")
+        assert mgr._write_export(path) is True
+        assert mgr._write_export(path) is False
+        Repository(db_a).create_supplier(Supplier(name="Changed"))
+        assert mgr._write_export(path) is True
+
+
+class TestDigestMigration:
+    """Upgrading a v28 database creates the digest cache."""
+
+    def test_migrates_from_v28(self, db_a):
+        with db_a.get_connection() as conn:
+            conn.execute("DROP TABLE sync_digest_ranges")
+            conn.execute("DROP TABLE sync_digest_state")
+            conn.execute("DELETE FROM schema_version WHERE version > 28")
+            conn.execute(
+                "INSERT OR IGNORE INTO schema_version (version) VALUES (28)"
+            )
+        initialize_database(db_a)
+        assert _digests(db_a, ["suppliers"])["suppliers"]["rows"] == 0
@@ -0,0 +1,194 @@
+"""Tests for the streaming, compressed sync file format."""
+
+import json
+import zlib
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from wired_part.config import Config
+from wired_part.database.connection import DatabaseConnection
+from wired_part.database.models import Supplier
+from wired_part.database.repository import Repository
+from wired_part.database.schema import initialize_database
+from wired_part.sync import sync_format
+from wired_part.sync.sync_format import (
+    SyncFileReader,
+    SyncFileWriter,
+    SyncFormatError,
+    content_hash,
+    read_footer,
+    read_sync_file,
+    write_sync_file,
+)
+from wired_part.sync.sync_manager import SyncCancelled, SyncManager
+
+
+def _export(rows=3):
+    return {
+        "device_id": "dev", "schema_version": 28, "journal_seq": 7,
+        "tables": {
+            "parts": [{"id": i, "name": f"P{i}"} for i in range(1, rows + 1)],
+        },
+        "deletes": {"jobs": [4, 9]},
+    }
+
+
+class TestRoundTrip:
+    """Files written by the writer read back unchanged."""
+
+    @pytest.mark.parametrize("codec", ["zlib", "lzma"])
+    def test_round_trip(self, tmp_path, codec):
+        path = tmp_path / "x.jsonl.z"
+        write_sync_file(path, _export(), codec)
+        data = read_sync_file(path)
+        assert data["device_id"] == "dev"
+        assert data["journal_seq"] == 7
+        assert data["tables"] == _export()["tables"]
+        assert data["deletes"] == {"jobs": [4, 9]}
+
+    def test_rows_arrive_in_bounded_batches(self, tmp_path):
+        path = tmp_path / "x.jsonl.z"
+        write_sync_file(path, _export(rows=25))
+        with SyncFileReader(path) as reader:
+            sizes = [len(p) for kind, _, p in reader.batches(10)
+                     if kind == "rows"]
+        assert sizes == [10, 10, 5]
+
+    def test_columns_are_written_once(self, tmp_path):
+        path = tmp_path / "x.jsonl.z"
+        write_sync_file(path, _export(rows=50))
+        raw = zlib.decompress(path.read_bytes()[len(sync_format.MAGIC) + 1:])
+        assert raw.count(b'"name"') == 1
+
+    def test_decodes_across_small_chunks(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(sync_format, "_READ_CHUNK", 7)
+        path = tmp_path / "x.jsonl.z"
+        write_sync_file(path, _export(rows=40))
+        assert len(read_sync_file(path)["tables"]["parts"]) == 40
+
+
+class TestRobustness:
+    """Damaged files are rejected rather than half-applied."""
+
+    def test_truncated_file_is_rejected(self, tmp_path):
+        path = tmp_path / "x.jsonl.z"
+        write_sync_file(path, _export(rows=200))
+        raw = path.read_bytes()
+        path.write_bytes(raw[:len(raw) // 2])
+        with pytest.raises(SyncFormatError):
+            read_sync_file(path)
+
+    def test_failed_write_keeps_previous_file(self, tmp_path):
+        path = tmp_path / "x.jsonl.z"
+        write_sync_file(path, _export())
+        with pytest.raises(RuntimeError):
+            with SyncFileWriter(path) as out:
+                out.write_header({"device_id": "new"})
+                raise RuntimeError("disk full")
+        assert read_sync_file(path)["device_id"] == "dev"
+        assert list(tmp_path.iterdir()) == [path]
+
+    def test_footer_identifies_content(self, tmp_path):
+        a, b = tmp_path / "a.jsonl.z", tmp_path / "b.jsonl.z"
+        write_sync_file(a, _export())
+        write_sync_file(b, _export(rows=4))
+        assert read_footer(a)[1] == a.stat().st_size - 30
+        assert content_hash(a) == read_footer(a)[0] != content_hash(b)
+
+    def test_truncated_file_has_no_footer(self, tmp_path):
+        path = tmp_path / "x.jsonl.z"
+        write_sync_file(path, _export())
+        path.write_bytes(path.read_bytes()[:-5])
+        assert read_footer(path) is None
+        assert content_hash(path) is None
+
+    def test_corrupted_body_fails_hash_check(self, tmp_path):
+        path = tmp_path / "x.jsonl.z"
+        write_sync_file(path, _export(rows=50))
+        raw = bytearray(path.read_bytes())
+        raw[8] ^= 0xFF
+        path.write_bytes(bytes(raw))
+        with pytest.raises(SyncFormatError):
+            read_sync_file(path)
+
+    def test_reads_legacy_json(self, tmp_path):
+        path = tmp_path / "x.json"
+        path.write_text(json.dumps(_export(), indent=2), encoding="utf-8")
+        with SyncFileReader(path) as reader:
+            assert reader.format_version == 1
+        assert read_sync_file(path)["tables"] == _export()["tables"]
+
+    def test_garbage_is_rejected(self, tmp_path):
+        path = tmp_path / "x.json"
+        path.write_bytes(b"\x00\x01 not a sync file")
+        with pytest.raises(SyncFormatError):
+            read_sync_file(path)
+
+
+def _make_mgr(tmp_path, device_id):
+    db = DatabaseConnection(str(tmp_path / f"{device_id}.db"))
+    initialize_database(db)
+    folder = tmp_path / "sync"
+    folder.mkdir(exist_ok=True)
+    with patch.object(Config, "SYNC_ENABLED", True), \
+         patch.object(Config, "SYNC_FOLDER_PATH", str(folder)), \
+         patch.object(Config, "LAST_SYNC_TIMESTAMP", ""), \
+         patch.object(Config, "DEVICE_ID", device_id), \
+         patch.object(Config, "get_device_id", return_value=device_id):
+        mgr = SyncManager(db)
+    return mgr
+
+
+class TestSyncFolderFiles:
+    """SyncManager writes v2 files and still imports v1 peers."""
+
+    @pytest.fixture(autouse=True)
+    def _no_config_writes(self):
+        with patch.object(Config, "update_last_sync"):
+            yield
+
+    def test_export_writes_compressed_stream(self, tmp_path):
+        mgr = _make_mgr(tmp_path, "device-a")
+        legacy = mgr.sync_folder / "wiredpart_sync_device-a.json"
+        legacy.write_text("{}", encoding="utf-8")
+        path = mgr.export_to_sync_folder()
+        assert path.endswith("wiredpart_sync_device-a.jsonl.z")
+        with open(path, "rb") as fh:
+            assert fh.read(4) == sync_format.MAGIC
+        assert not legacy.exists()
+
+    def test_cancelled_export_leaves_no_file(self, tmp_path):
+        mgr = _make_mgr(tmp_path, "device-a")
+        checks = []
+        # Let the first check pass, then cancel while tables stream out
+        mgr.cancel_requested = lambda: bool(checks.append(1)) or len(checks) > 1
+        with pytest.raises(SyncCancelled):
+            mgr.export_to_sync_folder()
+        assert len(checks) == 2
+        assert list(mgr.sync_folder.iterdir()) == []
+
+    def test_imports_legacy_peer_file(self, tmp_path):
+        mgr_b = _make_mgr(tmp_path, "device-b")
+        Repository(mgr_b.db).create_supplier(Supplier(name="Legacy B"))
+        legacy = mgr_b.sync_folder / "wiredpart_sync_device-b.json"
+        legacy.write_text(
+            json.dumps(mgr_b._build_export(), indent=2, default=str),
+            encoding="utf-8",
+        )
+        mgr_a = _make_mgr(tmp_path, "device-a")
+        assert mgr_a.import_from_sync_folder()["suppliers"] == 1
+
+    def test_truncated_peer_file_is_rolled_back(self, tmp_path):
+        mgr_b = _make_mgr(tmp_path, "device-b")
+        repo_b = Repository(mgr_b.db)
+        for i in range(300):
+            repo_b.create_supplier(Supplier(name=f"Supplier {i}"))
+        path = mgr_b.export_to_sync_folder()
+        raw = Path(path).read_bytes()
+        Path(path).write_bytes(raw[:-40])
+        mgr_a = _make_mgr(tmp_path, "device-a")
+        assert mgr_a.import_from_sync_folder() == {}
+        names = {s.name for s in Repository(mgr_a.db).get_all_suppliers()}
+        assert "Supplier 0" not in names
@@ -8,8 +8,6 @@ Simulated user feedback driving each section:
   Loop 35 — "The sync status just says 'Last sync: 2 hours ago' — is it working?"
 """
 
-import json
-from pathlib import Path
 from unittest.mock import patch
 
 import pytest
@@ -19,6 +17,7 @@ from wired_part.database.connection import DatabaseConnection
 from wired_part.database.models import Category, Part, Supplier
 from wired_part.database.repository import Repository
 from wired_part.database.schema import initialize_database
+from wired_part.sync.sync_format import read_sync_file
 from wired_part.sync.sync_manager import SyncManager
 
 
@@ -84,7 +83,7 @@ class TestConflictDetection:
 
         mgr_b = _make_mgr(db_b, sync_folder, "device-b")
         path = mgr_b.export_to_sync_folder()
-        data = json.loads(Path(path).read_text(encoding="utf-8"))
+        data = read_sync_file(path)
 
         mgr_a = _make_mgr(db_a, sync_folder, "device-a")
         conflicts = mgr_a.detect_conflicts(data)
@@ -119,7 +118,7 @@ class TestConflictDetection:
 
         mgr_b = _make_mgr(db_b, sync_folder, "device-b")
         path = mgr_b.export_to_sync_folder()
-        data = json.loads(Path(path).read_text(encoding="utf-8"))
+        data = read_sync_file(path)
 
         mgr_a = _make_mgr(db_a, sync_folder, "device-a")
         conflicts = mgr_a.detect_conflicts(data)
@@ -155,7 +154,7 @@ class TestConflictDetection:
 
         mgr_b = _make_mgr(db_b, sync_folder, "device-b")
         path = mgr_b.export_to_sync_folder()
-        data = json.loads(Path(path).read_text(encoding="utf-8"))
+        data = read_sync_file(path)
 
         mgr_a = _make_mgr(db_a, sync_folder, "device-a")
         conflicts = mgr_a.detect_conflicts(data)
@@ -175,7 +174,7 @@ class TestConflictDetection:
 
         mgr_b = _make_mgr(db_b, sync_folder, "device-b")
         path = mgr_b.export_to_sync_folder()
-        data = json.loads(Path(path).read_text(encoding="utf-8"))
+        data = read_sync_file(path)
 
         mgr_a = _make_mgr(db_a, sync_folder, "device-a")
         conflicts = mgr_a.detect_conflicts(data)
@@ -187,7 +186,7 @@ class TestConflictDetection:
         repo_b.create_supplier(Supplier(name="Test"))
         mgr_b = _make_mgr(db_b, sync_folder, "device-b")
         path = mgr_b.export_to_sync_folder()
-        data = json.loads(Path(path).read_text(encoding="utf-8"))
+        data = read_sync_file(path)
         data["schema_version"] = 999
 
         mgr_a = _make_mgr(db_a, sync_folder, "device-a")
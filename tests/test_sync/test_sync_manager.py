@@ -13,6 +13,7 @@ from wired_part.database.connection import DatabaseConnection
 from wired_part.database.models import Job, Part, Supplier, User
 from wired_part.database.repository import Repository
 from wired_part.database.schema import initialize_database
+from wired_part.sync.sync_format import read_sync_file, write_sync_file
 from wired_part.sync.sync_manager import (
     SyncError,
     SyncLockError,
@@ -107,7 +108,7 @@ class TestExport:
         ))
         mgr = _make_sync_manager(db_a, sync_folder)
         path = mgr.export_to_sync_folder()
-        data = json.loads(Path(path).read_text(encoding="utf-8"))
+        data = read_sync_file(path)
 
         assert "tables" in data
         assert "parts" in data["tables"]
@@ -117,7 +118,7 @@ class TestExport:
     def test_export_includes_schema_version(self, db_a, sync_folder):
         mgr = _make_sync_manager(db_a, sync_folder)
         path = mgr.export_to_sync_folder()
-        data = json.loads(Path(path).read_text(encoding="utf-8"))
+        data = read_sync_file(path)
         assert "schema_version" in data
         assert data["schema_version"] > 0
 
@@ -230,9 +231,9 @@ class TestFullSync:
         path = mgr_b.export_to_sync_folder()
 
         # Tamper with schema version in export
-        data = json.loads(Path(path).read_text(encoding="utf-8"))
+        data = read_sync_file(path)
         data["schema_version"] = 999
-        Path(path).write_text(json.dumps(data), encoding="utf-8")
+        write_sync_file(path, data)
 
         # Device A imports — should skip due to schema mismatch
         mgr_a = _make_sync_manager(db_a, sync_folder, "device-a")
@@ -20,6 +20,7 @@ from wired_part.database.connection import DatabaseConnection
 from wired_part.database.models import Supplier
 from wired_part.database.repository import Repository
 from wired_part.database.schema import initialize_database
+from wired_part.sync.sync_format import read_sync_file, write_sync_file
 from wired_part.sync.sync_manager import SYNC_TABLES, SyncManager
 
 
@@ -146,9 +147,9 @@ class TestSchemaCompatibility:
         path = mgr_b.export_to_sync_folder()
 
         # Tamper schema version
-        data = json.loads(Path(path).read_text(encoding="utf-8"))
+        data = read_sync_file(path)
         data["schema_version"] = 999
-        Path(path).write_text(json.dumps(data), encoding="utf-8")
+        write_sync_file(path, data)
 
         mgr_a = _make_mgr(db_a, sync_folder, "device-a")
         result = mgr_a.check_schema_compatibility()
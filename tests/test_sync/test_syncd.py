@@ -0,0 +1,232 @@
+"""Tests for the wired-part-syncd server and its HTTP transport."""
+
+import socket
+from unittest.mock import patch
+
+import pytest
+
+from wired_part.config import Config
+from wired_part.database.connection import DatabaseConnection
+from wired_part.database.models import Supplier
+from wired_part.database.repository import Repository
+from wired_part.database.schema import initialize_database
+from wired_part.sync.segments import segment_name
+from wired_part.sync.sync_manager import SyncCancelled, SyncManager
+from wired_part.sync.syncd import SegmentStore, SyncServer
+from wired_part.sync.transport import SyncServerClient, SyncServerError
+
+
+def _make_mgr(tmp_path, device_id, sync_folder=None):
+    db = DatabaseConnection(str(tmp_path / f"{device_id}.db"))
+    initialize_database(db)
+    with patch.object(Config, "SYNC_ENABLED", sync_folder is not None), \
+         patch.object(Config, "SYNC_FOLDER_PATH", str(sync_folder or "")), \
+         patch.object(Config, "LAST_SYNC_TIMESTAMP", ""), \
+         patch.object(Config, "DEVICE_ID", device_id), \
+         patch.object(Config, "get_device_id", return_value=device_id):
+        mgr = SyncManager(db)
+    return mgr
+
+
+def _add_supplier(mgr, supplier_id, name):
+    with mgr.db.get_connection() as conn:
+        conn.execute(
+            "INSERT INTO suppliers (id, name) VALUES (?, ?)",
+            (supplier_id, name),
+        )
+
+
+def _names(mgr):
+    return {s.name for s in Repository(mgr.db).get_all_suppliers()}
+
+
+@pytest.fixture(autouse=True)
+def _no_config_writes():
+    with patch.object(Config, "update_last_sync"):
+        yield
+
+
+@pytest.fixture
+def server(tmp_path):
+    srv = SyncServer(tmp_path / "syncd", port=0).start()
+    yield srv
+    srv.stop()
+
+
+@pytest.fixture
+def devices(tmp_path):
+    return [_make_mgr(tmp_path, f"device-{n}") for n in "abc"]
+
+
+class TestServerSync:
+    """Devices converge through the server without a sync folder."""
+
+    def test_changes_and_deletes_propagate(self, server, devices):
+        for n, mgr in enumerate(devices):
+            _add_supplier(mgr, 1000 + n, f"From {mgr.device_id}")
+        for _ in range(2):
+            for mgr in devices:
+                mgr.sync_server(server.url)
+        expected = {"From device-a", "From device-b", "From device-c"}
+        assert all(expected <= _names(mgr) for mgr in devices)
+
+        Repository(devices[0].db).delete_supplier(1001)
+        for mgr in devices:
+            mgr.sync_server(server.url)
+        assert all("From device-b" not in _names(mgr) for mgr in devices)
+
+    def test_uses_configured_url(self, server, devices):
+        with patch.object(Config, "SYNC_SERVER_URL", server.url):
+            assert devices[0].sync_server() == {}
+        assert "device-a" in server.store.status()["devices"]
+
+    def test_nothing_new_pushes_nothing(self, server, devices):
+        mgr = devices[0]
+        mgr.sync_server(server.url)
+        with SyncServerClient(server.url) as client:
+            assert mgr.push_to_server(client) is None
+
+    def test_large_pull_arrives_in_several_responses(self, server, devices):
+        a, b = devices[:2]
+        for n in range(3):
+            _add_supplier(a, 1000 + n, f"Batch {n}")
+            a.sync_server(server.url)
+        server.store.PULL_MAX_BYTES = 1  # One file per response
+        with SyncServerClient(server.url) as client:
+            pulls = []
+            real = client.pull
+            with patch.object(client, "pull",
+                              side_effect=lambda *a: pulls.append(1)
+                              or real(*a)):
+                b.import_from_server(client)
+        assert {"Batch 0", "Batch 1", "Batch 2"} <= _names(b)
+        assert len(pulls) >= 3
+
+    def test_cancelled_pull_resumes_next_time(self, server, devices):
+        a, b = devices[:2]
+        for n in range(3):
+            _add_supplier(a, 1000 + n, f"Batch {n}")
+            a.sync_server(server.url)
+        events = []
+        b.progress_callback = events.append
+        b.cancel_requested = lambda: any(e.done and not e.table
+                                         for e in events)
+        with pytest.raises(SyncCancelled):
+            b.sync_server(server.url)
+        assert b.get_peer_watermarks()
+        b.cancel_requested = None
+        b.sync_server(server.url)
+        assert {"Batch 0", "Batch 1", "Batch 2"} <= _names(b)
+
+    def test_tombstones_collected_once_all_acknowledge(
+        self, server, devices,
+    ):
+        a = devices[0]
+        sup_id = Repository(a.db).create_supplier(Supplier(name="Short"))
+        for mgr in devices:
+            mgr.sync_server(server.url)
+        Repository(a.db).delete_supplier(sup_id)
+        a.sync_server(server.url)
+        assert a.db.execute("SELECT COUNT(*) AS n FROM sync_tombstones")[0]["n"]
+        for mgr in devices:
+            mgr.sync_server(server.url)
+        a.sync_server(server.url)
+        assert a.db.execute(
+            "SELECT COUNT(*) AS n FROM sync_tombstones"
+        )[0]["n"] == 0
+
+    def test_server_store_is_a_sync_folder(self, tmp_path, server, devices):
+        a = devices[0]
+        _add_supplier(a, 1000, "Via server")
+        a.sync_server(server.url)
+        folder_user = _make_mgr(tmp_path, "folder-user", server.store.root)
+        assert folder_user.import_segments() == {"suppliers": 1}
+
+
+class TestServerProtocol:
+    """The server validates what it appends."""
+
+    def _segment(self, tmp_path, mgr):
+        _add_supplier(mgr, 1000, "Pushed")
+        return mgr._write_segment(tmp_path, 0, 0)  # A snapshot
+
+    def test_push_is_idempotent(self, tmp_path, server, devices):
+        path = self._segment(tmp_path, devices[0])
+        with SyncServerClient(server.url) as client:
+            first = client.push("device-a", path)
+            assert client.push("device-a", path) == first
+
+    def test_segment_must_continue_the_log(self, tmp_path, server, devices):
+        path = self._segment(tmp_path, devices[0])
+        gap = path.with_name(segment_name(999, 1000))
+        gap.write_bytes(path.read_bytes())
+        with SyncServerClient(server.url) as client:
+            with pytest.raises(SyncServerError) as err:
+                client.push("device-a", gap)
+        assert err.value.status in (400, 409)
+
+    def test_rejects_corrupt_file(self, tmp_path, server, devices):
+        path = self._segment(tmp_path, devices[0])
+        data = bytearray(path.read_bytes())
+        data[len(data) // 2] ^= 0xFF
+        path.write_bytes(bytes(data))
+        with SyncServerClient(server.url) as client:
+            with pytest.raises(SyncServerError) as err:
+                client.push("device-a", path)
+            assert err.value.status == 400
+            assert client.status()["devices"].get("device-a") is None
+
+    def test_rejects_other_devices_file(self, tmp_path, server, devices):
+        path = self._segment(tmp_path, devices[0])
+        with SyncServerClient(server.url) as client:
+            with pytest.raises(SyncServerError):
+                client.push("device-b", path)
+
+    def test_rejects_bad_device_id(self, server):
+        with SyncServerClient(server.url) as client:
+            with pytest.raises(SyncServerError) as err:
+                client.put_acks("../escape", {})
+        assert err.value.status == 400
+
+    def test_unreachable_server_raises_oserror(self, devices):
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            port = sock.getsockname()[1]
+        with pytest.raises(OSError):
+            devices[0].sync_server(f"http://127.0.0.1:{port}")
+
+    def test_rejects_oversized_push(self, tmp_path, server, devices):
+        path = self._segment(tmp_path, devices[0])
+        with patch.object(SegmentStore, "PUSH_MAX_BYTES", 16):
+            with SyncServerClient(server.url) as client:
+                with pytest.raises(SyncServerError) as err:
+                    client.push("device-a", path)
+        assert err.value.status == 413
+
+
+class TestServerAuth:
+    """A server with a token refuses requests without it."""
+
+    @pytest.fixture
+    def secured(self, tmp_path):
+        srv = SyncServer(tmp_path / "syncd", port=0, token="s3cret").start()
+        yield srv
+        srv.stop()
+
+    def test_requires_token(self, secured):
+        for token in ("", "wrong"):
+            with SyncServerClient(secured.url, token) as client:
+                with pytest.raises(SyncServerError) as err:
+                    client.status()
+            assert err.value.status == 401
+
+    def test_devices_sync_with_configured_token(self, secured, devices):
+        _add_supplier(devices[0], 1000, "Authorised")
+        with patch.object(Config, "SYNC_SERVER_TOKEN", "s3cret"):
+            devices[0].sync_server(secured.url)
+            devices[1].sync_server(secured.url)
+        assert "Authorised" in _names(devices[1])
+
+    def test_refuses_lan_address_without_token(self, tmp_path):
+        with pytest.raises(ValueError):
+            SyncServer(tmp_path / "syncd", host="0.0.0.0", port=0)
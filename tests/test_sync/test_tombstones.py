@@ -0,0 +1,267 @@
+"""Tests for trigger-captured sync tombstones (v31)."""
+
+from unittest.mock import patch
+
+import pytest
+
+from wired_part.config import Config
+from wired_part.database.connection import DatabaseConnection
+from wired_part.database.models import Notification, Supplier
+from wired_part.database.repository import Repository
+from wired_part.database.schema import initialize_database
+from wired_part.sync.sync_manager import SyncManager
+
+
+@pytest.fixture
+def sync_folder(tmp_path):
+    folder = tmp_path / "sync"
+    folder.mkdir()
+    return folder
+
+
+def _make_mgr(tmp_path, sync_folder, device_id):
+    db = DatabaseConnection(str(tmp_path / f"{device_id}.db"))
+    initialize_database(db)
+    with patch.object(Config, "SYNC_ENABLED", True), \
+         patch.object(Config, "SYNC_FOLDER_PATH", str(sync_folder)), \
+         patch.object(Config, "LAST_SYNC_TIMESTAMP", ""), \
+         patch.object(Config, "DEVICE_ID", device_id), \
+         patch.object(Config, "get_device_id", return_value=device_id):
+        mgr = SyncManager(db)
+    return mgr
+
+
+def _tombstones(db):
+    return [
+        (r["table_name"], r["row_id"]) for r in db.execute(
+            "SELECT table_name, row_id FROM sync_tombstones ORDER BY seq"
+        )
+    ]
+
+
+@pytest.fixture
+def mgr(tmp_path, sync_folder):
+    return _make_mgr(tmp_path, sync_folder, "device-a")
+
+
+@pytest.fixture
+def pair(tmp_path, sync_folder, mgr):
+    """Two devices that have completed an initial delta sync."""
+    mgr_b = _make_mgr(tmp_path, sync_folder, "device-b")
+    with patch.object(Config, "update_last_sync"):
+        mgr_b.export_deltas_to_sync_folder()  # Announces device-b
+        mgr.export_deltas_to_sync_folder()
+        mgr_b.import_deltas_from_sync_folder()
+    return mgr, mgr_b
+
+
+class TestCapture:
+    """Deletes leave one tombstone each; re-inserts clear it."""
+
+    def test_delete_leaves_tombstone_at_journal_seq(self, mgr):
+        repo = Repository(mgr.db)
+        sup_id = repo.create_supplier(Supplier(name="Doomed"))
+        repo.delete_supplier(sup_id)
+        assert _tombstones(mgr.db) == [("suppliers", sup_id)]
+        seq = mgr.db.execute("SELECT seq FROM sync_tombstones")[0]["seq"]
+        assert seq == repo.get_change_journal_seq()
+
+    def test_reinsert_clears_tombstone(self, mgr):
+        repo = Repository(mgr.db)
+        sup_id = repo.create_supplier(Supplier(name="Back again"))
+        repo.delete_supplier(sup_id)
+        with mgr.db.get_connection() as conn:
+            conn.execute(
+                "INSERT INTO suppliers (id, name) VALUES (?, 'Back again')",
+                (sup_id,),
+            )
+        assert _tombstones(mgr.db) == []
+
+    def test_stale_copy_does_not_resurrect_row(self, mgr):
+        repo = Repository(mgr.db)
+        sup_id = repo.create_supplier(Supplier(name="Deleted here"))
+        row = dict(mgr.db.execute(
+            "SELECT * FROM suppliers WHERE id = ?", (sup_id,),
+        )[0])
+        repo.delete_supplier(sup_id)
+        with mgr.db.get_connection() as conn:
+            assert mgr._merge_table(conn, "suppliers", [row]) == 0
+        assert repo.get_supplier_by_id(sup_id) is None
+
+    def test_survives_journal_compaction(self, mgr):
+        repo = Repository(mgr.db)
+        sup_id = repo.create_supplier(Supplier(name="Old news"))
+        repo.delete_supplier(sup_id)
+        repo.compact_change_journal(max_entries=0)
+        assert _tombstones(mgr.db) == [("suppliers", sup_id)]
+
+    def test_archived_activity_leaves_no_tombstones(self, mgr):
+        repo = Repository(mgr.db)
+        entry_id = repo.log_activity(None, "updated", "job", 1, "", sync=True)
+        with mgr.db.get_connection() as conn:
+            conn.execute(
+                "UPDATE activity_log SET created_at = '2020-01-15 08:00:00' "
+                "WHERE id = ?", (entry_id,),
+            )
+        assert repo.archive_activity_log(older_than_days=30)["archived"] == 1
+        assert _tombstones(mgr.db) == []
+
+
+class TestRetiredRows:
+    """Rows a device archived or expired are not merged back in."""
+
+    @staticmethod
+    def _notify(db, title, created_at="2020-01-15 08:00:00"):
+        nid = Repository(db).create_notification(Notification(
+            title=title, message="m",
+        ))
+        with db.get_connection() as conn:
+            conn.execute(
+                "UPDATE notifications SET created_at = ? WHERE id = ?",
+                (created_at, nid),
+            )
+        return nid
+
+    @staticmethod
+    def _sync(*managers):
+        with patch.object(Config, "update_last_sync"):
+            return [mgr.sync() for mgr in managers]
+
+    def test_archived_notification_stays_archived(self, pair):
+        mgr_a, mgr_b = pair
+        old = self._notify(mgr_a.db, "Old")
+        self._sync(mgr_a, mgr_b)
+        repo_b = Repository(mgr_b.db)
+        assert repo_b.archive_notifications(hot_days=30) == 1
+
+        fresh = self._notify(
+            mgr_a.db, "Fresh", created_at="2099-01-01 00:00:00",
+        )
+        _, summary_b = self._sync(mgr_a, mgr_b)
+        assert summary_b.get("notifications") == 1
+        live = {r["id"] for r in mgr_b.db.execute(
+            "SELECT id FROM notifications"
+        )}
+        assert live == {fresh}
+        assert old not in live
+
+    def test_expired_notification_stays_expired(self, pair):
+        mgr_a, mgr_b = pair
+        with mgr_a.db.get_connection() as conn:
+            conn.execute("""
+                INSERT INTO notifications
+                    (title, message, source, created_at)
+                VALUES ('Reminder', 'm', 'reminder_agent',
+                        '2020-01-15 08:00:00')
+            """)
+        self._sync(mgr_a, mgr_b)
+        assert Repository(mgr_b.db).expire_notifications() == 1
+        fresh = self._notify(
+            mgr_a.db, "Fresh", created_at="2099-01-01 00:00:00",
+        )
+        self._sync(mgr_a, mgr_b)
+        assert [r["id"] for r in mgr_b.db.execute(
+            "SELECT id FROM notifications"
+        )] == [fresh]
+
+    def test_archived_activity_stays_archived(self, pair):
+        mgr_a, mgr_b = pair
+        entry_id = Repository(mgr_a.db).log_activity(
+            None, "updated", "job", 1, "", sync=True,
+        )
+        with mgr_a.db.get_connection() as conn:
+            conn.execute(
+                "UPDATE activity_log SET created_at = '2020-01-15 08:00:00' "
+                "WHERE id = ?", (entry_id,),
+            )
+        self._sync(mgr_a, mgr_b)
+        repo_b = Repository(mgr_b.db)
+        assert repo_b.archive_activity_log(older_than_days=30)[
+            "archived"
+        ] == 1
+
+        Repository(mgr_a.db).log_activity(
+            None, "created", "job", 2, "", sync=True,
+        )
+        self._sync(mgr_a, mgr_b)
+        assert mgr_b.db.execute(
+            "SELECT id FROM activity_log WHERE id = ?", (entry_id,),
+        ) == []
+        assert [
+            e.id for e in repo_b.get_activity_log() if e.entity_id == 1
+        ] == [entry_id]
+
+
+class TestExport:
+    """Exports list tombstones instead of diffing id sets."""
+
+    def test_export_with_deletions_reads_tombstones(self, mgr):
+        repo = Repository(mgr.db)
+        sup_id = repo.create_supplier(Supplier(name="Gone"))
+        repo.delete_supplier(sup_id)
+        with patch.object(SyncManager, "_export_table", return_value=[]):
+            export = mgr.export_with_deletions()
+        assert export["tombstones"] == {"suppliers": [sup_id]}
+
+    def test_snapshot_after_compaction_carries_deletes(self, pair):
+        mgr_a, _ = pair
+        repo = Repository(mgr_a.db)
+        sup_id = repo.create_supplier(Supplier(name="Gone"))
+        repo.delete_supplier(sup_id)
+        with mgr_a.db.get_connection() as conn:
+            conn.execute(
+                "UPDATE change_journal_state SET floor_seq = "
+                "(SELECT MAX(seq) FROM change_journal) + 1"
+            )
+        data = mgr_a.export_delta("device-b")
+        assert data["full"] is True
+        assert data["deletes"] == {"suppliers": [sup_id]}
+
+
+class TestCollection:
+    """Tombstones go once every known peer has acknowledged them."""
+
+    def test_kept_until_acknowledged(self, pair):
+        mgr_a, mgr_b = pair
+        repo = Repository(mgr_a.db)
+        sup_id = repo.create_supplier(Supplier(name="Gone"))
+        repo.delete_supplier(sup_id)
+        assert mgr_a.collect_tombstones() == 0
+
+        with patch.object(Config, "update_last_sync"):
+            mgr_a.export_deltas_to_sync_folder()
+            mgr_b.import_deltas_from_sync_folder()
+        assert mgr_a.collect_tombstones() == 1
+        assert _tombstones(mgr_a.db) == []
+
+    def test_unacknowledged_peer_holds_collection(self, pair):
+        mgr_a, mgr_b = pair
+        Repository(mgr_a.db).delete_supplier(
+            Repository(mgr_a.db).create_supplier(Supplier(name="Gone"))
+        )
+        with patch.object(Config, "update_last_sync"):
+            mgr_a.export_deltas_to_sync_folder()
+            mgr_b.import_deltas_from_sync_folder()
+        with patch.object(SyncManager, "get_sync_peers",
+                          return_value=["device-b", "device-c"]):
+            assert mgr_a.collect_tombstones() == 0
+
+
+class TestTombstoneMigration:
+    """Upgrading a v30 database seeds tombstones from the journal."""
+
+    def test_migrates_from_v30(self, mgr):
+        repo = Repository(mgr.db)
+        sup_id = repo.create_supplier(Supplier(name="Gone"))
+        repo.delete_supplier(sup_id)
+        kept = repo.create_supplier(Supplier(name="Kept"))
+        with mgr.db.get_connection() as conn:
+            conn.execute("DROP TABLE sync_tombstones")
+            conn.execute("DELETE FROM schema_version WHERE version > 30")
+            conn.execute(
+                "INSERT OR IGNORE INTO schema_version (version) VALUES (30)"
+            )
+        initialize_database(mgr.db)
+        assert _tombstones(mgr.db) == [("suppliers", sup_id)]
+        repo.delete_supplier(kept)
+        assert _tombstones(mgr.db)[-1] == ("suppliers", kept)
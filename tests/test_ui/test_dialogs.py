@@ -115,6 +115,14 @@ class TestJobDialog:
         qtbot.addWidget(dlg)
         assert dlg.name_input is not None
 
+    def test_cancelled_dialog_does_not_use_a_number(self, qtbot, repo):
+        from wired_part.ui.dialogs.job_dialog import JobDialog
+        dlg = JobDialog(repo)
+        qtbot.addWidget(dlg)
+        shown = dlg.job_number_input.text()
+        dlg.reject()
+        assert repo.generate_job_number() == shown
+
     def test_creates_for_edit(self, qtbot, repo, sample_job):
         from wired_part.ui.dialogs.job_dialog import JobDialog
         dlg = JobDialog(repo, job=sample_job)
@@ -0,0 +1,63 @@
+"""pytest-qt tests for the domain event relay and live page refresh."""
+
+from wired_part.database.events import EventBus, PartsChanged
+from wired_part.database.models import Part
+from wired_part.ui.domain_events import DomainEventRelay
+from wired_part.ui.pages.inventory_page import InventoryPage
+
+
+class TestDomainEventRelay:
+    def test_coalesces_per_tick(self, qtbot):
+        bus = EventBus()
+        relay = DomainEventRelay(bus)
+        batches = []
+        relay.events_ready.connect(batches.append)
+        bus.publish(PartsChanged(frozenset({1})))
+        bus.publish(PartsChanged(frozenset({2})))
+        assert batches == []  # Delivered on the next event-loop tick
+        qtbot.waitUntil(lambda: len(batches) == 1)
+        assert batches[0] == [PartsChanged(frozenset({1, 2}))]
+
+    def test_close_unsubscribes(self, qtbot):
+        bus = EventBus()
+        relay = DomainEventRelay(bus)
+        batches = []
+        relay.events_ready.connect(batches.append)
+        relay.close()
+        bus.publish(PartsChanged())
+        qtbot.wait(10)
+        assert batches == []
+
+
+class TestInventoryPageLiveRefresh:
+    def test_not_stale_until_something_changes(self, qtbot, repo):
+        page = InventoryPage(repo)
+        qtbot.addWidget(page)
+        assert not page.is_stale()
+        repo.create_part(Part(part_number="LR-1"))
+        assert page.is_stale()
+        page.refresh()
+        assert not page.is_stale()
+
+    def test_patches_rows_in_place(self, qtbot, repo):
+        pid = repo.create_part(Part(part_number="LR-1", quantity=1))
+        page = InventoryPage(repo)
+        qtbot.addWidget(page)
+        page.show()
+        relay = DomainEventRelay(repo.events)
+        relay.events_ready.connect(page.on_domain_events)
+
+        part = repo.get_part_by_id(pid)
+        part.quantity = 42
+        repo.update_part(part)
+        qtbot.waitUntil(lambda: page.table.item(0, 2).text() == "42")
+        # The patch covered the change, so no reload is needed
+        assert not page.is_stale()
+        relay.close()
+
+    def test_unpublished_changes_mark_stale(self, qtbot, repo):
+        repo.create_part(Part(part_number="LR-1", quantity=1))
+        page = InventoryPage(repo)
+        qtbot.addWidget(page)
+        repo.db.execute("UPDATE parts SET quantity = 5")
+        assert page.is_stale()
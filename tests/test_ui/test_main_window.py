@@ -209,6 +209,21 @@ class TestMainWindow:
         qtbot.addWidget(win)
         assert win.bg_agents_page is not None
 
+    def test_sync_status_in_status_bar(
+        self, qtbot, db_and_repo, admin_for_main
+    ):
+        """Sync status shows in the status bar; disabled sync never runs."""
+        from unittest.mock import patch
+
+        from wired_part.config import Config
+        from wired_part.ui.main_window import MainWindow
+        db, _ = db_and_repo
+        with patch.object(Config, "SYNC_ENABLED", False):
+            win = MainWindow(db, current_user=admin_for_main)
+        qtbot.addWidget(win)
+        assert win.sync_status_label.text() == "Sync: off"
+        assert not win.sync_service.enabled
+
 
 class TestLoginDialog:
     def test_creates_without_crash(self, qtbot, db_and_repo):
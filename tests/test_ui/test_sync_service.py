@@ -0,0 +1,264 @@
+"""pytest-qt tests for the background sync worker and scheduler."""
+
+import shutil
+import time
+from unittest.mock import patch
+
+import pytest
+from PySide6.QtCore import Qt
+
+from wired_part.config import Config
+from wired_part.database.connection import DatabaseConnection
+from wired_part.database.schema import initialize_database
+from wired_part.sync.sync_manager import SyncManager
+from wired_part.sync.transport import SyncServerError
+from wired_part.ui.sync_service import SyncService, SyncWorker
+from wired_part.utils.constants import (
+    SYNC_IDLE_MIN_GAP,
+    SYNC_IDLE_SECONDS,
+    SYNC_RETRY_INITIAL,
+)
+
+
+def _config(folder, device_id="office"):
+    """Patch Config for a sync against *folder* as *device_id*."""
+    patches = [
+        patch.object(Config, "SYNC_ENABLED", True),
+        patch.object(Config, "SYNC_FOLDER_PATH", str(folder)),
+        patch.object(Config, "LAST_SYNC_TIMESTAMP", ""),
+        patch.object(Config, "DEVICE_ID", device_id),
+        patch.object(Config, "get_device_id", return_value=device_id),
+        patch.object(Config, "update_last_sync"),
+    ]
+    for p in patches:
+        p.start()
+    return patches
+
+
+@pytest.fixture
+def template_db(tmp_path):
+    """Seed data shared by every device, so only suppliers differ."""
+    db = DatabaseConnection(str(tmp_path / "template.db"))
+    initialize_database(db)
+    return db.db_path
+
+
+@pytest.fixture
+def sync_folder(tmp_path, template_db):
+    """A sync folder holding exports from three trucks."""
+    folder = tmp_path / "sync"
+    folder.mkdir()
+    for n in (1, 2, 3):
+        shutil.copy(template_db, tmp_path / f"truck-{n}.db")
+        db = DatabaseConnection(str(tmp_path / f"truck-{n}.db"))
+        with db.get_connection() as conn:
+            conn.execute(
+                "INSERT INTO suppliers (id, name) VALUES (?, ?)",
+                (1000 * n, f"From truck-{n}"),
+            )
+        patches = _config(folder, f"truck-{n}")
+        try:
+            SyncManager(db).export_to_sync_folder()
+        finally:
+            for p in patches:
+                p.stop()
+    return folder
+
+
+@pytest.fixture
+def office_db(tmp_path, template_db):
+    shutil.copy(template_db, tmp_path / "office.db")
+    return DatabaseConnection(str(tmp_path / "office.db"))
+
+
+@pytest.fixture
+def synced_config(sync_folder):
+    patches = _config(sync_folder)
+    yield sync_folder
+    for p in patches:
+        p.stop()
+
+
+@pytest.fixture
+def service(qtbot, office_db):
+    svc = SyncService(office_db.db_path)
+    yield svc
+    svc.stop()
+
+
+class TestSyncWorker:
+    def test_merges_off_the_gui_thread(self, qtbot, office_db, synced_config):
+        worker = SyncWorker(office_db.db_path)
+        worker.TABLE_PROGRESS_INTERVAL = 0
+        files, tables = [], []
+        worker.progress.connect(lambda *args: files.append(args))
+        worker.table_progress.connect(lambda *args: tables.append(args))
+        with qtbot.waitSignal(worker.completed, timeout=30_000) as blocker:
+            worker.start()
+        worker.wait()
+        assert blocker.args == [{"suppliers": 3}]
+        assert files[0] == (0, 3, "")
+        assert files[-1] == (3, 3, "truck-3")
+        assert ("truck-1", "suppliers", 1) in tables
+
+    def test_cancel_stops_between_files(
+        self, qtbot, office_db, synced_config,
+    ):
+        worker = SyncWorker(office_db.db_path)
+
+        def cancel_after_first(done, total, device_id):
+            if done:
+                worker.requestInterruption()
+
+        # Direct: runs on the worker thread as soon as a file is merged
+        worker.progress.connect(
+            cancel_after_first, Qt.ConnectionType.DirectConnection,
+        )
+        with qtbot.waitSignal(worker.cancelled, timeout=30_000):
+            worker.start()
+        worker.wait()
+        names = {
+            r["name"] for r in office_db.execute("SELECT name FROM suppliers")
+        }
+        assert "From truck-1" in names
+        assert "From truck-3" not in names
+
+    def test_missing_folder_is_reported_unavailable(
+        self, qtbot, office_db, tmp_path,
+    ):
+        patches = _config(tmp_path / "offline")
+        try:
+            worker = SyncWorker(office_db.db_path)
+            with qtbot.waitSignal(worker.unavailable, timeout=30_000):
+                worker.start()
+            worker.wait()
+        finally:
+            for p in patches:
+                p.stop()
+
+    @pytest.mark.parametrize("status, signal", [
+        (409, "unavailable"), (503, "unavailable"), (401, "failed"),
+    ])
+    def test_server_errors(self, qtbot, office_db, status, signal):
+        worker = SyncWorker(office_db.db_path, mode="server")
+        error = SyncServerError(status, "nope")
+        with patch.object(SyncManager, "sync_server", side_effect=error):
+            with qtbot.waitSignal(getattr(worker, signal), timeout=30_000):
+                worker.start()
+            worker.wait()
+
+    def test_rejects_unknown_mode(self, office_db):
+        with pytest.raises(ValueError):
+            SyncWorker(office_db.db_path, mode="bogus")
+
+
+class TestSyncService:
+    def test_sync_now_updates_status(self, qtbot, service, synced_config):
+        statuses = []
+        service.status_changed.connect(statuses.append)
+        with qtbot.waitSignal(service.sync_finished, timeout=30_000) as b:
+            assert service.sync_now()
+        qtbot.waitUntil(lambda: not service.is_running)
+        assert "Sync: 3/3 files" in statuses
+        assert b.args == [{"suppliers": 3}]
+        assert service.status.startswith("Sync: merged 3 rows")
+
+    def test_one_sync_at_a_time(self, qtbot, service, synced_config):
+        with qtbot.waitSignal(service.sync_finished, timeout=30_000):
+            assert service.sync_now()
+            assert not service.sync_now()
+        qtbot.waitUntil(lambda: not service.is_running)
+
+    def test_uses_sync_server_when_configured(
+        self, qtbot, service, tmp_path,
+    ):
+        from wired_part.sync.syncd import SyncServer
+        server = SyncServer(tmp_path / "syncd", port=0).start()
+        patches = _config(tmp_path / "no-folder")
+        try:
+            with patch.object(Config, "SYNC_SERVER_URL", server.url):
+                with qtbot.waitSignal(service.sync_finished, timeout=30_000):
+                    service.sync_now()
+                qtbot.waitUntil(lambda: not service.is_running)
+        finally:
+            for p in patches:
+                p.stop()
+            server.stop()
+        assert "office" in server.store.status()["devices"]
+
+    def test_disabled_does_not_sync(self, service):
+        with patch.object(Config, "SYNC_ENABLED", False):
+            assert not service.sync_now()
+        assert service.status == "Sync: off"
+
+    def test_unavailable_folder_backs_off(self, qtbot, service, tmp_path):
+        patches = _config(tmp_path / "offline")
+        try:
+            service.start()
+            for expected in (SYNC_RETRY_INITIAL, SYNC_RETRY_INITIAL * 2):
+                with qtbot.waitSignal(service.sync_failed, timeout=30_000):
+                    service.sync_now()
+                qtbot.waitUntil(lambda: not service.is_running)
+                assert service.retry_seconds == expected
+            assert "unavailable" in service.status
+        finally:
+            for p in patches:
+                p.stop()
+
+    def test_success_resets_backoff(self, qtbot, service, tmp_path,
+                                    sync_folder):
+        service.start()
+        patches = _config(tmp_path / "offline")
+        try:
+            with qtbot.waitSignal(service.sync_failed, timeout=30_000):
+                service.sync_now()
+            qtbot.waitUntil(lambda: not service.is_running)
+        finally:
+            for p in patches:
+                p.stop()
+        patches = _config(sync_folder)
+        try:
+            with qtbot.waitSignal(service.sync_finished, timeout=30_000):
+                service.sync_now()
+            qtbot.waitUntil(lambda: not service.is_running)
+        finally:
+            for p in patches:
+                p.stop()
+        assert service.retry_seconds == 0
+
+    def test_idle_triggers_sync(self, qtbot, service, synced_config):
+        service._check_idle()
+        assert not service.is_running  # User just active
+        now = time.monotonic()
+        service._last_input = now - SYNC_IDLE_SECONDS
+        service._last_run = now - SYNC_IDLE_MIN_GAP * 60
+        with qtbot.waitSignal(service.sync_finished, timeout=30_000):
+            service._check_idle()
+            assert service.is_running
+        qtbot.waitUntil(lambda: not service.is_running)
+        service._last_input = now - SYNC_IDLE_SECONDS
+        service._check_idle()
+        assert not service.is_running  # Synced too recently
+
+    def test_stop_cancels_running_sync(self, qtbot, service, synced_config):
+        service.start()
+        service.sync_now()
+        service.stop()
+        assert not service.enabled
+        qtbot.waitUntil(lambda: not service.is_running)
+
+    def test_stop_does_not_block_on_a_slow_sync(
+        self, qtbot, service, synced_config,
+    ):
+        def slow_sync(mgr):
+            while True:
+                mgr._check_cancelled()
+                time.sleep(0.05)
+
+        with patch.object(SyncManager, "sync", slow_sync):
+            service.start()
+            service.sync_now()
+            with qtbot.waitSignal(service.stopped, timeout=30_000):
+                assert not service.stop(timeout_ms=0)
+        assert not service.is_running
+        assert service.status == "Sync: cancelled"
@@ -51,6 +51,24 @@ class TestNotebookWidget:
         # Should have at least the default sections
         assert w.sections_list.count() >= 1
 
+    def test_pages_come_from_tree_cache(
+        self, qtbot, repo, sample_job, admin_user
+    ):
+        from wired_part.database.models import NotebookPage
+        from wired_part.ui.widgets.notebook_widget import NotebookWidget
+        nb = repo.get_or_create_notebook(sample_job.id)
+        sid = repo.get_sections(nb.id)[0].id
+        repo.create_page(NotebookPage(
+            section_id=sid, title="Cached", content="<p>x</p>",
+        ))
+        w = NotebookWidget(
+            repo, job_id=sample_job.id, user_id=admin_user.id,
+        )
+        qtbot.addWidget(w)
+        assert w.pages_list.count() == 1
+        assert w.pages_list.item(0).text() == "Cached"
+        assert sid in w._pages_by_section
+
 
 # ── Search Dialog ─────────────────────────────────────────────
 